@@ -30,6 +30,7 @@ from InvenTree import helpers, ready
 from InvenTree.auth_overrides import registration_enabled
 from InvenTree.mixins import ListCreateAPI
 from InvenTree.sso import sso_registration_enabled
+from order.totals import deferred_total_price
 from plugin.serializers import MetadataSerializer
 from users.models import ApiToken
 from users.permissions import check_user_permission, prefetch_rule_sets
@@ -520,7 +521,8 @@ class BulkCreateMixin:
                 if has_unique_errors:
                     raise ValidationError(unique_errors)
 
-            with transaction.atomic():
+            # Dependent totals (e.g. order total price) are recalculated once on commit
+            with transaction.atomic(), deferred_total_price():
                 for item in data:
                     serializer = self.get_serializer(data=item)
                     if serializer.is_valid():
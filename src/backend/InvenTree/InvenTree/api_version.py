@@ -1,11 +1,47 @@
 """InvenTree API version information."""
 
 # InvenTree API version
-INVENTREE_API_VERSION = 443
+INVENTREE_API_VERSION = 454
 """Increment this API version number whenever there is a significant change to the API that any clients need to know about."""
 
 INVENTREE_API_TEXT = """
 
+v454 -> 2026-10-17
+    - Adds the "lead_time" field to the Part API endpoint
+    - Adds the /api/part/requirement/ endpoint for time-phased material requirements
+    - Adds the /api/part/requirement/run/ endpoint to start a material planning run
+
+v453 -> 2026-10-17
+    - Adds API endpoint for reserving one or more new reference values for a given model type
+
+v452 -> 2026-10-17
+    - Adds API endpoint for completing multiple SalesOrderShipment objects at once
+
+v451 -> 2026-10-17
+    - Adds "tests_passed" filter to the StockItem API endpoint
+
+v450 -> 2026-10-17
+    - Stock tracking API endpoints return archived stock tracking entries
+    - "tracking_items" field of the StockItem API endpoint includes archived stock tracking entries
+
+v449 -> 2026-10-17
+    - Adds "groups" field to the stock merge API endpoint, allowing multiple groups of stock items to be merged in a single request
+
+v448 -> 2026-10-17
+    - Adds "copy_history" field to the stock item serialize API endpoint
+
+v447 -> 2026-10-17
+    - Adds "strategy" field to the build order auto-allocation API endpoint
+
+v446 -> 2026-10-17
+    - Adds optional "can_build" field (and ordering option) to the Part list API endpoint
+
+v445 -> 2026-10-17
+    - Adds /api/bom/exploded/ endpoint for the flattened (multi-level) BOM of assemblies
+
+v444 -> 2026-10-17
+    - Adds "pricing_queue" field to the background task overview API endpoint
+
 v443 -> 2026-01-21 : https://github.com/inventree/InvenTree/pull/11177
     - Adds IPN ordering option for BomItem API endpoint
     - Adds IPN ordering option for BuildLine API endpoint
@@ -0,0 +1,134 @@
+"""Per-transaction work queues, which are processed when the current transaction is committed.
+
+Many model changes (e.g. stock adjustments, BOM edits) require some follow-up work,
+such as offloading a background task. Rather than registering a callback for every change,
+the affected items are collected in a CommitQueue and processed together on commit:
+
+- A single callback is registered for each (nested) atomic block in which items are added
+- If an atomic block is rolled back, its callback (and the items added within it) are discarded
+- Processing is idempotent - the first callback to run processes all pending items
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+from django.db import transaction
+
+
+class _Batch:
+    """Items added to a CommitQueue within a single atomic block.
+
+    The batch is only referenced (strongly) by the on_commit callback list of the connection.
+    If the atomic block is rolled back, the callback is discarded and the batch is released.
+    """
+
+    def __init__(self, queue: CommitQueue):
+        """Initialize an empty batch for the provided queue."""
+        self.queue = queue
+        self.items: set = set()
+        self.done = False
+
+    def __call__(self):
+        """Process the pending items, when the transaction is committed."""
+        self.queue.flush()
+
+
+class CommitQueue:
+    """A per-thread queue of items, which are processed when the current transaction is committed.
+
+    Usage:
+        queue = CommitQueue(lambda part_ids: offload_task(check_parts, sorted(part_ids)))
+
+        queue.add([part.pk for part in parts])
+    """
+
+    def __init__(self, process: Callable[[set], Any]):
+        """Initialize the queue.
+
+        Arguments:
+            process: Function which is called with the set of pending items on commit
+        """
+        self.process = process
+        self._local = threading.local()
+
+    def _batches(self) -> dict[Optional[str], weakref.ref]:
+        """Return the {savepoint: batch} map for the current thread."""
+        if not hasattr(self._local, 'batches'):
+            self._local.batches = {}
+
+        return self._local.batches
+
+    def _live_batches(self) -> list[_Batch]:
+        """Return the batches which are still waiting to be processed.
+
+        Batches which have been discarded (i.e. rolled back) are removed.
+        """
+        batches = self._batches()
+        live = []
+
+        for key, ref in list(batches.items()):
+            batch = ref()
+
+            if batch is None or batch.done:
+                del batches[key]
+            else:
+                live.append(batch)
+
+        return live
+
+    def add(self, items: Iterable):
+        """Add the provided items to the queue, to be processed when the current transaction is committed.
+
+        Any None values are ignored.
+        """
+        items = {item for item in items if item is not None}
+
+        if not items:
+            return
+
+        self._live_batches()
+
+        # Items are tracked separately for each savepoint,
+        # so that a rolled back savepoint discards only its own items
+        connection = transaction.get_connection()
+        savepoint = connection.savepoint_ids[-1] if connection.savepoint_ids else None
+
+        batches = self._batches()
+
+        if ref := batches.get(savepoint):
+            ref().items.update(items)
+            return
+
+        batch = _Batch(self)
+        batch.items.update(items)
+        batches[savepoint] = weakref.ref(batch)
+
+        # Note: If there is no active transaction, the batch is processed immediately
+        transaction.on_commit(batch)
+
+    def pending(self) -> set:
+        """Return the set of items which are waiting to be processed."""
+        items = set()
+
+        for batch in self._live_batches():
+            items.update(batch.items)
+
+        return items
+
+    def flush(self):
+        """Process all pending items immediately."""
+        batches = self._live_batches()
+        items = set()
+
+        for batch in batches:
+            items.update(batch.items)
+            batch.done = True
+
+        self._batches().clear()
+
+        if items:
+            self.process(items)
@@ -8,6 +8,7 @@ import json
 import os.path
 import re
 from decimal import Decimal, InvalidOperation
+from itertools import islice
 from typing import Optional, TypeVar
 from wsgiref.util import FileWrapper
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -459,6 +460,20 @@ def decimal2money(d, currency=None):
     return Money(d, currency)
 
 
+def chunked(items, size: int):
+    """Split an iterable into lists of at most 'size' items.
+
+    The iterable is consumed lazily, so that generators can be processed in batches.
+
+    Yields:
+        Lists of items, in the original order
+    """
+    iterator = iter(items)
+
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
 def WrapWithQuotes(text, quote='"'):
     """Wrap the supplied text with quotes.
 
@@ -566,6 +581,29 @@ def increment_serial_number(serial, part=None):
     return increment(serial)
 
 
+# Maximum integer value of a serial number (as allowed in the database schema)
+SERIAL_INT_MAX = 0x7FFFFFFF
+
+
+def integer_serial(serial) -> Optional[int]:
+    """Return the integer value of a serial number, if it is a "plain" integer.
+
+    A plain integer serial number is a positive integer without leading zeros
+    (e.g. '123'), which can be converted to and from an integer value without loss.
+
+    Returns:
+        The integer value of the serial number, or None
+    """
+    serial = str(serial).strip() if serial is not None else ''
+
+    if not re.fullmatch(r'[1-9][0-9]*', serial):
+        return None
+
+    value = int(serial)
+
+    return value if value <= SERIAL_INT_MAX else None
+
+
 def extract_serial_numbers(
     input_string, expected_quantity: int, starting_value=None, part=None
 ):
@@ -608,6 +646,12 @@ def extract_serial_numbers(
 
     next_value = increment_serial_number(starting_value, part=part)
 
+    # Without any custom plugins, sequences of integer serial numbers can be
+    # validated arithmetically (without incrementing through each value)
+    from plugin import PluginMixinEnum, registry
+
+    integer_ranges = len(registry.with_mixin(PluginMixinEnum.VALIDATION)) == 0
+
     # Substitute ~ character with latest value
     while '~' in input_string and next_value:
         input_string = input_string.replace('~', str(next_value), 1)
@@ -619,6 +663,9 @@ def extract_serial_numbers(
     serials = []
     errors = []
 
+    # Set of serials (for duplicate checks)
+    unique_serials = set()
+
     def add_error(error: str):
         """Helper function for adding an error message."""
         if error not in errors:
@@ -632,10 +679,11 @@ def extract_serial_numbers(
         if len(serial) == 0:
             return
 
-        if serial in serials:
+        if serial in unique_serials:
             add_error(_('Duplicate serial') + f': {serial}')
         else:
             serials.append(serial)
+            unique_serials.add(serial)
 
     # If the user has supplied the correct number of serials, do not split into groups
     if len(groups) == expected_quantity:
@@ -668,6 +716,24 @@ def extract_serial_numbers(
                     add_error(_(f'Invalid group: {group}'))
                     continue
 
+                a_int = integer_serial(a)
+                b_int = integer_serial(b)
+
+                if integer_ranges and a_int is not None and b_int is not None:
+                    if a_int > b_int:
+                        add_error(_(f'Invalid group: {group}'))
+                    elif b_int - a_int + 1 > remaining:
+                        add_error(
+                            _(
+                                f'Group range {group} exceeds allowed quantity ({expected_quantity})'
+                            )
+                        )
+                    else:
+                        for value in range(a_int, b_int + 1):
+                            add_serial(str(value))
+
+                    continue
+
                 group_items = []
 
                 count = 0
@@ -736,6 +802,15 @@ def extract_serial_numbers(
                     add_error(_(f'Invalid group: {group}'))
                     continue
 
+            if sequence_count > max(0, expected_quantity - len(serials)):
+                # More than the allowed number of items
+                add_error(
+                    _(
+                        f'Group range {group} exceeds allowed quantity ({expected_quantity})'
+                    )
+                )
+                continue
+
             value = items[0]
 
             # Keep incrementing up to the specified quantity
@@ -14,10 +14,10 @@ from django.utils.translation import gettext_lazy as _
 import requests
 import requests.exceptions
 import structlog
-from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 from PIL import Image
 
+from common.currency import convert_money
 from common.notifications import (
     InvenTreeNotificationBodies,
     NotificationBody,
@@ -0,0 +1,50 @@
+"""Custom management command to generate stock history entries.
+
+- Performs the same function as the scheduled stocktake task
+- The batch size can be adjusted for very large databases
+"""
+
+import argparse
+
+from django.core.management.base import BaseCommand
+
+import structlog
+
+logger = structlog.get_logger('inventree')
+
+
+class Command(BaseCommand):
+    """Generate stock history entries for all active parts."""
+
+    def add_arguments(self, parser):
+        """Add custom arguments for this command."""
+        from part.stocktake import STOCKTAKE_CHUNK_SIZE
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=STOCKTAKE_CHUNK_SIZE,
+            help='Number of parts to process in each batch',
+        )
+
+        parser.add_argument(
+            '--incremental',
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help='Only recalculate parts which have changed since their previous entry (defaults to the STOCKTAKE_INCREMENTAL setting)',
+        )
+
+    def handle(self, *args, **kwargs):
+        """Generate stock history entries for all active parts."""
+        from part.stocktake import perform_stocktake
+
+        def progress(processed: int, total: int):
+            self.stdout.write(f'Processed {processed} / {total} parts')
+
+        created = perform_stocktake(
+            chunk_size=kwargs['chunk_size'],
+            progress=progress,
+            incremental=kwargs['incremental'],
+        )
+
+        logger.info('Created %s stock history entries', created)
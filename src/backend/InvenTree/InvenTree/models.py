@@ -13,6 +13,7 @@ from django.db import models, transaction
 from django.db.models import QuerySet
 from django.db.models.signals import post_save
 from django.db.transaction import TransactionManagementError
+from django.db.utils import OperationalError, ProgrammingError
 from django.dispatch import receiver
 from django.urls import resolve, reverse
 from django.urls.exceptions import NoReverseMatch
@@ -237,6 +238,18 @@ class MetadataMixin(models.Model):
             self.save()
 
 
+class ReferenceFormatter(Formatter):
+    """String formatter for reference patterns, which supports the wildcard-with-default syntax {?:default}."""
+
+    # Based on https://stackoverflow.com/a/57570269/14488558
+    def format_field(self, value, format_spec):
+        """Replace a wildcard value with the provided default."""
+        if isinstance(value, str) and value == '?':
+            value = format_spec
+            format_spec = ''
+        return super().format_field(value, format_spec)
+
+
 class ReferenceIndexingMixin(models.Model):
     """A mixin for keeping track of numerical copies of the "reference" field.
 
@@ -261,6 +274,17 @@ class ReferenceIndexingMixin(models.Model):
 
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Record the stored reference number when an instance is loaded from the database.
+
+        This allows the reference sequence to be left untouched when the reference is not changed.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._stored_reference_int = instance.__dict__.get('reference_int')
+
+        return instance
+
     @classmethod
     def get_reference_pattern(cls):
         """Returns the reference pattern associated with this model.
@@ -299,8 +323,18 @@ class ReferenceIndexingMixin(models.Model):
 
     @classmethod
     def get_next_reference(cls):
-        """Return the next available reference value for this particular class."""
-        # Find the "most recent" item
+        """Return the next available reference value for this particular class.
+
+        The next reference is read from the reference sequence for this model,
+        which tracks the highest reference number issued (see common.sequence).
+        """
+        import common.sequence
+
+        if value := common.sequence.current_value(cls):
+            return value + 1
+
+        # No numeric references have been issued (or the sequence is not available)
+        # - fall back to the "most recent" item
         latest = cls.get_most_recent_item()
 
         if not latest:
@@ -328,17 +362,21 @@ class ReferenceIndexingMixin(models.Model):
         return incremented
 
     @classmethod
-    def generate_reference(cls):
-        """Generate the next 'reference' field based on specified pattern."""
+    def format_reference(cls, ref, ctx: Optional[dict] = None) -> str:
+        """Format the provided 'ref' value using the reference pattern for this model.
+
+        Arguments:
+            ref: The reference value (e.g. an integer) to format
+            ctx: Optional context data (defaults to get_reference_context)
+        """
+        ctx = dict(ctx or cls.get_reference_context())
+        ctx['ref'] = ref
 
-        # Based on https://stackoverflow.com/a/57570269/14488558
-        class ReferenceFormatter(Formatter):
-            def format_field(self, value, format_spec):
-                if isinstance(value, str) and value == '?':
-                    value = format_spec
-                    format_spec = ''
-                return super().format_field(value, format_spec)
+        return ReferenceFormatter().format(cls.get_reference_pattern(), **ctx)
 
+    @classmethod
+    def generate_reference(cls):
+        """Generate the next 'reference' field based on specified pattern."""
         ref_ptn = cls.get_reference_pattern()
         ctx = cls.get_reference_context()
         fmt = ReferenceFormatter()
@@ -373,6 +411,52 @@ class ReferenceIndexingMixin(models.Model):
 
         return reference
 
+    @classmethod
+    def reserve_references(cls, count: int = 1) -> list[str]:
+        """Reserve a block of new 'reference' values for this model.
+
+        The reference numbers are allocated atomically, so that concurrent callers
+        (e.g. multiple API clients creating orders) never receive the same reference.
+        Reserved references are not issued again (even if they are not used).
+
+        Arguments:
+            count: The number of references to reserve
+
+        Returns:
+            A list of formatted reference values
+        """
+        import common.sequence
+
+        ctx = cls.get_reference_context()
+
+        return [
+            cls.format_reference(ref, ctx)
+            for ref in common.sequence.reserve_sequence(cls, count)
+        ]
+
+    @classmethod
+    def reserve_reference(cls) -> str:
+        """Atomically issue the next 'reference' value for a new instance of this model.
+
+        Unlike generate_reference (which only suggests the next reference),
+        concurrent callers are never issued the same reference.
+        The reference may be reused if the new instance is deleted.
+        """
+        import common.sequence
+
+        try:
+            (ref,) = common.sequence.reserve_sequence(cls, 1, hold=False)
+        except (OperationalError, ProgrammingError):
+            # The sequence table is not available - fall back to the suggested reference
+            return cls.generate_reference()
+
+        return cls.format_reference(ref)
+
+    def assign_reference(self):
+        """Issue a new reference to this instance, if it is being created without one."""
+        if self._state.adding and not str(self.reference or '').strip():
+            self.reference = self.reserve_reference()
+
     @classmethod
     def validate_reference_pattern(cls, pattern):
         """Ensure that the provided pattern is valid."""
@@ -903,10 +987,12 @@ class InvenTreeTree(ContentTypeMixin, MPTTModel):
         trees = set()
 
         parent = getattr(self, self.NODE_PARENT_KEY, None)
+        moved = False
 
         if db_instance:
             # If the tree_id or parent has changed, we need to rebuild the tree
             if getattr(db_instance, self.NODE_PARENT_KEY) != parent:
+                moved = True
                 trees.add(db_instance.tree_id)
             if db_instance.tree_id != self.tree_id:
                 trees.add(self.tree_id)
@@ -931,6 +1017,18 @@ class InvenTreeTree(ContentTypeMixin, MPTTModel):
                 InvenTree.sentry.report_exception(e)
                 InvenTree.exceptions.log_error(f'{self.__class__.__name__}.save')
 
+        if moved:
+            self.handle_tree_move(getattr(db_instance, self.NODE_PARENT_KEY))
+
+    def handle_tree_move(self, previous_parent):
+        """Called after this node has been moved to a different parent node.
+
+        The default implementation does nothing.
+
+        Arguments:
+            previous_parent: The parent node before the move (or None)
+        """
+
     def partial_rebuild(self, tree_id: int) -> bool:
         """Perform a partial rebuild of the tree structure.
 
@@ -995,6 +1093,10 @@ class InvenTreeTree(ContentTypeMixin, MPTTModel):
             return 1
 
 
+# Maximum number of nodes to reference in a single pathstring query
+PATHSTRING_CHUNK_SIZE = 1000
+
+
 class PathStringMixin(models.Model):
     """Mixin class for adding a 'pathstring' field to a model class.
 
@@ -1102,21 +1204,54 @@ class PathStringMixin(models.Model):
         """Rebuild the pathstring for lower nodes in the tree.
 
         - This is used when the pathstring for this node is updated, and we need to update all lower nodes.
-        - We use a bulk-update to update the pathstring for all lower nodes in the tree.
+        - The lower nodes are processed in tree order, so the path of each node is built from the path of its parent.
+        - Ancestors outside the provided set of nodes are only fetched once for each subtree.
+        - Modified nodes are written back with batched bulk-update operations.
         """
-        nodes = self.__class__.objects.filter(pk__in=lower_nodes)
+        model = self.__class__
+
+        nodes = []
+
+        for chunk in InvenTree.helpers.chunked(lower_nodes, PATHSTRING_CHUNK_SIZE):
+            nodes.extend(
+                model.objects.filter(pk__in=chunk).values_list(
+                    'pk', 'parent', self.PATH_FIELD, 'pathstring', 'tree_id', 'lft'
+                )
+            )
+
+        # Parent nodes are always processed before their children
+        nodes.sort(key=lambda node: (node[4], node[5]))
+
+        # Map of {pk: [path]} for each processed node
+        paths = {}
+
+        updates = []
+
+        for pk, parent, name, pathstring, _tree, _lft in nodes:
+            if parent is None:
+                path = []
+            elif parent in paths:
+                path = paths[parent]
+            else:
+                # The parent node is outside the set of lower nodes
+                path = paths[parent] = [
+                    getattr(item, self.PATH_FIELD, item.pk)
+                    for item in model.objects.get(pk=parent).path
+                ]
+
+            path = paths[pk] = [*path, name]
 
-        nodes_to_update = []
+            new_path = InvenTree.helpers.constructPathString(path)
 
-        for node in nodes:
-            new_path = node.construct_pathstring()
+            if new_path != pathstring:
+                updates.append(model(pk=pk, pathstring=new_path))
 
-            if new_path != node.pathstring:
-                node.pathstring = new_path
-                nodes_to_update.append(node)
+            if len(updates) >= PATHSTRING_CHUNK_SIZE:
+                model.objects.bulk_update(updates, ['pathstring'])
+                updates = []
 
-        if len(nodes_to_update) > 0:
-            self.__class__.objects.bulk_update(nodes_to_update, ['pathstring'])
+        if len(updates) > 0:
+            model.objects.bulk_update(updates, ['pathstring'])
 
     def construct_pathstring(self, refresh: bool = False) -> str:
         """Construct the pathstring for this tree node.
@@ -590,7 +590,11 @@ def update_exchange_rates(force: bool = False):
     try:
         from djmoney.contrib.exchange.models import Rate
 
-        from common.currency import currency_code_default, currency_codes
+        from common.currency import (
+            clear_exchange_rate_matrix,
+            currency_code_default,
+            currency_codes,
+        )
         from InvenTree.exchange import InvenTreeExchange
     except AppRegistryNotReady:  # pragma: no cover
         # Apps not yet loaded!
@@ -621,6 +625,14 @@ def update_exchange_rates(force: bool = False):
             currency__in=currency_codes()
         ).delete()
 
+        # Rates are bulk-created (no signals), so invalidate the cached matrix here
+        clear_exchange_rate_matrix()
+
+        # Order totals are maintained incrementally, at the rates which applied at the time
+        offload_task(
+            'order.tasks.reconcile_total_prices', force_async=True, group='order'
+        )
+
         # Record successful task execution
         record_task_success('update_exchange_rates')
 
@@ -13,11 +13,13 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import mail
 from django.core.exceptions import ValidationError
-from django.test import TestCase, override_settings
+from django.db import transaction
+from django.test import TestCase, override_settings, tag
 from django.urls import reverse
 from django.utils import timezone
 
 import pint.errors
+import pytest
 from djmoney.contrib.exchange.exceptions import MissingRate
 from djmoney.contrib.exchange.models import Rate, convert_money
 from djmoney.money import Money
@@ -25,6 +27,7 @@ from maintenance_mode.core import get_maintenance_mode, set_maintenance_mode
 from sesame.utils import get_user
 from stdimage.models import StdImageFieldFile
 
+import common.currency
 import InvenTree.conversion
 import InvenTree.format
 import InvenTree.helpers
@@ -33,9 +36,16 @@ import InvenTree.tasks
 from common.currency import currency_codes
 from common.models import CustomUnit, InvenTreeSetting
 from common.settings import get_global_setting
+from InvenTree.commit_queue import CommitQueue
 from InvenTree.helpers_mixin import ClassProviderMixin, ClassValidationMixin
 from InvenTree.sanitizer import sanitize_svg
-from InvenTree.unit_test import InvenTreeTestCase, in_env_context
+from InvenTree.unit_test import (
+    ExchangeRateMixin,
+    InvenTreeTestCase,
+    bulk_create_nodes,
+    count_queries,
+    in_env_context,
+)
 from part.models import Part, PartCategory
 from stock.models import StockItem, StockLocation
 
@@ -899,6 +909,76 @@ class TestMPTT(TestCase):
         self.assertNotEqual(tree, drawer.tree_id)
 
 
+@tag('performance_test')
+class PathStringPerformanceTest(TestCase):
+    """Benchmark pathstring updates when a large subtree is moved."""
+
+    N_CHILDREN = 20
+    N_GRANDCHILDREN = 50
+
+    def build_tree(self, model):
+        """Construct a large tree of nodes for the provided model, returning the root node."""
+        root = model.objects.create(name='Root')
+
+        bulk_create_nodes(
+            model,
+            [model(name=f'C{idx}', parent=root) for idx in range(self.N_CHILDREN)],
+        )
+
+        bulk_create_nodes(
+            model,
+            [
+                model(name=f'G{idx}', parent=child)
+                for child in model.objects.filter(parent=root)
+                for idx in range(self.N_GRANDCHILDREN)
+            ],
+            rebuild=True,
+        )
+
+        root.refresh_from_db()
+        root.rebuild_lower_nodes(
+            list(root.get_descendants().values_list('pk', flat=True))
+        )
+
+        return root
+
+    def move_tree(self, model):
+        """Move the root of a large tree, and check that the pathstrings are updated."""
+        root = self.build_tree(model)
+        top = model.objects.create(name='Top')
+
+        N = root.get_descendant_count()
+        self.assertEqual(N, self.N_CHILDREN * (self.N_GRANDCHILDREN + 1))
+
+        root.parent = top
+
+        with count_queries(f'Move {model.__name__} tree ({N} nodes)', threshold=1):
+            root.save()
+
+        node = model.objects.get(name='G0', parent__name='C0')
+        self.assertEqual(node.pathstring, 'Top/Root/C0/G0')
+
+        self.assertFalse(
+            model.objects
+            .filter(tree_id=top.tree_id)
+            .exclude(pk=top.pk)
+            .exclude(pathstring__startswith='Top/Root')
+            .exists()
+        )
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_part_category_tree(self):
+        """Benchmark moving a large PartCategory tree."""
+        self.move_tree(PartCategory)
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_stock_location_tree(self):
+        """Benchmark moving a large StockLocation tree."""
+        self.move_tree(StockLocation)
+
+
 class TestSerialNumberExtraction(TestCase):
     """Tests for serial number extraction code.
 
@@ -1013,6 +1093,15 @@ class TestSerialNumberExtraction(TestCase):
             e('1, A-2, 3+', 5, 1)
         self.assertIn('Invalid group: A-2', str(exc.exception))
 
+        # Very large ranges are rejected without expanding every value
+        with self.assertRaises(ValidationError) as exc:
+            e('1-2000000000', 10, 1)
+        self.assertIn('exceeds allowed quantity (10)', str(exc.exception))
+
+        with self.assertRaises(ValidationError) as exc:
+            e('5+2000000000', 10, 1)
+        self.assertIn('exceeds allowed quantity (10)', str(exc.exception))
+
     def test_combinations(self):
         """Test complex serial number combinations."""
         e = helpers.extract_serial_numbers
@@ -1108,7 +1197,7 @@ class TestVersionNumber(TestCase):
         self.assertEqual(d, version.inventreeCommitDate())
 
 
-class CurrencyTests(TestCase):
+class CurrencyTests(ExchangeRateMixin, TestCase):
     """Unit tests for currency / exchange rate functionality."""
 
     def test_rates(self):
@@ -1159,6 +1248,77 @@ class CurrencyTests(TestCase):
         with self.assertRaises(MissingRate):
             convert_money(Money(100, 'GBP'), 'ZWL')
 
+    def test_rate_matrix(self):
+        """Test the cached exchange rate matrix."""
+        common.currency.clear_exchange_rate_matrix()
+
+        with self.assertRaises(MissingRate):
+            common.currency.convert_money(Money(100, 'USD'), 'AUD')
+
+        # Creating the exchange rates invalidates the matrix
+        self.generate_exchange_rates()
+
+        values = [
+            Money(100, 'USD'),
+            Money(25, 'AUD'),
+            Money(Decimal('12.345'), 'CAD'),
+            Money(3, 'GBP'),
+        ]
+
+        rates = {'AUD': 1.5, 'CAD': 1.7, 'GBP': 0.9, 'USD': 1.0}
+
+        for value in values:
+            for currency, rate in rates.items():
+                result = common.currency.convert_money(value, currency)
+                expected = float(value.amount) * rate / rates[str(value.currency)]
+
+                self.assertEqual(str(result.currency), currency)
+                self.assertAlmostEqual(float(result.amount), expected, places=6)
+
+        # Conversion of many values requires no database queries
+        with self.assertNumQueries(0):
+            results = common.currency.convert_many(values * 250, target='CAD')
+
+        self.assertEqual(len(results), 1000)
+        self.assertEqual(results[0], Money(170, 'CAD'))
+        self.assertEqual(results[-1], common.currency.convert_money(values[-1], 'CAD'))
+
+        # Plain amounts with a separate list of currencies
+        results = common.currency.convert_many([10, 20], ['USD', 'GBP'], target='AUD')
+        self.assertEqual(results[0], Money(15, 'AUD'))
+        self.assertAlmostEqual(results[1].amount, Decimal(20 * 1.5 / 0.9), places=6)
+
+        with self.assertRaises(MissingRate):
+            common.currency.convert_many([Money(1, 'NZD')], target='USD')
+
+        # The shared version key is not checked for each conversion
+        with mock.patch.object(common.currency.cache, 'get') as cache_get:
+            for value in values * 10:
+                common.currency.convert_money(value, 'USD')
+
+        cache_get.assert_not_called()
+
+        # Once the check interval has passed, the version key is checked again
+        matrix = common.currency.exchange_rate_matrix()
+        matrix.checked -= common.currency.RATE_MATRIX_CHECK_INTERVAL
+
+        with mock.patch.object(
+            common.currency.cache, 'get', return_value=matrix.version
+        ) as cache_get:
+            common.currency.convert_money(values[0], 'USD')
+
+        cache_get.assert_called_once()
+        self.assertIs(common.currency.exchange_rate_matrix(), matrix)
+
+        # Updating a rate invalidates the matrix
+        rate = Rate.objects.get(currency='AUD')
+        rate.value = 2
+        rate.save()
+
+        self.assertEqual(
+            common.currency.convert_money(Money(10, 'USD'), 'AUD'), Money(20, 'AUD')
+        )
+
 
 class TestStatus(TestCase):
     """Unit tests for status functions."""
@@ -1571,6 +1731,61 @@ class TestOffloadTask(InvenTreeTestCase):
             self.assertTrue(result)
 
 
+class TestCommitQueue(TestCase):
+    """Tests for the CommitQueue helper class."""
+
+    def setUp(self):
+        """Create a queue which records the processed items."""
+        self.processed = []
+        self.queue = CommitQueue(self.processed.append)
+
+    def test_commit(self):
+        """Items added within a transaction are processed together on commit."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.queue.add([1, 2])
+            self.queue.add([2, 3, None])
+
+            with transaction.atomic():
+                self.queue.add([4])
+
+            self.assertEqual(self.queue.pending(), {1, 2, 3, 4})
+            self.assertEqual(self.processed, [])
+
+        # One callback per atomic block
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(self.processed, [{1, 2, 3, 4}])
+        self.assertEqual(self.queue.pending(), set())
+
+    def test_rollback(self):
+        """Items added within a rolled back atomic block are discarded."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.add([1])
+
+            try:
+                with transaction.atomic():
+                    self.queue.add([2])
+                    raise ValueError
+            except ValueError:
+                pass
+
+            self.assertEqual(self.queue.pending(), {1})
+
+        self.assertEqual(self.processed, [{1}])
+
+        # A rolled back transaction does not affect the next one
+        try:
+            with transaction.atomic():
+                self.queue.add([3])
+                raise ValueError
+        except ValueError:
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.add([4])
+
+        self.assertEqual(self.processed, [{1}, {4}])
+
+
 class BarcodeMixinTest(InvenTreeTestCase):
     """Tests for the InvenTreeBarcodeMixin mixin class."""
 
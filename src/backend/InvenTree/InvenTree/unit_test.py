@@ -15,17 +15,37 @@ from unittest import mock
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission, User
 from django.db import connections, models
+from django.db.models import Max
 from django.http.response import StreamingHttpResponse
 from django.test import TestCase, tag
 from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 
+import structlog
 from djmoney.contrib.exchange.models import ExchangeBackend, Rate
 from rest_framework.test import APITestCase
 
 from plugin import registry
 from plugin.models import PluginConfig
 
+logger = structlog.get_logger('inventree')
+
+
+class QueryCount:
+    """The result of a count_queries block.
+
+    Attributes:
+        count: The number of queries which were executed
+        elapsed: The time taken to execute the block (in seconds)
+        queries: The captured queries (note that the query log is limited in size)
+    """
+
+    def __init__(self):
+        """Initialize an empty query count."""
+        self.count: int = 0
+        self.elapsed: float = 0
+        self.queries: list = []
+
 
 @contextmanager
 def count_queries(
@@ -36,33 +56,75 @@ def count_queries(
 ):  # pragma: no cover
     """Helper function to count the number of queries executed.
 
+    Queries are counted as they are executed, so the count is accurate
+    even if the query log (which is limited in size) overflows.
+
     Arguments:
-        msg: Optional message to print after counting queries
+        msg: Optional message to log after counting queries
         log_to_file: If True, log the queries to a file (default = False)
         using: The database connection to use (default = 'default')
         threshold: Minimum number of queries to log (default = 10)
+
+    Yields:
+        A QueryCount object, which is populated when the block exits
     """
-    t1 = time.time()
+    result = QueryCount()
 
-    with CaptureQueriesContext(connections[using]) as context:
-        yield
+    def counter(execute, sql, params, many, context):
+        result.count += 1
+        return execute(sql, params, many, context)
+
+    t1 = time.time()
 
-    dt = time.time() - t1
+    with (
+        CaptureQueriesContext(connections[using]) as context,
+        connections[using].execute_wrapper(counter),
+    ):
+        yield result
 
-    n = len(context.captured_queries)
+    result.elapsed = time.time() - t1
+    result.queries = context.captured_queries
 
     if log_to_file:
         with open('queries.txt', 'w', encoding='utf-8') as f:
             for q in context.captured_queries:
                 f.write(str(q['sql']) + '\n\n')
 
-    output = f'Executed {n} queries in {dt:.4f}s'
+    output = f'Executed {result.count} queries in {result.elapsed:.4f}s'
 
-    if threshold and n >= threshold:
+    if threshold and result.count >= threshold:
         if msg:
-            print(f'{msg}: {output}')
+            logger.info('%s: %s', msg, output)
         else:
-            print(output)
+            logger.info(output)
+
+
+def bulk_create_nodes(model, nodes: list, rebuild: bool = False) -> list:
+    """Bulk create tree (MPTT) model instances, for generating large test datasets.
+
+    Arguments:
+        model: The tree model class (e.g. Part, StockItem, StockLocation)
+        nodes: A list of (unsaved) model instances
+        rebuild: If True, rebuild the tree structure from the 'parent' field of each node.
+            Otherwise, each node is created as the root of a new tree.
+
+    Returns:
+        The list of created model instances
+    """
+    tree_id = (model.objects.aggregate(tree_id=Max('tree_id'))['tree_id'] or 0) + 1
+
+    for idx, node in enumerate(nodes):
+        node.tree_id = tree_id + idx
+        node.level = 0
+        node.lft = 1
+        node.rght = 2
+
+    nodes = model.objects.bulk_create(nodes)
+
+    if rebuild:
+        model.objects.rebuild()
+
+    return nodes
 
 
 def addUserPermission(user: User, app_name: str, model_name: str, perm: str) -> None:
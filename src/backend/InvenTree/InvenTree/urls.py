@@ -77,6 +77,11 @@ apipatterns = [
                 stock.api.GenerateSerialNumber.as_view(),
                 name='api-generate-serial-number',
             ),
+            path(
+                'reference/',
+                common.api.GenerateReference.as_view(),
+                name='api-generate-reference',
+            ),
         ]),
     ),
     path('user/', include(users.api.user_urls)),
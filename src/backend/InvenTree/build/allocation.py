@@ -0,0 +1,458 @@
+"""Batch stock allocation for the Build app.
+
+The BuildAllocator class performs auto-allocation of stock against all
+untracked lines of a build order in a single pass:
+
+- All candidate stock (including variant and substitute parts) is loaded with a single query
+- The available quantity of each stock item is tracked in an in-memory ledger,
+  so that a stock item cannot be allocated to multiple lines beyond its available quantity
+- Candidate stock items are ordered using a (pluggable) allocation strategy
+- All new BuildItem objects are created with a single bulk_create operation
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+import structlog
+from sql_util.utils import SubquerySum
+
+from build.filters import annotate_allocated_quantity
+from InvenTree.helpers import chunked
+from part.bom import BOM_CHUNK_SIZE, PartTreeCache
+
+logger = structlog.get_logger('inventree')
+
+# Registry of available allocation strategies, keyed by name
+ALLOCATION_STRATEGIES: dict[str, tuple[str, Callable]] = {}
+
+# Default allocation strategy
+DEFAULT_ALLOCATION_STRATEGY = 'fifo'
+
+# Allocation priority for different candidate types
+PRIORITY_DIRECT = 1
+PRIORITY_VARIANT = 2
+PRIORITY_SUBSTITUTE = 3
+
+
+def register_allocation_strategy(name: str, label: str):
+    """Register a function as a stock allocation strategy.
+
+    The decorated function is called as func(allocator, candidate, required),
+    and must return a sort key for the candidate stock item (lower values are allocated first).
+
+    Arguments:
+        name: The unique name of the strategy
+        label: Human readable label for the strategy
+    """
+
+    def decorator(func):
+        ALLOCATION_STRATEGIES[name] = (label, func)
+        return func
+
+    return decorator
+
+
+def allocation_strategy_choices() -> list[tuple[str, str]]:
+    """Return a list of available allocation strategies, as (name, label) choices."""
+    return [(name, label) for name, (label, _func) in ALLOCATION_STRATEGIES.items()]
+
+
+def _updated_key(candidate: dict) -> tuple:
+    """Sort key for the 'updated' timestamp of a candidate (oldest first)."""
+    return (candidate['updated'] is None, candidate['updated'])
+
+
+@register_allocation_strategy('fifo', _('First In, First Out'))
+def fifo_strategy(allocator, candidate: dict, required: Decimal) -> tuple:
+    """Allocate the least recently updated stock items first."""
+    return _updated_key(candidate)
+
+
+@register_allocation_strategy('expiry', _('Expiry Date'))
+def expiry_strategy(allocator, candidate: dict, required: Decimal) -> tuple:
+    """Allocate stock items with the earliest expiry date first.
+
+    Stock items without an expiry date are allocated last.
+    """
+    expiry = candidate['expiry_date']
+
+    return (expiry is None, expiry, *_updated_key(candidate))
+
+
+@register_allocation_strategy('fewest_picks', _('Fewest Picks'))
+def fewest_picks_strategy(allocator, candidate: dict, required: Decimal) -> tuple:
+    """Allocate stock using the fewest number of stock items.
+
+    - The smallest stock item which can fulfil the entire requirement is preferred
+    - Otherwise, the largest stock items are allocated first
+    """
+    available = allocator.available.get(candidate['pk'], 0)
+
+    if available >= required:
+        return (0, available, *_updated_key(candidate))
+
+    return (1, -available, *_updated_key(candidate))
+
+
+@register_allocation_strategy('location', _('Same Location'))
+def location_strategy(allocator, candidate: dict, required: Decimal) -> tuple:
+    """Prefer stock items from locations which have already been allocated from."""
+    location = candidate['location']
+
+    return (
+        location is None or location not in allocator.locations,
+        *_updated_key(candidate),
+    )
+
+
+class BuildAllocator(PartTreeCache):
+    """Automatically allocate stock against the untracked lines of a build order.
+
+    Usage:
+        allocator = BuildAllocator(build, interchangeable=True)
+        allocator.allocate()
+    """
+
+    # Part fields required to determine valid parts for allocation
+    PART_FIELDS = ['pk', 'tree_id', 'lft', 'rght', 'active', 'trackable']
+
+    def __init__(self, build, **kwargs):
+        """Initialize the build allocator.
+
+        Arguments:
+            build: The Build object to allocate stock against
+
+        Keyword Arguments:
+            location: If specified, only allocate stock from this location (or sub-locations)
+            exclude_location: If specified, do not allocate stock from this location (or sub-locations)
+            interchangeable: If True, stock items in multiple locations can be used interchangeably
+            substitutes: If True, allow allocation of substitute parts
+            optional_items: If True, allocate stock against optional BOM items
+            strategy: The name of the allocation strategy (or a callable sort key function)
+        """
+        super().__init__()
+
+        self.build = build
+
+        self.location = kwargs.get('location')
+        self.exclude_location = kwargs.get('exclude_location')
+        self.interchangeable = kwargs.get('interchangeable', False)
+        self.substitutes = kwargs.get('substitutes', True)
+        self.optional_items = kwargs.get('optional_items', False)
+
+        strategy = kwargs.get('strategy') or DEFAULT_ALLOCATION_STRATEGY
+
+        if callable(strategy):
+            self.strategy = strategy
+        elif strategy in ALLOCATION_STRATEGIES:
+            self.strategy = ALLOCATION_STRATEGIES[strategy][1]
+        else:
+            raise ValueError(f"Invalid allocation strategy: '{strategy}'")
+
+        # Available (unallocated) quantity of each candidate stock item
+        self.available: dict[int, Decimal] = {}
+
+        # Candidate stock items, grouped by part ID
+        self.stock: dict[int, list[dict]] = {}
+
+        # Locations which stock has been allocated from
+        self.locations: set = set()
+
+    def get_lines(self) -> list:
+        """Return the BuildLine objects which may require auto-allocation."""
+        lines = self.build.untracked_line_items.exclude(bom_item__consumable=True)
+
+        if not self.optional_items:
+            lines = lines.exclude(bom_item__optional=True)
+
+        lines = lines.select_related('bom_item', 'bom_item__sub_part')
+
+        if self.substitutes:
+            lines = lines.prefetch_related('bom_item__substitutes')
+
+        lines = lines.annotate(allocated=annotate_allocated_quantity())
+
+        return list(lines.order_by('pk'))
+
+    def valid_parts(self, line) -> dict[int, int]:
+        """Return the parts which can be allocated against a BuildLine.
+
+        Returns:
+            A dict of {part_id: priority} for each valid part
+        """
+        bom_item = line.bom_item
+        trackable = bom_item.sub_part.trackable
+
+        parts = {bom_item.sub_part_id: PRIORITY_DIRECT}
+
+        if bom_item.allow_variants:
+            for pk in self.descendants(bom_item.sub_part_id):
+                parts.setdefault(pk, PRIORITY_VARIANT)
+
+        if self.substitutes:
+            for substitute in bom_item.substitutes.all():
+                parts.setdefault(substitute.part_id, PRIORITY_SUBSTITUTE)
+
+                if bom_item.allow_variants:
+                    for pk in self.descendants(substitute.part_id):
+                        parts.setdefault(pk, PRIORITY_SUBSTITUTE)
+
+        # Only active parts with matching trackable status are valid
+        return {
+            pk: priority
+            for pk, priority in parts.items()
+            if (part := self.parts.get(pk))
+            and part['active']
+            and part['trackable'] == trackable
+        }
+
+    def load_stock(self, part_ids: set[int]):
+        """Load all available stock items for the provided parts.
+
+        The available quantity of each stock item is recorded in the ledger.
+        """
+        from order.status_codes import SalesOrderStatusGroups
+        from stock.models import StockItem
+
+        queryset = StockItem.objects.filter(StockItem.IN_STOCK_FILTER)
+
+        # Serialized stock items cannot be auto-allocated
+        queryset = queryset.filter(Q(serial=None) | Q(serial=''))
+
+        if self.location:
+            queryset = queryset.filter(
+                location__in=self.location.get_descendants(include_self=True)
+            )
+
+        if self.exclude_location:
+            queryset = queryset.exclude(
+                location__in=self.exclude_location.get_descendants(include_self=True)
+            )
+
+        queryset = queryset.annotate(
+            build_allocated=SubquerySum('allocations__quantity'),
+            sales_allocated=SubquerySum(
+                'sales_order_allocations__quantity',
+                filter=Q(
+                    line__order__status__in=SalesOrderStatusGroups.OPEN,
+                    shipment__shipment_date=None,
+                ),
+            ),
+        )
+
+        for chunk in chunked(sorted(part_ids), BOM_CHUNK_SIZE):
+            rows = queryset.filter(part__in=chunk).values(
+                'pk',
+                'part',
+                'location',
+                'quantity',
+                'updated',
+                'expiry_date',
+                'build_allocated',
+                'sales_allocated',
+            )
+
+            for row in rows:
+                allocated = (row['build_allocated'] or 0) + (
+                    row['sales_allocated'] or 0
+                )
+
+                self.available[row['pk']] = max(row['quantity'] - allocated, 0)
+                self.stock.setdefault(row['part'], []).append(row)
+
+    def candidates(self, line, parts: dict[int, int], required: Decimal) -> list:
+        """Return the candidate stock items for a BuildLine, in allocation order.
+
+        Stock items are first sorted by priority:
+        1. Direct part matches
+        2. Variant part matches
+        3. Substitute part matches
+
+        This ensures that allocation priority is first given to "direct" parts.
+        Within each priority group, stock items are ordered by the allocation strategy.
+        """
+        items = [
+            item
+            for pk in parts
+            for item in self.stock.get(pk, [])
+            if self.available[item['pk']] > 0
+        ]
+
+        return sorted(
+            items,
+            key=lambda item: (
+                parts[item['part']],
+                *self.strategy(self, item, required),
+                item['pk'],
+            ),
+        )
+
+    def allocate(self) -> list:
+        """Allocate stock against the build order.
+
+        Returns:
+            A list of the BuildItem objects which were created
+        """
+        from build.models import BuildItem
+
+        lines = []
+
+        for line in self.get_lines():
+            required = max(line.quantity - line.consumed - line.allocated, 0)
+
+            if required > 0:
+                lines.append((line, required))
+
+        if not lines:
+            return []
+
+        # Load part tree data for all referenced parts
+        tree_parts = set()
+
+        for line, _required in lines:
+            tree_parts.add(line.bom_item.sub_part_id)
+
+            if self.substitutes:
+                tree_parts.update(
+                    sub.part_id for sub in line.bom_item.substitutes.all()
+                )
+
+        self.load_trees(tree_parts)
+
+        line_parts = {line.pk: self.valid_parts(line) for line, _required in lines}
+
+        self.load_stock(set().union(*line_parts.values()))
+
+        # Seed the set of locations with existing allocations against this build
+        self.locations.update(
+            BuildItem.objects
+            .filter(build_line__build=self.build)
+            .values_list('stock_item__location', flat=True)
+            .distinct()
+        )
+
+        new_items = []
+
+        for line, required in lines:
+            candidates = self.candidates(line, line_parts[line.pk], required)
+
+            if len(candidates) != 1 and not self.interchangeable:
+                # Stock is only allocated from a single candidate item,
+                # unless the items are "interchangeable"
+                continue
+
+            for candidate in candidates:
+                quantity = min(required, self.available[candidate['pk']])
+
+                if quantity <= 0:
+                    continue
+
+                new_items.append(
+                    BuildItem(
+                        build_line=line,
+                        stock_item_id=candidate['pk'],
+                        quantity=quantity,
+                    )
+                )
+
+                # Update the ledger
+                self.available[candidate['pk']] -= quantity
+                self.locations.add(candidate['location'])
+
+                required -= quantity
+
+                if required <= 0:
+                    # We have now fully-allocated this BuildLine - no need to continue!
+                    break
+
+        logger.info(
+            'Auto-allocating %s stock items against build %s',
+            len(new_items),
+            self.build.pk,
+        )
+
+        return BuildItem.objects.bulk_create(new_items)
+
+
+def allocate_serialized_outputs(build, outputs, valid_parts: dict[int, list[int]]):
+    """Allocate serialized stock items against new build outputs, based on serial number.
+
+    For each output and each trackable BOM item, a stock item is allocated if
+    exactly one available stock item (of a valid part) has a matching serial number.
+
+    Matching stock items for all outputs are found with a single query,
+    rather than a separate query for each (output, BOM item) combination.
+
+    Arguments:
+        build: The Build object which the outputs belong to
+        outputs: The (serialized) build outputs
+        valid_parts: A dict of {bom_item_id: [part_id, ...]} for each trackable BOM item
+
+    Returns:
+        A list of the BuildItem objects which were created
+    """
+    from build.models import BuildItem
+    from stock.models import StockItem
+    from stock.status_codes import StockStatusGroups
+
+    outputs = [output for output in outputs if output.serial]
+    part_ids = {pk for parts in valid_parts.values() for pk in parts}
+
+    if not outputs or not part_ids:
+        return []
+
+    # Find the BuildLine objects which point to each BomItem
+    lines = {
+        line.bom_item_id: line
+        for line in build.build_lines.filter(bom_item__in=valid_parts.keys())
+    }
+
+    # Note that we can accept "in production" items here
+    queryset = StockItem.objects.filter(
+        part__in=part_ids,
+        quantity=1,
+        status__in=StockStatusGroups.AVAILABLE_CODES,
+        sales_order=None,
+        belongs_to=None,
+        customer=None,
+        consumed_by=None,
+    )
+
+    # Matching stock items, keyed by serial number
+    matches: dict[str, list[tuple[int, int]]] = {}
+
+    for chunk in chunked([output.serial for output in outputs], BOM_CHUNK_SIZE):
+        for pk, part, serial in queryset.filter(serial__in=chunk).values_list(
+            'pk', 'part', 'serial'
+        ):
+            matches.setdefault(serial, []).append((pk, part))
+
+    allocations = []
+
+    for output in outputs:
+        items = matches.get(output.serial, [])
+
+        for bom_item_id, parts in valid_parts.items():
+            line = lines.get(bom_item_id)
+
+            if not line:
+                continue
+
+            available = [pk for pk, part in items if part in parts]
+
+            if len(available) == 1:
+                allocations.append(
+                    BuildItem(
+                        build_line=line,
+                        stock_item_id=available[0],
+                        quantity=1,
+                        install_into=output,
+                    )
+                )
+
+    return BuildItem.objects.bulk_create(allocations)
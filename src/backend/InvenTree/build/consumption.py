@@ -0,0 +1,336 @@
+"""Bulk stock consumption for the Build app.
+
+The BuildItemConsumption class completes many BuildItem allocations at once
+(e.g. when a build order or build output is completed):
+
+- All affected stock items are locked with a single select_for_update() query
+- Partial allocations are split from the allocated stock item in memory,
+  and the new stock items are written in bulk (see stock.split.StockItemSplit)
+- Consumed (or installed) stock items are written with a single bulk_update operation
+- Stock tracking entries are written with a single bulk_create operation
+- The consumed quantity of each BuildLine is updated with a single (batched) UPDATE
+- Background tasks (low stock notification, pricing updates) are scheduled once per part
+
+All operations are performed within a single database transaction.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+
+import structlog
+
+import InvenTree.helpers
+import stock.summary
+from common.settings import get_global_setting
+from plugin import PluginMixinEnum, registry
+from plugin.events import trigger_event
+from stock.events import StockEvents
+from stock.split import StockItemSplit
+from stock.status_codes import StockHistoryCode
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of objects to write in a single bulk operation
+CONSUMPTION_CHUNK_SIZE = 500
+
+# Fields which may be modified when stock is consumed
+CONSUMPTION_FIELDS = [
+    'quantity',
+    'location',
+    'consumed_by',
+    'belongs_to',
+    'rght',
+    'updated',
+]
+
+
+class BuildItemConsumption:
+    """Complete multiple BuildItem allocations in bulk.
+
+    For each BuildItem allocation:
+
+    - If less than the allocated stock item quantity is consumed, the stock item is split
+    - If the part is trackable, the stock item is *installed* into the build output
+    - Otherwise, the stock item is *consumed* by the build order
+    - The allocated quantity is reduced (and the BuildItem deleted once fully consumed)
+
+    Usage:
+        BuildItemConsumption(build_items, user, notes='Consumed').run()
+    """
+
+    def __init__(
+        self,
+        build_items,
+        user: User | None = None,
+        notes: str = '',
+        quantities: dict[int, Decimal] | None = None,
+    ):
+        """Initialize the stock consumption operation.
+
+        Arguments:
+            build_items: List (or queryset) of BuildItem objects to complete
+            user: The user completing the allocations
+            notes: Optional notes for the generated tracking entries
+            quantities: Optional map of {build_item_id: quantity} (default = allocated quantity)
+        """
+        self.build_items = build_items
+        self.user = user
+        self.notes = notes
+        self.quantities = quantities or {}
+
+        self.now = InvenTree.helpers.current_time()
+
+        # Locked BuildItem and StockItem objects, keyed by primary key
+        self.allocations: dict = {}
+        self.items: dict = {}
+
+        # Build outputs which stock items are installed into, keyed by primary key
+        self.outputs: dict = {}
+
+        # Original location of each StockItem, keyed by primary key
+        self.locations: dict = {}
+
+        # Existing StockItem objects which have been modified, keyed by primary key
+        self.modified: dict = {}
+
+        # Stock items which are split from an allocated stock item
+        self.splitter = StockItemSplit(user=user, notes=notes)
+
+        # List of (allocation, stock_item) tuples for each consumed stock item
+        self.consumed: list = []
+
+        # Map of BuildItem ID -> consumed StockItem object
+        self.targets: dict = {}
+
+        # Consumed quantity for each BuildLine, keyed by primary key
+        self.line_quantities: dict = defaultdict(Decimal)
+
+        # Quantity of each allocated StockItem which has not yet been consumed, keyed by primary key
+        self.available: dict = {}
+
+    def lock(self):
+        """Fetch (and lock) all BuildItem and StockItem objects referenced in this operation."""
+        from build.models import BuildItem
+        from part.models import Part
+        from stock.models import StockItem
+
+        pks = [item.pk for item in self.build_items]
+
+        # The build order is referenced via the associated BuildLine
+        self.allocations = (
+            BuildItem.objects
+            .select_for_update(of=('self',))
+            .annotate(build_order_id=F('build_line__build'))
+            .in_bulk(pks)
+        )
+
+        self.items = StockItem.objects.select_for_update().in_bulk({
+            allocation.stock_item_id for allocation in self.allocations.values()
+        })
+
+        self.outputs = StockItem.objects.in_bulk({
+            allocation.install_into_id
+            for allocation in self.allocations.values()
+            if allocation.install_into_id
+        })
+
+        parts = Part.objects.in_bulk({item.part_id for item in self.items.values()})
+
+        for item in self.items.values():
+            item.part = parts[item.part_id]
+            self.locations[item.pk] = item.location_id
+
+    def consume(self):
+        """Calculate the consumed quantity and the new state of each allocated StockItem."""
+        for item in self.items.values():
+            self.available[item.pk] = Decimal(item.quantity)
+
+        for pk in sorted(self.allocations.keys()):
+            allocation = self.allocations[pk]
+            item = self.items[allocation.stock_item_id]
+
+            quantity = Decimal(self.quantities.get(pk, allocation.quantity))
+
+            # Ensure we are not consuming more than available
+            # (the same stock item may be allocated more than once)
+            quantity = min(quantity, self.available[item.pk])
+
+            if quantity <= 0:
+                # Nothing to consume - the allocation is removed
+                allocation.quantity = 0
+                continue
+
+            self.available[item.pk] -= quantity
+            self.modified[item.pk] = item
+
+            # Split the allocated stock if there are more available than allocated
+            if item.quantity > quantity and not item.serialized:
+                item = self.splitter.split(item, quantity)
+
+            item.location = None
+            item.consumed_by_id = allocation.build_order_id
+
+            if item.part.trackable and allocation.install_into_id:
+                # Install the stock item into the build output
+                item.belongs_to_id = allocation.install_into_id
+
+            self.consumed.append((allocation, item))
+            self.targets[allocation.pk] = item
+
+            # Increase the "consumed" count for the associated BuildLine
+            if allocation.build_line_id:
+                self.line_quantities[allocation.build_line_id] += quantity
+
+            # Decrease the allocated quantity
+            allocation.quantity = max(0, allocation.quantity - quantity)
+
+    def tracking_entries(self) -> list:
+        """Construct the stock tracking entries for this operation.
+
+        Note that this must be called after the new StockItem objects have been created.
+        """
+        tracking = self.splitter.tracking_entries()
+
+        def add_entry(item, code, deltas: dict):
+            entry = item.add_tracking_entry(
+                code, self.user, notes=self.notes, deltas=deltas, commit=False
+            )
+            entry.date = self.now
+            tracking.append(entry)
+
+        for allocation, item in self.consumed:
+            if item.belongs_to_id:
+                add_entry(
+                    item,
+                    StockHistoryCode.INSTALLED_INTO_ASSEMBLY,
+                    {
+                        'stockitem': item.belongs_to_id,
+                        'buildorder': allocation.build_order_id,
+                    },
+                )
+
+                add_entry(
+                    self.outputs[item.belongs_to_id],
+                    StockHistoryCode.INSTALLED_CHILD_ITEM,
+                    {'stockitem': item.pk},
+                )
+            else:
+                add_entry(
+                    item,
+                    StockHistoryCode.BUILD_CONSUMED,
+                    {
+                        'buildorder': allocation.build_order_id,
+                        'quantity': float(item.quantity),
+                    },
+                )
+
+        return tracking
+
+    def update_allocations(self):
+        """Update the consumed quantity of each BuildLine, and the remaining allocations."""
+        from build.models import BuildItem, BuildLine
+
+        for chunk in InvenTree.helpers.chunked(
+            self.line_quantities.items(), CONSUMPTION_CHUNK_SIZE
+        ):
+            BuildLine.objects.filter(pk__in=[pk for pk, _q in chunk]).update(
+                consumed=F('consumed')
+                + Case(
+                    *[When(pk=pk, then=Value(q)) for pk, q in chunk],
+                    default=Value(0),
+                    output_field=DecimalField(max_digits=15, decimal_places=5),
+                )
+            )
+
+        completed = []
+        remaining = []
+
+        for allocation in self.allocations.values():
+            if allocation.quantity <= 0:
+                completed.append(allocation.pk)
+            else:
+                item = self.targets[allocation.pk]
+
+                # An installed item remains allocated against the build output,
+                # otherwise the remaining allocation stays with the source item
+                if item.belongs_to_id:
+                    allocation.stock_item_id = item.pk
+
+                remaining.append(allocation)
+
+        for chunk in InvenTree.helpers.chunked(completed, CONSUMPTION_CHUNK_SIZE):
+            BuildItem.objects.filter(pk__in=chunk).delete()
+
+        BuildItem.objects.bulk_update(
+            remaining, ['quantity', 'stock_item'], batch_size=CONSUMPTION_CHUNK_SIZE
+        )
+
+    def trigger_events(self):
+        """Trigger plugin events for installed stock items."""
+        if not get_global_setting('ENABLE_PLUGINS_EVENTS', False):
+            return
+
+        for _allocation, item in self.consumed:
+            if item.belongs_to_id:
+                trigger_event(
+                    StockEvents.ITEM_INSTALLED_INTO_ASSEMBLY,
+                    id=item.pk,
+                    assembly_id=item.belongs_to_id,
+                )
+
+    def commit(self):
+        """Write all pending changes to the database."""
+        from stock.models import StockItem, StockItemTracking, stock_changed
+
+        items = list(self.modified.values())
+
+        if registry.with_mixin(PluginMixinEnum.VALIDATION):
+            for item in [*items, *self.splitter.created]:
+                item.run_plugin_validation()
+
+        for item in items:
+            item.updated = self.now
+
+        self.splitter.create(updated=self.now)
+
+        StockItem.objects.bulk_update(
+            items, CONSUMPTION_FIELDS, batch_size=CONSUMPTION_CHUNK_SIZE
+        )
+
+        # bulk_update does not send post_save signals, so update the location summary here
+        stock.summary.update_location_summary(
+            stock.summary.location_changes(self.locations, items)
+        )
+
+        StockItemTracking.objects.bulk_create(
+            self.tracking_entries(), batch_size=CONSUMPTION_CHUNK_SIZE
+        )
+
+        self.update_allocations()
+        self.splitter.complete()
+        self.trigger_events()
+
+        stock_changed([item.part for item in self.items.values()], create=True)
+
+    def run(self):
+        """Perform the stock consumption, within a single transaction."""
+        with transaction.atomic():
+            self.lock()
+
+            if not self.allocations:
+                return
+
+            self.consume()
+            self.commit()
+
+        logger.info(
+            'Consumed %s build allocations (%s stock items split)',
+            len(self.consumed),
+            len(self.splitter.splits),
+        )
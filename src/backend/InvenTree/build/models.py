@@ -16,7 +16,6 @@ from django.utils.translation import gettext_lazy as _
 
 import structlog
 from mptt.models import TreeForeignKey
-from rest_framework import serializers
 
 import generic.states
 import InvenTree.fields
@@ -29,6 +28,7 @@ import part.models
 import report.mixins
 import stock.models
 import users.models
+from build.consumption import BuildItemConsumption
 from build.events import BuildEvents
 from build.filters import annotate_allocated_quantity, annotate_required_quantity
 from build.status_codes import BuildStatus, BuildStatusGroups
@@ -44,6 +44,7 @@ from common.settings import (
 )
 from generic.states import StateTransitionMixin, StatusCodeMixin
 from plugin.events import trigger_event
+from stock.required_tests import passed_required_tests
 from stock.status_codes import StockHistoryCode, StockStatus
 
 logger = structlog.get_logger('inventree')
@@ -158,6 +159,7 @@ class Build(
 
     def save(self, *args, **kwargs):
         """Custom save method for the BuildOrder model."""
+        self.assign_reference()
         self.reference_int = self.validate_reference_field(self.reference)
 
         # Check part when initially creating the build order
@@ -889,15 +891,6 @@ class Build(
         Returns:
             A QuerySet of the created output (StockItem) objects.
         """
-        trackable_parts = self.part.get_trackable_parts()
-
-        # Create (and cache) a map of valid parts for allocation
-        valid_parts = {}
-
-        for bom_item in trackable_parts:
-            parts = bom_item.get_valid_parts_for_allocation()
-            valid_parts[bom_item.pk] = [part.pk for part in parts]
-
         user = kwargs.get('user')
         batch = kwargs.get('batch', self.batch)
         location = kwargs.get('location')
@@ -920,7 +913,6 @@ class Build(
 
             # Create tracking entries for each item
             tracking = []
-            allocations = []
 
             outputs = stock.models.StockItem._create_serial_numbers(
                 serials,
@@ -947,57 +939,21 @@ class Build(
                 ):
                     tracking.append(entry)
 
-                # Auto-allocate stock based on serial number
-                if auto_allocate:
-                    for bom_item in trackable_parts:
-                        valid_part_ids = valid_parts.get(bom_item.pk, [])
-
-                        # Find all matching stock items, based on serial number
-                        stock_items = list(
-                            stock.models.StockItem.objects.filter(
-                                part__pk__in=valid_part_ids,
-                                serial=output.serial,
-                                quantity=1,
-                            )
-                        )
-
-                        # Filter stock items to only those which are in stock
-                        # Note that we can accept "in production" items here
-                        available_items = list(
-                            filter(
-                                lambda item: item.is_in_stock(
-                                    check_in_production=False
-                                ),
-                                stock_items,
-                            )
-                        )
-
-                        if len(available_items) == 1:
-                            stock_item = available_items[0]
-
-                            # Find the 'BuildLine' object which points to this BomItem
-                            try:
-                                build_line = BuildLine.objects.get(
-                                    build=self, bom_item=bom_item
-                                )
-
-                                # Allocate the stock items against the BuildLine
-                                allocations.append(
-                                    BuildItem(
-                                        build_line=build_line,
-                                        stock_item=stock_item,
-                                        quantity=1,
-                                        install_into=output,
-                                    )
-                                )
-                            except BuildLine.DoesNotExist:
-                                pass
-
             # Bulk create tracking entries
             stock.models.StockItemTracking.objects.bulk_create(tracking)
 
-            # Generate stock allocations
-            BuildItem.objects.bulk_create(allocations)
+            # Auto-allocate stock based on serial number
+            if auto_allocate:
+                from build.allocation import allocate_serialized_outputs
+
+                # Create a map of valid parts for allocation
+                valid_parts = {}
+
+                for bom_item in self.part.get_trackable_parts():
+                    parts = bom_item.get_valid_parts_for_allocation()
+                    valid_parts[bom_item.pk] = [part.pk for part in parts]
+
+                allocate_serialized_outputs(self, outputs, valid_parts)
 
         else:
             """Create a single build output of the given quantity."""
@@ -1109,8 +1065,7 @@ class Build(
         )
 
         # Remove stock
-        for item in items:
-            item.complete_allocation(user=user)
+        BuildItemConsumption(items, user=user).run()
 
         # Delete allocation
         items.all().delete()
@@ -1161,9 +1116,8 @@ class Build(
         allocated_items = output.items_to_install.all()
 
         # Complete or discard allocations
-        for build_item in allocated_items:
-            if not discard_allocations:
-                build_item.complete_allocation(user=user)
+        if not discard_allocations:
+            BuildItemConsumption(allocated_items, user=user).run()
 
         # Delete allocations
         allocated_items.delete()
@@ -1209,15 +1163,19 @@ class Build(
             prevent_build_output_complete_on_incompleted_tests(),
         )
 
-        if prevent_on_incomplete and not output.passedAllRequiredTests(
-            required_tests=required_tests
-        ):
-            msg = _('Build output has not passed all required tests')
+        if prevent_on_incomplete:
+            # The required test status may be evaluated in bulk by the caller
+            test_status = kwargs.get('test_status') or output.requiredTestStatus(
+                required_tests=required_tests
+            )
+
+            if not passed_required_tests(test_status):
+                msg = _('Build output has not passed all required tests')
 
-            if serial := output.serial:
-                msg = _(f'Build output {serial} has not passed all required tests')
+                if serial := output.serial:
+                    msg = _(f'Build output {serial} has not passed all required tests')
 
-            raise ValidationError(msg)
+                raise ValidationError(msg)
 
         # List the allocated BuildItem objects for the given output
         allocated_items = output.items_to_install.all()
@@ -1243,9 +1201,8 @@ class Build(
             # Split the stock item
             output = output.splitStock(quantity, user=user, allow_production=True)
 
-        for build_item in allocated_items:
-            # Complete the allocation of stock for that item
-            build_item.complete_allocation(user=user)
+        # Complete the allocation of stock for each item
+        BuildItemConsumption(allocated_items, user=user).run()
 
         # Delete the BuildItem objects from the database
         allocated_items.all().delete()
@@ -1289,127 +1246,14 @@ class Build(
         - If a single stock item is found, we can allocate that and move on!
         - If multiple stock items are found, we *may* be able to allocate:
             - If the calling function has specified that items are interchangeable
-        """
-        location = kwargs.get('location')
-        exclude_location = kwargs.get('exclude_location')
-        interchangeable = kwargs.get('interchangeable', False)
-        substitutes = kwargs.get('substitutes', True)
-        optional_items = kwargs.get('optional_items', False)
-
-        def stock_sort(item, bom_item, variant_parts):
-            if item.part == bom_item.sub_part:
-                return 1
-            elif item.part in variant_parts:
-                return 2
-            return 3
-
-        new_items = []
-
-        # Auto-allocation is only possible for "untracked" line items
-        for line_item in self.untracked_line_items.all():
-            # Find the referenced BomItem
-            bom_item = line_item.bom_item
-
-            if bom_item.consumable:
-                # Do not auto-allocate stock to consumable BOM items
-                continue
-
-            if bom_item.optional and not optional_items:
-                # User has specified that optional_items are to be ignored
-                continue
+        - Stock items are allocated in the order determined by the 'strategy' argument
 
-            variant_parts = bom_item.sub_part.get_descendants(include_self=False)
-
-            unallocated_quantity = line_item.unallocated_quantity()
-
-            if unallocated_quantity <= 0:
-                # This BomItem is fully allocated, we can continue
-                continue
-
-            # Check which parts we can "use" (may include variants and substitutes)
-            available_parts = bom_item.get_valid_parts_for_allocation(
-                allow_variants=True, allow_inactive=False, allow_substitutes=substitutes
-            )
-
-            # Look for available stock items
-            available_stock = stock.models.StockItem.objects.filter(
-                stock.models.StockItem.IN_STOCK_FILTER
-            )
-
-            # Filter by list of available parts
-            available_stock = available_stock.filter(part__in=list(available_parts))
-
-            # Filter out "serialized" stock items, these cannot be auto-allocated
-            available_stock = available_stock.filter(
-                Q(serial=None) | Q(serial='')
-            ).distinct()
-
-            if location:
-                # Filter only stock items located "below" the specified location
-                sublocations = location.get_descendants(include_self=True)
-                available_stock = available_stock.filter(
-                    location__in=list(sublocations)
-                )
-
-            if exclude_location:
-                # Exclude any stock items from the provided location
-                sublocations = exclude_location.get_descendants(include_self=True)
-                available_stock = available_stock.exclude(
-                    location__in=list(sublocations)
-                )
-
-            """
-            Next, we sort the available stock items with the following priority:
-            1. Direct part matches (+1)
-            2. Variant part matches (+2)
-            3. Substitute part matches (+3)
-
-            This ensures that allocation priority is first given to "direct" parts
-            """
-            available_stock = sorted(
-                available_stock,
-                key=lambda item, b=bom_item, v=variant_parts: stock_sort(item, b, v),
-            )
-
-            if len(available_stock) == 1 or interchangeable:
-                # Either there is only a single stock item available,
-                # or all items are "interchangeable" and we don't care where we take stock from
-
-                for stock_item in available_stock:
-                    # Skip inactive parts
-                    if not stock_item.part.active:
-                        continue
-
-                    # How much of the stock item is "available" for allocation?
-                    quantity = min(
-                        unallocated_quantity, stock_item.unallocated_quantity()
-                    )
-
-                    if quantity > 0:
-                        try:
-                            new_items.append(
-                                BuildItem(
-                                    build_line=line_item,
-                                    stock_item=stock_item,
-                                    quantity=quantity,
-                                )
-                            )
-
-                            # Subtract the required quantity
-                            unallocated_quantity -= quantity
-
-                        except (ValidationError, serializers.ValidationError) as exc:
-                            # Catch model errors and re-throw as DRF errors
-                            raise ValidationError(
-                                exc.message, detail=serializers.as_serializer_error(exc)
-                            )
-
-                    if unallocated_quantity <= 0:
-                        # We have now fully-allocated this BomItem - no need to continue!
-                        break
+        Candidate stock for all lines is loaded in a single pass,
+        refer to build.allocation.BuildAllocator for further details.
+        """
+        from build.allocation import BuildAllocator
 
-        # Bulk-create the new BuildItem objects
-        BuildItem.objects.bulk_create(new_items)
+        BuildAllocator(self, **kwargs).allocate()
 
     def unallocated_lines(self, tracked: Optional[bool] = None) -> QuerySet:
         """Returns a list of BuildLine objects which have not been fully allocated."""
@@ -1910,59 +1754,13 @@ class BuildItem(InvenTree.models.InvenTreeMetadataModel):
         - If the referenced part is trackable, the stock item will be *installed* into the build output
         - If the referenced part is *not* trackable, the stock item will be *consumed* by the build order
 
-        TODO: This is quite expensive (in terms of number of database hits) - and requires some thought
-        TODO: Revisit, and refactor!
-
+        To complete multiple allocations, use BuildItemConsumption directly (which operates in bulk).
         """
-        # If the quantity is not provided, use the quantity of this BuildItem
-        if quantity is None:
-            quantity = self.quantity
-
-        item = self.stock_item
-
-        # Ensure we are not allocating more than available
-        if quantity > item.quantity:
-            quantity = item.quantity
-
-        # Split the allocated stock if there are more available than allocated
-        if item.quantity > quantity:
-            item = item.splitStock(quantity, None, user, notes=notes)
+        quantities = {self.pk: quantity} if quantity is not None else None
 
-        # For a trackable part, special consideration needed!
-        if item.part.trackable:
-            # Make sure we are pointing to the new item
-            self.stock_item = item
-            self.save()
-
-            # Install the stock item into the output
-            self.install_into.installStockItem(
-                item, quantity, user, notes, build=self.build
-            )
-
-        else:
-            # Mark the item as "consumed" by the build order
-            item.consumed_by = self.build
-            item.location = None
-            item.save(add_note=False)
-
-            item.add_tracking_entry(
-                StockHistoryCode.BUILD_CONSUMED,
-                user,
-                notes=notes,
-                deltas={'buildorder': self.build.pk, 'quantity': float(item.quantity)},
-            )
-
-        # Increase the "consumed" count for the associated BuildLine
-        self.build_line.consumed += quantity
-        self.build_line.save()
-
-        # Decrease the allocated quantity
-        self.quantity = max(0, self.quantity - quantity)
-
-        if self.quantity <= 0:
-            self.delete()
-        else:
-            self.save()
+        BuildItemConsumption(
+            [self], user=user, notes=notes, quantities=quantities
+        ).run()
 
     build_line = models.ForeignKey(
         BuildLine, on_delete=models.CASCADE, null=True, related_name='allocations'
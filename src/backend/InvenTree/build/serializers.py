@@ -21,6 +21,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
 
+import build.allocation
 import build.tasks
 import common.filters
 import common.settings
@@ -28,6 +29,7 @@ import company.serializers
 import InvenTree.helpers
 import part.filters
 import part.serializers as part_serializers
+import stock.required_tests
 from common.settings import get_global_setting
 from generic.states.fields import InvenTreeCustomStatusSerializerMixin
 from InvenTree.mixins import DataImportExportSerializerMixin
@@ -51,7 +53,7 @@ from users.serializers import OwnerSerializer, UserSerializer
 
 from .models import Build, BuildItem, BuildLine
 from .status_codes import BuildStatus
-from .tasks import consume_build_item, consume_build_line
+from .tasks import consume_build_items, consume_build_line
 
 
 class BuildSerializer(
@@ -576,12 +578,18 @@ class BuildOutputCompleteSerializer(serializers.Serializer):
         outputs = data.get('outputs', [])
 
         if common.settings.prevent_build_output_complete_on_incompleted_tests():
+            # Evaluate the required tests for all outputs at once
+            test_status = stock.required_tests.required_test_status([
+                output['output'] for output in outputs
+            ])
+
+            data['test_status'] = test_status
+
             errors = []
             for output in outputs:
                 stock_item = output['output']
-                if (
-                    stock_item.hasRequiredTests()
-                    and not stock_item.passedAllRequiredTests()
+                if not stock.required_tests.passed_required_tests(
+                    test_status[stock_item.pk]
                 ):
                     serial = stock_item.serial
 
@@ -616,6 +624,7 @@ class BuildOutputCompleteSerializer(serializers.Serializer):
         notes = data.get('notes', '')
 
         outputs = data.get('outputs', [])
+        test_status = data.get('test_status', {})
 
         # Cache some calculated values which can be passed to each output
         required_tests = outputs[0]['output'].part.getRequiredTests()
@@ -638,6 +647,7 @@ class BuildOutputCompleteSerializer(serializers.Serializer):
                     notes=notes,
                     required_tests=required_tests,
                     prevent_on_incomplete=prevent_on_incomplete,
+                    test_status=test_status.get(output.pk),
                 )
 
 
@@ -1077,6 +1087,7 @@ class BuildAutoAllocationSerializer(serializers.Serializer):
             'interchangeable',
             'substitutes',
             'optional_items',
+            'strategy',
         ]
 
     location = serializers.PrimaryKeyRelatedField(
@@ -1117,6 +1128,13 @@ class BuildAutoAllocationSerializer(serializers.Serializer):
         help_text=_('Allocate optional BOM items to build order'),
     )
 
+    strategy = serializers.ChoiceField(
+        choices=build.allocation.allocation_strategy_choices(),
+        default=build.allocation.DEFAULT_ALLOCATION_STRATEGY,
+        label=_('Allocation Strategy'),
+        help_text=_('Order in which available stock items are allocated'),
+    )
+
     def save(self):
         """Perform the auto-allocation step."""
         import InvenTree.tasks
@@ -1133,6 +1151,7 @@ class BuildAutoAllocationSerializer(serializers.Serializer):
             interchangeable=data['interchangeable'],
             substitutes=data['substitutes'],
             optional_items=data['optional_items'],
+            strategy=data['strategy'],
             group='build',
         ):
             raise ValidationError(_('Failed to start auto-allocation task'))
@@ -1832,20 +1851,19 @@ class BuildConsumeSerializer(serializers.Serializer):
 
         with transaction.atomic():
             # Process the provided BuildItem objects
-            for item in items:
-                build_item = item['build_item']
-                quantity = item['quantity']
-
-                if build_item.install_into:
-                    # If the build item is tracked into an output, we do not consume now
-                    # Instead, it gets consumed when the output is completed
-                    continue
-
-                # Offload a background task to consume this BuildItem
+            # If the build item is tracked into an output, we do not consume now
+            # Instead, it gets consumed when the output is completed
+            quantities = {
+                item['build_item'].pk: str(item['quantity'])
+                for item in items
+                if not item['build_item'].install_into
+            }
+
+            if quantities:
+                # Offload a single background task to consume all BuildItem objects
                 offload_task(
-                    consume_build_item,
-                    build_item.pk,
-                    quantity,
+                    consume_build_items,
+                    quantities,
                     notes=notes,
                     user_id=request.user.pk if request else None,
                 )
@@ -62,9 +62,32 @@ def consume_build_item(
     )
 
 
+@tracer.start_as_current_span('consume_build_items')
+def consume_build_items(items: dict, notes: str = '', user_id: int | None = None):
+    """Consume stock against multiple BuildOrderLineItem allocations.
+
+    Arguments:
+        items: Map of {build_item_id: quantity}
+        notes: Optional notes for the stock tracking entries
+        user_id: The ID of the user consuming the stock
+    """
+    from build.consumption import BuildItemConsumption
+    from build.models import BuildItem
+
+    quantities = {int(pk): Decimal(str(q)) for pk, q in items.items()}
+
+    BuildItemConsumption(
+        BuildItem.objects.filter(pk__in=quantities.keys()),
+        user=User.objects.filter(pk=user_id).first() if user_id else None,
+        notes=notes,
+        quantities=quantities,
+    ).run()
+
+
 @tracer.start_as_current_span('consume_build_line')
 def consume_build_line(line_id: int, notes: str = '', user_id: int | None = None):
     """Consume stock against a particular BuildOrderLineItem."""
+    from build.consumption import BuildItemConsumption
     from build.models import BuildLine
 
     line_item = BuildLine.objects.filter(pk=line_id).first()
@@ -76,12 +99,11 @@ def consume_build_line(line_id: int, notes: str = '', user_id: int | None = None
         )
         return
 
-    for item in line_item.allocations.all():
-        item.complete_allocation(
-            quantity=item.quantity,
-            notes=notes,
-            user=User.objects.filter(pk=user_id).first() if user_id else None,
-        )
+    BuildItemConsumption(
+        line_item.allocations.all(),
+        user=User.objects.filter(pk=user_id).first() if user_id else None,
+        notes=notes,
+    ).run()
 
 
 @tracer.start_as_current_span('complete_build_allocations')
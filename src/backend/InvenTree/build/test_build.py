@@ -6,15 +6,19 @@ from datetime import datetime, timedelta
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.models import Sum
-from django.test.utils import override_settings
+from django.test import tag
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 
+import pytest
 import structlog
 
 import build.tasks
 import common.models
 import company.models
+from build.consumption import BuildItemConsumption
 from build.models import Build, BuildItem, BuildLine, generate_next_build_reference
 from build.status_codes import BuildStatus
 from common.settings import set_global_setting
@@ -22,11 +26,19 @@ from InvenTree import status_codes as status
 from InvenTree.unit_test import (
     InvenTreeAPITestCase,
     InvenTreeTestCase,
+    bulk_create_nodes,
+    count_queries,
     findOffloadedEvent,
 )
 from order.models import PurchaseOrder, PurchaseOrderLineItem
 from part.models import BomItem, BomItemSubstitute, Part, PartTestTemplate
-from stock.models import StockItem, StockItemTestResult, StockLocation
+from stock.models import (
+    StockItem,
+    StockItemTestResult,
+    StockItemTracking,
+    StockLocation,
+)
+from stock.status_codes import StockHistoryCode
 from users.models import Owner
 
 logger = structlog.get_logger('inventree')
@@ -627,6 +639,149 @@ class BuildTest(BuildTestBase):
         for output in outputs:
             self.assertFalse(output.is_building)
 
+    def test_bulk_consumption(self):
+        """Test that multiple allocations are consumed in a single bulk operation."""
+        self.build.issue_build()
+
+        # Partial allocations (which require the stock items to be split)
+        self.allocate_stock(
+            None,
+            {
+                self.stock_1_1: 3,
+                self.stock_1_2: 10,
+                self.stock_2_1: 2,
+                self.stock_2_2: 2,
+                self.stock_2_3: 2,
+                self.stock_2_4: 2,
+                self.stock_2_5: 5,
+            },
+        )
+
+        # Allocate tracked parts to output_1
+        self.allocate_stock(self.output_1, {self.stock_3_1: 6})
+
+        N = StockItem.objects.count()
+        tracking = StockItemTracking.objects.count()
+
+        allocations = list(self.build.allocated_stock.all())
+        self.assertEqual(len(allocations), 8)
+
+        with CaptureQueriesContext(connection) as ctx:
+            BuildItemConsumption(allocations, notes='Bulk').run()
+
+        # The number of queries does not scale with the number of allocations
+        self.assertLess(len(ctx), 25)
+
+        self.assertEqual(self.build.allocated_stock.count(), 0)
+
+        # Six items have been split from the allocated stock
+        self.assertEqual(StockItem.objects.count(), N + 6)
+
+        # One split entry against each parent and child, and one consumed entry per allocation
+        self.assertEqual(StockItemTracking.objects.count(), tracking + 6 * 2 + 8 + 1)
+
+        self.line_1.refresh_from_db()
+        self.line_2.refresh_from_db()
+        self.line_3.refresh_from_db()
+
+        self.assertEqual(self.line_1.consumed, 13)
+        self.assertEqual(self.line_2.consumed, 13)
+        self.assertEqual(self.line_3.consumed, 6)
+
+        # Fully allocated items are consumed directly
+        for item in [self.stock_1_1, self.stock_2_5]:
+            item.refresh_from_db()
+            self.assertEqual(item.consumed_by, self.build)
+            self.assertIsNone(item.location)
+            self.assertFalse(item.in_stock)
+
+        # Partially allocated items are split
+        self.stock_1_2.refresh_from_db()
+        self.assertEqual(self.stock_1_2.quantity, 90)
+        self.assertIsNone(self.stock_1_2.consumed_by)
+
+        child = self.stock_1_2.children.get()
+        self.assertEqual(child.quantity, 10)
+        self.assertEqual(child.consumed_by, self.build)
+        self.assertEqual(child.get_ancestors().first(), self.stock_1_2)
+
+        # Tracked items are installed into the build output
+        self.stock_3_1.refresh_from_db()
+        self.assertEqual(self.stock_3_1.quantity, 994)
+
+        installed = self.stock_3_1.children.get()
+        self.assertEqual(installed.quantity, 6)
+        self.assertEqual(installed.belongs_to, self.output_1)
+        self.assertEqual(installed.consumed_by, self.build)
+        self.assertEqual(
+            installed.tracking_info.filter(
+                tracking_type=StockHistoryCode.INSTALLED_INTO_ASSEMBLY
+            ).count(),
+            1,
+        )
+
+    def test_duplicate_consumption(self):
+        """Test that a stock item allocated more than once is not consumed twice."""
+        self.build.issue_build()
+
+        item_a = StockItem.objects.create(part=self.sub_part_3, quantity=5)
+        item_b = StockItem.objects.create(part=self.sub_part_3, quantity=4)
+
+        self.allocate_stock(self.output_1, {item_a: 4, item_b: 4})
+        self.allocate_stock(self.output_2, {item_a: 4, item_b: 4})
+
+        N = StockItem.objects.count()
+
+        BuildItemConsumption(list(self.build.allocated_stock.all())).run()
+
+        # Only the first allocation of item_a requires a split
+        self.assertEqual(StockItem.objects.count(), N + 1)
+
+        self.line_3.refresh_from_db()
+        self.assertEqual(self.line_3.consumed, 9)
+
+        # The second allocation of item_a is trimmed to the remaining quantity
+        item_a.refresh_from_db()
+        self.assertEqual(item_a.quantity, 1)
+        self.assertEqual(item_a.belongs_to, self.output_2)
+        self.assertEqual(item_a.children.get().belongs_to, self.output_1)
+
+        # The second allocation of item_b is skipped
+        item_b.refresh_from_db()
+        self.assertEqual(item_b.quantity, 4)
+        self.assertEqual(item_b.belongs_to, self.output_1)
+        self.assertEqual(item_b.children.count(), 0)
+
+        # Only the unfulfilled part of the trimmed allocation remains
+        remaining = self.build.allocated_stock.get()
+        self.assertEqual(remaining.quantity, 3)
+        self.assertEqual(remaining.stock_item, item_a)
+
+    def test_partial_consumption(self):
+        """Test consumption of part of a BuildItem allocation."""
+        self.build.issue_build()
+
+        self.allocate_stock(None, {self.stock_1_2: 10})
+
+        allocation = self.build.allocated_stock.get()
+        allocation.complete_allocation(quantity=4)
+
+        # The remaining allocation still points to the source item
+        allocation.refresh_from_db()
+        self.assertEqual(allocation.quantity, 6)
+        self.assertEqual(allocation.stock_item, self.stock_1_2)
+
+        # The consumed quantity is split from the source item
+        consumed = self.stock_1_2.children.get(consumed_by=self.build)
+        self.assertEqual(consumed.quantity, 4)
+        self.assertIsNone(consumed.location)
+
+        self.stock_1_2.refresh_from_db()
+        self.assertEqual(self.stock_1_2.quantity, 96)
+
+        self.line_1.refresh_from_db()
+        self.assertEqual(self.line_1.consumed, 4)
+
     def test_complete_with_required_tests(self):
         """Test the prevention completion when a required test is missing feature."""
         # with required tests incompleted the save should fail
@@ -925,6 +1080,380 @@ class AutoAllocationTests(BuildTestBase):
 
         self.assertEqual(self.build.allocated_stock.count(), N - 8)
 
+    def test_shared_stock(self):
+        """Stock items shared between multiple lines must not be over-allocated."""
+        alt_part = self.bom_item_2.substitutes.first().part
+        alt_stock = alt_part.stock_items.first()
+
+        # Add another line which requires the substitute part directly
+        bom_item = BomItem.objects.create(
+            part=self.assembly, sub_part=alt_part, quantity=50
+        )
+
+        line = BuildLine.objects.create(
+            build=self.build, bom_item=bom_item, quantity=500
+        )
+
+        self.build.auto_allocate_stock(
+            interchangeable=True, substitutes=True, optional_items=True
+        )
+
+        # line_2 takes 25 from sub_part_2, and 5 from the substitute part
+        self.assertEqual(self.line_2.unallocated_quantity(), 0)
+        self.assertEqual(
+            self.line_2.allocations.filter(stock_item=alt_stock).first().quantity, 5
+        )
+
+        # The remaining substitute stock is allocated to the new line
+        self.assertEqual(line.allocated_quantity(), 495)
+        self.assertEqual(line.unallocated_quantity(), 5)
+
+        alt_stock.refresh_from_db()
+        self.assertEqual(alt_stock.unallocated_quantity(), 0)
+        self.assertEqual(alt_stock.allocation_count(), 500)
+
+    def test_allocation_strategy(self):
+        """Test the different stock allocation strategies."""
+        from build.allocation import BuildAllocator
+
+        today = datetime.now().date()
+
+        expiring = StockItem.objects.create(
+            part=self.sub_part_1, quantity=80, expiry_date=today + timedelta(days=5)
+        )
+
+        location = StockLocation.objects.create(name='Allocation location')
+        located = StockItem.objects.create(
+            part=self.sub_part_2, quantity=50, location=location
+        )
+
+        StockItem.objects.create(part=self.sub_part_1, quantity=10, location=location)
+
+        with self.assertRaises(ValueError):
+            BuildAllocator(self.build, strategy='not-a-strategy')
+
+        # FIFO - oldest stock items are allocated first
+        self.build.auto_allocate_stock(
+            interchangeable=True, optional_items=True, strategy='fifo'
+        )
+
+        self.assertEqual(
+            set(self.line_1.allocations.values_list('stock_item', flat=True)),
+            {self.stock_1_1.pk, self.stock_1_2.pk},
+        )
+
+        # Direct part matches are allocated before substitute parts
+        self.assertEqual(self.line_2.allocations.count(), 6)
+        self.assertEqual(self.line_2.allocations.last().stock_item, located)
+
+        BuildItem.objects.filter(build_line__build=self.build).delete()
+
+        # Expiry - stock items which expire first are allocated first
+        self.build.auto_allocate_stock(
+            interchangeable=True, optional_items=True, strategy='expiry'
+        )
+
+        allocation = self.line_1.allocations.get()
+        self.assertEqual(allocation.stock_item, expiring)
+        self.assertEqual(allocation.quantity, 50)
+
+        BuildItem.objects.filter(build_line__build=self.build).delete()
+
+        # Fewest picks - a single stock item fulfils each line
+        self.build.auto_allocate_stock(
+            interchangeable=True, optional_items=True, strategy='fewest_picks'
+        )
+
+        self.assertEqual(self.line_1.allocations.get().stock_item, expiring)
+        self.assertEqual(self.line_2.allocations.get().stock_item, located)
+
+        BuildItem.objects.filter(build_line__build=self.build).delete()
+
+        # Location - stock is taken from locations already allocated from
+        self.line_2.allocations.create(stock_item=located, quantity=1)
+
+        self.build.auto_allocate_stock(
+            interchangeable=True, optional_items=True, strategy='location'
+        )
+
+        allocations = self.line_1.allocations.all().order_by('pk')
+        self.assertEqual(allocations[0].stock_item.location, location)
+        self.assertEqual(allocations[0].quantity, 10)
+        self.assertEqual(allocations.count(), 3)
+
+        self.assertTrue(self.build.is_fully_allocated(tracked=False))
+
+
+class SerialAllocationTest(InvenTreeTestCase):
+    """Tests for serial number based auto-allocation of tracked stock."""
+
+    def test_serial_allocation(self):
+        """Tracked stock is allocated against build outputs with matching serial numbers."""
+        assembly = Part.objects.create(
+            name='Tracked assembly',
+            description='An assembly',
+            assembly=True,
+            trackable=True,
+        )
+
+        component_a, component_b, component_c = [
+            Part.objects.create(
+                name=f'Tracked component {x}',
+                description='A component',
+                component=True,
+                trackable=True,
+            )
+            for x in 'ABC'
+        ]
+
+        BomItem.objects.create(part=assembly, sub_part=component_a, quantity=1)
+        bom_item = BomItem.objects.create(
+            part=assembly, sub_part=component_b, quantity=1
+        )
+        BomItemSubstitute.objects.create(bom_item=bom_item, part=component_c)
+
+        customer = company.models.Company.objects.create(
+            name='Customer', is_customer=True
+        )
+
+        for sn in range(1, 6):
+            StockItem.objects.create(
+                part=component_a,
+                quantity=1,
+                serial=str(sn),
+                # Stock assigned to a customer cannot be allocated
+                customer=customer if sn == 3 else None,
+            )
+
+        for sn in [1, 2, 3, 5]:
+            StockItem.objects.create(part=component_b, quantity=1, serial=str(sn))
+
+        for sn in [4, 5]:
+            StockItem.objects.create(part=component_c, quantity=1, serial=str(sn))
+
+        build = Build.objects.create(part=assembly, reference='BO-9876', quantity=5)
+
+        outputs = build.create_build_output(
+            5, serials=[str(sn) for sn in range(1, 6)], auto_allocate=True
+        )
+
+        allocated = {
+            output.serial: sorted(
+                (item.stock_item.part.name[-1], item.stock_item.serial)
+                for item in BuildItem.objects.filter(install_into=output)
+            )
+            for output in outputs
+        }
+
+        self.assertEqual(
+            allocated,
+            {
+                '1': [('A', '1'), ('B', '1')],
+                '2': [('A', '2'), ('B', '2')],
+                '3': [('B', '3')],
+                '4': [('A', '4'), ('C', '4')],
+                # Serial number '5' is ambiguous for the second BOM item
+                '5': [('A', '5')],
+            },
+        )
+
+        for item in BuildItem.objects.filter(build_line__build=build):
+            self.assertEqual(item.quantity, 1)
+            self.assertEqual(item.build_line.bom_item.part, assembly)
+
+
+@tag('performance_test')
+class SerialAllocationPerformanceTest(InvenTreeTestCase):
+    """Compare serial number auto-allocation against the previous per-output approach."""
+
+    N_OUTPUTS = 250
+    N_TRACKED = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        """Generate a trackable assembly with tracked sub-assemblies in stock."""
+        super().setUpTestData()
+
+        cls.assembly = Part.objects.create(
+            name='Benchmark assembly',
+            description='An assembly',
+            assembly=True,
+            trackable=True,
+        )
+
+        components = [
+            Part.objects.create(
+                name=f'Benchmark component {idx}',
+                description='A component',
+                assembly=True,
+                component=True,
+                trackable=True,
+            )
+            for idx in range(cls.N_TRACKED)
+        ]
+
+        for component in components:
+            BomItem.objects.create(part=cls.assembly, sub_part=component, quantity=1)
+
+        bulk_create_nodes(
+            StockItem,
+            [
+                StockItem(part=component, quantity=1, serial=str(sn), serial_int=sn)
+                for component in components
+                for sn in range(1, cls.N_OUTPUTS + 1)
+            ],
+        )
+
+        cls.build = Build.objects.create(
+            part=cls.assembly, reference='BO-8765', quantity=cls.N_OUTPUTS
+        )
+
+        cls.outputs = list(
+            cls.build.create_build_output(
+                cls.N_OUTPUTS, serials=[str(sn) for sn in range(1, cls.N_OUTPUTS + 1)]
+            )
+        )
+
+    def valid_parts(self):
+        """Return a map of valid parts for each trackable BOM item."""
+        return {
+            bom_item.pk: [prt.pk for prt in bom_item.get_valid_parts_for_allocation()]
+            for bom_item in self.assembly.get_trackable_parts()
+        }
+
+    def allocate_per_output(self, valid_parts):
+        """Allocate stock with a separate query for each output and BOM item."""
+        allocations = []
+
+        for output in self.outputs:
+            for bom_item in self.assembly.get_trackable_parts():
+                items = [
+                    item
+                    for item in StockItem.objects.filter(
+                        part__pk__in=valid_parts[bom_item.pk],
+                        serial=output.serial,
+                        quantity=1,
+                    )
+                    if item.is_in_stock(check_in_production=False)
+                ]
+
+                if len(items) == 1:
+                    allocations.append(
+                        BuildItem(
+                            build_line=BuildLine.objects.get(
+                                build=self.build, bom_item=bom_item
+                            ),
+                            stock_item=items[0],
+                            quantity=1,
+                            install_into=output,
+                        )
+                    )
+
+        return BuildItem.objects.bulk_create(allocations)
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_serial_allocation(self):
+        """Benchmark set-based serial allocation, and check it matches the per-output approach."""
+        from build.allocation import allocate_serialized_outputs
+
+        valid_parts = self.valid_parts()
+        expected = self.N_OUTPUTS * self.N_TRACKED
+
+        results = {}
+
+        for name, func in [
+            ('per-output', self.allocate_per_output),
+            (
+                'set-based',
+                lambda parts: allocate_serialized_outputs(
+                    self.build, self.outputs, parts
+                ),
+            ),
+        ]:
+            BuildItem.objects.filter(build_line__build=self.build).delete()
+
+            with count_queries(name, threshold=1) as result:
+                func(valid_parts)
+
+            results[name] = (
+                result.count,
+                set(
+                    BuildItem.objects.filter(build_line__build=self.build).values_list(
+                        'stock_item', 'install_into', 'build_line'
+                    )
+                ),
+            )
+
+        self.assertEqual(len(results['set-based'][1]), expected)
+        self.assertEqual(results['set-based'][1], results['per-output'][1])
+
+        # Only the bulk_create operation may be split into multiple queries
+        self.assertLess(results['set-based'][0], self.N_OUTPUTS)
+        self.assertGreater(results['per-output'][0], expected)
+
+
+@tag('performance_test')
+class ConsumptionPerformanceTest(InvenTreeTestCase):
+    """Benchmark bulk consumption of build allocations."""
+
+    N_PARTS = 100
+    N_ITEMS = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        """Generate a build order with many partially allocated stock items."""
+        super().setUpTestData()
+
+        assembly = Part.objects.create(
+            name='Benchmark assembly', description='An assembly', assembly=True
+        )
+
+        for idx in range(cls.N_PARTS):
+            component = Part.objects.create(
+                name=f'Benchmark component {idx}',
+                description='A component',
+                component=True,
+            )
+
+            BomItem.objects.create(part=assembly, sub_part=component, quantity=1)
+
+            for _ in range(cls.N_ITEMS):
+                StockItem.objects.create(part=component, quantity=10)
+
+        cls.build = Build.objects.create(
+            reference=generate_next_build_reference(),
+            part=assembly,
+            quantity=cls.N_ITEMS,
+        )
+
+        BuildItem.objects.bulk_create([
+            BuildItem(build_line=line, stock_item=item, quantity=1)
+            for line in BuildLine.objects.filter(build=cls.build)
+            for item in StockItem.objects.filter(part=line.bom_item.sub_part)
+        ])
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_consumption(self):
+        """Benchmark consumption of all allocated stock against the build order."""
+        N = self.N_PARTS * self.N_ITEMS
+
+        self.assertEqual(self.build.allocated_stock.count(), N)
+
+        with count_queries(f'consumption ({N} allocations)', threshold=1) as result:
+            self.build.subtract_allocated_stock(None)
+
+        self.assertEqual(self.build.allocated_stock.count(), 0)
+        self.assertEqual(StockItem.objects.filter(consumed_by=self.build).count(), N)
+
+        for line in BuildLine.objects.filter(build=self.build):
+            self.assertEqual(line.consumed, self.N_ITEMS)
+
+        # Each item is split - which previously required thousands of queries
+        # Only the bulk operations may be split into multiple queries
+        self.assertLess(result.count, 100)
+
 
 class ExternalBuildTest(InvenTreeAPITestCase):
     """Unit tests for external build order functionality."""
@@ -23,7 +23,7 @@ from djmoney.contrib.exchange.models import ExchangeBackend, Rate
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from error_report.models import Error
 from pint._typing import UnitLike
-from rest_framework import generics, serializers
+from rest_framework import generics, serializers, status
 from rest_framework.exceptions import NotAcceptable, NotFound, PermissionDenied
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
@@ -578,12 +578,14 @@ class BackgroundTaskOverview(APIView):
         import django_q.models as q_models
 
         import InvenTree.status
+        import part.pricing
 
         serializer = common.serializers.TaskOverviewSerializer({
             'is_running': InvenTree.status.is_worker_running(),
             'pending_tasks': q_models.OrmQ.objects.count(),
             'scheduled_tasks': q_models.Schedule.objects.count(),
             'failed_tasks': q_models.Failure.objects.count(),
+            'pricing_queue': part.pricing.pricing_queue_depth(),
         })
 
         return Response(serializer.data)
@@ -697,6 +699,22 @@ class ContentTypeModelDetail(ContentTypeDetail):
         return super().get(request, *args, **kwargs)
 
 
+class GenerateReference(generics.GenericAPIView):
+    """API endpoint for reserving new reference values (e.g. for bulk order creation)."""
+
+    permission_classes = [IsAuthenticatedOrReadScope]
+    serializer_class = common.serializers.GenerateReferenceSerializer
+
+    def post(self, request, *args, **kwargs):
+        """Reserve one or more new reference values."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.save()
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
 class AttachmentFilter(FilterSet):
     """Filterset for the AttachmentList API endpoint."""
 
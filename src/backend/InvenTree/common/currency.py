@@ -2,12 +2,16 @@
 
 import decimal
 import math
+import time
+import uuid
 from typing import Optional
 
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 import structlog
+from djmoney.contrib.exchange.exceptions import MissingRate
 from moneyed import CURRENCIES
 
 import InvenTree.helpers
@@ -114,6 +118,185 @@ def after_change_currency(setting) -> None:
     )
 
 
+RATE_MATRIX_KEY = 'exchange_rate_matrix_version'
+
+# Minimum interval (in seconds) between checks of the shared version key
+RATE_MATRIX_CHECK_INTERVAL = 5
+
+
+class ExchangeRateMatrix:
+    """Snapshot of the stored exchange rates, held in process memory.
+
+    All rates are stored relative to the base currency of the exchange backend,
+    so converting between any two currencies is a dictionary lookup rather than
+    a database query. Conversion results match djmoney's convert_money.
+    """
+
+    def __init__(self, base_currency: Optional[str], rates: dict, version=None):
+        """Initialize the matrix from a {currency: rate} mapping."""
+        self.base_currency = base_currency
+        self.rates = dict(rates)
+        self.version = version
+        self.loaded = time.monotonic()
+        self.checked = self.loaded
+
+        if base_currency and base_currency not in self.rates:
+            self.rates[base_currency] = decimal.Decimal(1)
+
+    def rate(self, source, target):
+        """Return the exchange rate from the source to the target currency.
+
+        Raises:
+            MissingRate: If either currency is not covered by the stored rates
+        """
+        source, target = str(source), str(target)
+
+        if source == target:
+            return 1
+
+        if source not in self.rates or target not in self.rates:
+            raise MissingRate(f'Rate {source} -> {target} does not exist')
+
+        if source == self.base_currency:
+            return self.rates[target]
+
+        if target == self.base_currency:
+            return 1 / self.rates[source]
+
+        return self.rates[target] / self.rates[source]
+
+    def convert(self, value, currency):
+        """Convert a single Money value into the target currency."""
+        amount = value.amount * self.rate(value.currency, currency)
+        return value.__class__(amount, currency)
+
+    def convert_many(self, amounts, currencies=None, target=None) -> list:
+        """Convert a sequence of values into the target currency.
+
+        Arguments:
+            amounts: Sequence of Money instances, or of plain numeric amounts
+            currencies: Currency code for each amount (not required for Money instances)
+            target: Target currency code (defaults to the system currency)
+
+        Returns:
+            A list of Money instances in the target currency, in the same order as the input
+
+        Raises:
+            MissingRate: If any of the provided currencies cannot be converted
+        """
+        from djmoney.money import Money
+
+        target = target or currency_code_default()
+
+        amounts = list(amounts)
+
+        if currencies is None:
+            currencies = [value.currency for value in amounts]
+            amounts = [value.amount for value in amounts]
+
+        # Each distinct currency only needs to be looked up once
+        rates = {}
+        results = []
+
+        for amount, currency in zip(amounts, currencies, strict=True):
+            code = str(currency)
+
+            if code not in rates:
+                rates[code] = self.rate(code, target)
+
+            results.append(Money(amount * rates[code], target))
+
+        return results
+
+
+_rate_matrix: Optional[ExchangeRateMatrix] = None
+
+
+def load_exchange_rate_matrix(version=None) -> ExchangeRateMatrix:
+    """Construct an ExchangeRateMatrix from the rates stored in the database."""
+    from djmoney.contrib.exchange.models import Rate, get_default_backend_name
+
+    base_currency = None
+    rates = {}
+
+    for currency, value, base in Rate.objects.filter(
+        backend=get_default_backend_name()
+    ).values_list('currency', 'value', 'backend__base_currency'):
+        base_currency = base
+        rates[currency] = value
+
+    return ExchangeRateMatrix(base_currency, rates, version=version)
+
+
+def exchange_rate_matrix() -> ExchangeRateMatrix:
+    """Return the process-local exchange rate matrix.
+
+    The matrix is reloaded from the database when:
+    - The shared version key has changed (exchange rates were updated elsewhere)
+    - The matrix is older than the djmoney rate cache timeout
+
+    The shared version key is checked at most once every RATE_MATRIX_CHECK_INTERVAL seconds,
+    so that repeated conversions do not each require a round trip to the cache.
+    """
+    global _rate_matrix
+
+    from djmoney.settings import RATES_CACHE_TIMEOUT
+
+    matrix = _rate_matrix
+    now = time.monotonic()
+
+    if matrix is not None and now - matrix.loaded > RATES_CACHE_TIMEOUT:
+        matrix = None
+
+    if matrix is not None and now - matrix.checked < RATE_MATRIX_CHECK_INTERVAL:
+        return matrix
+
+    version = cache.get(RATE_MATRIX_KEY)
+
+    if version is None:
+        cache.add(RATE_MATRIX_KEY, uuid.uuid4().hex, None)
+        version = cache.get(RATE_MATRIX_KEY)
+
+    if matrix is None or matrix.version != version:
+        matrix = load_exchange_rate_matrix(version=version)
+        _rate_matrix = matrix
+
+    matrix.checked = now
+
+    return matrix
+
+
+def clear_exchange_rate_matrix() -> None:
+    """Invalidate the exchange rate matrix for all processes.
+
+    This must be called whenever the stored exchange rates are changed.
+    """
+    global _rate_matrix
+
+    _rate_matrix = None
+    cache.set(RATE_MATRIX_KEY, uuid.uuid4().hex, None)
+
+
+def convert_money(value, currency):
+    """Convert a Money value into the target currency.
+
+    Drop-in replacement for djmoney's convert_money,
+    using the cached exchange rate matrix rather than querying the database.
+
+    Raises:
+        MissingRate: If no exchange rate is available
+    """
+    return exchange_rate_matrix().convert(value, currency)
+
+
+def convert_many(amounts, currencies=None, target=None) -> list:
+    """Convert a sequence of values into the target currency.
+
+    Refer to ExchangeRateMatrix.convert_many for details.
+    """
+    return exchange_rate_matrix().convert_many(amounts, currencies, target)
+
+
 def validate_currency_codes(value):
     """Validate the currency codes."""
     values = value.strip().split(',')
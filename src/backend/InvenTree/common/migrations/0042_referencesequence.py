@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0041_auto_20251203_1244'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_type', models.CharField(help_text='Model type for this reference sequence', max_length=100, unique=True, verbose_name='Model Type')),
+                ('value', models.BigIntegerField(default=0, help_text='Highest reference number issued for this model', verbose_name='Value')),
+                ('reserved', models.BigIntegerField(default=0, help_text='Highest reference number reserved for this model', verbose_name='Reserved')),
+            ],
+            options={
+                'verbose_name': 'Reference Sequence',
+            },
+        ),
+    ]
@@ -43,11 +43,13 @@ import structlog
 from anymail.signals import inbound, tracking
 from django_q.signals import post_spawn
 from djmoney.contrib.exchange.exceptions import MissingRate
-from djmoney.contrib.exchange.models import convert_money
+from djmoney.contrib.exchange.models import ExchangeBackend, Rate
 from opentelemetry import trace
 from rest_framework.exceptions import PermissionDenied
 from taggit.managers import TaggableManager
 
+import common.currency
+import common.sequence
 import common.validators
 import InvenTree.conversion
 import InvenTree.exceptions
@@ -1376,7 +1378,7 @@ class PriceBreak(MetaMixin):
             currency_code: The currency code to convert to (e.g "USD" or "AUD")
         """
         try:
-            converted = convert_money(self.price, currency_code)
+            converted = common.currency.convert_money(self.price, currency_code)
         except MissingRate:
             logger.warning(
                 'No currency conversion rate available for %s -> %s',
@@ -1388,6 +1390,16 @@ class PriceBreak(MetaMixin):
         return converted.amount
 
 
+@receiver(post_save, sender=Rate, dispatch_uid='exchange_rate_saved')
+@receiver(post_delete, sender=Rate, dispatch_uid='exchange_rate_deleted')
+@receiver(post_save, sender=ExchangeBackend, dispatch_uid='exchange_backend_saved')
+@receiver(post_delete, sender=ExchangeBackend, dispatch_uid='exchange_backend_deleted')
+def after_exchange_rate_updated(sender, instance, **kwargs):
+    """Callback when an exchange rate is updated or deleted."""
+    # Force reload of the exchange rate matrix
+    common.currency.clear_exchange_rate_matrix()
+
+
 class VerificationMethod(Enum):
     """Class to hold method references."""
 
@@ -2939,6 +2951,70 @@ class DataOutput(models.Model):
         self.save()
 
 
+class ReferenceSequence(models.Model):
+    """Stores the reference number sequence for a model which supports reference patterns.
+
+    Each model which implements the ReferenceIndexingMixin (e.g. PurchaseOrder)
+    has a single ReferenceSequence entry, which tracks the highest reference
+    number which has been issued for that model.
+
+    Refer to common.sequence for the allocation logic.
+
+    Attributes:
+        model_type: The model label (e.g. 'order.purchaseorder')
+        value: The highest reference number which has been issued (used or reserved)
+        reserved: The highest reference number which has been reserved
+    """
+
+    class Meta:
+        """Metaclass options for the ReferenceSequence model."""
+
+        verbose_name = _('Reference Sequence')
+
+    def __str__(self):
+        """String representation of a ReferenceSequence."""
+        return f'{self.model_type}: {self.value}'
+
+    model_type = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_('Model Type'),
+        help_text=_('Model type for this reference sequence'),
+    )
+
+    value = models.BigIntegerField(
+        default=0,
+        verbose_name=_('Value'),
+        help_text=_('Highest reference number issued for this model'),
+    )
+
+    reserved = models.BigIntegerField(
+        default=0,
+        verbose_name=_('Reserved'),
+        help_text=_('Highest reference number reserved for this model'),
+    )
+
+
+@receiver(post_save, dispatch_uid='reference_sequence_post_save')
+def after_reference_saved(sender, instance, **kwargs):
+    """Advance the reference sequence when a reference-indexed model is saved."""
+    if issubclass(sender, InvenTree.models.ReferenceIndexingMixin):
+        # The sequence only needs to be advanced for a new (or changed) reference
+        if kwargs.get('created') or instance.reference_int != getattr(
+            instance, '_stored_reference_int', None
+        ):
+            common.sequence.advance_sequence(sender, instance.reference_int)
+
+        instance._stored_reference_int = instance.reference_int
+
+
+@receiver(post_delete, dispatch_uid='reference_sequence_post_delete')
+def after_reference_deleted(sender, instance, **kwargs):
+    """Rewind the reference sequence when a reference-indexed model is deleted."""
+    if issubclass(sender, InvenTree.models.ReferenceIndexingMixin):
+        common.sequence.rewind_sequence(sender, instance.reference_int)
+
+
 # region Email
 class Priority(models.IntegerChoices):
     """Enumeration for defining email priority levels."""
@@ -0,0 +1,169 @@
+"""Reference number sequences for models which support reference patterns.
+
+The ReferenceSequence table stores the highest reference number issued for each
+model which implements the ReferenceIndexingMixin (e.g. PurchaseOrder, Build):
+
+- The next reference is read from a single (indexed) row, rather than scanning the model table
+- The sequence is advanced atomically (with a single UPDATE query) whenever an instance is saved
+- Blocks of references can be reserved atomically (e.g. for bulk order creation),
+  by locking the sequence row with select_for_update()
+- New instances which are created without a reference are issued the next number in the same way
+- The sequence is seeded from the existing model table the first time it is accessed
+- If the sequence table is not available (e.g. while migrations are being applied),
+  callers fall back to scanning the model table
+
+Reference numbers correspond to the 'reference_int' field of the model,
+i.e. the integer value of the {ref} group in the reference pattern.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import F, Max, Value
+from django.db.models.functions import Greatest
+from django.db.utils import OperationalError, ProgrammingError
+
+import structlog
+
+logger = structlog.get_logger('inventree')
+
+
+def sequence_label(model) -> str:
+    """Return the sequence label for the provided model class (or instance)."""
+    return model._meta.label_lower
+
+
+def highest_reference(model) -> int:
+    """Return the highest reference number currently in use for the provided model."""
+    return model.objects.aggregate(value=Max('reference_int'))['value'] or 0
+
+
+def get_sequence(model):
+    """Return the ReferenceSequence for the provided model.
+
+    If the sequence does not yet exist, it is seeded from the existing model table.
+    """
+    from common.models import ReferenceSequence
+
+    sequence, _created = ReferenceSequence.objects.get_or_create(
+        model_type=sequence_label(model),
+        # Evaluated only when the sequence is created
+        defaults={'value': lambda: highest_reference(model)},
+    )
+
+    return sequence
+
+
+def current_value(model) -> Optional[int]:
+    """Return the highest reference number which has been issued for the provided model.
+
+    Returns:
+        The current sequence value, or None if the sequence table cannot be read
+        (e.g. when the model is used before the common app migrations have been applied)
+    """
+    try:
+        # Use a savepoint, so that a failed query does not break the outer transaction
+        with transaction.atomic():
+            return get_sequence(model).value
+    except (OperationalError, ProgrammingError):
+        return None
+
+
+def advance_sequence(model, value: int):
+    """Ensure that the sequence for the provided model is at least the provided value.
+
+    This is performed with a single atomic UPDATE query.
+    """
+    from common.models import ReferenceSequence
+
+    if not value or value <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            updated = ReferenceSequence.objects.filter(
+                model_type=sequence_label(model)
+            ).update(value=Greatest(F('value'), Value(value)))
+
+            if not updated:
+                # Seed the sequence (which accounts for the provided value)
+                get_sequence(model)
+    except (OperationalError, ProgrammingError):
+        # The sequence table is not available yet - it is seeded when first accessed
+        pass
+
+
+def rewind_sequence(model, value: int):
+    """Rewind the sequence for the provided model, after an instance has been deleted.
+
+    If the deleted instance held the highest reference number, the sequence is reset
+    to the highest remaining reference number - so that the reference may be reused.
+    Reserved reference numbers are never released.
+    """
+    from common.models import ReferenceSequence
+
+    if not value or value <= 0:
+        return
+
+    sequences = ReferenceSequence.objects.filter(
+        model_type=sequence_label(model), value__lte=value
+    )
+
+    try:
+        with transaction.atomic():
+            if sequences.exists():
+                sequences.update(
+                    value=Greatest(F('reserved'), Value(highest_reference(model)))
+                )
+    except (OperationalError, ProgrammingError):
+        # The sequence table is not available yet - it is seeded when first accessed
+        pass
+
+
+def reserve_sequence(model, count: int = 1, hold: bool = True) -> range:
+    """Atomically reserve a block of reference numbers for the provided model.
+
+    The sequence row is locked for the duration of the reservation,
+    so concurrent callers are always issued distinct reference numbers.
+
+    Arguments:
+        model: The model class to reserve reference numbers for
+        count: The number of reference numbers to reserve
+        hold: If True, the reserved numbers are never released (even if they are not used).
+            If False, the numbers may be reused if the instance which holds the highest number is deleted.
+
+    Returns:
+        A range of the reserved reference numbers
+    """
+    from common.models import ReferenceSequence
+
+    count = max(1, int(count))
+
+    with transaction.atomic():
+        # Ensure that the sequence exists before locking it
+        get_sequence(model)
+
+        sequence = ReferenceSequence.objects.select_for_update().get(
+            model_type=sequence_label(model)
+        )
+
+        start = sequence.value + 1
+
+        sequence.value += count
+
+        if hold:
+            sequence.reserved = sequence.value
+
+        sequence.save(update_fields=['value', 'reserved'])
+
+    logger.info(
+        'Reserved %s reference numbers for %s (%s - %s)',
+        count,
+        sequence_label(model),
+        start,
+        start + count - 1,
+    )
+
+    return range(start, start + count)
@@ -482,6 +482,82 @@ class ContentTypeSerializer(serializers.Serializer):
         return obj.app_label in plugin_registry.installed_apps
 
 
+class GenerateReferenceSerializer(serializers.Serializer):
+    """Serializer for reserving one or multiple new reference values.
+
+    The reserved references are allocated atomically,
+    and will not be issued again (even if they are not used).
+    """
+
+    class Meta:
+        """Metaclass options."""
+
+        fields = ['model_type', 'quantity', 'references']
+
+        read_only_fields = ['references']
+
+        write_only_fields = ['model_type', 'quantity']
+
+    def __init__(self, *args, **kwargs):
+        """Override the model_type field to provide dynamic choices."""
+        super().__init__(*args, **kwargs)
+
+        if len(self.fields['model_type'].choices) == 0:
+            self.fields[
+                'model_type'
+            ].choices = common.validators.reference_model_options()
+
+    # Note: The choices are overridden at run-time on class initialization
+    model_type = serializers.ChoiceField(
+        label=_('Model Type'),
+        choices=common.validators.reference_model_options(),
+        required=True,
+        allow_blank=False,
+        allow_null=False,
+        write_only=True,
+        help_text=_('Model type to generate references for'),
+    )
+
+    quantity = serializers.IntegerField(
+        required=False,
+        default=1,
+        min_value=1,
+        max_value=1000,
+        write_only=True,
+        label=_('Quantity'),
+        help_text=_('Number of references to generate'),
+    )
+
+    references = serializers.ListField(
+        child=serializers.CharField(),
+        read_only=True,
+        label=_('References'),
+        help_text=_('Generated reference values'),
+    )
+
+    def validate_model_type(self, model_type):
+        """Ensure that the user has permission to create instances of the selected model."""
+        from users.permissions import check_user_permission
+
+        model_class = common.validators.reference_model_class_from_label(model_type)
+
+        user = self.context['request'].user
+
+        if not check_user_permission(user, model_class, 'add'):
+            raise PermissionDenied(
+                _('User does not have permission to create instances of this model')
+            )
+
+        return model_class
+
+    def save(self):
+        """Reserve the requested number of references."""
+        model_class = self.validated_data['model_type']
+        quantity = self.validated_data.get('quantity', 1)
+
+        return {'references': model_class.reserve_references(quantity)}
+
+
 @register_importer()
 class CustomUnitSerializer(DataImportExportSerializerMixin, InvenTreeModelSerializer):
     """DRF serializer for CustomUnit model."""
@@ -549,6 +625,12 @@ class TaskOverviewSerializer(serializers.Serializer):
         read_only=True,
     )
 
+    pricing_queue = serializers.IntegerField(
+        label=_('Pricing Queue'),
+        help_text='Number of parts waiting for a pricing update',
+        read_only=True,
+    )
+
 
 class PendingTaskSerializer(InvenTreeModelSerializer):
     """Serializer for an individual pending task object."""
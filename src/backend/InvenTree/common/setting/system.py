@@ -195,6 +195,20 @@ SYSTEM_SETTINGS: dict[str, InvenTreeSettingsKeyType] = {
         'default': 0,
         'validator': int,
     },
+    '_EXPLODED_BOM_BUILT': {
+        'name': _('Exploded BOM built'),
+        'description': _('The exploded BOM table has been fully populated'),
+        'default': False,
+        'validator': bool,
+        'hidden': True,
+    },
+    '_BOM_USAGE_BUILT': {
+        'name': _('BOM usage index built'),
+        'description': _('The BOM usage index has been fully populated'),
+        'default': False,
+        'validator': bool,
+        'hidden': True,
+    },
     SystemSetId.GLOBAL_WARNING: {
         'name': _('Active warning codes'),
         'description': _('A dict of active warning codes'),
@@ -535,6 +549,14 @@ SYSTEM_SETTINGS: dict[str, InvenTreeSettingsKeyType] = {
         'default': '',
         'validator': common.validators.validate_icon,
     },
+    'PART_PLANNING_ENABLE': {
+        'name': _('Enable Material Planning'),
+        'description': _(
+            'Track changes to orders and stock for incremental material requirements planning'
+        ),
+        'default': False,
+        'validator': bool,
+    },
     'PRICING_DECIMAL_PLACES_MIN': {
         'name': _('Minimum Pricing Decimal Places'),
         'description': _(
@@ -1114,6 +1136,14 @@ SYSTEM_SETTINGS: dict[str, InvenTreeSettingsKeyType] = {
         'validator': bool,
         'default': False,
     },
+    'STOCKTAKE_INCREMENTAL': {
+        'name': _('Incremental Stock History'),
+        'description': _(
+            'Only recalculate stock history for parts which have changed since their previous entry'
+        ),
+        'validator': bool,
+        'default': False,
+    },
     'STOCKTAKE_AUTO_DAYS': {
         'name': _('Automatic Stocktake Period'),
         'description': _('Number of days between automatic stock history recording'),
@@ -1138,6 +1168,15 @@ SYSTEM_SETTINGS: dict[str, InvenTreeSettingsKeyType] = {
         'units': _('days'),
         'validator': [int, MinValueValidator(30)],
     },
+    'STOCK_TRACKING_ARCHIVE_DAYS': {
+        'name': _('Stock Tracking Archive Interval'),
+        'description': _(
+            'Stock tracking entries older than the specified number of days are moved to the archive (zero to disable)'
+        ),
+        'default': 0,
+        'units': _('days'),
+        'validator': [int, MinValueValidator(0)],
+    },
     'DISPLAY_FULL_NAMES': {
         'name': _('Display Users full names'),
         'description': _('Display Users full names instead of usernames'),
@@ -15,8 +15,9 @@ from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 
 from PIL import Image
@@ -47,6 +48,7 @@ from .models import (
     NotificationMessage,
     ParameterTemplate,
     ProjectCode,
+    ReferenceSequence,
     SelectionList,
     SelectionListEntry,
     WebhookEndpoint,
@@ -1839,6 +1841,156 @@ class ContentTypeAPITest(InvenTreeAPITestCase):
         )
 
 
+class ReferenceSequenceTest(InvenTreeAPITestCase):
+    """Unit tests for the ReferenceSequence model and API endpoint."""
+
+    fixtures = ['company']
+
+    roles = ['purchase_order.add']
+
+    @classmethod
+    def setUpTestData(cls):
+        """Remove any existing purchase orders."""
+        from order.models import PurchaseOrder
+
+        super().setUpTestData()
+
+        PurchaseOrder.objects.all().delete()
+
+    def create_order(self, reference):
+        """Create a new PurchaseOrder with the provided reference."""
+        from company.models import Company
+        from order.models import PurchaseOrder
+
+        return PurchaseOrder.objects.create(
+            supplier=Company.objects.get(pk=1), reference=reference
+        )
+
+    def test_sequence(self):
+        """Test that the reference sequence tracks the highest reference number."""
+        from order.models import PurchaseOrder
+
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0001')
+
+        self.create_order('PO-0010')
+
+        sequence = ReferenceSequence.objects.get(model_type='order.purchaseorder')
+        self.assertEqual(sequence.value, 10)
+
+        # The next reference is read from the sequence (without scanning the table)
+        # The single SELECT query is wrapped in a savepoint
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(PurchaseOrder.get_next_reference(), 11)
+
+        queries = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(len([q for q in queries if q.startswith('SELECT')]), 1)
+        self.assertNotIn('order_purchaseorder', ' '.join(queries))
+
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0011')
+
+        # A lower (manually entered) reference does not rewind the sequence
+        order = self.create_order('PO-0005')
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0011')
+
+        # Saving an order without changing the reference does not touch the sequence
+        order = PurchaseOrder.objects.get(pk=order.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            order.description = 'Updated'
+            order.save()
+
+        self.assertNotIn(
+            'common_referencesequence', ' '.join(q['sql'] for q in ctx.captured_queries)
+        )
+
+        # Deleting the most recent order allows the reference to be reused
+        PurchaseOrder.objects.filter(reference='PO-0010').delete()
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0006')
+
+        order.delete()
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0001')
+
+    def test_change_reference(self):
+        """Test that changing the reference of an existing order advances the sequence."""
+        from order.models import PurchaseOrder
+
+        order = self.create_order('PO-0003')
+        order = PurchaseOrder.objects.get(pk=order.pk)
+
+        order.reference = 'PO-0020'
+        order.save()
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0021')
+
+    def test_reserve(self):
+        """Test that blocks of references can be reserved."""
+        from order.models import PurchaseOrder
+
+        self.create_order('PO-0003')
+
+        self.assertEqual(
+            PurchaseOrder.reserve_references(3), ['PO-0004', 'PO-0005', 'PO-0006']
+        )
+
+        # Reserved references are not issued again
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0007')
+        self.assertEqual(PurchaseOrder.reserve_references(), ['PO-0007'])
+
+        # Reserved references can be used
+        for ref in ['PO-0004', 'PO-0005', 'PO-0006']:
+            self.create_order(ref)
+
+        # Reserved references are not released when an order is deleted
+        PurchaseOrder.objects.all().delete()
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0008')
+
+    def test_create_without_reference(self):
+        """Test that new orders created without a reference are issued distinct references."""
+        from order.models import PurchaseOrder
+
+        self.create_order('PO-0003')
+
+        # Two creates which read the sequence before either is saved
+        # are still issued different references
+        self.assertEqual(PurchaseOrder.reserve_reference(), 'PO-0004')
+        self.assertEqual(PurchaseOrder.reserve_reference(), 'PO-0005')
+
+        self.assertEqual(self.create_order('').reference, 'PO-0006')
+        self.assertEqual(self.create_order('').reference, 'PO-0007')
+
+        # Issued references are released when the most recent order is deleted
+        PurchaseOrder.objects.filter(reference='PO-0007').delete()
+        self.assertEqual(PurchaseOrder.generate_reference(), 'PO-0007')
+
+    def test_reserve_api(self):
+        """Test the API endpoint for reserving references."""
+        url = reverse('api-generate-reference')
+
+        self.create_order('PO-0100')
+
+        response = self.post(
+            url, {'model_type': 'purchaseorder', 'quantity': 5}, expected_code=201
+        )
+
+        self.assertEqual(
+            response.data['references'],
+            ['PO-0101', 'PO-0102', 'PO-0103', 'PO-0104', 'PO-0105'],
+        )
+
+        response = self.post(url, {'model_type': 'purchaseorder'}, expected_code=201)
+        self.assertEqual(response.data['references'], ['PO-0106'])
+
+        # Invalid model type
+        self.post(url, {'model_type': 'part', 'quantity': 1}, expected_code=400)
+
+        # Invalid quantity
+        self.post(
+            url, {'model_type': 'purchaseorder', 'quantity': 0}, expected_code=400
+        )
+
+        # User does not have permission to create sales orders
+        self.post(url, {'model_type': 'salesorder', 'quantity': 1}, expected_code=403)
+
+
 class IconAPITest(InvenTreeAPITestCase):
     """Unit tests for the Icons API."""
 
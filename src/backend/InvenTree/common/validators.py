@@ -76,6 +76,37 @@ def validate_attachment_model_type(value):
         raise ValidationError('Model type does not support attachments')
 
 
+def reference_model_types():
+    """Return a list of models which support reference patterns."""
+    import InvenTree.models
+
+    return list(
+        InvenTree.helpers_model.getModelsWithMixin(
+            InvenTree.models.ReferenceIndexingMixin
+        )
+    )
+
+
+def reference_model_options():
+    """Return a list of options for models which support reference patterns."""
+    return [
+        (model.__name__.lower(), model._meta.verbose_name)
+        for model in reference_model_types()
+    ]
+
+
+def reference_model_class_from_label(label: str):
+    """Return the reference model class for the given label."""
+    if not label:
+        raise ValidationError(_('No reference model type provided'))
+
+    for model in reference_model_types():
+        if model.__name__.lower() == label.lower():
+            return model
+
+    raise ValidationError(_('Invalid reference model type') + f": '{label}'")
+
+
 def validate_notes_model_type(value):
     """Ensure that the provided model type is valid.
 
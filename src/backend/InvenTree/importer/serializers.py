@@ -13,6 +13,7 @@ from InvenTree.serializers import (
     InvenTreeAttachmentSerializerField,
     InvenTreeModelSerializer,
 )
+from order.totals import deferred_total_price
 from users.serializers import UserSerializer
 
 
@@ -208,8 +209,10 @@ class DataImportAcceptRowSerializer(serializers.Serializer):
 
         request = self.context.get('request', None)
 
-        for row in rows:
-            row.validate(commit=True, request=request)
+        # Dependent totals (e.g. order total price) are recalculated once for all rows
+        with deferred_total_price():
+            for row in rows:
+                row.validate(commit=True, request=request)
 
         if session := self.context.get('session', None):
             session.check_complete()
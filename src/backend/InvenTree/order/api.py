@@ -1413,7 +1413,11 @@ class SalesOrderShipmentDetail(SalesOrderShipmentMixin, RetrieveUpdateDestroyAPI
 
 
 class SalesOrderShipmentComplete(CreateAPI):
-    """API endpoint for completing (shipping) a SalesOrderShipment."""
+    """API endpoint for completing (shipping) SalesOrderShipment objects.
+
+    - The detail endpoint completes a single shipment
+    - The list endpoint completes multiple shipments (provided as a list)
+    """
 
     queryset = models.SalesOrderShipment.objects.all()
     serializer_class = serializers.SalesOrderShipmentCompleteSerializer
@@ -1423,12 +1427,11 @@ class SalesOrderShipmentComplete(CreateAPI):
         ctx = super().get_serializer_context()
         ctx['request'] = self.request
 
-        try:
-            ctx['shipment'] = models.SalesOrderShipment.objects.get(
-                pk=self.kwargs.get('pk', None)
-            )
-        except Exception:
-            pass
+        if pk := self.kwargs.get('pk', None):
+            try:
+                ctx['shipment'] = models.SalesOrderShipment.objects.get(pk=pk)
+            except Exception:
+                pass
 
         return ctx
 
@@ -1954,6 +1957,11 @@ order_api_urls = [
             path(
                 'shipment/',
                 include([
+                    path(
+                        'ship/',
+                        SalesOrderShipmentComplete.as_view(),
+                        name='api-so-shipment-ship-multiple',
+                    ),
                     path(
                         '<int:pk>/',
                         include([
@@ -16,7 +16,6 @@ from django.utils.translation import gettext_lazy as _
 
 import structlog
 from djmoney.contrib.exchange.exceptions import MissingRate
-from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 from mptt.models import TreeForeignKey
 
@@ -26,12 +25,14 @@ import InvenTree.models
 import InvenTree.ready
 import InvenTree.tasks
 import InvenTree.validators
+import order.totals
 import order.validators
 import report.mixins
 import stock.models
+import stock.summary
 import users.models as UserModels
 from build.status_codes import BuildStatus
-from common.currency import currency_code_default
+from common.currency import convert_money, currency_code_default
 from common.notifications import InvenTreeNotificationBodies
 from common.settings import get_global_setting
 from company.models import Address, Company, Contact, SupplierPart
@@ -75,13 +76,7 @@ class TotalPriceMixin(models.Model):
         # Recalculate total_price for this order
         self.update_total_price(commit=False)
 
-        if hasattr(self, '_SAVING_TOTAL_PRICE') and self._SAVING_TOTAL_PRICE:
-            # Avoid recursion on save
-            return super().save(*args, **kwargs)
-        self._SAVING_TOTAL_PRICE = True
-
-        # Save the object as we can not access foreign/m2m fields before saving
-        self.update_total_price(commit=True)
+        super().save(*args, **kwargs)
 
     total_price = InvenTreeModelMoneyField(
         null=True,
@@ -122,8 +117,63 @@ class TotalPriceMixin(models.Model):
         """Recalculate and save the total_price for this order."""
         self.total_price = self.calculate_total_price(target_currency=self.currency)
 
-        if commit:
-            self.save()
+        if commit and self.pk:
+            # Only the total price is written to the database
+            type(self).objects.filter(pk=self.pk).update(
+                total_price=self.total_price.amount if self.total_price else None,
+                total_price_currency=self.currency,
+            )
+
+    def apply_line_total(self, previous: Optional[Money], current: Optional[Money]):
+        """Apply the change in a line item total to the stored total_price for this order.
+
+        Rather than recalculating the total price from every line item,
+        the converted difference is added to the stored total with a single query.
+
+        The difference is converted at the current exchange rates, so the stored total
+        drifts from a full recalculation when the rates change. Open orders are
+        recalculated after each exchange rate update (see order.tasks.reconcile_total_prices).
+
+        Arguments:
+            previous: The previous total of the line item (or None)
+            current: The new total of the line item (or None)
+        """
+        if self.pk is None:
+            return
+
+        if order.totals.is_deferred():
+            # The total price will be recalculated once (on commit)
+            order.totals.schedule_total_price(self)
+            return
+
+        changes = [value for value in [current] if value]
+        changes += [-value for value in [previous] if value]
+
+        if not changes:
+            return
+
+        currency = self.currency
+
+        try:
+            delta = order.totals.convert_totals(changes, currency)
+        except MissingRate:
+            # Fall back to recalculating the total price (which records the error)
+            self.update_total_price()
+            return
+
+        updated = (
+            type(self)
+            .objects.filter(
+                pk=self.pk, total_price__isnull=False, total_price_currency=currency
+            )
+            .update(total_price=F('total_price') + delta.amount)
+        )
+
+        if not updated:
+            # The stored total price is invalid, or in a different currency
+            self.update_total_price()
+        elif self.total_price is not None:
+            self.total_price = Money(self.total_price.amount + delta.amount, currency)
 
     def calculate_total_price(self, target_currency=None):
         """Calculates the total price of all order lines, and converts to the specified target currency.
@@ -143,35 +193,23 @@ class TotalPriceMixin(models.Model):
         if self.pk is None:
             return total
 
-        # order items
-        for line in self.lines.all():
-            if not line.price:
-                continue
-
-            try:
-                total += line.quantity * convert_money(line.price, target_currency)
-            except MissingRate:
-                log_error('order.calculate_total_price')
-                logger.exception("Missing exchange rate for '%s'", target_currency)
-
-                # Return None to indicate the calculated price is invalid
-                return None
-
-        # extra items
-        for line in self.extra_lines.all():
-            if not line.price:
-                continue
-
-            try:
-                total += line.quantity * convert_money(line.price, target_currency)
-            except MissingRate:
-                # Record the error, try to press on
+        # Sum the line totals in the database, so that each currency is converted once
+        totals = [
+            Money(amount, currency)
+            for lines in [self.lines, self.extra_lines]
+            for currency, amount in order.totals.currency_totals(
+                lines.all(), lines.model.PRICE_FIELD
+            ).items()
+        ]
 
-                log_error('order.calculate_total_price')
-                logger.exception("Missing exchange rate for '%s'", target_currency)
+        try:
+            total = order.totals.convert_totals(totals, target_currency)
+        except MissingRate:
+            log_error('order.calculate_total_price')
+            logger.exception("Missing exchange rate for '%s'", target_currency)
 
-                # Return None to indicate the calculated price is invalid
-                return None
+            # Return None to indicate the calculated price is invalid
+            return None
 
         # set decimal-places
         total.decimal_places = 4
@@ -326,6 +364,7 @@ class Order(
                 })
 
         # Reference calculations
+        self.assign_reference()
         self.reference_int = self.rebuild_reference_field(self.reference)
         if not self.creation_date:
             self.creation_date = InvenTree.helpers.current_date()
@@ -1140,6 +1179,11 @@ class PurchaseOrder(TotalPriceMixin, Order):
         if len(bulk_create_items) > 0:
             stock.models.StockItem.objects.bulk_create(bulk_create_items)
 
+            # bulk_create does not send post_save signals, so update the location summary here
+            stock.summary.update_location_summary(
+                stock.summary.count_locations(bulk_create_items)
+            )
+
             # Fetch them back again
             tree_ids = [item.tree_id for item in bulk_create_items]
 
@@ -1725,10 +1769,13 @@ class OrderLineItem(InvenTree.models.InvenTreeMetadataModel):
 
         abstract = True
 
+    # Name of the (unit) price field for this line item
+    PRICE_FIELD = 'price'
+
     def save(self, *args, **kwargs):
         """Custom save method for the OrderLineItem model.
 
-        Calls save method on the linked order
+        Updates the total price of the linked order
         """
         if self.order and self.order.check_locked():
             raise ValidationError({
@@ -1737,22 +1784,49 @@ class OrderLineItem(InvenTree.models.InvenTreeMetadataModel):
 
         update_order = kwargs.pop('update_order', True)
 
+        previous = self.saved_line_price() if update_order else None
+
         super().save(*args, **kwargs)
+
         if update_order and self.order:
-            self.order.save()
+            self.order.apply_line_total(previous, self.total_line_price)
 
     def delete(self, *args, **kwargs):
         """Custom delete method for the OrderLineItem model.
 
-        Calls save method on the linked order
+        Updates the total price of the linked order
         """
         if self.order and self.order.check_locked():
             raise ValidationError({
                 'non_field_errors': _('The order is locked and cannot be modified')
             })
 
+        previous = self.saved_line_price()
+
         super().delete(*args, **kwargs)
-        self.order.save()
+
+        self.order.apply_line_total(previous, None)
+
+    def saved_line_price(self):
+        """Return the total price for this line item, as stored in the database."""
+        if self.pk is None:
+            return None
+
+        row = (
+            type(self)
+            .objects.filter(pk=self.pk)
+            .values_list('quantity', self.PRICE_FIELD, f'{self.PRICE_FIELD}_currency')
+            .first()
+        )
+
+        if row is None:
+            return None
+
+        quantity, price, currency = row
+
+        return order.totals.line_total(
+            quantity, Money(price, currency) if price is not None else None
+        )
 
     quantity = RoundingDecimalField(
         verbose_name=_('Quantity'),
@@ -1961,6 +2035,8 @@ class PurchaseOrderLineItem(OrderLineItem):
         help_text=_('Unit purchase price'),
     )
 
+    PRICE_FIELD = 'purchase_price'
+
     @property
     def price(self):
         """Return the 'purchase_price' field as 'price'."""
@@ -2120,6 +2196,8 @@ class SalesOrderLineItem(OrderLineItem):
         help_text=_('Unit sale price'),
     )
 
+    PRICE_FIELD = 'sale_price'
+
     @property
     def price(self):
         """Return the 'sale_price' field as 'price'."""
@@ -2404,54 +2482,61 @@ class SalesOrderShipment(
         1. Update any stock items associated with this shipment
         2. Update the "shipped" quantity of all associated line items
         3. Set the "shipment_date" to now
-        """
-        import order.tasks
-
-        # Check if the shipment can be completed (throw error if not)
-        self.check_can_complete()
 
-        # Update the "shipment" date
-        self.shipment_date = kwargs.get(
-            'shipment_date', InvenTree.helpers.current_date()
-        )
-        self.shipped_by = user
+        Refer to SalesOrderShipment.complete_shipments for keyword arguments.
+        """
+        SalesOrderShipment.complete_shipments([self], user, **kwargs)
 
-        # Was a tracking number provided?
-        tracking_number = kwargs.get('tracking_number')
+    @staticmethod
+    @transaction.atomic
+    def complete_shipments(shipments: list, user, **kwargs):
+        """Complete multiple shipments at once.
 
-        if tracking_number is not None:
-            self.tracking_number = tracking_number
+        The allocated stock for all shipments is processed in a single background task.
 
-        # Was an invoice number provided?
-        invoice_number = kwargs.get('invoice_number')
+        Arguments:
+            shipments: List of SalesOrderShipment objects to complete
+            user: The user completing the shipments
 
-        if invoice_number is not None:
-            self.invoice_number = invoice_number
+        Keyword Arguments:
+            shipment_date: The date the shipments were sent (default = today)
+            tracking_number: Optional tracking number
+            invoice_number: Optional invoice number
+            link: Optional link
+            delivery_date: Optional delivery date
+        """
+        import order.tasks
 
-        # Was a link provided?
-        link = kwargs.get('link')
+        for shipment in shipments:
+            # Check if the shipment can be completed (throw error if not)
+            shipment.check_can_complete()
 
-        if link is not None:
-            self.link = link
+            # Update the "shipment" date
+            shipment.shipment_date = kwargs.get(
+                'shipment_date', InvenTree.helpers.current_date()
+            )
+            shipment.shipped_by = user
 
-        # Was a delivery date provided?
-        delivery_date = kwargs.get('delivery_date')
+            # Update any other provided fields
+            for field in ['tracking_number', 'invoice_number', 'link', 'delivery_date']:
+                value = kwargs.get(field)
 
-        if delivery_date is not None:
-            self.delivery_date = delivery_date
+                if value is not None:
+                    setattr(shipment, field, value)
 
-        self.save()
+            shipment.save()
 
-        # Offload the "completion" of each line item to the background worker
+        # Offload the "completion" of all allocations to the background worker
         # This may take some time, and we don't want to block the main thread
         InvenTree.tasks.offload_task(
-            order.tasks.complete_sales_order_shipment,
-            shipment_id=self.pk,
+            order.tasks.complete_sales_order_shipments,
+            shipment_ids=[shipment.pk for shipment in shipments],
             user_id=user.pk if user else None,
             group='sales_order',
         )
 
-        trigger_event(SalesOrderEvents.SHIPMENT_COMPLETE, id=self.pk)
+        for shipment in shipments:
+            trigger_event(SalesOrderEvents.SHIPMENT_COMPLETE, id=shipment.pk)
 
 
 class SalesOrderExtraLine(OrderExtraLine):
@@ -2622,7 +2707,7 @@ class SalesOrderAllocation(models.Model):
 
         # Update the 'shipped' quantity
         self.line.shipped += self.quantity
-        self.line.save()
+        self.line.save(update_order=False)
 
         # Update our own reference to the StockItem
         # (It may have changed if the stock was split)
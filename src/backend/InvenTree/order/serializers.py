@@ -15,6 +15,7 @@ from sql_util.utils import SubqueryCount, SubquerySum
 import build.serializers
 import common.filters
 import order.models
+import order.totals
 import part.filters as part_filters
 import part.models as part_models
 import stock.models
@@ -249,16 +250,18 @@ class AbstractOrderSerializer(
                 # If the order ID is invalid, raise a validation error
                 raise ValidationError(_('Invalid order ID'))
 
-            if copy_lines:
-                for line in copy_from.lines.all():
-                    instance.clean_line_item(line)
-                    line.save()
+            # The order total is recalculated once, after all lines are copied
+            with order.totals.deferred_total_price():
+                if copy_lines:
+                    for line in copy_from.lines.all():
+                        instance.clean_line_item(line)
+                        line.save()
 
-            if copy_extra_lines:
-                for line in copy_from.extra_lines.all():
-                    line.pk = None
-                    line.order = instance
-                    line.save()
+                if copy_extra_lines:
+                    for line in copy_from.extra_lines.all():
+                        line.pk = None
+                        line.order = instance
+                        line.save()
 
         return instance
 
@@ -1433,7 +1436,7 @@ class SalesOrderAllocationSerializer(
 
 
 class SalesOrderShipmentCompleteSerializer(serializers.ModelSerializer):
-    """Serializer for completing (shipping) a SalesOrderShipment."""
+    """Serializer for completing (shipping) one or more SalesOrderShipment objects."""
 
     class Meta:
         """Metaclass options."""
@@ -1441,6 +1444,7 @@ class SalesOrderShipmentCompleteSerializer(serializers.ModelSerializer):
         model = order.models.SalesOrderShipment
 
         fields = [
+            'shipments',
             'shipment_date',
             'delivery_date',
             'tracking_number',
@@ -1448,6 +1452,26 @@ class SalesOrderShipmentCompleteSerializer(serializers.ModelSerializer):
             'link',
         ]
 
+    shipments = serializers.PrimaryKeyRelatedField(
+        queryset=order.models.SalesOrderShipment.objects.all(),
+        many=True,
+        required=False,
+        write_only=True,
+        label=_('Shipments'),
+        help_text=_('List of shipments to complete'),
+    )
+
+    def get_shipments(self, data) -> list:
+        """Return the list of shipments to complete.
+
+        A single shipment may be provided via the serializer context (detail endpoint),
+        otherwise a list of shipments must be provided.
+        """
+        if shipment := self.context.get('shipment', None):
+            return [shipment]
+
+        return data.get('shipments', [])
+
     def validate(self, data):
         """Custom validation for the serializer.
 
@@ -1455,23 +1479,27 @@ class SalesOrderShipmentCompleteSerializer(serializers.ModelSerializer):
         """
         data = super().validate(data)
 
-        shipment = self.context.get('shipment', None)
+        shipments = self.get_shipments(data)
 
-        if not shipment:
+        if not shipments:
             raise ValidationError(_('No shipment details provided'))
 
-        shipment.check_can_complete(raise_error=True)
+        if len({shipment.pk for shipment in shipments}) != len(shipments):
+            raise ValidationError(_('Duplicate shipments provided'))
+
+        for shipment in shipments:
+            shipment.check_can_complete(raise_error=True)
 
         return data
 
     def save(self):
-        """Save the serializer to complete the SalesOrderShipment."""
-        shipment = self.context.get('shipment', None)
+        """Save the serializer to complete the SalesOrderShipment(s)."""
+        data = self.validated_data
 
-        if not shipment:
-            return
+        shipments = self.get_shipments(data)
 
-        data = self.validated_data
+        if not shipments:
+            return
 
         request = self.context.get('request')
         user = request.user if request else None
@@ -1484,13 +1512,15 @@ class SalesOrderShipmentCompleteSerializer(serializers.ModelSerializer):
             # checks if shipment_date exists in data
             shipment_date = now
 
-        shipment.complete_shipment(
+        # Fields which are not provided are left unchanged
+        order.models.SalesOrderShipment.complete_shipments(
+            shipments,
             user,
-            tracking_number=data.get('tracking_number', shipment.tracking_number),
-            invoice_number=data.get('invoice_number', shipment.invoice_number),
-            link=data.get('link', shipment.link),
+            tracking_number=data.get('tracking_number'),
+            invoice_number=data.get('invoice_number'),
+            link=data.get('link'),
             shipment_date=shipment_date,
-            delivery_date=data.get('delivery_date', shipment.delivery_date),
+            delivery_date=data.get('delivery_date'),
         )
 
 
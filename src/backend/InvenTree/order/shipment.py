@@ -0,0 +1,286 @@
+"""Bulk shipment completion for the Order app.
+
+The SalesOrderShipmentCompletion class completes the stock allocations for
+one or many SalesOrderShipment objects (e.g. when shipments are sent) at once:
+
+- All affected allocations and stock items are locked with a single select_for_update() query
+- Partial allocations are split from the allocated stock item in memory,
+  and the new stock items are written in bulk (see stock.split.StockItemSplit)
+- Shipped stock items are written with a single bulk_update operation
+- Stock tracking entries are written with a single bulk_create operation
+- The shipped quantity of each SalesOrderLineItem is updated with a single (batched) UPDATE
+- Background tasks (low stock notification, pricing updates) are scheduled once per part
+
+All operations are performed within a single database transaction.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+
+import structlog
+
+import InvenTree.helpers
+import stock.summary
+from common.settings import get_global_setting
+from plugin import PluginMixinEnum, registry
+from plugin.events import trigger_event
+from stock.events import StockEvents
+from stock.split import StockItemSplit
+from stock.status_codes import StockHistoryCode
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of objects to write in a single bulk operation
+SHIPMENT_CHUNK_SIZE = 500
+
+# Fields which may be modified when stock is shipped
+SHIPMENT_FIELDS = ['quantity', 'location', 'sales_order', 'customer', 'rght', 'updated']
+
+
+class SalesOrderShipmentCompletion:
+    """Complete the SalesOrderAllocation objects for multiple shipments in bulk.
+
+    For each SalesOrderAllocation:
+
+    - If less than the allocated stock item quantity is shipped, the stock item is split
+    - The shipped stock item is assigned to the customer (and removed from stock)
+    - The "shipped" quantity of the associated line item is increased
+
+    Usage:
+        SalesOrderShipmentCompletion(shipments, user).run()
+    """
+
+    def __init__(self, shipments, user: User | None = None):
+        """Initialize the shipment completion operation.
+
+        Arguments:
+            shipments: List (or queryset) of SalesOrderShipment objects (or IDs)
+            user: The user completing the shipments
+        """
+        self.shipments = [getattr(shipment, 'pk', shipment) for shipment in shipments]
+        self.user = user
+
+        self.now = InvenTree.helpers.current_time()
+
+        # Locked SalesOrderAllocation and StockItem objects, keyed by primary key
+        self.allocations: dict = {}
+        self.items: dict = {}
+
+        # SalesOrder objects, keyed by primary key
+        self.orders: dict = {}
+
+        # Original location of each StockItem, keyed by primary key
+        self.locations: dict = {}
+
+        # Existing StockItem objects which have been modified, keyed by primary key
+        self.modified: dict = {}
+
+        # Stock items which are split from an allocated stock item
+        self.splitter = StockItemSplit(user=user)
+
+        # List of (allocation, original_item, shipped_item) tuples for each allocation
+        self.shipped: list = []
+
+        # Shipped quantity for each SalesOrderLineItem, keyed by primary key
+        self.line_quantities: dict = defaultdict(Decimal)
+
+        # Quantity of each allocated StockItem which has not yet been shipped, keyed by primary key
+        self.available: dict = {}
+
+    def lock(self):
+        """Fetch (and lock) all allocations and stock items referenced by the shipments."""
+        from order.models import SalesOrder, SalesOrderAllocation
+        from part.models import Part
+        from stock.models import StockItem
+
+        self.allocations = (
+            SalesOrderAllocation.objects
+            .select_for_update(of=('self',))
+            .filter(shipment__in=self.shipments)
+            .annotate(sales_order_id=F('line__order'))
+            .in_bulk()
+        )
+
+        self.items = StockItem.objects.select_for_update().in_bulk({
+            allocation.item_id for allocation in self.allocations.values()
+        })
+
+        self.orders = SalesOrder.objects.select_related('customer').in_bulk({
+            allocation.sales_order_id for allocation in self.allocations.values()
+        })
+
+        parts = Part.objects.in_bulk({item.part_id for item in self.items.values()})
+
+        for item in self.items.values():
+            item.part = parts[item.part_id]
+            self.locations[item.pk] = item.location_id
+
+    def ship(self):
+        """Calculate the new state of each allocated StockItem."""
+        for item in self.items.values():
+            self.available[item.pk] = Decimal(item.quantity)
+
+        for pk in sorted(self.allocations.keys()):
+            allocation = self.allocations[pk]
+            order = self.orders[allocation.sales_order_id]
+
+            original = self.items[allocation.item_id]
+
+            # Ensure we are not shipping more than available
+            # (the same stock item may be allocated more than once)
+            quantity = min(Decimal(allocation.quantity), self.available[original.pk])
+
+            if quantity <= 0:
+                # The stock item has already been shipped
+                continue
+
+            self.available[original.pk] -= quantity
+            self.modified[original.pk] = original
+
+            # Split the allocated stock if there are more available than allocated
+            if quantity < original.quantity:
+                item = self.splitter.split(original, quantity)
+            else:
+                item = original
+
+            # Assign the stock item to the customer
+            item.sales_order_id = order.pk
+            item.customer_id = order.customer_id
+            item.location = None
+
+            self.shipped.append((allocation, original, item))
+
+            # Increase the "shipped" count for the associated line item
+            self.line_quantities[allocation.line_id] += quantity
+
+    def tracking_entries(self) -> list:
+        """Construct the stock tracking entries for this operation.
+
+        Note that this must be called after the new StockItem objects have been created.
+        """
+        tracking = self.splitter.tracking_entries()
+
+        for allocation, _original, item in self.shipped:
+            order = self.orders[allocation.sales_order_id]
+
+            deltas = {}
+
+            if customer := order.customer:
+                deltas['customer'] = customer.pk
+                deltas['customer_name'] = customer.name
+
+            deltas['salesorder'] = order.pk
+
+            tracking.append(
+                item.add_tracking_entry(
+                    StockHistoryCode.SHIPPED_AGAINST_SALES_ORDER,
+                    self.user,
+                    deltas,
+                    commit=False,
+                )
+            )
+
+        return tracking
+
+    def update_allocations(self):
+        """Update the shipped quantity of each line item, and the allocated stock items."""
+        from order.models import SalesOrderAllocation, SalesOrderLineItem
+
+        for chunk in InvenTree.helpers.chunked(
+            self.line_quantities.items(), SHIPMENT_CHUNK_SIZE
+        ):
+            SalesOrderLineItem.objects.filter(pk__in=[pk for pk, _q in chunk]).update(
+                shipped=F('shipped')
+                + Case(
+                    *[When(pk=pk, then=Value(q)) for pk, q in chunk],
+                    default=Value(0),
+                    output_field=DecimalField(max_digits=15, decimal_places=5),
+                )
+            )
+
+        updated = []
+
+        for allocation, _original, item in self.shipped:
+            # The allocation now points to the shipped (split) item
+            if allocation.item_id != item.pk:
+                allocation.item_id = item.pk
+                updated.append(allocation)
+
+        SalesOrderAllocation.objects.bulk_update(
+            updated, ['item'], batch_size=SHIPMENT_CHUNK_SIZE
+        )
+
+    def trigger_events(self):
+        """Trigger plugin events for the shipped stock items."""
+        if not get_global_setting('ENABLE_PLUGINS_EVENTS', False):
+            return
+
+        for allocation, original, _item in self.shipped:
+            order = self.orders[allocation.sales_order_id]
+
+            trigger_event(
+                StockEvents.ITEM_ASSIGNED_TO_CUSTOMER,
+                id=original.pk,
+                customer=order.customer_id,
+            )
+
+    def commit(self):
+        """Write all pending changes to the database."""
+        from stock.models import StockItem, StockItemTracking, stock_changed
+
+        items = list(self.modified.values())
+
+        if registry.with_mixin(PluginMixinEnum.VALIDATION):
+            for item in [*items, *self.splitter.created]:
+                item.run_plugin_validation()
+
+        for item in items:
+            item.updated = self.now
+
+        self.splitter.create(updated=self.now)
+
+        StockItem.objects.bulk_update(
+            items, SHIPMENT_FIELDS, batch_size=SHIPMENT_CHUNK_SIZE
+        )
+
+        # bulk_update does not send post_save signals, so update the location summary here
+        stock.summary.update_location_summary(
+            stock.summary.location_changes(self.locations, items)
+        )
+
+        StockItemTracking.objects.bulk_create(
+            self.tracking_entries(), batch_size=SHIPMENT_CHUNK_SIZE
+        )
+
+        self.update_allocations()
+        self.splitter.complete()
+        self.trigger_events()
+
+        stock_changed([item.part for item in self.items.values()], create=True)
+
+    def run(self):
+        """Perform the shipment completion, within a single transaction."""
+        if not self.shipments:
+            return
+
+        with transaction.atomic():
+            self.lock()
+
+            if not self.allocations:
+                return
+
+            self.ship()
+            self.commit()
+
+        logger.info(
+            'Shipped %s allocations against %s shipments (%s stock items split)',
+            len(self.shipped),
+            len(self.shipments),
+            len(self.splitter.splits),
+        )
@@ -3,8 +3,7 @@
 from datetime import datetime, timedelta
 
 from django.contrib.auth.models import Group, User
-from django.db import transaction
-from django.db.models import F
+from django.db.models import Exists, F, OuterRef, Q
 from django.utils.translation import gettext_lazy as _
 
 import structlog
@@ -242,14 +241,26 @@ def complete_sales_order_shipment(shipment_id: int, user_id: int) -> None:
     At this stage, the shipment is assumed to be complete,
     and we need to perform the required "processing" tasks.
     """
-    try:
-        shipment = order.models.SalesOrderShipment.objects.get(pk=shipment_id)
-    except Exception:
+    complete_sales_order_shipments([shipment_id], user_id)
+
+
+@tracer.start_as_current_span('complete_sales_order_shipments')
+def complete_sales_order_shipments(shipment_ids: list[int], user_id: int) -> None:
+    """Complete allocations for multiple pending shipments (in a single operation)."""
+    from order.shipment import SalesOrderShipmentCompletion
+
+    shipments = list(
+        order.models.SalesOrderShipment.objects.filter(pk__in=shipment_ids)
+    )
+
+    if len(shipments) < len(set(shipment_ids)):
         # Shipping object does not exist
         logger.warning(
-            'Failed to complete shipment - no matching SalesOrderShipment for ID <%s>',
-            shipment_id,
+            'Failed to complete shipment - no matching SalesOrderShipment for IDs <%s>',
+            sorted(set(shipment_ids) - {shipment.pk for shipment in shipments}),
         )
+
+    if not shipments:
         return
 
     try:
@@ -257,8 +268,46 @@ def complete_sales_order_shipment(shipment_id: int, user_id: int) -> None:
     except Exception:
         user = None
 
-    logger.info('Completing SalesOrderShipment <%s>', shipment)
+    logger.info('Completing %s SalesOrderShipment(s)', len(shipments))
+
+    SalesOrderShipmentCompletion(shipments, user).run()
+
+
+@tracer.start_as_current_span('reconcile_total_prices')
+def reconcile_total_prices():
+    """Recalculate the total price of open orders which are affected by exchange rates.
+
+    Line item changes are applied to the stored order total at the exchange rates
+    which apply when the change is made (see TotalPriceMixin.apply_line_total).
+    This task is run after the exchange rates are updated, and recalculates each
+    open order which contains lines in another currency (or has no valid total).
+    """
+    for model, statuses in [
+        (order.models.PurchaseOrder, PurchaseOrderStatusGroups.OPEN),
+        (order.models.SalesOrder, SalesOrderStatusGroups.OPEN),
+        (order.models.ReturnOrder, ReturnOrderStatusGroups.OPEN),
+    ]:
+        affected = Q(total_price__isnull=True)
+
+        for lines in [model.lines, model.extra_lines]:
+            line_model = lines.rel.related_model
+            price_field = line_model.PRICE_FIELD
+
+            affected |= Exists(
+                line_model.objects.filter(
+                    order=OuterRef('pk'), **{f'{price_field}__isnull': False}
+                ).exclude(**{
+                    f'{price_field}_currency': OuterRef('total_price_currency')
+                })
+            )
+
+        orders = model.objects.filter(affected, status__in=statuses)
+
+        logger.info(
+            'Recalculating total price for %s open %s(s)',
+            orders.count(),
+            model.__name__,
+        )
 
-    with transaction.atomic():
-        for allocation in shipment.allocations.all():
-            allocation.complete_allocation(user=user)
+        for instance in orders:
+            instance.update_total_price()
@@ -2231,6 +2231,77 @@ class SalesOrderAllocateTest(OrderTest):
         self.assertEqual(self.shipment.delivery_date, datetime(2023, 12, 5).date())
         self.assertTrue(self.shipment.is_delivered())
 
+    def test_shipment_complete_multiple(self):
+        """Test that multiple shipments can be completed in a single API call."""
+        url = reverse('api-so-shipment-ship-multiple')
+
+        shipment_2 = models.SalesOrderShipment.objects.create(
+            order=self.order, reference='2'
+        )
+
+        lines = list(self.order.lines.all())
+        items = {}
+
+        # Allocate stock (from the same stock item) to both shipments
+        for line in lines:
+            item = StockItem.objects.create(part=line.part, quantity=100)
+            items[line.pk] = item
+
+            models.SalesOrderAllocation.objects.create(
+                shipment=self.shipment, line=line, item=item, quantity=2
+            )
+
+            models.SalesOrderAllocation.objects.create(
+                shipment=shipment_2, line=line, item=item, quantity=3
+            )
+
+        # No shipments provided
+        response = self.post(url, {'shipments': []}, expected_code=400)
+        self.assertIn('No shipment details provided', str(response.data))
+
+        response = self.post(
+            url,
+            {
+                'shipments': [self.shipment.pk, shipment_2.pk],
+                'tracking_number': 'TRK-MULTI',
+            },
+            expected_code=201,
+        )
+
+        for shipment in [self.shipment, shipment_2]:
+            shipment.refresh_from_db()
+            self.assertTrue(shipment.is_complete())
+            self.assertEqual(shipment.tracking_number, 'TRK-MULTI')
+
+        # Shipments which are already complete cannot be completed again
+        response = self.post(url, {'shipments': [self.shipment.pk]}, expected_code=400)
+        self.assertIn('Shipment has already been sent', str(response.data))
+
+        for line in lines:
+            line.refresh_from_db()
+            self.assertEqual(line.shipped, 5)
+
+            item = items[line.pk]
+            item.refresh_from_db()
+            self.assertEqual(item.quantity, 95)
+
+            # Each allocation now points to a new (split) stock item
+            shipped = StockItem.objects.filter(
+                sales_order=self.order, part=line.part
+            ).order_by('quantity')
+
+            self.assertEqual([s.quantity for s in shipped], [2, 3])
+
+            for s in shipped:
+                self.assertEqual(s.parent, item)
+                self.assertEqual(s.customer, self.order.customer)
+                self.assertIsNone(s.location)
+
+            self.assertEqual(
+                set(line.allocations.values_list('item', flat=True)),
+                {s.pk for s in shipped},
+            )
+
     def test_shipment_delivery_date(self):
         """Test delivery date functions via API."""
         url = reverse('api-so-shipment-detail', kwargs={'pk': self.shipment.pk})
@@ -19,6 +19,7 @@ from order.models import (
     SalesOrderLineItem,
     SalesOrderShipment,
 )
+from order.shipment import SalesOrderShipmentCompletion
 from part.models import Part
 from stock.models import StockItem
 from users.models import Owner
@@ -368,6 +369,44 @@ class SalesOrderTest(InvenTreeTestCase):
         self.assertIsNone(self.shipment.delivery_date)
         self.assertFalse(self.shipment.is_delivered())
 
+    def test_shipment_duplicate_allocation(self):
+        """Test that a stock item allocated more than once is not shipped twice."""
+        shipment_2 = SalesOrderShipment.objects.create(order=self.order, reference='2')
+
+        item_a = StockItem.objects.create(part=self.part, quantity=5)
+        item_b = StockItem.objects.create(part=self.part, quantity=4)
+
+        # Over-allocate each stock item (bypassing validation)
+        SalesOrderAllocation.objects.bulk_create([
+            SalesOrderAllocation(
+                line=self.line, shipment=shipment, item=item, quantity=4
+            )
+            for shipment in [self.shipment, shipment_2]
+            for item in [item_a, item_b]
+        ])
+
+        N = StockItem.objects.count()
+
+        SalesOrderShipmentCompletion([self.shipment, shipment_2]).run()
+
+        # Only the first allocation of item_a requires a split
+        self.assertEqual(StockItem.objects.count(), N + 1)
+
+        self.line.refresh_from_db()
+        self.assertEqual(self.line.shipped, 9)
+
+        # The second allocation of item_a ships the remaining quantity
+        item_a.refresh_from_db()
+        self.assertEqual(item_a.quantity, 1)
+        self.assertEqual(item_a.customer, self.customer)
+        self.assertEqual(item_a.children.get().quantity, 4)
+
+        # The second allocation of item_b is skipped
+        item_b.refresh_from_db()
+        self.assertEqual(item_b.quantity, 4)
+        self.assertEqual(item_b.customer, self.customer)
+        self.assertEqual(item_b.children.count(), 0)
+
     def test_shipment_address(self):
         """Unit tests for SalesOrderShipment address field."""
         shipment = SalesOrderShipment.objects.first()
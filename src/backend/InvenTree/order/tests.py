@@ -6,10 +6,13 @@ from decimal import Decimal
 import django.core.exceptions as django_exceptions
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.db import transaction
 from django.test import TestCase
 
+from djmoney.contrib.exchange.models import Rate
 from djmoney.money import Money
 
+import common.currency
 import common.models
 import order.tasks
 from common.settings import get_global_setting, set_global_setting
@@ -468,6 +471,141 @@ class OrderTest(ExchangeRateMixin, PluginRegistryMixin, TestCase):
         self.assertEqual(item.purchase_price_currency, 'CAD')
         self.assertAlmostEqual(item.purchase_price.amount, Decimal(1.25), 3)
 
+    def test_total_price(self):
+        """Test that the order total is updated as line items are changed."""
+        self.generate_exchange_rates()
+
+        set_global_setting('INVENTREE_DEFAULT_CURRENCY', 'USD')
+
+        order = PurchaseOrder.objects.get(pk=7)
+        order.order_currency = 'USD'
+        order.save()
+
+        self.assertEqual(order.total_price.amount, 0)
+
+        sku = SupplierPart.objects.get(SKU='ZERGM312')
+
+        def check_total(expected):
+            order.refresh_from_db()
+            self.assertAlmostEqual(order.total_price.amount, Decimal(expected), 3)
+            self.assertEqual(
+                order.total_price.amount.quantize(Decimal('0.001')),
+                order.calculate_total_price('USD').amount.quantize(Decimal('0.001')),
+            )
+
+        line = PurchaseOrderLineItem.objects.create(
+            order=order, part=sku, quantity=10, purchase_price=Money(2, 'USD')
+        )
+
+        check_total(20)
+
+        extra = PurchaseOrderExtraLine.objects.create(
+            order=order, quantity=3, price=Money(9, 'GBP')
+        )
+
+        check_total(50)
+
+        # Change the quantity and currency of a line item
+        line.quantity = 5
+        line.purchase_price = Money(3.4, 'CAD')
+        line.save()
+
+        check_total(40)
+
+        extra.delete()
+
+        check_total(10)
+
+        # Changing the order currency recalculates the total
+        order.order_currency = 'AUD'
+        order.save()
+        order.refresh_from_db()
+
+        self.assertEqual(order.total_price.currency.code, 'AUD')
+        self.assertAlmostEqual(order.total_price.amount, Decimal(15), 3)
+
+    def test_deferred_total_price(self):
+        """Test that deferred order totals are recalculated once on commit."""
+        import order.totals as order_totals
+        from order.totals import deferred_total_price
+
+        order = PurchaseOrder.objects.get(pk=7)
+        order.save()
+
+        sku = SupplierPart.objects.get(SKU='ZERGM312')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with deferred_total_price():
+                for idx in range(10):
+                    PurchaseOrderLineItem.objects.create(
+                        order=order,
+                        part=sku,
+                        quantity=idx + 1,
+                        purchase_price=Money(1, order.currency),
+                    )
+
+                    PurchaseOrderExtraLine.objects.create(
+                        order=order, quantity=1, price=Money(2, order.currency)
+                    )
+
+                # The total is not updated until the operation is complete
+                order.refresh_from_db()
+                self.assertEqual(order.total_price.amount, 0)
+
+            # Recalculation is performed on commit
+            order.refresh_from_db()
+            self.assertEqual(order.total_price.amount, 0)
+
+        order.refresh_from_db()
+        self.assertEqual(order.total_price.amount, 55 + 20)
+
+        # Orders recorded in a transaction which is rolled back are discarded
+        try:
+            with transaction.atomic(), deferred_total_price():
+                PurchaseOrderExtraLine.objects.create(
+                    order=order, quantity=1, price=Money(2, order.currency)
+                )
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(order_totals._pending(), set())
+        self.assertEqual(order_totals._queue.pending(), set())
+
+    def test_reconcile_total_prices(self):
+        """Test that open order totals are recalculated when exchange rates change."""
+        self.generate_exchange_rates()
+        common.currency.clear_exchange_rate_matrix()
+
+        po = PurchaseOrder.objects.get(pk=7)
+        po.order_currency = 'USD'
+        po.save()
+
+        sku = SupplierPart.objects.get(SKU='ZERGM312')
+
+        PurchaseOrderExtraLine.objects.create(
+            order=po, quantity=3, price=Money(9, 'GBP')
+        )
+
+        po.refresh_from_db()
+        self.assertAlmostEqual(po.total_price.amount, Decimal(30), 3)
+
+        Rate.objects.filter(currency='GBP').update(value=0.5)
+        common.currency.clear_exchange_rate_matrix()
+
+        # The change is converted at the new rate, but the existing total is not
+        PurchaseOrderLineItem.objects.create(
+            order=po, part=sku, quantity=10, purchase_price=Money(2, 'USD')
+        )
+
+        po.refresh_from_db()
+        self.assertAlmostEqual(po.total_price.amount, Decimal(50), 3)
+
+        order.tasks.reconcile_total_prices()
+
+        po.refresh_from_db()
+        self.assertAlmostEqual(po.total_price.amount, Decimal(74), 3)
+
     def test_overdue_notification(self):
         """Test overdue purchase order notification.
 
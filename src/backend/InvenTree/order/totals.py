@@ -0,0 +1,168 @@
+"""Order total price maintenance for the Order app.
+
+The total price of each order is stored against the order (see TotalPriceMixin):
+
+- When a line item is saved (or deleted), the converted change in the line total
+  is applied to the stored order total with a single UPDATE query
+- Within a deferred_total_price() block (e.g. bulk imports), line item changes only
+  record the affected orders, and each order total is recalculated once on commit
+  (or discarded, if the transaction is rolled back)
+- A full recalculation sums the line totals in the database (grouped by currency),
+  so that each currency is converted once rather than once per line
+
+As each change is converted at the exchange rates which apply when it is made,
+the stored total of an order with lines in other currencies drifts as the rates change.
+Open orders are recalculated in full after the exchange rates are updated
+(see order.tasks.reconcile_total_prices).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Optional
+
+from django.apps import apps
+from django.db.models import DecimalField, ExpressionWrapper, F, QuerySet, Sum
+
+import structlog
+from djmoney.money import Money
+
+from common.currency import convert_many
+from InvenTree.commit_queue import CommitQueue
+
+logger = structlog.get_logger('inventree')
+
+# Orders recorded within a deferred_total_price() block (for the current thread)
+_deferred = threading.local()
+
+
+def _pending() -> set[tuple[str, int]]:
+    """Return the set of (model, pk) pairs recorded in the current deferred block."""
+    if not hasattr(_deferred, 'orders'):
+        _deferred.orders = set()
+        _deferred.depth = 0
+
+    return _deferred.orders
+
+
+def recalculate_total_price(orders: Iterable[tuple[str, int]]):
+    """Recalculate the total price of each of the provided (model, pk) orders."""
+    pks = defaultdict(list)
+
+    for label, pk in orders:
+        pks[label].append(pk)
+
+    for label, order_ids in pks.items():
+        for order in apps.get_model(label).objects.filter(pk__in=order_ids):
+            order.update_total_price()
+
+
+# Orders pending a total price recalculation, when the current transaction is committed
+_queue = CommitQueue(recalculate_total_price)
+
+
+def is_deferred() -> bool:
+    """Return True if order total updates are currently deferred (for this thread)."""
+    _pending()
+    return _deferred.depth > 0
+
+
+@contextmanager
+def deferred_total_price():
+    """Defer order total price updates until the end of a bulk operation.
+
+    Within this block, saving (or deleting) a line item only records the affected order.
+    The total price of each affected order is recalculated once,
+    when the current transaction is committed.
+
+    Usage:
+        with transaction.atomic(), deferred_total_price():
+            for line in lines:
+                line.save()
+    """
+    pending = _pending()
+    _deferred.depth += 1
+
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+
+        if _deferred.depth == 0:
+            orders = set(pending)
+            pending.clear()
+
+            # Discarded if the enclosing transaction is rolled back
+            _queue.add(orders)
+
+
+def schedule_total_price(order):
+    """Record that the total price of the provided order must be recalculated."""
+    _pending().add((order._meta.label, order.pk))
+
+
+def flush_total_price():
+    """Recalculate the total price of each pending order."""
+    _queue.flush()
+
+
+def line_total(quantity, price) -> Optional[Money]:
+    """Return the total price of a line item (or None if the line is not priced)."""
+    if price is None or quantity is None:
+        return None
+
+    return price * quantity
+
+
+def currency_totals(lines: QuerySet, price_field: str) -> dict[str, Decimal]:
+    """Return the sum of (quantity * price) for the provided lines, grouped by currency.
+
+    Arguments:
+        lines: A queryset of line items
+        price_field: The name of the price field (e.g. 'purchase_price')
+
+    Returns:
+        A dict of {currency: total}
+    """
+    currency_field = f'{price_field}_currency'
+
+    return dict(
+        lines
+        .filter(**{f'{price_field}__isnull': False})
+        .order_by()
+        .values(currency_field)
+        .annotate(
+            line_total=Sum(
+                ExpressionWrapper(
+                    F('quantity') * F(price_field),
+                    output_field=DecimalField(max_digits=30, decimal_places=11),
+                )
+            )
+        )
+        .values_list(currency_field, 'line_total')
+    )
+
+
+def convert_totals(totals: Iterable[Money], target_currency: str) -> Money:
+    """Convert and sum the provided totals (each currency is converted once).
+
+    Raises:
+        MissingRate: If any of the provided currencies cannot be converted
+    """
+    amounts = defaultdict(Decimal)
+
+    for value in totals:
+        amounts[str(value.currency)] += value.amount
+
+    total = Money(0, target_currency)
+
+    for value in convert_many(
+        list(amounts.values()), list(amounts.keys()), target=target_currency
+    ):
+        total += value
+
+    return total
@@ -12,6 +12,7 @@ from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.response import Response
 
+import part.filters as part_filters
 import part.tasks as part_tasks
 from data_exporter.mixins import DataExportViewMixin
 from InvenTree.api import (
@@ -52,6 +53,8 @@ from . import serializers as part_serializers
 from .models import (
     BomItem,
     BomItemSubstitute,
+    ExplodedBomItem,
+    MaterialRequirement,
     Part,
     PartCategory,
     PartCategoryParameterTemplate,
@@ -1022,6 +1025,15 @@ class PartMixin(SerializerContextMixin):
 
         queryset = part_serializers.PartSerializer.annotate_queryset(queryset)
 
+        # The 'can_build' quantity is only calculated if requested
+        if self.request is not None:
+            params = self.request.query_params
+
+            if str2bool(params.get('can_build', False)) or 'can_build' in params.get(
+                'ordering', ''
+            ):
+                queryset = part_filters.annotate_can_build(queryset)
+
         return queryset
 
     def get_serializer(self, *args, **kwargs):
@@ -1063,6 +1075,9 @@ class PartOutputOptions(OutputConfiguration):
         InvenTreeOutputOption('path_detail'),
         InvenTreeOutputOption('price_breaks'),
         InvenTreeOutputOption('tags'),
+        InvenTreeOutputOption(
+            'can_build', description='Include the quantity which can be built'
+        ),
     ]
 
 
@@ -1097,9 +1112,11 @@ class PartList(
         'pricing_updated',
         'revision',
         'revision_count',
+        'can_build',
     ]
 
     ordering_field_aliases = {
+        'can_build': 'can_build_quantity',
         'pricing_min': 'pricing_data__overall_min',
         'pricing_max': 'pricing_data__overall_max',
         'pricing_updated': 'pricing_data__updated',
@@ -1236,6 +1253,79 @@ class PartStocktakeDetail(RetrieveUpdateDestroyAPI):
     serializer_class = part_serializers.PartStocktakeSerializer
 
 
+class MaterialRequirementFilter(FilterSet):
+    """Custom filters for the material requirements list."""
+
+    class Meta:
+        """Metaclass options."""
+
+        model = MaterialRequirement
+        fields = ['part', 'level']
+
+    min_date = rest_filters.DateFilter(
+        label=_('Date after'), field_name='date', lookup_expr='gte'
+    )
+
+    max_date = rest_filters.DateFilter(
+        label=_('Date before'), field_name='date', lookup_expr='lte'
+    )
+
+    has_net_requirement = rest_filters.BooleanFilter(
+        label=_('Has Net Requirement'), method='filter_has_net_requirement'
+    )
+
+    def filter_has_net_requirement(self, queryset, name, value):
+        """Filter by whether a planned order is required."""
+        if str2bool(value):
+            return queryset.filter(net_requirement__gt=0)
+        return queryset.filter(net_requirement__lte=0)
+
+
+class MaterialRequirementOutputOptions(OutputConfiguration):
+    """Output options for the material requirements endpoint."""
+
+    OPTIONS = [InvenTreeOutputOption('part_detail', default=True)]
+
+
+class MaterialRequirementList(SerializerContextMixin, OutputOptionsMixin, ListAPI):
+    """API endpoint for the time-phased material requirements of all parts.
+
+    - GET: Return a list of MaterialRequirement objects
+    """
+
+    serializer_class = part_serializers.MaterialRequirementSerializer
+    queryset = MaterialRequirement.objects.all()
+    output_options = MaterialRequirementOutputOptions
+    filterset_class = MaterialRequirementFilter
+    filter_backends = SEARCH_ORDER_FILTER_ALIAS
+
+    search_fields = ['part__name', 'part__description', 'part__IPN']
+
+    ordering_fields = [
+        'part',
+        'IPN',
+        'date',
+        'level',
+        'gross_requirement',
+        'net_requirement',
+        'planned_date',
+    ]
+
+    ordering_field_aliases = {'part': 'part__name', 'IPN': 'part__IPN'}
+
+    ordering = ['level', 'part__name', 'date']
+
+
+class MaterialPlanningRun(CreateAPI):
+    """API endpoint for starting a material requirements planning run.
+
+    - POST: Offload a (full or incremental) planning run to the background worker
+    """
+
+    queryset = MaterialRequirement.objects.all()
+    serializer_class = part_serializers.MaterialPlanningRunSerializer
+
+
 class BomFilter(FilterSet):
     """Custom filters for the BOM list."""
 
@@ -1472,6 +1562,69 @@ class BomItemValidate(UpdateAPI):
         return Response(serializer.data)
 
 
+class ExplodedBomFilter(FilterSet):
+    """Custom filters for the exploded BOM list."""
+
+    class Meta:
+        """Metaclass options."""
+
+        model = ExplodedBomItem
+        fields = ['assembly', 'sub_part', 'bom_item', 'inherited', 'substitute']
+
+    part = rest_filters.ModelChoiceFilter(
+        queryset=Part.objects.all(), field_name='assembly', label=_('Part')
+    )
+
+    depth = rest_filters.NumberFilter(label=_('Depth'), field_name='depth')
+
+    max_depth = rest_filters.NumberFilter(
+        label=_('Maximum Depth'), field_name='depth', lookup_expr='lte'
+    )
+
+    sub_part_assembly = rest_filters.BooleanFilter(
+        label='Component part is an assembly', field_name='sub_part__assembly'
+    )
+
+    sub_part_virtual = rest_filters.BooleanFilter(
+        label='Component part is virtual', field_name='sub_part__virtual'
+    )
+
+
+class ExplodedBomOutputOptions(OutputConfiguration):
+    """Output options for the exploded BOM endpoint."""
+
+    OPTIONS = [
+        InvenTreeOutputOption('assembly_detail'),
+        InvenTreeOutputOption('sub_part_detail', default=True),
+    ]
+
+
+class ExplodedBomList(SerializerContextMixin, OutputOptionsMixin, ListAPI):
+    """API endpoint for the flattened (multi-level) BOM of assemblies.
+
+    - GET: Return a list of ExplodedBomItem objects
+    """
+
+    serializer_class = part_serializers.ExplodedBomItemSerializer
+    queryset = ExplodedBomItem.objects.all()
+    output_options = ExplodedBomOutputOptions
+    filterset_class = ExplodedBomFilter
+    filter_backends = SEARCH_ORDER_FILTER_ALIAS
+
+    search_fields = [
+        'sub_part__name',
+        'sub_part__description',
+        'sub_part__IPN',
+        'sub_part__revision',
+    ]
+
+    ordering_fields = ['path', 'depth', 'quantity', 'sub_part', 'IPN']
+
+    ordering_field_aliases = {'sub_part': 'sub_part__name', 'IPN': 'sub_part__IPN'}
+
+    ordering = 'path'
+
+
 class BomItemSubstituteList(ListCreateAPI):
     """API endpoint for accessing a list of BomItemSubstitute objects."""
 
@@ -1603,6 +1756,18 @@ part_api_urls = [
             path('', PartStocktakeList.as_view(), name='api-part-stocktake-list'),
         ]),
     ),
+    # Material requirements planning
+    path(
+        'requirement/',
+        include([
+            path(
+                'run/', MaterialPlanningRun.as_view(), name='api-part-requirement-run'
+            ),
+            path(
+                '', MaterialRequirementList.as_view(), name='api-part-requirement-list'
+            ),
+        ]),
+    ),
     path(
         'thumbs/',
         include([
@@ -1663,6 +1828,8 @@ bom_api_urls = [
             path('', BomItemSubstituteList.as_view(), name='api-bom-substitute-list'),
         ]),
     ),
+    # Flattened (multi-level) BOM
+    path('exploded/', ExplodedBomList.as_view(), name='api-bom-exploded-list'),
     # BOM Item Detail
     path(
         '<int:pk>/',
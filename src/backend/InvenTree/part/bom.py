@@ -0,0 +1,604 @@
+"""Multi-level BOM explosion for the Part app.
+
+The ExplodedBomItem table stores a flattened copy of the bill of materials
+for each assembly, with one row for every path through the BOM tree:
+
+- Each row records the sub-part, the depth of the path, and the cumulative quantity
+- Lines inherited from a template part (at any level of the path) are flagged as inherited
+- Substitute parts are included as additional (leaf) rows against the same path
+
+The table is rebuilt for the affected assemblies whenever a BOM is edited,
+so that multi-level BOM queries can be performed with a single query.
+
+The BomItemUsage table is a reverse ("used in") index from each part to the
+BOM items (and assemblies) it can be used in, covering variant parts, substitute
+parts and inherited BOM lines. It is rebuilt for the affected BOM items only.
+
+Both tables are populated by a background task after they are first created
+(and by a daily check, if that task has not completed). Until a full rebuild has
+completed (see index_built), queries fall back to walking the BOM data directly.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Subquery
+
+import structlog
+
+from common.settings import get_global_setting, set_global_setting
+from InvenTree.helpers import chunked
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of primary keys to pass to a single "__in" query
+BOM_CHUNK_SIZE = 500
+
+# Maximum depth of BOM explosion (guards against malformed BOM data)
+BOM_MAX_DEPTH = 50
+
+# Global settings which record that an index table has been fully populated
+INDEX_BUILT_SETTINGS = {
+    'part.ExplodedBomItem': '_EXPLODED_BOM_BUILT',
+    'part.BomItemUsage': '_BOM_USAGE_BUILT',
+}
+
+# Index tables which are known to have been populated (in this process)
+_built: set[str] = set()
+
+
+def index_built(model) -> bool:
+    """Return True if the provided BOM index table (ExplodedBomItem or BomItemUsage) has been populated.
+
+    Incremental rebuilds may write rows for some assemblies before the full rebuild has run,
+    so the table is only considered built once the full rebuild task has completed
+    (see set_index_built).
+    """
+    label = model._meta.label
+
+    if label in _built:
+        return True
+
+    if get_global_setting(INDEX_BUILT_SETTINGS[label], backup_value=False):
+        _built.add(label)
+        return True
+
+    return False
+
+
+def set_index_built(model, built: bool = True):
+    """Record whether the provided BOM index table has been fully populated."""
+    label = model._meta.label
+
+    set_global_setting(INDEX_BUILT_SETTINGS[label], built, change_user=None)
+
+    # The cached state is reloaded from the setting
+    _built.discard(label)
+
+
+class PartTreeCache:
+    """Cache of part template / variant relationships, loaded one MPTT tree at a time."""
+
+    # Part fields required to determine template / variant relationships
+    PART_FIELDS = ['pk', 'tree_id', 'lft', 'rght']
+
+    def __init__(self):
+        """Initialize the (empty) part tree cache."""
+        # Part data, keyed by part ID
+        self.parts: dict[int, dict] = {}
+
+        # Part data, grouped by MPTT tree ID
+        self.trees: dict[int, list[dict]] = {}
+
+    def load_trees(self, part_ids: Iterable[int]):
+        """Load part data for each part tree which contains any of the provided parts."""
+        from part.models import Part
+
+        missing = [pk for pk in part_ids if pk not in self.parts]
+
+        for chunk in chunked(missing, BOM_CHUNK_SIZE):
+            tree_ids = Part.objects.filter(pk__in=chunk).values('tree_id')
+
+            rows = (
+                Part.objects
+                .filter(tree_id__in=Subquery(tree_ids))
+                .exclude(tree_id__in=list(self.trees.keys()))
+                .values(*self.PART_FIELDS)
+            )
+
+            for row in rows:
+                self.parts[row['pk']] = row
+                self.trees.setdefault(row['tree_id'], []).append(row)
+
+    def ancestors(self, part_id: int) -> list[int]:
+        """Return the IDs of all template parts above the specified part."""
+        part = self.parts.get(part_id)
+
+        if not part:
+            return []
+
+        return [
+            row['pk']
+            for row in self.trees[part['tree_id']]
+            if row['lft'] < part['lft'] and row['rght'] > part['rght']
+        ]
+
+    def descendants(self, part_id: int) -> list[int]:
+        """Return the IDs of all variant parts below the specified part."""
+        part = self.parts.get(part_id)
+
+        if not part:
+            return []
+
+        return [
+            row['pk']
+            for row in self.trees[part['tree_id']]
+            if row['lft'] > part['lft'] and row['rght'] < part['rght']
+        ]
+
+
+class BomExplosion(PartTreeCache):
+    """Calculate the exploded BOM for a set of assemblies.
+
+    Usage:
+        explosion = BomExplosion([1, 2, 3])
+        explosion.rebuild()
+    """
+
+    # BomItem fields loaded for each BOM line
+    BOM_FIELDS = [
+        'pk',
+        'part_id',
+        'sub_part_id',
+        'quantity',
+        'inherited',
+        'consumable',
+        'setup_quantity',
+        'attrition',
+        'rounding_multiple',
+    ]
+
+    def __init__(self, part_ids: Iterable[int]):
+        """Initialize the BOM explosion.
+
+        Arguments:
+            part_ids: IDs of the assemblies for which the exploded BOM is calculated
+        """
+        super().__init__()
+
+        self.part_ids = {int(pk) for pk in part_ids}
+
+        # BOM lines which apply to each part: {part_id: [line, ...]}
+        self.bom_lines: dict[int, list[dict]] = {}
+
+        # Exploded rows (relative to each part): {part_id: [row, ...]}
+        self.rows: dict[int, list[tuple]] = {}
+
+    def load(self):
+        """Load the BOM lines for every part which appears in the BOM tree.
+
+        The BOM tree is walked one "level" at a time,
+        with a fixed number of queries for each level.
+        """
+        from part.models import BomItem, BomItemSubstitute
+
+        frontier = set(self.part_ids)
+
+        while frontier:
+            self.load_trees(frontier)
+
+            # Ignore any parts which no longer exist
+            frontier = {pk for pk in frontier if pk in self.parts}
+
+            # BOM lines can be defined against the part, or inherited from a template
+            bom_sources = set(frontier)
+
+            for pk in frontier:
+                bom_sources.update(self.ancestors(pk))
+
+            lines_by_part: dict[int, list[dict]] = {}
+            lines_by_id: dict[int, dict] = {}
+
+            for chunk in chunked(bom_sources, BOM_CHUNK_SIZE):
+                for line in BomItem.objects.filter(part__in=chunk).values(
+                    *self.BOM_FIELDS
+                ):
+                    line['substitutes'] = []
+                    lines_by_part.setdefault(line['part_id'], []).append(line)
+                    lines_by_id[line['pk']] = line
+
+            for chunk in chunked(lines_by_id.keys(), BOM_CHUNK_SIZE):
+                for bom_item_id, part_id in (
+                    BomItemSubstitute.objects
+                    .filter(bom_item__in=chunk)
+                    .order_by('pk')
+                    .values_list('bom_item_id', 'part_id')
+                ):
+                    lines_by_id[bom_item_id]['substitutes'].append(part_id)
+
+            for pk in frontier:
+                lines = list(lines_by_part.get(pk, []))
+
+                for parent in self.ancestors(pk):
+                    lines.extend(
+                        line
+                        for line in lines_by_part.get(parent, [])
+                        if line['inherited']
+                    )
+
+                self.bom_lines[pk] = sorted(lines, key=lambda line: line['pk'])
+
+            frontier = {
+                line['sub_part_id']
+                for pk in frontier
+                for line in self.bom_lines[pk]
+                if line['sub_part_id'] not in self.bom_lines
+            }
+
+    def explode(self, part_id: int, stack: tuple = ()) -> list[tuple]:
+        """Return the exploded BOM rows for the specified part.
+
+        Each row is a tuple of:
+            (sub_part_id, bom_item_id, depth, quantity, inherited, substitute, path)
+
+        Arguments:
+            part_id: The ID of the part to explode
+            stack: IDs of the parts above this part in the BOM tree (used to detect recursion)
+        """
+        if part_id in self.rows:
+            return self.rows[part_id]
+
+        rows = []
+
+        if part_id in stack or len(stack) >= BOM_MAX_DEPTH:
+            logger.warning('BOM explosion for part <%s> exceeds maximum depth', part_id)
+            return rows
+
+        stack = (*stack, part_id)
+
+        for line in self.bom_lines.get(part_id, []):
+            inherited = line['part_id'] != part_id
+            quantity = Decimal(line['quantity'])
+            path = str(line['pk'])
+
+            rows.append((
+                line['sub_part_id'],
+                line['pk'],
+                1,
+                quantity,
+                inherited,
+                False,
+                path,
+            ))
+
+            rows.extend(
+                (substitute_id, line['pk'], 1, quantity, inherited, True, path)
+                for substitute_id in line['substitutes']
+            )
+
+            for (
+                sub_part,
+                bom_item,
+                depth,
+                sub_quantity,
+                sub_inherited,
+                substitute,
+                sub_path,
+            ) in self.explode(line['sub_part_id'], stack):
+                rows.append((
+                    sub_part,
+                    bom_item,
+                    depth + 1,
+                    quantity * sub_quantity,
+                    inherited or sub_inherited,
+                    substitute,
+                    f'{path}.{sub_path}',
+                ))
+
+        self.rows[part_id] = rows
+
+        return rows
+
+    def rebuild(self) -> int:
+        """Rebuild the exploded BOM table for each assembly.
+
+        Returns:
+            The number of exploded BOM rows which were created
+        """
+        from part.models import ExplodedBomItem
+
+        self.load()
+
+        created = 0
+
+        for chunk in chunked(sorted(self.part_ids), BOM_CHUNK_SIZE):
+            items = [
+                ExplodedBomItem(
+                    assembly_id=pk,
+                    sub_part_id=sub_part,
+                    bom_item_id=bom_item,
+                    depth=depth,
+                    quantity=quantity,
+                    inherited=inherited,
+                    substitute=substitute,
+                    path=path,
+                )
+                for pk in chunk
+                if pk in self.parts
+                for (
+                    sub_part,
+                    bom_item,
+                    depth,
+                    quantity,
+                    inherited,
+                    substitute,
+                    path,
+                ) in self.explode(pk)
+            ]
+
+            with transaction.atomic():
+                ExplodedBomItem.objects.filter(assembly__in=chunk).delete()
+                ExplodedBomItem.objects.bulk_create(items, batch_size=BOM_CHUNK_SIZE)
+
+            created += len(items)
+
+        return created
+
+
+def affected_assemblies(part_ids: Iterable[int]) -> set[int]:
+    """Return the IDs of all assemblies whose exploded BOM depends on the BOM of the provided parts.
+
+    This includes:
+    - The parts themselves
+    - Variants of the parts (which may inherit BOM lines)
+    - Any assembly which uses one of these parts (at any level of its BOM)
+    """
+    from part.models import ExplodedBomItem
+
+    cache = PartTreeCache()
+    cache.load_trees({int(pk) for pk in part_ids})
+
+    parts = set(cache.parts.keys()) & {int(pk) for pk in part_ids}
+
+    for pk in list(parts):
+        parts.update(cache.descendants(pk))
+
+    assemblies = set(parts)
+
+    for chunk in chunked(parts, BOM_CHUNK_SIZE):
+        assemblies.update(
+            ExplodedBomItem.objects
+            .filter(sub_part__in=chunk, substitute=False)
+            .values_list('assembly', flat=True)
+            .distinct()
+        )
+
+    return assemblies
+
+
+def rebuild_exploded_bom(part_ids: Iterable[int], cascade: bool = True) -> int:
+    """Rebuild the exploded BOM table after the BOM of the provided parts has changed.
+
+    Arguments:
+        part_ids: IDs of the parts whose BOM (or template) has changed
+        cascade: If True, also rebuild all assemblies which depend on these parts
+
+    Returns:
+        The number of exploded BOM rows which were created
+    """
+    part_ids = {int(pk) for pk in part_ids}
+
+    if cascade:
+        part_ids = affected_assemblies(part_ids)
+
+    if not part_ids:
+        return 0
+
+    return BomExplosion(part_ids).rebuild()
+
+
+@transaction.atomic
+def rebuild_all_exploded_bom() -> int:
+    """Rebuild the exploded BOM table for every assembly in the database.
+
+    The table is rebuilt in a single transaction, so that it is never partially populated.
+
+    Returns:
+        The number of exploded BOM rows which were created
+    """
+    from part.models import BomItem, ExplodedBomItem
+
+    cache = PartTreeCache()
+
+    # Parts which define BOM lines (and any variants which may inherit them)
+    sources = set(BomItem.objects.values_list('part', flat=True).distinct())
+    cache.load_trees(sources)
+
+    assemblies = set(sources)
+
+    for pk in sources:
+        assemblies.update(cache.descendants(pk))
+
+    # Remove any rows for parts which no longer have a BOM
+    stale = (
+        set(ExplodedBomItem.objects.values_list('assembly', flat=True).distinct())
+        - assemblies
+    )
+
+    for chunk in chunked(stale, BOM_CHUNK_SIZE):
+        ExplodedBomItem.objects.filter(assembly__in=chunk).delete()
+
+    created = 0
+
+    for chunk in chunked(sorted(assemblies), BOM_CHUNK_SIZE):
+        created += BomExplosion(chunk).rebuild()
+
+    return created
+
+
+class BomUsageIndex(PartTreeCache):
+    """Calculate the "used in" index entries for a set of BOM items.
+
+    Each BOM item is expanded to one entry for every (part, assembly) combination:
+
+    - The part may be the sub_part, a variant of the sub_part (if allowed) or a substitute
+    - The assembly may be the BOM item part, or a variant which inherits the BOM item
+
+    Usage:
+        index = BomUsageIndex([1, 2, 3])
+        index.rebuild()
+    """
+
+    def __init__(self, bom_item_ids: Iterable[int]):
+        """Initialize the usage index.
+
+        Arguments:
+            bom_item_ids: IDs of the BOM items for which index entries are calculated
+        """
+        super().__init__()
+
+        self.bom_item_ids = {int(pk) for pk in bom_item_ids}
+
+    def entries(self, bom_item_ids: list[int]) -> list:
+        """Return (unsaved) index entries for the provided BOM items."""
+        from part.models import BomItem, BomItemSubstitute, BomItemUsage
+
+        lines = list(
+            BomItem.objects.filter(pk__in=bom_item_ids).values(
+                'pk', 'part_id', 'sub_part_id', 'inherited', 'allow_variants'
+            )
+        )
+
+        substitutes: dict[int, list[int]] = {}
+
+        for bom_item_id, part_id in BomItemSubstitute.objects.filter(
+            bom_item__in=bom_item_ids
+        ).values_list('bom_item_id', 'part_id'):
+            substitutes.setdefault(bom_item_id, []).append(part_id)
+
+        self.load_trees(
+            {line['part_id'] for line in lines}
+            | {line['sub_part_id'] for line in lines if line['allow_variants']}
+        )
+
+        entries = []
+
+        for line in lines:
+            assemblies = [(line['part_id'], False)]
+
+            if line['inherited']:
+                assemblies.extend(
+                    (pk, True) for pk in self.descendants(line['part_id'])
+                )
+
+            parts = [(line['sub_part_id'], False, False)]
+
+            if line['allow_variants']:
+                parts.extend(
+                    (pk, True, False) for pk in self.descendants(line['sub_part_id'])
+                )
+
+            parts.extend((pk, False, True) for pk in substitutes.get(line['pk'], []))
+
+            entries.extend(
+                BomItemUsage(
+                    part_id=part_id,
+                    assembly_id=assembly_id,
+                    bom_item_id=line['pk'],
+                    inherited=inherited,
+                    variant=variant,
+                    substitute=substitute,
+                )
+                for assembly_id, inherited in assemblies
+                for part_id, variant, substitute in parts
+            )
+
+        return entries
+
+    def rebuild(self) -> int:
+        """Rebuild the "used in" index entries for each BOM item.
+
+        Returns:
+            The number of index entries which were created
+        """
+        from part.models import BomItemUsage
+
+        created = 0
+
+        for chunk in chunked(sorted(self.bom_item_ids), BOM_CHUNK_SIZE):
+            entries = self.entries(chunk)
+
+            with transaction.atomic():
+                BomItemUsage.objects.filter(bom_item__in=chunk).delete()
+                BomItemUsage.objects.bulk_create(entries, batch_size=BOM_CHUNK_SIZE)
+
+            created += len(entries)
+
+        return created
+
+
+def affected_bom_items(part_ids: Iterable[int]) -> set[int]:
+    """Return the IDs of all BOM items whose "used in" entries depend on the template of the provided parts.
+
+    This includes any BOM item which:
+    - Is defined against (or used by) a part in the same template tree
+    - Already has index entries which refer to the parts (or their variants)
+    """
+    from part.models import BomItem, BomItemUsage
+
+    part_ids = {int(pk) for pk in part_ids}
+
+    cache = PartTreeCache()
+    cache.load_trees(part_ids)
+
+    parts = set(cache.parts.keys()) & part_ids
+
+    for pk in list(parts):
+        parts.update(cache.descendants(pk))
+
+    tree_ids = {cache.parts[pk]['tree_id'] for pk in parts}
+
+    bom_items = set()
+
+    for chunk in chunked(tree_ids, BOM_CHUNK_SIZE):
+        bom_items.update(
+            BomItem.objects.filter(
+                Q(part__tree_id__in=chunk) | Q(sub_part__tree_id__in=chunk)
+            ).values_list('pk', flat=True)
+        )
+
+    for chunk in chunked(parts, BOM_CHUNK_SIZE):
+        bom_items.update(
+            BomItemUsage.objects
+            .filter(Q(part__in=chunk) | Q(assembly__in=chunk))
+            .values_list('bom_item', flat=True)
+            .distinct()
+        )
+
+    return bom_items
+
+
+def rebuild_bom_usage(bom_item_ids: Iterable[int]) -> int:
+    """Rebuild the "used in" index entries for the provided BOM items.
+
+    Returns:
+        The number of index entries which were created
+    """
+    return BomUsageIndex(bom_item_ids).rebuild()
+
+
+@transaction.atomic
+def rebuild_all_bom_usage() -> int:
+    """Rebuild the "used in" index for every BOM item in the database.
+
+    The index is rebuilt in a single transaction, so that it is never partially populated.
+
+    Returns:
+        The number of index entries which were created
+    """
+    from part.models import BomItem
+
+    return rebuild_bom_usage(BomItem.objects.values_list('pk', flat=True))
@@ -29,7 +29,7 @@ from django.db.models import (
     Value,
     When,
 )
-from django.db.models.functions import Cast, Coalesce, Greatest
+from django.db.models.functions import Cast, Coalesce, Floor, Greatest
 from django.db.models.query import QuerySet
 
 from sql_util.utils import SubquerySum
@@ -309,6 +309,33 @@ def annotate_variant_quantity(subquery: Q, reference: str = 'quantity') -> Query
     )
 
 
+def annotate_total_stock_with_variants() -> QuerySet:
+    """Annotate the 'total stock' quantity (including variant parts) against a Part queryset.
+
+    - Matches the value returned by Part.get_stock_count()
+    - Sums the 'in stock' quantity for the part, and all variants of the part
+    """
+    subquery = stock.models.StockItem.objects.filter(
+        stock.models.StockItem.IN_STOCK_FILTER,
+        part__tree_id=OuterRef('tree_id'),
+        part__lft__gte=OuterRef('lft'),
+        part__rght__lte=OuterRef('rght'),
+    )
+
+    return Coalesce(
+        Subquery(
+            subquery
+            .annotate(
+                total=Func(F('quantity'), function='SUM', output_field=DecimalField())
+            )
+            .values('total')
+            .order_by()
+        ),
+        Decimal(0),
+        output_field=DecimalField(),
+    )
+
+
 def annotate_category_parts() -> QuerySet:
     """Construct a queryset annotation which returns the number of parts in a particular category.
 
@@ -519,3 +546,55 @@ def annotate_bom_item_can_build(queryset: QuerySet, reference: str = '') -> Quer
     )
 
     return queryset
+
+
+def annotate_can_build(queryset: QuerySet, reference: str = '') -> QuerySet:
+    """Annotate the 'can_build' quantity for each Part in a queryset.
+
+    This is the bulk equivalent of the Part.can_build property,
+    allowing the buildable quantity of many assemblies to be calculated in a single query.
+
+    Arguments:
+        queryset: A queryset of Part objects
+        reference: Reference to the Part from the current queryset (default = '')
+
+    The 'can_build_quantity' annotation is calculated as the minimum 'can_build' quantity
+    across all BOM items for each part (see annotate_bom_item_can_build), where:
+
+    - BOM items may be defined against the part, or inherited from a template part
+    - Virtual sub-parts and consumable BOM items are ignored
+    - Parts without any such BOM items have a 'can_build_quantity' of zero
+    - The 'can_build_quantity' is never negative (e.g. if stock is over-allocated)
+    """
+    bom_items = part.models.BomItem.objects.filter(
+        Q(part=OuterRef(f'{reference}pk'))
+        | Q(
+            inherited=True,
+            part__tree_id=OuterRef(f'{reference}tree_id'),
+            part__lft__lt=OuterRef(f'{reference}lft'),
+            part__rght__gt=OuterRef(f'{reference}rght'),
+        ),
+        consumable=False,
+        sub_part__virtual=False,
+    )
+
+    bom_items = annotate_bom_item_can_build(bom_items)
+
+    return queryset.annotate(
+        can_build_quantity=Cast(
+            Greatest(
+                Floor(
+                    Coalesce(
+                        Subquery(
+                            bom_items.order_by('can_build').values('can_build')[:1]
+                        ),
+                        0,
+                        output_field=FloatField(),
+                    )
+                ),
+                0,
+                output_field=FloatField(),
+            ),
+            output_field=IntegerField(),
+        )
+    )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.10 on 2026-10-17 08:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('part', '0146_auto_20251203_1241'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExplodedBomItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=1, verbose_name='Depth')),
+                ('quantity', models.DecimalField(decimal_places=10, max_digits=30, verbose_name='Quantity')),
+                ('inherited', models.BooleanField(default=False, verbose_name='Inherited')),
+                ('substitute', models.BooleanField(default=False, verbose_name='Substitute')),
+                ('path', models.TextField(verbose_name='Path')),
+                ('assembly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exploded_bom_items', to='part.part', verbose_name='Assembly')),
+                ('bom_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exploded_items', to='part.bomitem', verbose_name='BOM Item')),
+                ('sub_part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exploded_used_in', to='part.part', verbose_name='Component')),
+            ],
+            options={
+                'verbose_name': 'Exploded BOM Item',
+                'indexes': [models.Index(fields=['assembly', 'depth'], name='part_explod_assembl_d7c3ab_idx'), models.Index(fields=['sub_part', 'substitute'], name='part_explod_sub_par_5ac464_idx')],
+            },
+        ),
+    ]
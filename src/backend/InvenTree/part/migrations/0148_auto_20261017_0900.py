@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-17 09:00
+
+from django.db import migrations
+
+
+def rebuild_exploded_bom(apps, schema_editor):
+    """Populate the exploded BOM table for all existing assemblies.
+
+    The background worker will process this task when the server restarts.
+    """
+
+    from InvenTree.tasks import offload_task
+    from part.tasks import rebuild_all_exploded_bom
+
+    BomItem = apps.get_model('part', 'BomItem')
+
+    if not BomItem.objects.exists():
+        return
+
+    print("\nScheduling rebuild of exploded BOM table.")
+
+    offload_task(
+        rebuild_all_exploded_bom,
+        force_async=True,
+        group='part'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("part", "0147_exploded_bom_item"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_exploded_bom, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-17 08:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('part', '0148_auto_20261017_0900'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BomItemUsage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inherited', models.BooleanField(default=False, verbose_name='Inherited')),
+                ('variant', models.BooleanField(default=False, verbose_name='Variant')),
+                ('substitute', models.BooleanField(default=False, verbose_name='Substitute')),
+                ('assembly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bom_usage_assemblies', to='part.part', verbose_name='Assembly')),
+                ('bom_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='part.bomitem', verbose_name='BOM Item')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bom_usage', to='part.part', verbose_name='Part')),
+            ],
+            options={
+                'verbose_name': 'BOM Item Usage',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-17 09:30
+
+from django.db import migrations
+
+
+def rebuild_bom_usage(apps, schema_editor):
+    """Populate the BOM usage index for all existing BOM items.
+
+    The background worker will process this task when the server restarts.
+    """
+
+    from InvenTree.tasks import offload_task
+    from part.tasks import rebuild_all_bom_usage
+
+    BomItem = apps.get_model('part', 'BomItem')
+
+    if not BomItem.objects.exists():
+        return
+
+    print("\nScheduling rebuild of BOM usage index.")
+
+    offload_task(
+        rebuild_all_bom_usage,
+        force_async=True,
+        group='part'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("part", "0149_bom_item_usage"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_bom_usage, migrations.RunPython.noop),
+    ]
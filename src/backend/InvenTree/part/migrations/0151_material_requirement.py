@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-17 13:11
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('part', '0150_auto_20261017_0930'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='lead_time',
+            field=models.PositiveIntegerField(default=0, help_text='Time (in days) required to build or purchase this part', validators=[django.core.validators.MinValueValidator(0)], verbose_name='Lead Time'),
+        ),
+        migrations.CreateModel(
+            name='MaterialRequirementChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='material_requirement_change', to='part.part', verbose_name='Part')),
+            ],
+            options={
+                'verbose_name': 'Material Requirement Change',
+            },
+        ),
+        migrations.CreateModel(
+            name='MaterialRequirement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('level', models.PositiveIntegerField(default=0, verbose_name='Level')),
+                ('gross_requirement', models.DecimalField(decimal_places=10, default=0, max_digits=30, verbose_name='Gross Requirement')),
+                ('scheduled_receipts', models.DecimalField(decimal_places=10, default=0, max_digits=30, verbose_name='Scheduled Receipts')),
+                ('projected_stock', models.DecimalField(decimal_places=10, default=0, max_digits=30, verbose_name='Projected Stock')),
+                ('net_requirement', models.DecimalField(decimal_places=10, default=0, max_digits=30, verbose_name='Net Requirement')),
+                ('planned_date', models.DateField(verbose_name='Planned Order Date')),
+                ('updated', models.DateTimeField(verbose_name='Updated')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='material_requirements', to='part.part', verbose_name='Part')),
+            ],
+            options={
+                'verbose_name': 'Material Requirement',
+                'indexes': [models.Index(fields=['part', 'date'], name='part_materi_part_id_660802_idx')],
+            },
+        ),
+    ]
@@ -29,7 +29,6 @@ from django.utils.translation import gettext_lazy as _
 import structlog
 from django_cleanup import cleanup
 from djmoney.contrib.exchange.exceptions import MissingRate
-from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 from mptt.managers import TreeManager
 from mptt.models import TreeForeignKey
@@ -43,13 +42,14 @@ import InvenTree.helpers
 import InvenTree.models
 import InvenTree.ready
 import InvenTree.tasks
+import part.bom as part_bom
 import part.helpers as part_helpers
 import part.settings as part_settings
 import report.mixins
 import users.models
 from build import models as BuildModels
 from build.status_codes import BuildStatusGroups
-from common.currency import currency_code_default
+from common.currency import convert_money, currency_code_default
 from common.icons import validate_icon
 from common.settings import get_global_setting
 from company.models import SupplierPart
@@ -493,6 +493,7 @@ class Part(
         default_supplier: The default SupplierPart which should be used to procure and stock this part
         default_expiry: The default expiry duration for any StockItem instances of this part
         minimum_stock: Minimum preferred quantity to keep in stock
+        lead_time: Number of days required to build or purchase this part (used for material planning)
         units: Units of measure for this part (default='pcs')
         salable: Can this part be sold to customers?
         assembly: Can this part be build from other parts?
@@ -608,10 +609,16 @@ class Part(
         If not, it is considered "orphaned" and will be deleted.
         """
         _new = False
+
+        # Has the template (variant_of) for this part been changed?
+        variant_changed = self.variant_of_id is not None
+
         if self.pk:
             try:
                 previous = Part.objects.get(pk=self.pk)
 
+                variant_changed = previous.variant_of_id != self.variant_of_id
+
                 # Image has been changed
                 if previous.image is not None and self.image != previous.image:
                     # Are there any (other) parts which reference the image?
@@ -638,6 +645,20 @@ class Part(
             # Only run if the check was not run previously (due to not existing in the database)
             self.ensure_trackable()
 
+        if (
+            variant_changed
+            and InvenTree.ready.canAppAccessDatabase(allow_test=True)
+            and not InvenTree.ready.isImportingData()
+        ):
+            # Inherited BOM lines may have changed
+            from part import tasks as part_tasks
+
+            part_tasks.schedule_bom_rebuild(part_tasks.rebuild_exploded_bom, [self.pk])
+
+            part_tasks.schedule_bom_rebuild(
+                part_tasks.rebuild_part_bom_usage, [self.pk]
+            )
+
     def __str__(self):
         """Return a string representation of the Part (for use in the admin interface)."""
         return f'{self.full_name} - {self.description}'
@@ -918,23 +939,34 @@ class Part(
     def find_conflicting_serial_numbers(self, serials: list) -> list:
         """For a provided list of serials, return a list of those which are conflicting."""
         # from part.models import Part
+        from plugin import PluginMixinEnum, registry
         from stock.models import StockItem
+        from stock.serials import find_serial_conflicts
 
-        conflicts = []
+        # Integer serial numbers are checked against the serial number range index
+        conflicts = [
+            (int(serial), serial) for serial in find_serial_conflicts(self, serials)
+        ]
 
-        # First, check for raw conflicts based on efficient database queries
-        if get_global_setting('SERIAL_NUMBER_GLOBALLY_UNIQUE', False):
-            # Serial number must be unique across *all* parts
-            parts = Part.objects.all()
-        else:
-            # Serial number must only be unique across this part "tree"
-            parts = Part.objects.filter(tree_id=self.tree_id)
+        # Any other serial numbers are checked with a direct database query
+        others = [
+            serial for serial in serials if helpers.integer_serial(serial) is None
+        ]
 
-        items = StockItem.objects.filter(part__in=parts, serial__in=serials)
-        items = items.order_by('serial_int', 'serial')
+        if others:
+            items = StockItem.objects.filter(serial__in=others)
 
-        for item in items:
-            conflicts.append(item.serial)
+            if not get_global_setting('SERIAL_NUMBER_GLOBALLY_UNIQUE', False):
+                # Serial number must only be unique across this part "tree"
+                items = items.filter(part__tree_id=self.tree_id)
+
+            conflicts.extend(items.values_list('serial_int', 'serial'))
+
+        conflicts = [serial for _value, serial in sorted(conflicts)]
+
+        # Without any validation plugins, there are no further checks to perform
+        if not registry.with_mixin(PluginMixinEnum.VALIDATION):
+            return conflicts
 
         for serial in serials:
             if serial in conflicts:
@@ -965,6 +997,7 @@ class Part(
             The latest serial number specified for this part, or None
         """
         from plugin import PluginMixinEnum, registry
+        from stock.serials import latest_serial
 
         if allow_plugins:
             # Check with plugin system
@@ -987,6 +1020,11 @@ class Part(
             # Serial numbers are unique across part trees
             stock = stock.filter(part__tree_id=self.tree_id)
 
+        # The highest integer serial number (from the serial number range index)
+        # is a lower bound for the latest serial number
+        if high := latest_serial(self):
+            stock = stock.filter(serial_int__gte=high)
+
         # There are no matching StockItem objects (skip further tests)
         if not stock.exists():
             return None
@@ -1256,6 +1294,13 @@ class Part(
         help_text=_('Minimum allowed stock level'),
     )
 
+    lead_time = models.PositiveIntegerField(
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name=_('Lead Time'),
+        help_text=_('Time (in days) required to build or purchase this part'),
+    )
+
     units = models.CharField(
         max_length=20,
         default='',
@@ -1900,6 +1945,35 @@ class Part(
 
         return queryset.prefetch_related('part', 'sub_part')
 
+    def get_exploded_bom(
+        self,
+        max_depth: int | None = None,
+        include_inherited: bool = True,
+        include_substitutes: bool = True,
+    ) -> QuerySet[ExplodedBomItem]:
+        """Return a queryset containing the flattened (multi-level) BOM for this part.
+
+        Each entry represents a single path through the BOM tree,
+        with the cumulative quantity required to make one of this part.
+
+        Arguments:
+            max_depth (int): If set, limit the number of BOM levels returned
+            include_inherited (bool): If set, include paths which contain BOM items inherited from a parent part
+            include_substitutes (bool): If set, include substitute parts
+        """
+        queryset = ExplodedBomItem.objects.filter(assembly=self)
+
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=max_depth)
+
+        if not include_inherited:
+            queryset = queryset.filter(inherited=False)
+
+        if not include_substitutes:
+            queryset = queryset.filter(substitute=False)
+
+        return queryset.order_by('path', 'substitute', 'pk')
+
     def get_installed_part_options(
         self, include_inherited: bool = True, include_variants: bool = True
     ):
@@ -1931,8 +2005,16 @@ class Part(
         B) This part may be a *variant* of a part which is directly specified in a BomItem instance
         C) This part may be a *substitute* for a part which is directly specified in a BomItem instance
 
-        So we construct a query for each case, and combine them...
+        Each case is captured by the BomItemUsage ("used in") index.
+        Until the index has been built, a query is constructed for each case instead.
         """
+        if part_bom.index_built(BomItemUsage):
+            return Q(
+                pk__in=self.get_bom_usage(include_variants, include_substitutes).values(
+                    'bom_item'
+                )
+            )
+
         # Cache all *parent* parts
         try:
             parents = self.get_ancestors(include_self=False)
@@ -1956,11 +2038,46 @@ class Part(
 
         return query
 
+    def get_bom_usage(
+        self, include_variants=True, include_substitutes=True, include_inherited=True
+    ) -> QuerySet[BomItemUsage]:
+        """Return the "used in" index entries which refer to *this* part.
+
+        Arguments:
+            include_variants: If True, include BOM items where this part is a variant of the sub_part
+            include_substitutes: If True, include BOM items where this part is a substitute
+            include_inherited: If True, include assemblies which inherit the BOM item from a template part
+        """
+        if not self.pk:
+            # This part is not saved yet
+            return BomItemUsage.objects.none()
+
+        queryset = BomItemUsage.objects.filter(part=self)
+
+        if not include_variants:
+            queryset = queryset.filter(variant=False)
+
+        if not include_substitutes:
+            queryset = queryset.filter(substitute=False)
+
+        if not include_inherited:
+            queryset = queryset.filter(inherited=False)
+
+        return queryset
+
     def get_used_in(self, include_inherited=True, include_substitutes=True):
         """Return a list containing all parts this part is used in.
 
         Includes consideration of inherited BOMs
         """
+        if part_bom.index_built(BomItemUsage):
+            usage = self.get_bom_usage(
+                include_substitutes=include_substitutes,
+                include_inherited=include_inherited,
+            )
+
+            return list(Part.objects.filter(pk__in=usage.values('assembly')))
+
         # Grab a queryset of all BomItem objects which "require" this part
         bom_items = BomItem.objects.filter(
             self.get_used_in_bom_item_filter(include_substitutes=include_substitutes)
@@ -2094,6 +2211,17 @@ class Part(
         if parts is None:
             parts = set()
 
+        if recursive and not parts and part_bom.index_built(ExplodedBomItem):
+            # Sub-assemblies are resolved via the exploded BOM table
+            parts.update(
+                Part.objects.filter(
+                    exploded_used_in__assembly=self, exploded_used_in__substitute=False
+                ).distinct()
+            )
+
+            return parts
+
+        # Otherwise, walk the BOM tree directly
         bom_items = self.get_bom_items()
 
         for bom_item in bom_items:
@@ -2135,37 +2263,26 @@ class Part(
     ):
         """Helper function to schedule a pricing update.
 
-        Importantly, catches any errors which may occur during deletion of related objects,
-        in particular due to post_delete signals.
+        The part is added to the pricing update queue, which is written to the database
+        when the current transaction is committed. This means that this function can be
+        safely called from post_delete signals (as the part may be deleted by then).
 
         Ref: https://github.com/inventree/InvenTree/pull/3986
 
         Arguments:
             create: Whether or not a new PartPricing object should be created if it does not already exist
             force: If True, force the pricing to be updated even auto pricing is disabled
-            refresh: If True, refresh the PartPricing object from the database
+            refresh: Not used (retained for backwards compatibility)
         """
         if not force and not get_global_setting(
             'PRICING_AUTO_UPDATE', backup_value=True
         ):
             return
 
-        if refresh:
-            try:
-                self.refresh_from_db()
-            except Part.DoesNotExist:
-                return
-
-        try:
-            pricing = self.pricing
+        import part.pricing
 
-            if create or pricing.pk:
-                pricing.schedule_for_update(refresh=refresh)
-        except IntegrityError:
-            # If this part instance has been deleted,
-            # some post-delete or post-save signals may still be fired
-            # which can cause issues down the track
-            pass
+        # Add this part to the pricing queue (written to the database on commit)
+        part.pricing.schedule_pricing_update([self.pk], create=create)
 
     def get_price_info(self, quantity=1, buy=True, bom=True, internal=False):
         """Return a simplified pricing string for this part.
@@ -2785,88 +2902,19 @@ class PartPricing(common.models.MetaMixin):
     def schedule_for_update(self, counter: int = 0, refresh: bool = True):
         """Schedule this pricing to be updated.
 
+        The referenced part is added to the pricing update queue,
+        which is processed by the background worker.
+
         Arguments:
-            counter: Recursion counter (used to prevent infinite recursion)
-            refresh: If specified, the PartPricing object will be refreshed from the database
+            counter: Recursion counter (no longer used)
+            refresh: If specified, the PartPricing object will be refreshed from the database (no longer used)
         """
-        import InvenTree.ready
-
-        # If importing data, skip pricing update
-        if InvenTree.ready.isImportingData():
-            return
-
-        # If running data migrations, skip pricing update
-        if InvenTree.ready.isRunningMigrations():
-            return
-
-        if (
-            not self.part
-            or not self.part.pk
-            or not Part.objects.filter(pk=self.part.pk).exists()
-        ):
-            logger.warning(
-                'Referenced part instance does not exist - skipping pricing update.'
-            )
-            return
-
-        try:
-            if refresh and self.pk:
-                self.refresh_from_db()
-        except (PartPricing.DoesNotExist, IntegrityError):
-            # Error thrown if this PartPricing instance has already been removed
-            logger.warning(
-                "Error refreshing PartPricing instance for part '%s'", self.part
-            )
-            return
+        import part.pricing
 
-        # Ensure that the referenced part still exists in the database
-        try:
-            p = self.part
-            if True:  # refresh and p.pk:
-                p.refresh_from_db()
-        except IntegrityError:
-            logger.exception(
-                "Could not update PartPricing as Part '%s' does not exist", self.part
-            )
+        if not self.part_id:
             return
 
-        if self.scheduled_for_update:
-            # Ignore if the pricing is already scheduled to be updated
-            logger.debug('Pricing for %s already scheduled for update - skipping', p)
-            return
-
-        if counter > self.MAX_PRICING_DEPTH:
-            # Prevent infinite recursion / stack depth issues
-            logger.debug(
-                counter, f'Skipping pricing update for {p} - maximum depth exceeded'
-            )
-            return
-
-        try:
-            self.scheduled_for_update = True
-            self.save()
-        except IntegrityError:
-            # An IntegrityError here likely indicates that the referenced part has already been deleted
-            logger.exception(
-                "Could not save PartPricing for part '%s' to the database", self.part
-            )
-            return
-
-        import part.tasks as part_tasks
-
-        # Pricing calculations are performed in the background,
-        # unless the TESTING_PRICING flag is set
-        background = not settings.TESTING or not settings.TESTING_PRICING
-
-        # Offload task to update the pricing
-        # Force async, to prevent running in the foreground (unless in testing mode)
-        InvenTree.tasks.offload_task(
-            part_tasks.update_part_pricing,
-            self,
-            counter=counter,
-            force_async=background,
-            group='pricing',
-        )
+        part.pricing.schedule_pricing_update([self.part_id], create=True)
 
     def update_pricing(
         self,
@@ -2923,24 +2971,25 @@ class PartPricing(common.models.MetaMixin):
 
         # Update parent assemblies and templates
         if pricing_changed and cascade:
-            self.update_assemblies(counter)
-            self.update_templates(counter)
-
-    def update_assemblies(self, counter: int = 0):
-        """Schedule updates for any assemblies which use this part."""
-        # If the linked Part is used in any assemblies, schedule a pricing update for those assemblies
+            self.update_dependants()
 
-        used_in_parts = self.part.get_used_in()
+    def update_dependants(self):
+        """Schedule a single pricing update for all assemblies and templates which depend on this part.
 
-        for p in used_in_parts:
-            p.pricing.schedule_for_update(counter=counter + 1)
+        The dependent parts are recalculated together (in dependency order),
+        rather than scheduling a separate update for each part.
+        """
+        import part.tasks as part_tasks
 
-    def update_templates(self, counter: int = 0):
-        """Schedule updates for any template parts above this part."""
-        templates = self.part.get_ancestors(include_self=False)
+        background = not settings.TESTING or not settings.TESTING_PRICING
 
-        for p in templates:
-            p.pricing.schedule_for_update(counter + 1)
+        InvenTree.tasks.offload_task(
+            part_tasks.update_pricing_graph,
+            [self.part.pk],
+            include_self=False,
+            force_async=background,
+            group='pricing',
+        )
 
     def save(self, *args, **kwargs):
         """Whenever pricing model is saved, automatically update overall prices."""
@@ -4408,6 +4457,277 @@ class BomItemSubstitute(InvenTree.models.InvenTreeMetadataModel):
     )
 
 
+class ExplodedBomItem(models.Model):
+    """A single row of the flattened (multi-level) bill of materials for an assembly.
+
+    There is one row for each path through the BOM tree of the assembly.
+    This table is maintained automatically (see part.bom) and should not be edited directly.
+
+    Attributes:
+        assembly: The top-level assembly
+        sub_part: The part which is required (at any level of the BOM)
+        bom_item: The BomItem at the bottom of the path
+        depth: Number of BOM levels between the assembly and the sub_part
+        quantity: Cumulative quantity of sub_part required to make one assembly
+        inherited: True if any line in the path is inherited from a template part
+        substitute: True if the sub_part is a substitute for the BomItem part
+        path: Dot-separated list of BomItem IDs which lead to the sub_part
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('Exploded BOM Item')
+        indexes = [
+            models.Index(fields=['assembly', 'depth']),
+            models.Index(fields=['sub_part', 'substitute']),
+        ]
+
+    @staticmethod
+    def get_api_url():
+        """Returns the list API endpoint URL associated with this model."""
+        return reverse('api-bom-exploded-list')
+
+    assembly = models.ForeignKey(
+        Part,
+        on_delete=models.CASCADE,
+        related_name='exploded_bom_items',
+        verbose_name=_('Assembly'),
+    )
+
+    sub_part = models.ForeignKey(
+        Part,
+        on_delete=models.CASCADE,
+        related_name='exploded_used_in',
+        verbose_name=_('Component'),
+    )
+
+    bom_item = models.ForeignKey(
+        BomItem,
+        on_delete=models.CASCADE,
+        related_name='exploded_items',
+        verbose_name=_('BOM Item'),
+    )
+
+    depth = models.PositiveIntegerField(default=1, verbose_name=_('Depth'))
+
+    quantity = models.DecimalField(
+        max_digits=30, decimal_places=10, verbose_name=_('Quantity')
+    )
+
+    inherited = models.BooleanField(default=False, verbose_name=_('Inherited'))
+
+    substitute = models.BooleanField(default=False, verbose_name=_('Substitute'))
+
+    path = models.TextField(verbose_name=_('Path'))
+
+
+class BomItemUsage(models.Model):
+    """A single entry in the reverse ("used in") index from a part to the BOM items which can use it.
+
+    This table is maintained automatically (see part.bom) and should not be edited directly.
+
+    Attributes:
+        part: The part which can be used in the BOM item
+        assembly: The assembly which uses the BOM item
+        bom_item: The BomItem which can use the part
+        inherited: True if the assembly inherits the BomItem from a template part
+        variant: True if the part is a variant of the BomItem sub_part
+        substitute: True if the part is a substitute for the BomItem sub_part
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('BOM Item Usage')
+
+    part = models.ForeignKey(
+        Part, on_delete=models.CASCADE, related_name='bom_usage', verbose_name=_('Part')
+    )
+
+    assembly = models.ForeignKey(
+        Part,
+        on_delete=models.CASCADE,
+        related_name='bom_usage_assemblies',
+        verbose_name=_('Assembly'),
+    )
+
+    bom_item = models.ForeignKey(
+        BomItem,
+        on_delete=models.CASCADE,
+        related_name='usage',
+        verbose_name=_('BOM Item'),
+    )
+
+    inherited = models.BooleanField(default=False, verbose_name=_('Inherited'))
+
+    variant = models.BooleanField(default=False, verbose_name=_('Variant'))
+
+    substitute = models.BooleanField(default=False, verbose_name=_('Substitute'))
+
+
+@receiver(post_save, sender=BomItem, dispatch_uid='post_save_bom_item_usage')
+def update_bom_item_usage(sender, instance, **kwargs):
+    """Rebuild the "used in" index entries for a BomItem when it is created or edited."""
+    if (
+        InvenTree.ready.canAppAccessDatabase(allow_test=True)
+        and not InvenTree.ready.isImportingData()
+    ):
+        from part import tasks as part_tasks
+
+        part_tasks.schedule_bom_rebuild(part_tasks.rebuild_bom_usage, [instance.pk])
+
+
+@receiver(post_save, sender=BomItem, dispatch_uid='post_save_bom_item_exploded')
+@receiver(post_delete, sender=BomItem, dispatch_uid='post_delete_bom_item_exploded')
+def update_exploded_bom(sender, instance, **kwargs):
+    """Rebuild the exploded BOM of any assemblies affected by a BomItem change."""
+    if (
+        InvenTree.ready.canAppAccessDatabase(allow_test=True)
+        and not InvenTree.ready.isImportingData()
+    ):
+        from part import tasks as part_tasks
+
+        part_tasks.schedule_bom_rebuild(
+            part_tasks.rebuild_exploded_bom, [instance.part_id]
+        )
+
+
+@receiver(
+    post_save,
+    sender=BomItemSubstitute,
+    dispatch_uid='post_save_bom_item_substitute_exploded',
+)
+@receiver(
+    post_delete,
+    sender=BomItemSubstitute,
+    dispatch_uid='post_delete_bom_item_substitute_exploded',
+)
+def update_exploded_bom_substitute(sender, instance, **kwargs):
+    """Rebuild the exploded BOM and "used in" index entries affected by a BomItemSubstitute change."""
+    if (
+        InvenTree.ready.canAppAccessDatabase(allow_test=True)
+        and not InvenTree.ready.isImportingData()
+    ):
+        from part import tasks as part_tasks
+
+        # Deleted along with the BomItem itself (which is handled separately)
+        origin = kwargs.get('origin')
+
+        if origin is not None and getattr(origin, 'model', type(origin)) is not sender:
+            return
+
+        bom_item = BomItem.objects.filter(pk=instance.bom_item_id).first()
+
+        if bom_item:
+            part_tasks.schedule_bom_rebuild(
+                part_tasks.rebuild_exploded_bom, [bom_item.part_id]
+            )
+
+            part_tasks.schedule_bom_rebuild(part_tasks.rebuild_bom_usage, [bom_item.pk])
+
+
+class MaterialRequirement(models.Model):
+    """A time-phased material requirement for a part, calculated by a planning (MRP) run.
+
+    There is one row for each date on which the part has a gross requirement or scheduled receipt.
+    This table is maintained automatically (see part.planning) and should not be edited directly.
+
+    Attributes:
+        part: The part which is required
+        date: The date on which the part is required (or received)
+        level: The low-level code (BOM depth) of the part within the planning run
+        gross_requirement: Quantity required on this date (sales orders, build orders and planned builds)
+        scheduled_receipts: Quantity due to be received on this date (purchase orders and build outputs)
+        projected_stock: Projected available stock at the end of this date (including planned orders)
+        net_requirement: Quantity which must be built or purchased to cover this date (planned order quantity)
+        planned_date: Date on which the planned order must be released (offset by the part lead time)
+        updated: Date and time of the planning run which calculated this row
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('Material Requirement')
+        indexes = [models.Index(fields=['part', 'date'])]
+
+    @staticmethod
+    def get_api_url():
+        """Returns the list API endpoint URL associated with this model."""
+        return reverse('api-part-requirement-list')
+
+    part = models.ForeignKey(
+        Part,
+        on_delete=models.CASCADE,
+        related_name='material_requirements',
+        verbose_name=_('Part'),
+    )
+
+    date = models.DateField(verbose_name=_('Date'))
+
+    level = models.PositiveIntegerField(default=0, verbose_name=_('Level'))
+
+    gross_requirement = models.DecimalField(
+        max_digits=30, decimal_places=10, default=0, verbose_name=_('Gross Requirement')
+    )
+
+    scheduled_receipts = models.DecimalField(
+        max_digits=30,
+        decimal_places=10,
+        default=0,
+        verbose_name=_('Scheduled Receipts'),
+    )
+
+    projected_stock = models.DecimalField(
+        max_digits=30, decimal_places=10, default=0, verbose_name=_('Projected Stock')
+    )
+
+    net_requirement = models.DecimalField(
+        max_digits=30, decimal_places=10, default=0, verbose_name=_('Net Requirement')
+    )
+
+    planned_date = models.DateField(verbose_name=_('Planned Order Date'))
+
+    updated = models.DateTimeField(verbose_name=_('Updated'))
+
+
+class MaterialRequirementChange(models.Model):
+    """A part whose material requirements must be recalculated by the next incremental planning run.
+
+    Entries are created automatically when orders or stock change (see part.planning).
+
+    Attributes:
+        part: The part which has changed
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('Material Requirement Change')
+
+    part = models.OneToOneField(
+        Part,
+        on_delete=models.CASCADE,
+        related_name='material_requirement_change',
+        verbose_name=_('Part'),
+    )
+
+
+@receiver(post_save, dispatch_uid='post_save_material_requirements')
+@receiver(post_delete, dispatch_uid='post_delete_material_requirements')
+def mark_material_requirements_changed(sender, instance, **kwargs):
+    """Mark parts for recalculation when the demand or supply for a part changes."""
+    from part import planning as part_planning
+
+    if (
+        sender._meta.label_lower in part_planning.PLANNING_SOURCES
+        and part_planning.tracking_enabled()
+        and InvenTree.ready.canAppAccessDatabase(allow_test=True)
+        and not InvenTree.ready.isImportingData()
+    ):
+        part_planning.schedule_planning_update(part_planning.changed_parts(instance))
+
+
 class PartRelated(InvenTree.models.InvenTreeMetadataModel):
     """Store and handle related parts (eg. mating connector, crimps, etc.)."""
 
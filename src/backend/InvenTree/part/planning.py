@@ -0,0 +1,680 @@
+"""Material requirements planning (MRP) for the Part app.
+
+The MaterialPlanner class calculates time-phased material requirements for every
+part in a single batch run, and stores the results in the MaterialRequirement table:
+
+- Demand is loaded from open sales orders and active build orders,
+  net of the stock which is already allocated against each order line
+- Scheduled receipts are loaded from open purchase orders and active build orders
+- Available stock (net of allocated stock) is loaded with grouped aggregate queries
+- BOMs are exploded level by level (see part.bom.BomExplosion), and parts are planned
+  in order of their low-level code, so that every part is netted exactly once,
+  after all of the assemblies which use it
+- Planned orders are offset by the part lead time, and planned builds generate
+  dependent demand for the components of the assembly
+
+Each query is performed for all parts at once (in chunks), rather than once per part.
+
+Changes to orders and stock are recorded in the MaterialRequirementChange table
+(when the PART_PLANNING_ENABLE setting is enabled). An incremental planning run
+only recalculates the changed parts, and every component below them in the BOM.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F, Sum
+
+import structlog
+
+import InvenTree.helpers
+from common.settings import get_global_setting
+from InvenTree.commit_queue import CommitQueue
+from InvenTree.helpers import chunked
+from part.bom import BomExplosion, PartTreeCache
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of objects to read (or write) in a single query
+PLANNING_CHUNK_SIZE = 500
+
+
+def tracking_enabled() -> bool:
+    """Return True if changes to orders and stock are tracked for incremental planning runs."""
+    return get_global_setting('PART_PLANNING_ENABLE', False)
+
+
+def required_quantity(line: dict, quantity: Decimal) -> Decimal:
+    """Return the quantity of a BOM line component required to build the provided quantity.
+
+    Arguments:
+        line: BOM line data (see part.bom.BomExplosion.BOM_FIELDS)
+        quantity: Number of assemblies to build
+    """
+    from part.models import BomItem
+
+    bom_item = BomItem(
+        quantity=line['quantity'],
+        setup_quantity=line['setup_quantity'],
+        attrition=line['attrition'],
+        rounding_multiple=line['rounding_multiple'],
+    )
+
+    return Decimal(str(bom_item.get_required_quantity(quantity)))
+
+
+class MaterialPlanner:
+    """Calculate time-phased gross and net material requirements.
+
+    For each part (in order of low-level code), and each date on which the part
+    has a gross requirement or scheduled receipt:
+
+    - The projected stock is reduced by the gross requirement, and increased by scheduled receipts
+    - If the projected stock falls below the minimum stock level, a planned order
+      is created for the shortfall (the net requirement)
+    - The planned order is released "lead time" days before the required date
+    - For an assembly, the planned order creates a gross requirement for each BOM component,
+      on the release date of the planned order
+
+    Usage:
+        MaterialPlanner().run()  # Full planning run
+        MaterialPlanner([1, 2, 3]).run()  # Incremental planning run for the provided parts
+    """
+
+    def __init__(self, part_ids: Optional[Iterable[int]] = None):
+        """Initialize the planning run.
+
+        Arguments:
+            part_ids: If provided, only recalculate these parts (and their BOM components)
+        """
+        self.incremental = part_ids is not None
+        self.changed = {int(pk) for pk in part_ids or []}
+
+        self.today = InvenTree.helpers.current_date()
+        self.now = InvenTree.helpers.current_time()
+
+        # The parts which are planned in this run (None = all parts)
+        self.scope: Optional[set[int]] = None
+
+        # Part data, keyed by part ID
+        self.parts: dict[int, dict] = {}
+
+        # BOM explosion (which contains the BOM lines for each part)
+        self.bom: Optional[BomExplosion] = None
+
+        # Gross requirements and scheduled receipts: {part_id: {date: quantity}}
+        self.gross: dict = defaultdict(lambda: defaultdict(Decimal))
+        self.receipts: dict = defaultdict(lambda: defaultdict(Decimal))
+
+        # Available stock (net of allocated stock), keyed by part ID
+        self.stock: dict = defaultdict(Decimal)
+
+        # Low-level code for each part, keyed by part ID
+        self.levels: dict[int, int] = {}
+
+        # Minimum low-level code for parts used by assemblies outside of this run
+        self.base_levels: dict[int, int] = {}
+
+        # Calculated (unsaved) MaterialRequirement objects
+        self.requirements: list = []
+
+    def need_date(self, *dates) -> date:
+        """Return the first provided date (or today), where past dates are moved to today."""
+        for value in dates:
+            if value:
+                return max(value, self.today)
+
+        return self.today
+
+    def scoped(self, queryset, field: str):
+        """Yield the provided queryset, filtered to the parts planned in this run (in chunks).
+
+        Arguments:
+            queryset: The queryset to filter
+            field: The name of the field which references the part
+        """
+        if self.scope is None:
+            yield queryset
+            return
+
+        for chunk in chunked(sorted(self.scope), PLANNING_CHUNK_SIZE):
+            yield queryset.filter(**{f'{field}__in': chunk})
+
+    def load_scope(self):
+        """Determine which parts are planned in this run, and load the BOM for each part.
+
+        - A full run plans every part with demand or supply (and all of their components)
+        - An incremental run plans the changed parts (and all of their components)
+        """
+        if self.incremental:
+            self.bom = BomExplosion(self.changed)
+            self.bom.load()
+            self.scope = set(self.bom.bom_lines.keys())
+
+    def load_demand(self):
+        """Load the (independent) demand from open sales orders and active build orders."""
+        from build.models import BuildItem, BuildLine
+        from build.status_codes import BuildStatusGroups
+        from order.models import SalesOrderAllocation, SalesOrderLineItem
+        from order.status_codes import SalesOrderStatusGroups
+
+        # Stock which is already allocated against each sales order line
+        so_allocated = {}
+
+        allocations = SalesOrderAllocation.objects.filter(
+            line__order__status__in=SalesOrderStatusGroups.OPEN,
+            shipment__shipment_date=None,
+        )
+
+        for queryset in self.scoped(allocations, 'line__part'):
+            so_allocated.update(
+                queryset
+                .order_by()
+                .values('line')
+                .annotate(allocated=Sum('quantity'))
+                .values_list('line', 'allocated')
+            )
+
+        lines = SalesOrderLineItem.objects.filter(
+            order__status__in=SalesOrderStatusGroups.OPEN,
+            part__isnull=False,
+            quantity__gt=F('shipped'),
+        )
+
+        for queryset in self.scoped(lines, 'part'):
+            for line in queryset.values(
+                'pk',
+                'part_id',
+                'quantity',
+                'shipped',
+                'target_date',
+                'order__target_date',
+            ):
+                quantity = (
+                    line['quantity']
+                    - line['shipped']
+                    - so_allocated.get(line['pk'], Decimal(0))
+                )
+
+                if quantity > 0:
+                    when = self.need_date(
+                        line['target_date'], line['order__target_date']
+                    )
+                    self.gross[line['part_id']][when] += quantity
+
+        # Stock which is already allocated against each build line
+        # (scoped by the BOM sub-part, as the allocated stock may be a substitute or variant)
+        build_allocated = {}
+
+        for queryset in self.scoped(
+            BuildItem.objects.all(), 'build_line__bom_item__sub_part'
+        ):
+            build_allocated.update(
+                queryset
+                .filter(build_line__isnull=False)
+                .order_by()
+                .values('build_line')
+                .annotate(allocated=Sum('quantity'))
+                .values_list('build_line', 'allocated')
+            )
+
+        build_lines = BuildLine.objects.filter(
+            build__status__in=BuildStatusGroups.ACTIVE_CODES,
+            bom_item__consumable=False,
+            quantity__gt=F('consumed'),
+        )
+
+        for queryset in self.scoped(build_lines, 'bom_item__sub_part'):
+            for line in queryset.values(
+                'pk',
+                'bom_item__sub_part_id',
+                'quantity',
+                'consumed',
+                'build__start_date',
+                'build__target_date',
+            ):
+                quantity = (
+                    line['quantity']
+                    - line['consumed']
+                    - build_allocated.get(line['pk'], Decimal(0))
+                )
+
+                if quantity > 0:
+                    when = self.need_date(
+                        line['build__start_date'], line['build__target_date']
+                    )
+                    self.gross[line['bom_item__sub_part_id']][when] += quantity
+
+    def load_receipts(self):
+        """Load the scheduled receipts from open purchase orders and active build orders."""
+        from build.models import Build
+        from build.status_codes import BuildStatusGroups
+        from order.models import PurchaseOrderLineItem
+        from order.status_codes import PurchaseOrderStatusGroups
+
+        lines = PurchaseOrderLineItem.objects.filter(
+            order__status__in=PurchaseOrderStatusGroups.OPEN,
+            part__isnull=False,
+            quantity__gt=F('received'),
+        )
+
+        for queryset in self.scoped(lines, 'part__part'):
+            for line in queryset.values(
+                'part__part_id',
+                'part__pack_quantity_native',
+                'quantity',
+                'received',
+                'target_date',
+                'order__target_date',
+            ):
+                # Convert the remaining quantity to the native units of the part
+                quantity = (line['quantity'] - line['received']) * Decimal(
+                    line['part__pack_quantity_native'] or 1
+                )
+
+                when = self.need_date(line['target_date'], line['order__target_date'])
+                self.receipts[line['part__part_id']][when] += quantity
+
+        builds = Build.objects.filter(
+            status__in=BuildStatusGroups.ACTIVE_CODES, quantity__gt=F('completed')
+        )
+
+        for queryset in self.scoped(builds, 'part'):
+            for build in queryset.values(
+                'part_id', 'quantity', 'completed', 'target_date'
+            ):
+                quantity = Decimal(build['quantity'] - build['completed'])
+
+                when = self.need_date(build['target_date'])
+                self.receipts[build['part_id']][when] += quantity
+
+    def load_bom(self):
+        """Load the BOM for each part with demand or supply (for a full planning run)."""
+        if self.bom is None:
+            self.bom = BomExplosion(set(self.gross.keys()) | set(self.receipts.keys()))
+            self.bom.load()
+
+    def load_parts(self):
+        """Load the planning data for each part."""
+        from part.models import Part
+
+        part_ids = set(self.bom.bom_lines.keys())
+
+        for chunk in chunked(sorted(part_ids), PLANNING_CHUNK_SIZE):
+            for part in Part.objects.filter(pk__in=chunk).values(
+                'pk', 'assembly', 'virtual', 'minimum_stock', 'lead_time'
+            ):
+                self.parts[part['pk']] = part
+
+    def load_stock(self):
+        """Load the available stock for each part (net of allocated stock)."""
+        from build.models import BuildItem
+        from order.models import SalesOrderAllocation
+        from order.status_codes import SalesOrderStatusGroups
+        from stock.models import StockItem
+
+        items = StockItem.objects.filter(StockItem.IN_STOCK_FILTER)
+
+        for queryset in self.scoped(items, 'part'):
+            for pk, quantity in (
+                queryset
+                .order_by()
+                .values('part')
+                .annotate(total=Sum('quantity'))
+                .values_list('part', 'total')
+            ):
+                self.stock[pk] += quantity
+
+        # Allocated stock is not available for any other demand
+        allocations = [
+            (BuildItem.objects.all(), 'stock_item__part'),
+            (
+                SalesOrderAllocation.objects.filter(
+                    line__order__status__in=SalesOrderStatusGroups.OPEN,
+                    shipment__shipment_date=None,
+                ),
+                'item__part',
+            ),
+        ]
+
+        for allocated, field in allocations:
+            for queryset in self.scoped(allocated, field):
+                for pk, quantity in (
+                    queryset
+                    .order_by()
+                    .values(field)
+                    .annotate(total=Sum('quantity'))
+                    .values_list(field, 'total')
+                ):
+                    self.stock[pk] -= quantity
+
+    def load_dependent_demand(self):
+        """Load the dependent demand from assemblies which are not planned in this run.
+
+        For an incremental run, the planned orders of any (unchanged) parent assembly
+        are read from the MaterialRequirement table.
+
+        Parent assemblies are found from the BOM lines directly, as the BomItemUsage
+        index is updated in the background (and may not reflect recent BOM changes).
+        """
+        from part.models import BomItem, MaterialRequirement
+
+        if self.scope is None:
+            return
+
+        lines = {}
+
+        for queryset in self.scoped(BomItem.objects.all(), 'sub_part'):
+            for line in queryset.values(*BomExplosion.BOM_FIELDS):
+                lines[line['pk']] = line
+
+        # Inherited BOM lines are also used by variants of the assembly
+        tree = PartTreeCache()
+        tree.load_trees({
+            line['part_id'] for line in lines.values() if line['inherited']
+        })
+
+        usage = defaultdict(set)
+
+        for line in lines.values():
+            assemblies = [line['part_id']]
+
+            if line['inherited']:
+                assemblies.extend(tree.descendants(line['part_id']))
+
+            for assembly in assemblies:
+                if assembly not in self.scope:
+                    usage[assembly].add(line['pk'])
+
+        if not usage:
+            return
+
+        for chunk in chunked(sorted(usage.keys()), PLANNING_CHUNK_SIZE):
+            for (
+                assembly,
+                level,
+                quantity,
+                planned_date,
+            ) in MaterialRequirement.objects.filter(part__in=chunk).values_list(
+                'part', 'level', 'net_requirement', 'planned_date'
+            ):
+                for bom_item in usage[assembly]:
+                    line = lines.get(bom_item)
+
+                    if not line or line['consumable']:
+                        continue
+
+                    sub_part = line['sub_part_id']
+
+                    # Components are always planned below the level of their parent assembly
+                    self.base_levels[sub_part] = max(
+                        self.base_levels.get(sub_part, 0), level + 1
+                    )
+
+                    if quantity > 0:
+                        self.gross[sub_part][self.need_date(planned_date)] += (
+                            required_quantity(line, quantity)
+                        )
+
+    def components(self, part_id: int) -> list[dict]:
+        """Return the BOM lines which are required to build the specified part."""
+        part = self.parts.get(part_id)
+
+        if not part or not part['assembly'] or part['virtual']:
+            return []
+
+        return [
+            line
+            for line in self.bom.bom_lines.get(part_id, [])
+            if not line['consumable'] and line['sub_part_id'] in self.parts
+        ]
+
+    def order(self) -> list[int]:
+        """Return the part IDs in planning order, and calculate the low-level code of each part.
+
+        Each part is ordered after every assembly which uses it (a topological sort of the BOM graph).
+        """
+        children = {
+            pk: {line['sub_part_id'] for line in self.components(pk)}
+            for pk in self.parts
+        }
+
+        parents = defaultdict(int)
+
+        for subs in children.values():
+            for sub in subs:
+                parents[sub] += 1
+
+        self.levels = {pk: self.base_levels.get(pk, 0) for pk in self.parts}
+
+        queue = sorted(pk for pk in self.parts if parents[pk] == 0)
+        ordered = []
+
+        while queue:
+            pk = queue.pop()
+            ordered.append(pk)
+
+            for sub in children[pk]:
+                self.levels[sub] = max(self.levels[sub], self.levels[pk] + 1)
+                parents[sub] -= 1
+
+                if parents[sub] == 0:
+                    queue.append(sub)
+
+        if len(ordered) < len(self.parts):
+            # Parts which are part of a recursive BOM cannot be ordered
+            remaining = sorted(set(self.parts.keys()) - set(ordered))
+            logger.warning('Recursive BOM detected for parts %s', remaining)
+            ordered.extend(remaining)
+
+        return ordered
+
+    def plan_part(self, part_id: int):
+        """Calculate the net requirements (and planned orders) for a single part."""
+        from part.models import MaterialRequirement
+
+        part = self.parts[part_id]
+
+        if part['virtual']:
+            return
+
+        gross = self.gross.get(part_id, {})
+        receipts = self.receipts.get(part_id, {})
+
+        projected = self.stock[part_id]
+        minimum = part['minimum_stock'] or Decimal(0)
+        lead_time = timedelta(days=part['lead_time'] or 0)
+
+        for when in sorted(set(gross.keys()) | set(receipts.keys())):
+            projected += receipts.get(when, 0) - gross.get(when, 0)
+
+            # Plan an order to restore the projected stock to the minimum level
+            net = max(minimum - projected, Decimal(0))
+            projected += net
+
+            planned_date = when - lead_time
+
+            if net > 0:
+                for line in self.components(part_id):
+                    self.gross[line['sub_part_id']][self.need_date(planned_date)] += (
+                        required_quantity(line, net)
+                    )
+
+            self.requirements.append(
+                MaterialRequirement(
+                    part_id=part_id,
+                    date=when,
+                    level=self.levels.get(part_id, 0),
+                    gross_requirement=gross.get(when, 0),
+                    scheduled_receipts=receipts.get(when, 0),
+                    projected_stock=projected,
+                    net_requirement=net,
+                    planned_date=planned_date,
+                    updated=self.now,
+                )
+            )
+
+    def commit(self):
+        """Replace the stored material requirements for the planned parts."""
+        from part.models import MaterialRequirement
+
+        with transaction.atomic():
+            if self.scope is None:
+                MaterialRequirement.objects.all().delete()
+            else:
+                for chunk in chunked(sorted(self.scope), PLANNING_CHUNK_SIZE):
+                    MaterialRequirement.objects.filter(part__in=chunk).delete()
+
+            MaterialRequirement.objects.bulk_create(
+                self.requirements, batch_size=PLANNING_CHUNK_SIZE
+            )
+
+    def run(self) -> int:
+        """Perform the planning run.
+
+        Returns:
+            The number of MaterialRequirement rows which were created
+        """
+        self.load_scope()
+        self.load_demand()
+        self.load_receipts()
+        self.load_bom()
+        self.load_parts()
+        self.load_stock()
+        self.load_dependent_demand()
+
+        for part_id in self.order():
+            self.plan_part(part_id)
+
+        self.commit()
+
+        logger.info(
+            'Material planning run complete: %s parts, %s requirements (%s)',
+            len(self.parts),
+            len(self.requirements),
+            'incremental' if self.incremental else 'full',
+        )
+
+        return len(self.requirements)
+
+
+def update_material_requirements(incremental: bool = True) -> int:
+    """Update the material requirements for all parts.
+
+    Arguments:
+        incremental: If True, only recalculate parts which have changed since the previous run.
+            A full run is performed if changes are not being tracked, or no previous run exists.
+
+    Returns:
+        The number of MaterialRequirement rows which were created
+    """
+    from part.models import MaterialRequirement, MaterialRequirementChange
+
+    if incremental and tracking_enabled() and MaterialRequirement.objects.exists():
+        changes = dict(MaterialRequirementChange.objects.values_list('pk', 'part'))
+
+        if not changes:
+            return 0
+
+        created = MaterialPlanner(changes.values()).run()
+
+        # Changes which were recorded during this run are processed next time
+        for chunk in chunked(sorted(changes.keys()), PLANNING_CHUNK_SIZE):
+            MaterialRequirementChange.objects.filter(pk__in=chunk).delete()
+    else:
+        MaterialRequirementChange.objects.all().delete()
+        created = MaterialPlanner().run()
+
+    return created
+
+
+# region Change tracking
+def record_planning_changes(part_ids: Iterable[int]):
+    """Write changes for the provided parts to the MaterialRequirementChange table."""
+    from part.models import MaterialRequirementChange, Part
+
+    for chunk in chunked(sorted(part_ids), PLANNING_CHUNK_SIZE):
+        # Ignore any parts which have since been deleted
+        existing = Part.objects.filter(pk__in=chunk).values_list('pk', flat=True)
+
+        MaterialRequirementChange.objects.bulk_create(
+            [MaterialRequirementChange(part_id=pk) for pk in existing],
+            ignore_conflicts=True,
+        )
+
+
+# Parts which have changed in the current thread, but have not yet been recorded
+_planning_queue = CommitQueue(record_planning_changes)
+
+
+def schedule_planning_update(part_ids: Iterable[int]):
+    """Record that the material requirements of the provided parts must be recalculated.
+
+    The part IDs are collected in memory, and written to the MaterialRequirementChange
+    table (with a single query) when the current transaction is committed.
+
+    Arguments:
+        part_ids: IDs of the parts which have changed
+    """
+    if not tracking_enabled():
+        return
+
+    _planning_queue.add(part_ids)
+
+
+def flush_planning_queue():
+    """Write all pending part changes to the database."""
+    _planning_queue.flush()
+
+
+def _build_parts(build) -> list[int]:
+    """Return the parts affected by a change to a Build (the assembly, and its components)."""
+    return [
+        build.part_id,
+        *build.build_lines.values_list('bom_item__sub_part', flat=True),
+    ]
+
+
+# Models which affect the material requirements of a part,
+# mapped to a function which returns the IDs of the affected parts.
+# Note that stock changes are recorded via stock.models.stock_changed
+# Stock allocations are not tracked, as an allocation reduces both the demand
+# and the available stock by the same quantity (the next full run picks up any change in timing)
+PLANNING_SOURCES = {
+    'build.build': _build_parts,
+    'build.buildline': lambda line: [line.bom_item.sub_part_id],
+    'order.purchaseorder': lambda order: order.lines.values_list(
+        'part__part', flat=True
+    ),
+    'order.purchaseorderlineitem': lambda line: (
+        [line.part.part_id] if line.part_id else []
+    ),
+    'order.salesorder': lambda order: order.lines.values_list('part', flat=True),
+    'order.salesorderlineitem': lambda line: [line.part_id],
+    'part.bomitem': lambda bom_item: [bom_item.part_id],
+    'part.part': lambda part: [part.pk],
+}
+
+
+def changed_parts(instance) -> list[int]:
+    """Return the IDs of the parts whose material requirements are affected by a change to the provided instance."""
+    func = PLANNING_SOURCES.get(instance._meta.label_lower)
+
+    if func is None:
+        return []
+
+    try:
+        return list(func(instance))
+    except ObjectDoesNotExist:
+        # The related objects may have already been deleted
+        return []
+
+
+# endregion
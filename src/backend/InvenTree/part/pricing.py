@@ -0,0 +1,847 @@
+"""Graph-wide pricing calculations for the Part app.
+
+Pricing for a given part depends on the pricing of other parts:
+
+- An assembly depends on the parts (and substitutes / variants) in its BOM
+- A template part depends on the pricing of its variants
+
+Rather than recalculating each dependent part in a separate background task,
+the functions here collect the entire set of affected parts, load the required
+data in bulk, sort the dependency graph topologically, and then calculate pricing
+for every part in a single bottom-up pass.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+import structlog
+from djmoney.money import Money
+
+from InvenTree.commit_queue import CommitQueue
+from InvenTree.helpers import chunked
+from part.bom import PartTreeCache, index_built
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of primary keys to pass to a single "__in" query
+PRICING_CHUNK_SIZE = 500
+
+# Name of the background task which drains the pricing update queue
+PRICING_QUEUE_TASK = 'part.tasks.process_pricing_queue'
+
+# Maximum delay (in seconds) before queued pricing updates are processed
+PRICING_QUEUE_DELAY = 60
+
+# Fields which are written back to the database after calculation
+PRICING_FIELDS = [
+    'bom_cost_min',
+    'bom_cost_max',
+    'purchase_cost_min',
+    'purchase_cost_max',
+    'internal_cost_min',
+    'internal_cost_max',
+    'supplier_price_min',
+    'supplier_price_max',
+    'variant_cost_min',
+    'variant_cost_max',
+    'sale_price_min',
+    'sale_price_max',
+    'sale_history_min',
+    'sale_history_max',
+    'overall_min',
+    'overall_max',
+]
+
+
+class PricingGraph(PartTreeCache):
+    """Calculate pricing for a set of parts, and all parts which depend on them.
+
+    Usage:
+        graph = PricingGraph([1, 2, 3])
+        graph.update()
+    """
+
+    # Part fields required for the graph calculations
+    PART_FIELDS = [
+        'pk',
+        'tree_id',
+        'lft',
+        'rght',
+        'active',
+        'assembly',
+        'is_template',
+        'purchaseable',
+        'trackable',
+    ]
+
+    def __init__(
+        self, part_ids: Iterable[int], cascade: bool = True, include_self: bool = True
+    ):
+        """Initialize the pricing graph.
+
+        Arguments:
+            part_ids: IDs of the parts which are known to require a pricing update
+            cascade: If True, include all assemblies and templates which depend on these parts
+            include_self: If False, the provided parts are not recalculated (only the dependent parts)
+        """
+        super().__init__()
+
+        self.seed_ids = {int(pk) for pk in part_ids}
+        self.cascade = cascade
+        self.include_self = include_self
+
+        # Set of part IDs for which pricing will be recalculated
+        self.nodes: set[int] = set()
+
+        # BOM lines which apply to each node: {part_id: [line, ...]}
+        self.bom_lines: dict[int, list[dict]] = {}
+
+        # PartPricing instances, keyed by part ID
+        self.pricing: dict = {}
+
+    def collect(self):
+        """Construct the set of parts which require a pricing update.
+
+        Starting from the seed parts, walk "upwards" through the graph:
+        - Template parts above each part (variant pricing)
+        - Assemblies which use each part in their BOM (directly or as a substitute)
+        - Variants of assemblies which inherit the relevant BOM lines
+
+        Each step of the walk is performed for an entire "level" of parts at once.
+        """
+        frontier = set(self.seed_ids)
+        nodes = set()
+
+        while frontier:
+            self.load_trees(frontier)
+
+            # Ignore any parts which no longer exist
+            frontier = {pk for pk in frontier if pk in self.parts}
+            nodes |= frontier
+
+            if not self.cascade:
+                break
+
+            upstream = set()
+
+            for pk in frontier:
+                upstream.update(self.ancestors(pk))
+
+            upstream.update(self.used_in(frontier))
+
+            frontier = upstream - nodes
+
+        if not self.include_self:
+            nodes -= self.seed_ids
+
+        self.nodes = nodes
+
+    def used_in(self, part_ids: set[int]) -> set[int]:
+        """Return the IDs of all assemblies which use the provided parts in their BOM.
+
+        Includes BOM lines where the part is a substitute, and variants of assemblies
+        which inherit the BOM line. Variants of the sub-part are not included here,
+        as they are reached via the template part (see collect).
+
+        Assemblies are found using the BomItemUsage ("used in") index.
+        Until the index has been built, the BOM data is queried directly instead.
+        """
+        from part.models import BomItem, BomItemUsage
+
+        assemblies = set()
+
+        if index_built(BomItemUsage):
+            for chunk in chunked(part_ids, PRICING_CHUNK_SIZE):
+                assemblies.update(
+                    BomItemUsage.objects
+                    .filter(part__in=chunk, variant=False)
+                    .values_list('assembly', flat=True)
+                    .distinct()
+                )
+
+            return assemblies
+
+        inherited = set()
+
+        for chunk in chunked(part_ids, PRICING_CHUNK_SIZE):
+            for assembly, is_inherited in (
+                BomItem.objects
+                .filter(Q(sub_part__in=chunk) | Q(substitutes__part__in=chunk))
+                .values_list('part', 'inherited')
+                .distinct()
+            ):
+                assemblies.add(assembly)
+
+                if is_inherited:
+                    inherited.add(assembly)
+
+        self.load_trees(inherited)
+
+        for pk in inherited:
+            assemblies.update(self.descendants(pk))
+
+        return assemblies
+
+    def load(self):
+        """Load BOM and pricing data for all nodes in the graph."""
+        from part.models import BomItem, BomItemSubstitute, PartPricing
+
+        assemblies = {pk for pk in self.nodes if self.parts[pk]['assembly']}
+
+        # BOM lines can be defined against the assembly, or inherited from a template
+        bom_sources = set(assemblies)
+
+        for pk in assemblies:
+            bom_sources.update(self.ancestors(pk))
+
+        lines_by_part: dict[int, list[dict]] = {}
+        lines_by_id: dict[int, dict] = {}
+
+        for chunk in chunked(bom_sources, PRICING_CHUNK_SIZE):
+            for line in BomItem.objects.filter(part__in=chunk).values(
+                'pk',
+                'part_id',
+                'sub_part_id',
+                'quantity',
+                'inherited',
+                'allow_variants',
+            ):
+                line['substitutes'] = []
+                lines_by_part.setdefault(line['part_id'], []).append(line)
+                lines_by_id[line['pk']] = line
+
+        for chunk in chunked(lines_by_id.keys(), PRICING_CHUNK_SIZE):
+            for bom_item_id, part_id in BomItemSubstitute.objects.filter(
+                bom_item__in=chunk
+            ).values_list('bom_item_id', 'part_id'):
+                lines_by_id[bom_item_id]['substitutes'].append(part_id)
+
+        # Ensure that we have tree data for every referenced sub-part
+        referenced = set()
+
+        for line in lines_by_id.values():
+            referenced.add(line['sub_part_id'])
+            referenced.update(line['substitutes'])
+
+        self.load_trees(referenced)
+
+        for line in lines_by_id.values():
+            line['valid_parts'] = self.valid_parts(line)
+
+        for pk in assemblies:
+            lines = list(lines_by_part.get(pk, []))
+
+            for parent in self.ancestors(pk):
+                lines.extend(
+                    line for line in lines_by_part.get(parent, []) if line['inherited']
+                )
+
+            self.bom_lines[pk] = lines
+
+        # Load existing pricing data for all parts which are referenced by the graph
+        required = set(self.nodes)
+
+        for lines in self.bom_lines.values():
+            for line in lines:
+                required.update(line['valid_parts'])
+
+        for pk in self.nodes:
+            if self.parts[pk]['is_template']:
+                required.update(self.descendants(pk))
+
+        for chunk in chunked(required, PRICING_CHUNK_SIZE):
+            for pricing in PartPricing.objects.filter(part__in=chunk):
+                self.pricing[pricing.part_id] = pricing
+
+        for pk in self.nodes:
+            if pk not in self.pricing:
+                self.pricing[pk] = PartPricing(part_id=pk)
+
+    def valid_parts(self, line: dict) -> list[int]:
+        """Return the IDs of all parts which can be allocated against a BOM line.
+
+        Mirrors the logic of BomItem.get_valid_parts_for_allocation()
+        """
+        sub_part_id = line['sub_part_id']
+
+        parts = {sub_part_id}
+
+        if line['allow_variants']:
+            parts.update(self.descendants(sub_part_id))
+
+        for substitute_id in line['substitutes']:
+            parts.add(substitute_id)
+
+            if line['allow_variants']:
+                parts.update(self.descendants(substitute_id))
+
+        trackable = self.parts[sub_part_id]['trackable']
+
+        return [
+            pk
+            for pk in parts
+            if pk in self.parts and self.parts[pk]['trackable'] == trackable
+        ]
+
+    def dependencies(self, part_id: int) -> set[int]:
+        """Return the set of graph nodes which must be calculated before the given part."""
+        deps = set()
+
+        for line in self.bom_lines.get(part_id, []):
+            deps.update(line['valid_parts'])
+
+        if self.parts[part_id]['is_template']:
+            deps.update(self.descendants(part_id))
+
+        deps.discard(part_id)
+
+        return deps & self.nodes
+
+    def sort(self) -> list[int]:
+        """Return the graph nodes sorted so that each part follows its dependencies.
+
+        Uses Kahn's algorithm. Any nodes which form a cycle are appended at the end.
+        """
+        dependencies = {pk: self.dependencies(pk) for pk in self.nodes}
+        dependants: dict[int, set[int]] = {pk: set() for pk in self.nodes}
+
+        for pk, deps in dependencies.items():
+            for dep in deps:
+                dependants[dep].add(pk)
+
+        remaining = {pk: len(deps) for pk, deps in dependencies.items()}
+        queue = sorted(pk for pk, count in remaining.items() if count == 0)
+        ordered = []
+
+        while queue:
+            pk = queue.pop()
+            ordered.append(pk)
+
+            for dependant in dependants[pk]:
+                remaining[dependant] -= 1
+
+                if remaining[dependant] == 0:
+                    queue.append(dependant)
+
+        if len(ordered) < len(self.nodes):
+            cyclic = sorted(set(self.nodes) - set(ordered))
+            logger.warning(
+                'Pricing graph contains a cycle - %s parts calculated out of order',
+                len(cyclic),
+            )
+            ordered.extend(cyclic)
+
+        return ordered
+
+    # region Bulk data loading
+    def load_price_data(self, queryset, part_field: str, price_field: str, pack=None):
+        """Load price values from a queryset, grouped by part ID.
+
+        Arguments:
+            queryset: Queryset from which to extract the price data
+            part_field: Name of the field which references the Part
+            price_field: Name of the money field
+            pack: Optional name of the field which provides the pack quantity
+        """
+        fields = [part_field, price_field, f'{price_field}_currency']
+
+        if pack:
+            fields.append(pack)
+
+        data: dict[int, list[Money]] = {}
+
+        for row in queryset.values(*fields):
+            amount = row[price_field]
+
+            if amount is None:
+                continue
+
+            price = Money(amount, row[f'{price_field}_currency'])
+
+            if pack:
+                price = price / row[pack]
+
+            data.setdefault(row[part_field], []).append(price)
+
+        return data
+
+    def load_prices(
+        self, model, part_field: str, price_field: str, pack=None, **filters
+    ):
+        """Load price data for all graph nodes from the specified model."""
+        data = {}
+
+        for chunk in chunked(self.nodes, PRICING_CHUNK_SIZE):
+            queryset = model.objects.filter(**{f'{part_field}__in': chunk}, **filters)
+            data.update(
+                self.load_price_data(queryset, part_field, price_field, pack=pack)
+            )
+
+        return data
+
+    # endregion
+
+    def convert_range(self, pricing, prices: Iterable[Money]):
+        """Return the converted (min, max) values for a set of prices."""
+        price_min = None
+        price_max = None
+
+        for price in prices:
+            cost = pricing.convert(price)
+
+            if cost is None:
+                continue
+
+            if price_min is None or cost < price_min:
+                price_min = cost
+
+            if price_max is None or cost > price_max:
+                price_max = cost
+
+        return price_min, price_max
+
+    def calculate(self, ordered: list[int]):
+        """Calculate pricing data for each node, in dependency order."""
+        import common.currency
+        import InvenTree.helpers
+        import part.models as part_models
+        from common.settings import get_global_setting
+        from company.models import SupplierPriceBreak
+        from order.models import PurchaseOrderLineItem, SalesOrderLineItem
+        from order.status_codes import PurchaseOrderStatus, SalesOrderStatusGroups
+        from stock.models import StockItem
+
+        currency_code = common.currency.currency_code_default()
+
+        purchase_prices = self.load_prices(
+            PurchaseOrderLineItem,
+            'part__part',
+            'purchase_price',
+            pack='part__pack_quantity_native',
+            order__status=PurchaseOrderStatus.COMPLETE.value,
+            received__gt=0,
+        )
+
+        if get_global_setting('PRICING_USE_STOCK_PRICING', True):
+            stock_filters = {}
+            days = int(get_global_setting('PRICING_STOCK_ITEM_AGE_DAYS', 0))
+
+            if days > 0:
+                date_threshold = InvenTree.helpers.current_date() - timedelta(days=days)
+                stock_filters['updated__gte'] = date_threshold
+
+            stock_prices = self.load_prices(
+                StockItem, 'part', 'purchase_price', **stock_filters
+            )
+        else:
+            stock_prices = {}
+
+        if get_global_setting('PART_INTERNAL_PRICE', False):
+            internal_prices = self.load_prices(
+                part_models.PartInternalPriceBreak, 'part', 'price'
+            )
+        else:
+            internal_prices = {}
+
+        supplier_prices = self.load_prices(
+            SupplierPriceBreak, 'part__part', 'price', pack='part__pack_quantity_native'
+        )
+
+        sale_prices = self.load_prices(part_models.PartSellPriceBreak, 'part', 'price')
+
+        # Sale history includes sales of any variant parts
+        sale_parts = set(self.nodes)
+
+        for pk in self.nodes:
+            sale_parts.update(self.descendants(pk))
+
+        sale_history = {}
+
+        for chunk in chunked(sale_parts, PRICING_CHUNK_SIZE):
+            sale_history.update(
+                self.load_price_data(
+                    SalesOrderLineItem.objects.filter(
+                        order__status__in=SalesOrderStatusGroups.COMPLETE,
+                        part__in=chunk,
+                    ),
+                    'part',
+                    'sale_price',
+                )
+            )
+
+        active_variants = get_global_setting('PRICING_ACTIVE_VARIANTS', False)
+
+        for pk in ordered:
+            part = self.parts[pk]
+            pricing = self.pricing[pk]
+
+            # BOM pricing
+            pricing.bom_cost_min, pricing.bom_cost_max = self.calculate_bom_cost(
+                pk, pricing, currency_code
+            )
+
+            # Purchase pricing (from purchase history and stock items)
+            pricing.purchase_cost_min, pricing.purchase_cost_max = self.convert_range(
+                pricing, purchase_prices.get(pk, []) + stock_prices.get(pk, [])
+            )
+
+            # Internal pricing
+            pricing.internal_cost_min, pricing.internal_cost_max = self.convert_range(
+                pricing, internal_prices.get(pk, [])
+            )
+
+            # Supplier pricing
+            if part['purchaseable']:
+                pricing.supplier_price_min, pricing.supplier_price_max = (
+                    self.convert_range(pricing, supplier_prices.get(pk, []))
+                )
+            else:
+                pricing.supplier_price_min = pricing.supplier_price_max = None
+
+            # Variant pricing
+            variant_min = None
+            variant_max = None
+
+            if part['is_template']:
+                for variant_id in self.descendants(pk):
+                    if active_variants and not self.parts[variant_id]['active']:
+                        continue
+
+                    v_min, v_max = self.overall_range(pricing, variant_id)
+
+                    if v_min is not None:
+                        if variant_min is None or v_min < variant_min:
+                            variant_min = v_min
+
+                    if v_max is not None:
+                        if variant_max is None or v_max > variant_max:
+                            variant_max = v_max
+
+            pricing.variant_cost_min = variant_min
+            pricing.variant_cost_max = variant_max
+
+            # Sale pricing
+            pricing.sale_price_min, pricing.sale_price_max = self.convert_range(
+                pricing, sale_prices.get(pk, [])
+            )
+
+            history = []
+
+            for variant_id in [pk, *self.descendants(pk)]:
+                history.extend(sale_history.get(variant_id, []))
+
+            pricing.sale_history_min, pricing.sale_history_max = self.convert_range(
+                pricing, history
+            )
+
+            pricing.currency = currency_code
+            pricing.update_overall_cost()
+
+    def overall_range(self, pricing, part_id: int):
+        """Return the converted overall (min, max) pricing for the specified part."""
+        other = self.pricing.get(part_id)
+
+        if other is None:
+            return None, None
+
+        return pricing.convert(other.overall_min), pricing.convert(other.overall_max)
+
+    def calculate_bom_cost(self, part_id: int, pricing, currency_code: str):
+        """Calculate the cumulative BOM cost for the specified assembly.
+
+        Mirrors the logic of PartPricing.update_bom_cost()
+        """
+        if not self.parts[part_id]['assembly']:
+            return None, None
+
+        cumulative_min = Money(0, currency_code)
+        cumulative_max = Money(0, currency_code)
+
+        any_min_elements = False
+        any_max_elements = False
+
+        for line in self.bom_lines.get(part_id, []):
+            line_min = None
+            line_max = None
+
+            for sub_part_id in line['valid_parts']:
+                if (
+                    sub_part_id != line['sub_part_id']
+                    and not self.parts[sub_part_id]['active']
+                ):
+                    continue
+
+                sub_min, sub_max = self.overall_range(pricing, sub_part_id)
+
+                if sub_min is not None:
+                    if line_min is None or sub_min < line_min:
+                        line_min = sub_min
+
+                if sub_max is not None:
+                    if line_max is None or sub_max > line_max:
+                        line_max = sub_max
+
+            if line_min is not None:
+                cumulative_min += pricing.convert(line_min * line['quantity'])
+                any_min_elements = True
+
+            if line_max is not None:
+                cumulative_max += pricing.convert(line_max * line['quantity'])
+                any_max_elements = True
+
+        return (
+            cumulative_min if any_min_elements else None,
+            cumulative_max if any_max_elements else None,
+        )
+
+    def save(self):
+        """Write the calculated pricing data back to the database."""
+        from part.models import PartPricing
+
+        now = timezone.now()
+
+        existing = []
+        created = []
+
+        for pk in self.nodes:
+            pricing = self.pricing[pk]
+            pricing.updated = now
+
+            if pricing.pk:
+                existing.append(pricing)
+            else:
+                created.append(pricing)
+
+        # Note: The 'scheduled_for_update' flag is managed by the pricing queue,
+        # so that any part which is flagged during the calculation is not lost
+        fields = ['currency', 'updated']
+
+        for field in PRICING_FIELDS:
+            fields += [field, f'{field}_currency']
+
+        PartPricing.objects.bulk_update(existing, fields, batch_size=PRICING_CHUNK_SIZE)
+
+        # Another worker may have created pricing data for the same part in the meantime
+        PartPricing.objects.bulk_create(
+            created, batch_size=PRICING_CHUNK_SIZE, ignore_conflicts=True
+        )
+
+    def update(self) -> int:
+        """Recalculate pricing for every part in the graph.
+
+        Returns:
+            The number of parts for which pricing was updated
+        """
+        self.collect()
+
+        if not self.nodes:
+            return 0
+
+        self.load()
+        self.calculate(self.sort())
+        self.save()
+
+        return len(self.nodes)
+
+
+def update_pricing(
+    part_ids: Iterable[int], cascade: bool = True, include_self: bool = True
+) -> int:
+    """Recalculate pricing for the provided parts (and all dependent parts) in a single pass.
+
+    Arguments:
+        part_ids: IDs of the parts which require a pricing update
+        cascade: If True, also update all assemblies and templates which depend on these parts
+        include_self: If False, only the dependent parts are updated
+
+    Returns:
+        The number of parts for which pricing was updated
+    """
+    import InvenTree.ready
+
+    if InvenTree.ready.isImportingData() or InvenTree.ready.isRunningMigrations():
+        return 0
+
+    graph = PricingGraph(part_ids, cascade=cascade, include_self=include_self)
+    n = graph.update()
+
+    logger.info('Updated pricing for %s parts', n)
+
+    return n
+
+
+# region Pricing update queue
+def record_pricing_updates(pending: set[tuple[int, bool]]):
+    """Write the provided (part_id, create) pairs to the database, and schedule the queue to be processed."""
+    from part.models import Part, PartPricing
+
+    part_ids = sorted({pk for pk, _create in pending})
+    create_ids = {pk for pk, create in pending if create}
+
+    existing = set()
+
+    for chunk in chunked(part_ids, PRICING_CHUNK_SIZE):
+        PartPricing.objects.filter(part__in=chunk, scheduled_for_update=False).update(
+            scheduled_for_update=True
+        )
+
+        if create_ids:
+            existing.update(
+                PartPricing.objects.filter(part__in=chunk).values_list(
+                    'part_id', flat=True
+                )
+            )
+
+    # Create new PartPricing entries as required
+    missing = create_ids - existing
+
+    for chunk in chunked(missing, PRICING_CHUNK_SIZE):
+        PartPricing.objects.bulk_create(
+            [
+                PartPricing(part_id=pk, scheduled_for_update=True)
+                for pk in Part.objects.filter(pk__in=chunk).values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+    schedule_pricing_queue()
+
+
+# Parts which have been scheduled for a pricing update in the current transaction,
+# but have not yet been written to the database
+_pricing_queue = CommitQueue(record_pricing_updates)
+
+
+def schedule_pricing_update(part_ids: Iterable[int], create: bool = False):
+    """Add the provided parts to the pricing update queue.
+
+    Rather than writing to the database each time a part is scheduled,
+    the part IDs are collected in memory and written in a single batch
+    when the current transaction is committed. Scheduling the same part
+    multiple times within a transaction has no additional cost.
+
+    If the transaction is rolled back, the parts which were scheduled
+    within that transaction are discarded.
+
+    Arguments:
+        part_ids: IDs of the parts which require a pricing update
+        create: If True, create PartPricing entries for parts which do not have one
+    """
+    import InvenTree.ready
+
+    # If importing data, skip pricing update
+    if InvenTree.ready.isImportingData():
+        return
+
+    # If running data migrations, skip pricing update
+    if InvenTree.ready.isRunningMigrations():
+        return
+
+    _pricing_queue.add((pk, create) for pk in part_ids if pk is not None)
+
+    if settings.TESTING and settings.TESTING_PRICING:
+        # Unit tests run inside a transaction which is never committed
+        flush_pricing_queue()
+
+
+def flush_pricing_queue():
+    """Write any pending pricing updates to the database, and schedule the queue to be processed."""
+    _pricing_queue.flush()
+
+
+def schedule_pricing_queue():
+    """Schedule the pricing update queue to be processed.
+
+    The queue is drained by the periodic process_pricing_queue task.
+    Rather than offloading a new task each time parts are queued, the next run
+    of the periodic task is brought forward to (at most) PRICING_QUEUE_DELAY from now.
+    Any parts which are queued within that window are processed together.
+
+    If the periodic task has not been registered, a drain task is offloaded instead.
+    """
+    from django_q.models import Schedule
+
+    import InvenTree.tasks
+    import part.tasks as part_tasks
+
+    # Pricing calculations are performed in the background,
+    # unless the TESTING_PRICING flag is set
+    background = not settings.TESTING or not settings.TESTING_PRICING
+
+    if background:
+        next_run = timezone.now() + timedelta(seconds=PRICING_QUEUE_DELAY)
+
+        schedule = Schedule.objects.filter(func=PRICING_QUEUE_TASK)
+
+        if schedule.filter(next_run__gt=next_run).update(next_run=next_run):
+            return
+
+        if schedule.exists():
+            # The queue is already due to be processed within the window
+            return
+
+    InvenTree.tasks.offload_task(
+        part_tasks.process_pricing_queue, force_async=background, group='pricing'
+    )
+
+
+def pricing_queue_depth() -> int:
+    """Return the number of parts which are waiting for a pricing update."""
+    from part.models import PartPricing
+
+    return PartPricing.objects.filter(scheduled_for_update=True).count()
+
+
+def process_pricing_queue(batch_size: int = PRICING_CHUNK_SIZE) -> int:
+    """Recalculate pricing for all parts in the pricing update queue.
+
+    Parts are processed in batches, with all dependent parts for each batch
+    being recalculated in a single pass.
+
+    Arguments:
+        batch_size: Maximum number of queued parts to process in each batch
+
+    Returns:
+        The number of parts for which pricing was updated
+    """
+    from part.models import PartPricing
+
+    last_id = 0
+    n = 0
+
+    while True:
+        part_ids = list(
+            PartPricing.objects
+            .filter(scheduled_for_update=True, part_id__gt=last_id)
+            .order_by('part_id')
+            .values_list('part_id', flat=True)[:batch_size]
+        )
+
+        if not part_ids:
+            break
+
+        last_id = part_ids[-1]
+
+        # Clear the flag *before* calculation, so that any part which is
+        # scheduled again while the calculation is running is not lost
+        PartPricing.objects.filter(part__in=part_ids).update(scheduled_for_update=False)
+
+        try:
+            n += update_pricing(part_ids, cascade=True)
+        except Exception:
+            # Return the parts to the queue, so that they are retried on the next run
+            PartPricing.objects.filter(part__in=part_ids).update(
+                scheduled_for_update=True
+            )
+            raise
+
+    return n
+
+
+# endregion
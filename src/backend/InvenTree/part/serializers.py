@@ -15,7 +15,6 @@ from django.utils.translation import gettext_lazy as _
 
 import structlog
 from djmoney.contrib.exchange.exceptions import MissingRate
-from djmoney.contrib.exchange.models import convert_money
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from sql_util.utils import SubqueryCount
@@ -30,6 +29,7 @@ import part.filters as part_filters
 import part.helpers as part_helpers
 import stock.models
 import users.models
+from common.currency import convert_money
 from importer.registry import register_importer
 from InvenTree.mixins import DataImportExportSerializerMixin
 from InvenTree.ready import isGeneratingSchema
@@ -45,6 +45,8 @@ from users.serializers import UserSerializer
 from .models import (
     BomItem,
     BomItemSubstitute,
+    ExplodedBomItem,
+    MaterialRequirement,
     Part,
     PartCategory,
     PartCategoryParameterTemplate,
@@ -587,6 +589,7 @@ class PartSerializer(
             'link',
             'locked',
             'minimum_stock',
+            'lead_time',
             'name',
             'notes',
             'parameters',
@@ -623,6 +626,7 @@ class PartSerializer(
             'external_stock',
             'unallocated_stock',
             'variant_stock',
+            'can_build',
             # Fields only used for Part creation
             'duplicate',
             'initial_stock',
@@ -786,6 +790,17 @@ class PartSerializer(
         source='category.name', read_only=True, label=_('Category Name')
     )
 
+    # Note: The 'can_build_quantity' annotation is only applied if this field is requested
+    can_build = enable_filter(
+        FilterableFloatField(
+            source='can_build_quantity',
+            label=_('Can Build'),
+            read_only=True,
+            allow_null=True,
+        ),
+        False,
+    )
+
     responsible = serializers.PrimaryKeyRelatedField(
         queryset=users.models.Owner.objects.all(),
         required=False,
@@ -1730,6 +1745,126 @@ class BomItemSerializer(
         return queryset
 
 
+class ExplodedBomItemSerializer(
+    InvenTree.serializers.FilterableSerializerMixin,
+    InvenTree.serializers.InvenTreeModelSerializer,
+):
+    """Serializer for the ExplodedBomItem model (read only)."""
+
+    class Meta:
+        """Metaclass defining serializer fields."""
+
+        model = ExplodedBomItem
+        fields = [
+            'pk',
+            'assembly',
+            'sub_part',
+            'bom_item',
+            'depth',
+            'quantity',
+            'inherited',
+            'substitute',
+            'path',
+            'assembly_detail',
+            'sub_part_detail',
+        ]
+        read_only_fields = fields
+
+    quantity = serializers.FloatField(read_only=True)
+
+    assembly_detail = enable_filter(
+        PartBriefSerializer(
+            source='assembly',
+            label=_('Assembly'),
+            many=False,
+            read_only=True,
+            allow_null=True,
+        ),
+        False,
+        prefetch_fields=['assembly'],
+    )
+
+    sub_part_detail = enable_filter(
+        PartBriefSerializer(
+            source='sub_part',
+            label=_('Component'),
+            many=False,
+            read_only=True,
+            allow_null=True,
+        ),
+        True,
+        prefetch_fields=['sub_part'],
+    )
+
+
+class MaterialRequirementSerializer(
+    InvenTree.serializers.FilterableSerializerMixin,
+    InvenTree.serializers.InvenTreeModelSerializer,
+):
+    """Serializer for the MaterialRequirement model (read only)."""
+
+    class Meta:
+        """Metaclass defining serializer fields."""
+
+        model = MaterialRequirement
+        fields = [
+            'pk',
+            'part',
+            'date',
+            'level',
+            'gross_requirement',
+            'scheduled_receipts',
+            'projected_stock',
+            'net_requirement',
+            'planned_date',
+            'updated',
+            'part_detail',
+        ]
+        read_only_fields = fields
+
+    gross_requirement = serializers.FloatField(read_only=True)
+
+    scheduled_receipts = serializers.FloatField(read_only=True)
+
+    projected_stock = serializers.FloatField(read_only=True)
+
+    net_requirement = serializers.FloatField(read_only=True)
+
+    part_detail = enable_filter(
+        PartBriefSerializer(
+            source='part', label=_('Part'), many=False, read_only=True, allow_null=True
+        ),
+        True,
+        prefetch_fields=['part'],
+    )
+
+
+class MaterialPlanningRunSerializer(serializers.Serializer):
+    """Serializer for starting a material requirements planning run."""
+
+    class Meta:
+        """Metaclass defining serializer fields."""
+
+        fields = ['incremental']
+
+    incremental = serializers.BooleanField(
+        label=_('Incremental'),
+        help_text=_('Only recalculate parts which have changed since the previous run'),
+        default=False,
+    )
+
+    def save(self):
+        """Offload the planning run to a background task."""
+        from InvenTree.tasks import offload_task
+        from part.tasks import update_material_requirements
+
+        offload_task(
+            update_material_requirements,
+            incremental=self.validated_data.get('incremental', False),
+            group='part',
+        )
+
+
 @register_importer()
 class CategoryParameterTemplateSerializer(
     InvenTree.serializers.FilterableSerializerMixin,
@@ -1,14 +1,41 @@
 """Stock history functionality."""
 
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Optional
+
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.utils import timezone
+
 import structlog
-from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 
 logger = structlog.get_logger('inventree')
 
+# Number of parts to process in each batch of stocktake queries
+STOCKTAKE_CHUNK_SIZE = 500
+
+
+def perform_stocktake(
+    chunk_size: int = STOCKTAKE_CHUNK_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    incremental: Optional[bool] = None,
+) -> int:
+    """Generate stock history entries for all active parts.
+
+    Stock levels and valuations are calculated using grouped queries
+    over batches of parts, rather than iterating through each stock item.
+
+    Arguments:
+        chunk_size: The number of parts to process in each batch
+        progress: Optional callback, called as progress(processed, total) after each batch
+        incremental: If True, only recalculate parts which have changed since their previous entry (defaults to the STOCKTAKE_INCREMENTAL setting)
 
-def perform_stocktake() -> None:
-    """Generate stock history entries for all active parts."""
+    Returns:
+        The number of stock history entries which were created
+    """
     import InvenTree.helpers
     import part.models as part_models
     from common.currency import currency_code_default
@@ -16,89 +43,367 @@ def perform_stocktake() -> None:
 
     if not get_global_setting('STOCKTAKE_ENABLE', False, cache=False):
         logger.info('Stocktake functionality is disabled - skipping')
-        return
+        return 0
 
     exclude_external = get_global_setting(
         'STOCKTAKE_EXCLUDE_EXTERNAL', False, cache=False
     )
 
-    active_parts = part_models.Part.objects.filter(active=True)
+    if incremental is None:
+        incremental = get_global_setting('STOCKTAKE_INCREMENTAL', False, cache=False)
 
-    # New history entries to be created
-    history_entries = []
+    # Deleted stock items leave no tracking entries behind,
+    # and are only detected via the resulting pricing update
+    if incremental and not get_global_setting('PRICING_AUTO_UPDATE', cache=False):
+        logger.info(
+            'Automatic pricing updates are disabled - performing full stocktake'
+        )
+        incremental = False
 
-    N_BULK_CREATE = 250
+    part_ids = list(
+        part_models.Part.objects
+        .filter(active=True)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
 
     base_currency = currency_code_default()
     today = InvenTree.helpers.current_date()
 
-    logger.info(
-        'Creating new stock history entries for %s active parts', active_parts.count()
+    logger.info('Creating new stock history entries for %s active parts', len(part_ids))
+
+    processed = 0
+    created = 0
+
+    for chunk in InvenTree.helpers.chunked(part_ids, max(1, chunk_size)):
+        history_entries = stocktake_entries(
+            chunk,
+            base_currency,
+            today,
+            exclude_external=exclude_external,
+            incremental=incremental,
+        )
+
+        # Batch create stock history entries
+        part_models.PartStocktake.objects.bulk_create(history_entries)
+
+        processed += len(chunk)
+        created += len(history_entries)
+
+        if progress:
+            progress(processed, len(part_ids))
+
+    return created
+
+
+def stocktake_entries(
+    part_ids: list,
+    base_currency: str,
+    today,
+    exclude_external: bool = False,
+    incremental: bool = False,
+) -> list:
+    """Generate (unsaved) stock history entries for a batch of parts.
+
+    Arguments:
+        part_ids: The primary keys of the parts to generate entries for
+        base_currency: The currency in which stock is valued
+        today: Parts which already have a stock history entry on (or after) this date are skipped
+        exclude_external: If True, stock in external locations is not counted
+        incremental: If True, the previous entry is carried forward for parts which have not changed
+
+    Returns:
+        A list of PartStocktake instances
+    """
+    import part.models as part_models
+
+    # Skip parts which already have a recent stock history entry
+    recent = set(
+        part_models.PartStocktake.objects.filter(
+            part__in=part_ids, date__gte=today
+        ).values_list('part', flat=True)
     )
 
-    for part in active_parts:
-        # Is there a recent stock history record for this part?
-        if part_models.PartStocktake.objects.filter(
-            part=part, date__gte=today
-        ).exists():
-            continue
+    part_ids = [pk for pk in part_ids if pk not in recent]
+
+    if not part_ids:
+        return []
 
-        pricing = part.pricing
+    tree = part_tree(part_ids)
 
-        # Fetch all 'in stock' items for this part
-        stock_items = part.stock_entries(
-            in_stock=True, include_external=not exclude_external, include_variants=True
+    entries = []
+
+    if incremental:
+        previous = previous_entries(part_ids)
+        changed = changed_parts(tree, previous, base_currency)
+
+        # Carry forward the previous values for any unchanged parts
+        for pk, entry in previous.items():
+            if pk not in changed:
+                entries.append(
+                    part_models.PartStocktake(
+                        part_id=pk,
+                        item_count=entry.item_count,
+                        quantity=entry.quantity,
+                        cost_min=entry.cost_min,
+                        cost_max=entry.cost_max,
+                    )
+                )
+
+        part_ids = [pk for pk in part_ids if pk in changed]
+
+        if not part_ids:
+            return entries
+
+        tree = part_tree(part_ids)
+
+    entries.extend(
+        calculate_entries(
+            part_ids, tree, base_currency, exclude_external=exclude_external
         )
+    )
+
+    return entries
 
-        total_cost_min = Money(0, base_currency)
-        total_cost_max = Money(0, base_currency)
 
-        total_quantity = 0
-        items_count = 0
+def part_tree(part_ids: list) -> dict:
+    """Map each part (and variant) to the parts whose stock levels it contributes to.
 
-        for item in stock_items:
-            # Extract cost information
+    Variants are found using the MPTT tree ranges of the provided parts.
 
-            entry_cost_min = pricing.overall_min or pricing.overall_max
-            entry_cost_max = pricing.overall_max or pricing.overall_min
+    Returns:
+        A dict of {stock_part_id: [part_id, ...]}
+    """
+    import part.models as part_models
 
-            if item.purchase_price is not None:
-                entry_cost_min = item.purchase_price
-                entry_cost_max = item.purchase_price
+    parts = defaultdict(list)
 
-            try:
-                entry_cost_min = (
-                    convert_money(entry_cost_min, base_currency) * item.quantity
-                )
-                entry_cost_max = (
-                    convert_money(entry_cost_max, base_currency) * item.quantity
+    for pk, tree_id, lft, rght in part_models.Part.objects.filter(
+        pk__in=part_ids
+    ).values_list('pk', 'tree_id', 'lft', 'rght'):
+        parts[tree_id].append((pk, lft, rght))
+
+    targets = defaultdict(list)
+
+    for pk, tree_id, lft, rght in part_models.Part.objects.filter(
+        tree_id__in=parts.keys()
+    ).values_list('pk', 'tree_id', 'lft', 'rght'):
+        for target, target_lft, target_rght in parts[tree_id]:
+            if target_lft <= lft and rght <= target_rght:
+                targets[pk].append(target)
+
+    return targets
+
+
+def previous_entries(part_ids: list) -> dict:
+    """Return the most recent stock history entry for each of the provided parts.
+
+    Returns:
+        A dict of {part_id: PartStocktake}
+    """
+    import part.models as part_models
+
+    latest = part_models.PartStocktake.objects.filter(part=OuterRef('pk')).order_by(
+        '-date', '-pk'
+    )
+
+    entry_ids = (
+        part_models.Part.objects
+        .filter(pk__in=part_ids)
+        .annotate(latest=Subquery(latest.values('pk')[:1]))
+        .exclude(latest=None)
+        .values_list('latest', flat=True)
+    )
+
+    return {
+        entry.part_id: entry
+        for entry in part_models.PartStocktake.objects.filter(pk__in=list(entry_ids))
+    }
+
+
+def changed_parts(tree: dict, previous: dict, base_currency: str) -> set:
+    """Determine which parts need their stock history to be recalculated.
+
+    A part is considered changed (since its previous entry) if:
+
+    - There is no previous entry for the part
+    - The previous entry was recorded in a different currency
+    - Stock tracking entries have been recorded against the part (or its variants)
+    - Stock items for the part (or its variants) have been edited
+    - The pricing for the part has been updated, or is scheduled for update
+
+    Note that the valuation of unchanged parts is carried forward as-is,
+    and is not adjusted for any change in exchange rates.
+
+    Returns:
+        A set of part IDs
+    """
+    import part.models as part_models
+    import stock.models as stock_models
+
+    part_ids = {pk for targets in tree.values() for pk in targets}
+
+    def threshold(date):
+        """Return the (aware) start of the day for the given date."""
+        value = datetime.combine(date, time.min)
+
+        if timezone.is_naive(value) and timezone.is_aware(timezone.now()):
+            value = timezone.make_aware(value)
+
+        return value
+
+    thresholds = {
+        pk: threshold(entry.date)
+        for pk, entry in previous.items()
+        if entry.cost_min is None or str(entry.cost_min.currency) == base_currency
+    }
+
+    changed = part_ids - set(thresholds.keys())
+
+    if not thresholds:
+        return changed
+
+    earliest = min(thresholds.values())
+
+    # Latest known change for each part (or variant)
+    changes = defaultdict(list)
+
+    for stock_part, latest in (
+        stock_models.StockItemTracking.objects
+        .filter(item__part__in=tree.keys(), date__gte=earliest)
+        .order_by()
+        .values('item__part')
+        .annotate(latest=Max('date'))
+        .values_list('item__part', 'latest')
+    ):
+        changes[stock_part].append(latest)
+
+    for stock_part, latest in (
+        stock_models.StockItem.objects
+        .filter(part__in=tree.keys(), updated__gte=earliest)
+        .order_by()
+        .values('part')
+        .annotate(latest=Max('updated'))
+        .values_list('part', 'latest')
+    ):
+        changes[stock_part].append(latest)
+
+    for stock_part, updated, scheduled in part_models.PartPricing.objects.filter(
+        part__in=thresholds.keys()
+    ).values_list('part', 'updated', 'scheduled_for_update'):
+        if scheduled:
+            changed.add(stock_part)
+        elif updated:
+            changes[stock_part].append(updated)
+
+    for stock_part, targets in tree.items():
+        for latest in changes.get(stock_part, []):
+            for target in targets:
+                if target in thresholds and latest >= thresholds[target]:
+                    changed.add(target)
+
+    return changed
+
+
+def calculate_entries(
+    part_ids: list, targets: dict, base_currency: str, exclude_external: bool = False
+) -> list:
+    """Calculate (unsaved) stock history entries for a batch of parts.
+
+    Each entry includes stock for the part itself and all of its variants.
+    Items without a purchase price are valued using the pricing data for the part.
+
+    Arguments:
+        part_ids: The primary keys of the parts to generate entries for
+        targets: Map of stock parts to the parts they contribute to (see part_tree)
+        base_currency: The currency in which stock is valued
+        exclude_external: If True, stock in external locations is not counted
+
+    Returns:
+        A list of PartStocktake instances
+    """
+    import part.models as part_models
+    import stock.models as stock_models
+    from common.currency import convert_money
+
+    # Fallback valuation for stock items which do not have a purchase price
+    fallback = {}
+
+    for row in part_models.PartPricing.objects.filter(part__in=part_ids).values(
+        'part',
+        'overall_min',
+        'overall_min_currency',
+        'overall_max',
+        'overall_max_currency',
+    ):
+        overall_min = overall_max = None
+
+        if row['overall_min'] is not None:
+            overall_min = Money(row['overall_min'], row['overall_min_currency'])
+
+        if row['overall_max'] is not None:
+            overall_max = Money(row['overall_max'], row['overall_max_currency'])
+
+        fallback[row['part']] = (overall_min or overall_max, overall_max or overall_min)
+
+    items = stock_models.StockItem.objects.filter(part__in=targets.keys()).filter(
+        stock_models.StockItem.IN_STOCK_FILTER
+    )
+
+    if exclude_external:
+        # Exclude stock entries which are not 'internal'
+        items = items.filter(location__external=False)
+
+    # Stock is grouped by part and purchase price,
+    # so that each group can be valued with a single currency conversion
+    items = (
+        items
+        .order_by()
+        .values('part', 'purchase_price', 'purchase_price_currency')
+        .annotate(item_count=Count('pk'), total_quantity=Sum('quantity'))
+    )
+
+    totals = {
+        pk: {
+            'item_count': 0,
+            'quantity': Decimal(0),
+            'cost_min': Money(0, base_currency),
+            'cost_max': Money(0, base_currency),
+        }
+        for pk in part_ids
+    }
+
+    for row in items:
+        for target in targets[row['part']]:
+            if row['purchase_price'] is None:
+                cost_min, cost_max = fallback.get(target, (None, None))
+            else:
+                cost_min = cost_max = Money(
+                    row['purchase_price'], row['purchase_price_currency']
                 )
+
+            quantity = row['total_quantity']
+
+            try:
+                cost_min = convert_money(cost_min, base_currency) * quantity
+                cost_max = convert_money(cost_max, base_currency) * quantity
             except Exception:
-                entry_cost_min = Money(0, base_currency)
-                entry_cost_max = Money(0, base_currency)
-
-            # Update total quantities
-            items_count += 1
-            total_quantity += item.quantity
-            total_cost_min += entry_cost_min
-            total_cost_max += entry_cost_max
-
-        # Add a new stocktake entry for this part
-        history_entries.append(
-            part_models.PartStocktake(
-                part=part,
-                item_count=items_count,
-                quantity=total_quantity,
-                cost_min=total_cost_min,
-                cost_max=total_cost_max,
-            )
-        )
+                cost_min = Money(0, base_currency)
+                cost_max = Money(0, base_currency)
 
-        # Batch create stock history entries
-        if len(history_entries) >= N_BULK_CREATE:
-            part_models.PartStocktake.objects.bulk_create(history_entries)
-            history_entries = []
+            entry = totals[target]
+            entry['item_count'] += row['item_count']
+            entry['quantity'] += quantity
+            entry['cost_min'] += cost_min
+            entry['cost_max'] += cost_max
 
-    if len(history_entries) > 0:
-        # Save any remaining stocktake entries
-        part_models.PartStocktake.objects.bulk_create(history_entries)
+    return [
+        part_models.PartStocktake(
+            part_id=pk,
+            item_count=entry['item_count'],
+            quantity=entry['quantity'],
+            cost_min=entry['cost_min'],
+            cost_max=entry['cost_max'],
+        )
+        for pk, entry in totals.items()
+    ]
@@ -0,0 +1,175 @@
+"""Bulk resolution of part subscriptions for the Part app.
+
+The Part.get_subscribers() method resolves the subscribers for a single part,
+walking the part (variant) tree and category tree with separate queries each time.
+
+The functions here resolve the subscribers for many parts at once:
+
+- Part stars are loaded once for each part tree
+- Category stars are loaded once for each category tree
+- Inherited subscriptions are matched in memory, using the MPTT tree ranges
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.contrib.auth.models import User
+
+from InvenTree.helpers import chunked
+
+# Maximum number of objects to reference in a single query
+SUBSCRIPTION_CHUNK_SIZE = 500
+
+
+def tree_nodes(model, pks: Iterable[int]) -> dict[int, dict]:
+    """Return the MPTT tree position of each of the provided objects.
+
+    Returns:
+        A dict of {pk: {'tree_id', 'lft', 'rght'}}
+    """
+    nodes = {}
+
+    for chunk in chunked(set(pks), SUBSCRIPTION_CHUNK_SIZE):
+        for node in model.objects.filter(pk__in=chunk).values(
+            'pk', 'tree_id', 'lft', 'rght'
+        ):
+            nodes[node['pk']] = node
+
+    return nodes
+
+
+def tree_stars(model, field: str, trees: Iterable[int]) -> dict[int, list[dict]]:
+    """Return the stars (subscriptions) against any object in the provided trees.
+
+    Arguments:
+        model: The star model (PartStar or PartCategoryStar)
+        field: The name of the starred field (e.g. 'part')
+        trees: The tree IDs to load stars for
+
+    Returns:
+        A dict of {tree_id: [{'user', 'lft', 'rght'}]}
+    """
+    stars = defaultdict(list)
+
+    for chunk in chunked(set(trees), SUBSCRIPTION_CHUNK_SIZE):
+        for star in model.objects.filter(**{f'{field}__tree_id__in': chunk}).values(
+            'user', f'{field}__tree_id', f'{field}__lft', f'{field}__rght'
+        ):
+            stars[star[f'{field}__tree_id']].append({
+                'user': star['user'],
+                'lft': star[f'{field}__lft'],
+                'rght': star[f'{field}__rght'],
+            })
+
+    return stars
+
+
+def inherited_stars(node: dict, stars: dict[int, list[dict]]) -> set[int]:
+    """Return the IDs of users who subscribe to the provided node (or any of its ancestors)."""
+    return {
+        star['user']
+        for star in stars.get(node['tree_id'], [])
+        if star['lft'] <= node['lft'] and star['rght'] >= node['rght']
+    }
+
+
+def part_subscribers(
+    parts: Iterable[int], include_variants: bool = True, include_categories: bool = True
+) -> dict[int, set[User]]:
+    """Return the users who are subscribed to each of the provided parts.
+
+    Subscriptions are resolved as per Part.get_subscribers().
+
+    Arguments:
+        parts: Iterable of Part IDs
+        include_variants: If True, include users who are subscribed to a template part
+        include_categories: If True, include users who are subscribed to the part category (or a parent category)
+
+    Returns:
+        A dict of {part_id: set(User)}
+    """
+    from part.models import Part, PartCategory, PartCategoryStar, PartStar
+
+    nodes = {}
+
+    for chunk in chunked(set(parts), SUBSCRIPTION_CHUNK_SIZE):
+        for node in Part.objects.filter(pk__in=chunk).values(
+            'pk', 'tree_id', 'lft', 'rght', 'category'
+        ):
+            nodes[node['pk']] = node
+
+    if include_variants:
+        part_stars = tree_stars(
+            PartStar, 'part', {node['tree_id'] for node in nodes.values()}
+        )
+    else:
+        part_stars = defaultdict(list)
+
+        for chunk in chunked(nodes.keys(), SUBSCRIPTION_CHUNK_SIZE):
+            for star in PartStar.objects.filter(part__in=chunk).values('user', 'part'):
+                node = nodes[star['part']]
+                part_stars[node['tree_id']].append({
+                    'user': star['user'],
+                    'lft': node['lft'],
+                    'rght': node['rght'],
+                })
+
+    categories = {}
+    category_stars = {}
+
+    if include_categories:
+        categories = tree_nodes(
+            PartCategory,
+            [node['category'] for node in nodes.values() if node['category']],
+        )
+
+        category_stars = tree_stars(
+            PartCategoryStar,
+            'category',
+            {node['tree_id'] for node in categories.values()},
+        )
+
+    subscribers = {}
+
+    for pk, node in nodes.items():
+        users = inherited_stars(node, part_stars)
+
+        if category := categories.get(node['category']):
+            users |= inherited_stars(category, category_stars)
+
+        subscribers[pk] = users
+
+    users = {}
+
+    for chunk in chunked(set().union(*subscribers.values()), SUBSCRIPTION_CHUNK_SIZE):
+        users.update(User.objects.in_bulk(chunk))
+
+    return {
+        pk: {users[user] for user in user_ids if user in users}
+        for pk, user_ids in subscribers.items()
+    }
+
+
+def group_by_subscriber(items: Iterable, **kwargs) -> dict[User, list]:
+    """Group the provided objects by the users who subscribe to the associated part.
+
+    Arguments:
+        items: Iterable of objects with a 'part_id' attribute (e.g. StockItem)
+        kwargs: Additional arguments passed to part_subscribers()
+
+    Returns:
+        A dict of {User: [items]}
+    """
+    items = list(items)
+
+    subscribers = part_subscribers({item.part_id for item in items}, **kwargs)
+
+    groups = defaultdict(list)
+
+    for item in items:
+        for user in subscribers.get(item.part_id, []):
+            groups[user].append(item)
+
+    return dict(groups)
@@ -1,10 +1,13 @@
 """Background task definitions for the 'part' app."""
 
+from collections.abc import Iterable
 from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
 from typing import Optional
 
 from django.core.exceptions import ValidationError
-from django.db.models import Model
+from django.db.models import F, Model, Q
 from django.utils.translation import gettext_lazy as _
 
 import structlog
@@ -14,6 +17,8 @@ import common.currency
 import common.notifications
 import InvenTree.helpers_model
 from common.settings import get_global_setting
+from InvenTree.commit_queue import CommitQueue
+from InvenTree.helpers import chunked
 from InvenTree.tasks import (
     ScheduledTask,
     check_daily_holdoff,
@@ -21,18 +26,26 @@ from InvenTree.tasks import (
     record_task_success,
     scheduled_task,
 )
+from part.subscriptions import group_by_subscriber, part_subscribers
 
 tracer = trace.get_tracer(__name__)
 logger = structlog.get_logger('inventree')
 
+# Maximum number of parts to check in a single low stock query
+LOW_STOCK_CHUNK_SIZE = 500
+
 
 @tracer.start_as_current_span('notify_low_stock')
-def notify_low_stock(part: Model):
+def notify_low_stock(part: Model, targets: Optional[list] = None):
     """Notify interested users that a part is 'low stock'.
 
     Rules:
     - Triggered when the available stock for a given part falls be low the configured threshold
     - A notification is delivered to any users who are 'subscribed' to this part
+
+    Arguments:
+        part: The Part which is low on stock
+        targets: Optional list of subscribed users (if already known)
     """
     # Do not trigger low-stock notifications for inactive parts
     if not part.active:
@@ -51,7 +64,11 @@ def notify_low_stock(part: Model):
     }
 
     common.notifications.trigger_notification(
-        part, 'part.notify_low_stock', target_fnc=part.get_subscribers, context=context
+        part,
+        'part.notify_low_stock',
+        targets=targets,
+        target_fnc=part.get_subscribers,
+        context=context,
     )
 
 
@@ -139,20 +156,113 @@ def notify_low_stock_if_required(part_id: int):
     """
     from part.models import Part
 
-    try:
-        part = Part.objects.get(pk=part_id)
-    except Part.DoesNotExist:
+    if not Part.objects.filter(pk=part_id).exists():
         logger.warning(
             'notify_low_stock_if_required: Part with ID %s does not exist', part_id
         )
         return
 
-    # Run "up" the tree, to allow notification for "parent" parts
-    parts = part.get_ancestors(include_self=True, ascending=True)
+    check_low_stock([part_id])
+
+
+def low_stock_parts(part_ids: Iterable[int]) -> list:
+    """Return the parts which have fallen below their minimum stock level.
+
+    The provided parts, and all of their parent (template) parts, are checked.
+    The stock level of every candidate part is calculated in a single aggregate query.
+
+    Arguments:
+        part_ids: IDs of the (active) parts to check
+
+    Returns:
+        A list of Part objects which are low on stock
+    """
+    from part.filters import annotate_total_stock_with_variants
+    from part.models import Part
+
+    parts = []
+
+    for chunk in chunked(set(part_ids), LOW_STOCK_CHUNK_SIZE):
+        nodes = Part.objects.filter(pk__in=chunk, active=True).values(
+            'tree_id', 'lft', 'rght'
+        )
+
+        if not nodes:
+            continue
+
+        # Run "up" the tree, to allow notification for "parent" parts
+        ancestors = reduce(
+            or_,
+            (
+                Q(tree_id=node['tree_id'], lft__lte=node['lft'], rght__gte=node['rght'])
+                for node in nodes
+            ),
+        )
+
+        parts.extend(
+            Part.objects
+            .filter(ancestors, active=True, minimum_stock__gt=0)
+            .annotate(stock_count=annotate_total_stock_with_variants())
+            .filter(stock_count__lt=F('minimum_stock'))
+        )
+
+    return list({part.pk: part for part in parts}.values())
+
+
+@tracer.start_as_current_span('check_low_stock')
+def check_low_stock(part_ids: list[int]):
+    """Check if the stock quantity of any of the provided parts has fallen below the minimum threshold.
+
+    If true, notify the users who have subscribed to each low stock part.
+
+    Arguments:
+        part_ids: IDs of the parts to check (parent parts are also checked)
+    """
+    parts = low_stock_parts(part_ids)
+
+    if not parts:
+        return
+
+    # Resolve the subscribers for all affected parts at once
+    subscribers = part_subscribers([p.pk for p in parts])
 
     for p in parts:
-        if part.active and p.is_part_low_on_stock():
-            offload_task(notify_low_stock, p, group='notification')
+        if targets := list(subscribers.get(p.pk, [])):
+            offload_task(notify_low_stock, p, targets=targets, group='notification')
+
+
+# region Low stock check queue
+def _offload_low_stock_check(part_ids: set[int]):
+    """Offload a single background task to check all of the provided parts."""
+    offload_task(
+        check_low_stock, sorted(part_ids), group='notification', force_async=True
+    )
+
+
+# Parts which have been scheduled for a low stock check in the current thread,
+# but have not yet been passed to a background task
+_low_stock_queue = CommitQueue(_offload_low_stock_check)
+
+
+def schedule_low_stock_check(part_ids: Iterable[int]):
+    """Schedule a low stock check for the provided parts.
+
+    Rather than offloading a task each time the stock for a part changes,
+    the part IDs are collected in memory and a single background task is
+    offloaded (for all parts) when the current transaction is committed.
+
+    Arguments:
+        part_ids: IDs of the parts which require a low stock check
+    """
+    _low_stock_queue.add(part_ids)
+
+
+def flush_low_stock_queue():
+    """Offload a single background task to check all pending parts."""
+    _low_stock_queue.flush()
+
+
+# endregion
 
 
 @tracer.start_as_current_span('check_stale_stock')
@@ -198,16 +308,7 @@ def check_stale_stock():
     logger.info('Found %s stale stock items', stale_stock_items.count())
 
     # Group stale stock items by user subscriptions
-    user_stale_items: dict[StockItem, list[StockItem]] = {}
-
-    for stock_item in stale_stock_items:
-        # Get all subscribers for this part
-        subscribers = stock_item.part.get_subscribers()
-
-        for user in subscribers:
-            if user not in user_stale_items:
-                user_stale_items[user] = []
-            user_stale_items[user].append(stock_item)
+    user_stale_items = group_by_subscriber(stale_stock_items)
 
     # Send one consolidated notification per user
     for user, items in user_stale_items.items():
@@ -242,6 +343,35 @@ def update_part_pricing(pricing: Model, counter: int = 0):
     )
 
 
+@tracer.start_as_current_span('update_pricing_graph')
+def update_pricing_graph(part_ids: list[int], include_self: bool = True):
+    """Recalculate pricing for the specified parts, and all parts which depend on them.
+
+    All affected assemblies and templates are calculated in a single pass,
+    rather than scheduling a separate task for each part.
+
+    Arguments:
+        part_ids: List of Part IDs which require a pricing update
+        include_self: If False, only the dependent parts are recalculated
+    """
+    import part.pricing
+
+    part.pricing.update_pricing(part_ids, cascade=True, include_self=include_self)
+
+
+@tracer.start_as_current_span('process_pricing_queue')
+@scheduled_task(ScheduledTask.MINUTES, 5)
+def process_pricing_queue():
+    """Recalculate pricing for all parts which are waiting in the pricing update queue.
+
+    This task is offloaded whenever parts are added to the queue,
+    and also runs periodically to catch any parts which may have been missed.
+    """
+    import part.pricing
+
+    part.pricing.process_pricing_queue()
+
+
 @tracer.start_as_current_span('check_missing_pricing')
 @scheduled_task(ScheduledTask.DAILY)
 def check_missing_pricing(limit=250):
@@ -264,14 +394,15 @@ def check_missing_pricing(limit=250):
         # Task does not run if the interval is zero
         return
 
+    # Collect the parts which require a pricing update
+    part_ids = set()
+
     # Find parts for which pricing information has never been updated
     results = PartPricing.objects.filter(updated=None)[:limit]
 
     if results.count() > 0:
         logger.info('Found %s parts with empty pricing', results.count())
-
-        for pp in results:
-            pp.schedule_for_update()
+        part_ids.update(results.values_list('part_id', flat=True))
 
     stale_date = datetime.now().date() - timedelta(days=days)
 
@@ -279,9 +410,7 @@ def check_missing_pricing(limit=250):
 
     if results.count() > 0:
         logger.info('Found %s stale pricing entries', results.count())
-
-        for pp in results:
-            pp.schedule_for_update()
+        part_ids.update(results.values_list('part_id', flat=True))
 
     # Find any pricing data which is in the wrong currency
     currency = common.currency.currency_code_default()
@@ -289,20 +418,18 @@ def check_missing_pricing(limit=250):
 
     if results.count() > 0:
         logger.info('Found %s pricing entries in the wrong currency', results.count())
-
-        for pp in results:
-            pp.schedule_for_update()
+        part_ids.update(results.values_list('part_id', flat=True))
 
     # Find any parts which do not have pricing information
     results = Part.objects.filter(pricing_data=None)[:limit]
 
     if results.count() > 0:
         logger.info('Found %s parts without pricing', results.count())
+        part_ids.update(results.values_list('pk', flat=True))
 
-        for p in results:
-            pricing = p.pricing
-            pricing.save()
-            pricing.schedule_for_update()
+    if part_ids:
+        # Recalculate all affected parts in a single pass
+        offload_task(update_pricing_graph, list(part_ids), group='pricing')
 
 
 @tracer.start_as_current_span('scheduled_stocktake_reports')
@@ -408,6 +535,166 @@ def check_bom_valid(part_id: int):
         part.save()
 
 
+@tracer.start_as_current_span('rebuild_exploded_bom')
+def rebuild_exploded_bom(part_ids: list[int]):
+    """Rebuild the exploded BOM for the specified parts, and all assemblies which use them.
+
+    Arguments:
+        part_ids: List of Part IDs whose BOM (or template part) has changed
+    """
+    import part.bom
+
+    part.bom.rebuild_exploded_bom(part_ids, cascade=True)
+
+
+@tracer.start_as_current_span('rebuild_all_exploded_bom')
+def rebuild_all_exploded_bom():
+    """Rebuild the exploded BOM for every assembly in the database."""
+    import part.bom
+    from part.models import ExplodedBomItem
+
+    n = part.bom.rebuild_all_exploded_bom()
+
+    # Queries only use the table once it has been completely rebuilt
+    part.bom.set_index_built(ExplodedBomItem)
+
+    logger.info('Rebuilt exploded BOM table: %s rows', n)
+
+
+@tracer.start_as_current_span('rebuild_bom_usage')
+def rebuild_bom_usage(bom_item_ids: list[int]):
+    """Rebuild the "used in" index entries for the specified BOM items.
+
+    Arguments:
+        bom_item_ids: List of BomItem IDs which have been created or edited
+    """
+    import part.bom
+
+    part.bom.rebuild_bom_usage(bom_item_ids)
+
+
+@tracer.start_as_current_span('rebuild_part_bom_usage')
+def rebuild_part_bom_usage(part_ids: list[int]):
+    """Rebuild the "used in" index entries affected by a change to the template of the specified parts.
+
+    Arguments:
+        part_ids: List of Part IDs whose template part (variant_of) has changed
+    """
+    import part.bom
+
+    part.bom.rebuild_bom_usage(part.bom.affected_bom_items(part_ids))
+
+
+@tracer.start_as_current_span('rebuild_all_bom_usage')
+def rebuild_all_bom_usage():
+    """Rebuild the "used in" index for every BOM item in the database."""
+    import part.bom
+    from part.models import BomItemUsage
+
+    n = part.bom.rebuild_all_bom_usage()
+
+    # Queries only use the index once it has been completely rebuilt
+    part.bom.set_index_built(BomItemUsage)
+
+    logger.info('Rebuilt BOM usage index: %s entries', n)
+
+
+@tracer.start_as_current_span('check_bom_index')
+@scheduled_task(ScheduledTask.DAILY)
+def check_bom_index():
+    """Rebuild any BOM index table which has not been completely populated.
+
+    The tables are populated by a background task when they are first created.
+    This check also covers a new database (where there was nothing to index),
+    or a rebuild task which did not complete.
+    """
+    import part.bom
+    from part.models import BomItemUsage, ExplodedBomItem
+
+    if not part.bom.index_built(ExplodedBomItem):
+        rebuild_all_exploded_bom()
+
+    if not part.bom.index_built(BomItemUsage):
+        rebuild_all_bom_usage()
+
+
+# region BOM index queue
+def _offload_bom_rebuild(pending: set[tuple]):
+    """Offload a single background task for each pending BOM index rebuild.
+
+    Arguments:
+        pending: Set of (task, ID) pairs
+    """
+    tasks = {}
+
+    for task, pk in pending:
+        tasks.setdefault(task, set()).add(pk)
+
+    for task, ids in tasks.items():
+        offload_task(task, sorted(ids), group='part')
+
+
+# BOM index rebuild tasks which have been scheduled in the current thread,
+# but have not yet been offloaded to the background worker
+_bom_queue = CommitQueue(_offload_bom_rebuild)
+
+
+def schedule_bom_rebuild(task, ids: Iterable[int]):
+    """Schedule a BOM index rebuild task for the provided IDs.
+
+    Rather than offloading a task each time a BOM is edited, the IDs are
+    collected in memory and a single background task is offloaded
+    (for each rebuild task) when the current transaction is committed.
+
+    Arguments:
+        task: The rebuild task to run (e.g. rebuild_exploded_bom)
+        ids: IDs to pass to the rebuild task
+    """
+    _bom_queue.add((task, pk) for pk in ids if pk is not None)
+
+
+def flush_bom_rebuild_queue():
+    """Offload a single background task for each pending BOM index rebuild."""
+    _bom_queue.flush()
+
+
+# endregion
+
+
+@tracer.start_as_current_span('update_material_requirements')
+def update_material_requirements(incremental: bool = True):
+    """Recalculate the material requirements for all parts.
+
+    Arguments:
+        incremental: If True, only recalculate parts which have changed since the previous run
+    """
+    import part.planning
+
+    n = part.planning.update_material_requirements(incremental=incremental)
+
+    logger.info('Updated material requirements: %s rows', n)
+
+
+@tracer.start_as_current_span('scheduled_material_planning')
+@scheduled_task(ScheduledTask.DAILY)
+def scheduled_material_planning():
+    """Perform a full material requirements planning run."""
+    if not get_global_setting('PART_PLANNING_ENABLE', False, cache=False):
+        return
+
+    update_material_requirements(incremental=False)
+
+
+@tracer.start_as_current_span('process_planning_queue')
+@scheduled_task(ScheduledTask.MINUTES, 15)
+def process_planning_queue():
+    """Recalculate the material requirements for parts which have changed since the previous run."""
+    if not get_global_setting('PART_PLANNING_ENABLE', False, cache=False):
+        return
+
+    update_material_requirements(incremental=True)
+
+
 @tracer.start_as_current_span('validate_bom')
 def validate_bom(part_id: int, valid: bool, user_id: Optional[int] = None):
     """Run BOM validation for the specified Part.
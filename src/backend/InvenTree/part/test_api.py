@@ -2222,6 +2222,55 @@ class PartPricingDetailTests(InvenTreeAPITestCase):
             self.assertIsNone(response.data[field])
 
 
+class MaterialRequirementAPITest(InvenTreeAPITestCase):
+    """Tests for the material requirements planning API endpoints."""
+
+    fixtures = ['category', 'part', 'location', 'bom', 'company']
+
+    roles = ['part.view', 'part.add']
+
+    def test_planning_run(self):
+        """Run material planning via the API, and list the results."""
+        assembly = Part.objects.get(pk=100)
+
+        order.models.SalesOrderLineItem.objects.create(
+            order=order.models.SalesOrder.objects.create(
+                customer=Company.objects.filter(is_customer=True).first(),
+                reference='SO-9999',
+            ),
+            part=assembly,
+            quantity=25,
+        )
+
+        url = reverse('api-part-requirement-list')
+
+        response = self.get(url, expected_code=200)
+        self.assertEqual(len(response.data), 0)
+
+        self.post(
+            reverse('api-part-requirement-run'),
+            {'incremental': False},
+            expected_code=201,
+        )
+
+        response = self.get(url, {'part': assembly.pk}, expected_code=200)
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['gross_requirement'], 25)
+        self.assertEqual(response.data[0]['level'], 0)
+        self.assertIn('part_detail', response.data[0])
+
+        # Every BOM component of the assembly is planned at a lower level
+        response = self.get(url, {'has_net_requirement': True}, expected_code=200)
+
+        levels = {row['part']: row['level'] for row in response.data}
+
+        for bom_item in assembly.get_bom_items().filter(
+            consumable=False, sub_part__virtual=False
+        ):
+            self.assertGreater(levels[bom_item.sub_part.pk], 0)
+
+
 class PartAPIAggregationTest(InvenTreeAPITestCase):
     """Tests to ensure that the various aggregation annotations are working correctly."""
 
@@ -2824,6 +2873,40 @@ class BomItemTest(InvenTreeAPITestCase):
 
         self.assertEqual(len(response.data), 2)
 
+    def test_exploded_bom(self):
+        """Tests for the exploded (multi-level) BOM endpoint."""
+        url = reverse('api-bom-exploded-list')
+
+        assembly = Part.objects.get(pk=100)
+
+        response = self.get(url, {'part': assembly.pk}, expected_code=200)
+
+        self.assertEqual(len(response.data), assembly.get_exploded_bom().count())
+        self.assertGreater(len(response.data), 0)
+
+        for row in response.data:
+            self.assertEqual(row['assembly'], assembly.pk)
+            self.assertIn('sub_part_detail', row)
+            self.assertNotIn('assembly_detail', row)
+
+        # Filter by depth
+        response = self.get(
+            url, {'part': assembly.pk, 'max_depth': 1}, expected_code=200
+        )
+
+        self.assertEqual(len(response.data), assembly.get_bom_items().count())
+
+        # Filter by sub-part
+        sub_part = assembly.get_bom_items().first().sub_part
+
+        response = self.get(
+            url, {'sub_part': sub_part.pk, 'assembly_detail': True}, expected_code=200
+        )
+
+        for row in response.data:
+            self.assertEqual(row['sub_part'], sub_part.pk)
+            self.assertIn('assembly_detail', row)
+
     def test_substitutes(self):
         """Tests for BomItem substitutes."""
         url = reverse('api-bom-substitute-list')
@@ -3044,6 +3127,24 @@ class BomItemTest(InvenTreeAPITestCase):
         can_build = response.data['can_build']
         self.assertAlmostEqual(can_build, 482.9, places=1)
 
+        # The 'can_build' quantity is optionally included in the Part list
+        url = reverse('api-part-list')
+
+        response = self.get(url, {'assembly': True}, expected_code=200)
+        self.assertNotIn('can_build', response.data[0])
+
+        response = self.get(
+            url,
+            {'assembly': True, 'can_build': True, 'ordering': '-can_build'},
+            expected_code=200,
+        )
+
+        for row in response.data:
+            self.assertEqual(row['can_build'], Part.objects.get(pk=row['pk']).can_build)
+
+        self.assertEqual(response.data[0]['pk'], assembly.pk)
+        self.assertEqual(response.data[0]['can_build'], 482)
+
 
 class AttachmentTest(InvenTreeAPITestCase):
     """Unit tests for the Attachment API endpoint."""
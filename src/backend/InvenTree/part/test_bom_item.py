@@ -1,15 +1,22 @@
 """Unit tests for the BomItem model."""
 
 from decimal import Decimal
+from itertools import pairwise
+from unittest import mock
 
 import django.core.exceptions as django_exceptions
 from django.db import transaction
+from django.db.models import Q
 from django.test import TestCase
 
 import build.models
 import stock.models
 
-from .models import BomItem, BomItemSubstitute, Part
+from . import bom as part_bom
+from . import tasks as part_tasks
+from .bom import index_built
+from .filters import annotate_can_build
+from .models import BomItem, BomItemSubstitute, BomItemUsage, ExplodedBomItem, Part
 
 
 class BomItemTest(TestCase):
@@ -238,7 +245,10 @@ class BomItemTest(TestCase):
         """Tests for the 'consumable' BomItem field."""
         # Create an assembly part
         assembly = Part.objects.create(
-            name='An assembly', description='Made with parts', assembly=True
+            name='An assembly',
+            description='Made with parts',
+            assembly=True,
+            is_template=True,
         )
 
         # No BOM information initially
@@ -276,6 +286,24 @@ class BomItemTest(TestCase):
 
         self.assertEqual(assembly.can_build, 20)
 
+        # A variant of the assembly inherits (only) the inherited BOM items
+        variant = Part.objects.create(
+            name='A variant', description='Variant assembly', variant_of=assembly
+        )
+
+        self.assertEqual(variant.can_build, 0)
+
+        BomItem.objects.create(part=assembly, sub_part=c4, quantity=4, inherited=True)
+
+        self.assertEqual(assembly.can_build, 20)
+        self.assertEqual(variant.can_build, 250)
+
+        # The bulk annotation matches the per-part calculation
+        queryset = annotate_can_build(Part.objects.all())
+
+        for prt in queryset:
+            self.assertEqual(prt.can_build_quantity, prt.can_build)
+
     def test_metadata(self):
         """Unit tests for the metadata field."""
         for model in [BomItem]:
@@ -390,3 +418,480 @@ class BomItemTest(TestCase):
 
         # Delete the new BOM item
         bom_item.delete()
+
+
+class BomExplosionTest(TestCase):
+    """Unit tests for the exploded (multi-level) BOM table."""
+
+    fixtures = ['category', 'part', 'location', 'bom']
+
+    @classmethod
+    def setUpTestData(cls):
+        """Build the exploded BOM table for the fixture data."""
+        super().setUpTestData()
+
+        part_tasks.rebuild_all_exploded_bom()
+
+    def setUp(self):
+        """Do not share the cached index state between tests."""
+        super().setUp()
+
+        part_bom._built.clear()
+        self.addCleanup(part_bom._built.clear)
+
+    def create_part(self, name, **kwargs):
+        """Create a new assembly / component part."""
+        kwargs.setdefault('assembly', True)
+        kwargs.setdefault('component', True)
+
+        return Part.objects.create(name=name, description=name, **kwargs)
+
+    def required_parts(self, part, parts=None):
+        """Reference implementation: walk the BOM one level at a time."""
+        if parts is None:
+            parts = set()
+
+        for bom_item in part.get_bom_items():
+            if bom_item.sub_part not in parts:
+                parts.add(bom_item.sub_part)
+                self.required_parts(bom_item.sub_part, parts)
+
+        return parts
+
+    def test_fixtures(self):
+        """The exploded BOM matches the recursive BOM walk for the fixture data."""
+        for part in Part.objects.filter(assembly=True):
+            self.assertEqual(
+                part.getRequiredParts(recursive=True), self.required_parts(part)
+            )
+
+    def test_explosion(self):
+        """Test the exploded BOM for a multi-level assembly."""
+        top = self.create_part('Top', is_template=True)
+        mid = self.create_part('Mid')
+        leaf_a = self.create_part('Leaf A', assembly=False)
+        leaf_b = self.create_part('Leaf B', assembly=False)
+        alt = self.create_part('Alt', assembly=False)
+
+        # The table is updated when the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItem.objects.create(part=top, sub_part=mid, quantity=3)
+            item_a = BomItem.objects.create(part=mid, sub_part=leaf_a, quantity=4)
+            BomItem.objects.create(
+                part=mid, sub_part=leaf_b, quantity=Decimal('0.5'), inherited=True
+            )
+
+        rows = {
+            (row.sub_part_id, row.depth): row
+            for row in top.get_exploded_bom(include_substitutes=False)
+        }
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[mid.pk, 1].quantity, 3)
+        self.assertEqual(rows[leaf_a.pk, 2].quantity, 12)
+        self.assertEqual(rows[leaf_b.pk, 2].quantity, Decimal('1.5'))
+        self.assertEqual(
+            rows[leaf_a.pk, 2].path, f'{rows[mid.pk, 1].bom_item_id}.{item_a.pk}'
+        )
+        self.assertEqual(top.get_exploded_bom(max_depth=1).count(), 1)
+
+        # Edit a BOM line in the sub-assembly
+        with self.captureOnCommitCallbacks(execute=True):
+            item_a.quantity = 5
+            item_a.save()
+
+        self.assertEqual(
+            top.get_exploded_bom().get(sub_part=leaf_a).quantity, Decimal(15)
+        )
+
+        # Add a substitute part
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItemSubstitute.objects.create(bom_item=item_a, part=alt)
+
+        row = top.get_exploded_bom().get(sub_part=alt)
+        self.assertTrue(row.substitute)
+        self.assertEqual(row.depth, 2)
+        self.assertEqual(row.quantity, Decimal(15))
+        self.assertNotIn(alt, top.getRequiredParts(recursive=True))
+
+        # A variant of the sub-assembly inherits the BOM
+        with self.captureOnCommitCallbacks(execute=True):
+            variant = self.create_part('Top Variant', variant_of=top)
+
+        self.assertEqual(variant.get_exploded_bom().count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItem.objects.filter(part=top).update(inherited=True)
+            BomItem.objects.get(part=top).save()
+
+        rows = variant.get_exploded_bom()
+        self.assertEqual(rows.count(), 4)
+        self.assertTrue(all(row.inherited for row in rows))
+
+        # Changing the template of a part updates the inherited BOM
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.variant_of = None
+            variant.save()
+
+        self.assertEqual(variant.get_exploded_bom().count(), 0)
+
+        # Remove the sub-assembly line
+        with self.captureOnCommitCallbacks(execute=True):
+            item_a.substitutes.all().delete()
+            item_a.delete()
+
+        self.assertFalse(top.get_exploded_bom().filter(sub_part=leaf_a).exists())
+        self.assertFalse(top.get_exploded_bom().filter(sub_part=alt).exists())
+
+        self.assertEqual(top.getRequiredParts(recursive=True), self.required_parts(top))
+
+    def test_deep_bom(self):
+        """Multi-level requirements for a deep BOM are resolved with a single query."""
+        parts = [self.create_part(f'Level {idx}') for idx in range(13)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for parent, child in pairwise(parts):
+                BomItem.objects.create(part=parent, sub_part=child, quantity=2)
+
+        top = parts[0]
+
+        self.assertTrue(index_built(ExplodedBomItem))
+
+        with self.assertNumQueries(1):
+            required = top.getRequiredParts(recursive=True)
+
+        self.assertEqual(required, set(parts[1:]))
+        self.assertEqual(required, self.required_parts(top))
+
+        row = top.get_exploded_bom().get(sub_part=parts[-1])
+        self.assertEqual(row.depth, 12)
+        self.assertEqual(row.quantity, 2**12)
+
+        # Rebuilding the entire table produces the same result
+        before = set(
+            ExplodedBomItem.objects.values_list(
+                'assembly', 'sub_part', 'depth', 'quantity', 'path'
+            )
+        )
+        part_tasks.rebuild_all_exploded_bom()
+        after = set(
+            ExplodedBomItem.objects.values_list(
+                'assembly', 'sub_part', 'depth', 'quantity', 'path'
+            )
+        )
+
+        self.assertEqual(before, after)
+
+    def test_index_not_built(self):
+        """The BOM tree is walked directly until the exploded BOM table has been built."""
+        top = Part.objects.filter(assembly=True).first()
+        expected = self.required_parts(top)
+
+        ExplodedBomItem.objects.all().delete()
+        part_bom.set_index_built(ExplodedBomItem, False)
+
+        self.assertFalse(index_built(ExplodedBomItem))
+        self.assertEqual(top.getRequiredParts(recursive=True), expected)
+
+        # Rebuilding the BOM of a single assembly does not build the entire table
+        assembly = self.create_part('Assembly')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItem.objects.create(
+                part=assembly, sub_part=self.create_part('Sub'), quantity=1
+            )
+
+        self.assertTrue(ExplodedBomItem.objects.filter(assembly=assembly).exists())
+        self.assertFalse(index_built(ExplodedBomItem))
+        self.assertEqual(top.getRequiredParts(recursive=True), expected)
+
+        # Reading the table state does not mark it as built
+        self.assertFalse(index_built(ExplodedBomItem))
+
+        part_tasks.rebuild_all_exploded_bom()
+
+        self.assertTrue(index_built(ExplodedBomItem))
+        self.assertEqual(top.getRequiredParts(recursive=True), expected)
+
+    def test_rebuild_queue(self):
+        """BOM changes within a transaction offload a single rebuild task."""
+        top = self.create_part('Top')
+        mid = self.create_part('Mid')
+
+        # Nothing is offloaded for a transaction which is rolled back
+        with mock.patch('part.tasks.offload_task') as offload:
+            try:
+                with transaction.atomic():
+                    BomItem.objects.create(
+                        part=top, sub_part=self.create_part('Rollback'), quantity=1
+                    )
+                    raise ValueError
+            except ValueError:
+                pass
+
+            with self.captureOnCommitCallbacks(execute=True):
+                part_tasks.schedule_bom_rebuild(
+                    part_tasks.rebuild_exploded_bom, [mid.pk]
+                )
+
+        offload.assert_called_once_with(
+            part_tasks.rebuild_exploded_bom, [mid.pk], group='part'
+        )
+
+        with (
+            mock.patch('part.tasks.offload_task') as offload,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            for idx in range(5):
+                BomItem.objects.create(
+                    part=top, sub_part=self.create_part(f'Leaf {idx}'), quantity=1
+                )
+                BomItem.objects.create(
+                    part=mid, sub_part=self.create_part(f'Sub {idx}'), quantity=1
+                )
+
+            offload.assert_not_called()
+
+        calls = [
+            call
+            for call in offload.call_args_list
+            if call.args[0] is part_tasks.rebuild_exploded_bom
+        ]
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args[1], sorted([top.pk, mid.pk]))
+
+
+class BomUsageTest(TestCase):
+    """Unit tests for the BomItemUsage ("used in") index."""
+
+    fixtures = ['category', 'part', 'location', 'bom']
+
+    @classmethod
+    def setUpTestData(cls):
+        """Build the "used in" index for the fixture data."""
+        super().setUpTestData()
+
+        part_tasks.rebuild_all_bom_usage()
+
+    def setUp(self):
+        """Do not share the cached index state between tests."""
+        super().setUp()
+
+        part_bom._built.clear()
+        self.addCleanup(part_bom._built.clear)
+
+    def create_part(self, name, **kwargs):
+        """Create a new assembly / component part."""
+        kwargs.setdefault('assembly', True)
+        kwargs.setdefault('component', True)
+
+        return Part.objects.create(name=name, description=name, **kwargs)
+
+    def used_in(self, part, include_inherited=True, include_substitutes=True):
+        """Reference implementation: find assemblies by walking the template tree."""
+        query = Q(sub_part=part) | Q(
+            allow_variants=True, sub_part__in=part.get_ancestors(include_self=False)
+        )
+
+        if include_substitutes:
+            query |= Q(substitutes__part=part)
+
+        parts = set()
+
+        for bom_item in BomItem.objects.filter(query):
+            parts.add(bom_item.part)
+
+            if include_inherited and bom_item.inherited:
+                parts.update(bom_item.part.get_descendants(include_self=False))
+
+        return parts
+
+    def check_used_in(self):
+        """Check the "used in" index against the reference implementation."""
+        for part in Part.objects.all():
+            for inherited in [True, False]:
+                for substitutes in [True, False]:
+                    self.assertEqual(
+                        set(
+                            part.get_used_in(
+                                include_inherited=inherited,
+                                include_substitutes=substitutes,
+                            )
+                        ),
+                        self.used_in(
+                            part,
+                            include_inherited=inherited,
+                            include_substitutes=substitutes,
+                        ),
+                    )
+
+    def test_fixtures(self):
+        """The "used in" index matches the fixture data."""
+        self.check_used_in()
+
+    def test_used_in(self):
+        """Test that the index is updated for BOM, substitute and variant changes."""
+        # The index is updated when the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            template = self.create_part('Template', is_template=True)
+            assembly = self.create_part('Assembly', is_template=True)
+            variant = self.create_part('Assembly Variant', variant_of=assembly)
+            component = self.create_part('Component', is_template=True, assembly=False)
+            alt = self.create_part('Alt', assembly=False)
+
+            item = BomItem.objects.create(
+                part=assembly,
+                sub_part=template,
+                quantity=1,
+                inherited=True,
+                allow_variants=True,
+            )
+
+        self.assertEqual(set(template.get_used_in()), {assembly, variant})
+        self.assertEqual(set(template.get_used_in(include_inherited=False)), {assembly})
+
+        # Add a substitute part
+        with self.captureOnCommitCallbacks(execute=True):
+            BomItemSubstitute.objects.create(bom_item=item, part=alt)
+
+        self.assertEqual(set(alt.get_used_in()), {assembly, variant})
+        self.assertEqual(alt.get_used_in(include_substitutes=False), [])
+
+        # Create a variant of the sub-part
+        with self.captureOnCommitCallbacks(execute=True):
+            sub_variant = self.create_part('Template Variant', variant_of=template)
+
+        self.assertEqual(set(sub_variant.get_used_in()), {assembly, variant})
+
+        # Move the variant to a different template
+        with self.captureOnCommitCallbacks(execute=True):
+            sub_variant.variant_of = component
+            sub_variant.save()
+
+        self.assertEqual(sub_variant.get_used_in(), [])
+
+        # Variants are not valid if the BOM item does not allow them
+        with self.captureOnCommitCallbacks(execute=True):
+            item.allow_variants = False
+            item.inherited = False
+            item.save()
+
+        self.assertEqual(set(template.get_used_in()), {assembly})
+
+        # Move the variant assembly back to a template
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.variant_of = None
+            variant.save()
+
+            item.inherited = True
+            item.save()
+
+        self.assertEqual(set(template.get_used_in()), {assembly})
+
+        # Filtering the BomItem list
+        self.assertEqual(
+            list(BomItem.objects.filter(alt.get_used_in_bom_item_filter())), [item]
+        )
+        self.assertEqual(
+            BomItem.objects.filter(
+                alt.get_used_in_bom_item_filter(include_substitutes=False)
+            ).count(),
+            0,
+        )
+
+        self.check_used_in()
+
+        # Deleting the BOM item removes the index entries
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+
+        self.assertEqual(template.get_used_in(), [])
+        self.assertFalse(BomItemUsage.objects.filter(part=alt).exists())
+
+    def test_rebuild(self):
+        """Rebuilding the entire index produces the same result."""
+        fields = ['part', 'assembly', 'bom_item', 'inherited', 'variant', 'substitute']
+
+        before = sorted(BomItemUsage.objects.values_list(*fields))
+
+        BomItemUsage.objects.all().delete()
+        part_tasks.rebuild_all_bom_usage()
+
+        self.assertEqual(before, sorted(BomItemUsage.objects.values_list(*fields)))
+        self.assertGreater(len(before), 0)
+
+    def test_index_not_built(self):
+        """The "used in" queries fall back to the BOM data until the index has been built."""
+        BomItemUsage.objects.all().delete()
+        part_bom.set_index_built(BomItemUsage, False)
+
+        self.assertFalse(index_built(BomItemUsage))
+        self.check_used_in()
+
+        # Indexing a single BOM item does not build the entire index
+        with self.captureOnCommitCallbacks(execute=True):
+            item = BomItem.objects.create(
+                part=self.create_part('Assembly'),
+                sub_part=self.create_part('Sub', assembly=False),
+                quantity=1,
+            )
+
+        self.assertTrue(BomItemUsage.objects.filter(bom_item=item).exists())
+        self.assertFalse(index_built(BomItemUsage))
+        self.check_used_in()
+
+        part_tasks.rebuild_all_bom_usage()
+
+        self.assertTrue(index_built(BomItemUsage))
+        self.check_used_in()
+
+    def test_check_bom_index(self):
+        """The daily check rebuilds any index table which has not been built."""
+        for model in [BomItemUsage, ExplodedBomItem]:
+            part_bom.set_index_built(model, False)
+            self.assertFalse(index_built(model))
+
+        part_tasks.check_bom_index()
+
+        for model in [BomItemUsage, ExplodedBomItem]:
+            self.assertTrue(index_built(model))
+
+        self.check_used_in()
+
+    def test_rebuild_queue(self):
+        """BOM changes within a transaction offload a single index rebuild task."""
+        assembly = self.create_part('Assembly')
+        template = self.create_part('Template', is_template=True)
+
+        with (
+            mock.patch('part.tasks.offload_task') as offload,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            items = [
+                BomItem.objects.create(
+                    part=assembly, sub_part=self.create_part(f'Sub {idx}'), quantity=1
+                )
+                for idx in range(5)
+            ]
+
+            BomItemSubstitute.objects.create(
+                bom_item=items[0], part=self.create_part('Alt')
+            )
+
+            variants = [
+                self.create_part(f'Variant {idx}', variant_of=template)
+                for idx in range(3)
+            ]
+
+            offload.assert_not_called()
+
+        tasks = {call.args[0]: call.args[1] for call in offload.call_args_list}
+
+        self.assertEqual(len(offload.call_args_list), len(tasks))
+        self.assertEqual(
+            tasks[part_tasks.rebuild_bom_usage], sorted(item.pk for item in items)
+        )
+        self.assertEqual(
+            tasks[part_tasks.rebuild_part_bom_usage], [part.pk for part in variants]
+        )
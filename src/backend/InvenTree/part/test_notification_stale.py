@@ -190,7 +190,7 @@ class StaleStockNotificationTests(InvenTreeTestCase):
             part.tasks.check_stale_stock()
             mock_logger.info.assert_called_with('No stale stock items found')
 
-    @patch('InvenTree.tasks.offload_task')
+    @patch('part.tasks.offload_task')
     def test_check_stale_stock_with_stale_items(self, mock_offload):
         """Test check_stale_stock when stale items exist."""
         # Clear existing stock items
@@ -1,18 +1,29 @@
 """Tests for the Part model."""
 
+import io
 import os
+from datetime import timedelta
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, tag
+from django.utils import timezone
+
+import pytest
 
 import part.settings
 from common.models import NotificationEntry, NotificationMessage
 from common.settings import get_global_setting, set_global_setting
 from InvenTree import version
 from InvenTree.templatetags import inventree_extras
-from InvenTree.unit_test import InvenTreeTestCase, addUserPermission
+from InvenTree.unit_test import (
+    InvenTreeTestCase,
+    addUserPermission,
+    bulk_create_nodes,
+    count_queries,
+)
 
 from .models import (
     Part,
@@ -903,6 +914,46 @@ class PartSubscriptionTests(InvenTreeTestCase):
         # Check part
         self.assertTrue(self.part.is_starred_by(self.user))
 
+    def test_bulk_subscribers(self):
+        """Test bulk resolution of part subscribers."""
+        from django.contrib.auth.models import User
+
+        from part.subscriptions import group_by_subscriber, part_subscribers
+        from stock.models import StockItem
+
+        other = User.objects.create_user(username='subscriber', password='123456')
+
+        sub_part = Part.objects.create(
+            name='sub_part',
+            description='a sub part',
+            category=self.category,
+            variant_of=self.part,
+        )
+
+        self.part.set_starred(self.user, True)
+        PartCategory.objects.get(pk=1).set_starred(other, True)
+
+        parts = list(Part.objects.all())
+
+        # Query count does not depend on the number of parts
+        with self.assertNumQueries(5):
+            subscribers = part_subscribers([p.pk for p in parts])
+
+        for p in parts:
+            self.assertEqual(subscribers[p.pk], set(p.get_subscribers()))
+
+        self.assertEqual(subscribers[sub_part.pk], {self.user, other})
+
+        direct = part_subscribers(
+            [sub_part.pk], include_variants=False, include_categories=False
+        )
+        self.assertEqual(direct[sub_part.pk], set())
+
+        items = [StockItem(part=self.part), StockItem(part=sub_part)]
+
+        groups = group_by_subscriber(items, include_categories=False)
+        self.assertEqual(groups, {self.user: items})
+
 
 class PartNotificationTest(InvenTreeTestCase):
     """Integration test for part notifications."""
@@ -993,3 +1044,357 @@ class PartStockHistoryTest(InvenTreeTestCase):
         N_STOCKTAKE = PartStocktake.objects.count()
         perform_stocktake()
         self.assertEqual(PartStocktake.objects.count(), N_STOCKTAKE)
+
+    def test_stock_history_values(self):
+        """Test that batched stock history entries match the per-part calculation."""
+        from djmoney.contrib.exchange.models import convert_money
+        from djmoney.money import Money
+
+        from part.models import Part, PartPricing, PartStocktake
+        from part.stocktake import perform_stocktake
+        from stock.models import StockItem, StockLocation
+
+        self.generate_exchange_rates()
+
+        set_global_setting('STOCKTAKE_ENABLE', True)
+        set_global_setting('STOCKTAKE_EXCLUDE_EXTERNAL', True)
+
+        PartStocktake.objects.all().delete()
+
+        # Assign pricing information to the template part
+        template = Part.objects.get(pk=10000)
+        PartPricing.objects.update_or_create(
+            part=template,
+            defaults={'overall_min': Money(2, 'GBP'), 'overall_max': Money(5, 'CAD')},
+        )
+
+        internal = StockLocation.objects.filter(external=False).first()
+        external = StockLocation.objects.filter(external=True).first()
+
+        # Create stock for the variants, with a mixture of prices and currencies
+        for idx, variant in enumerate(template.get_descendants(include_self=True)):
+            StockItem.objects.create(part=variant, quantity=10 + idx, location=internal)
+            StockItem.objects.create(
+                part=variant,
+                quantity=3,
+                location=internal,
+                purchase_price=Money(1.5, 'AUD'),
+            )
+            StockItem.objects.create(
+                part=variant,
+                quantity=7,
+                location=internal,
+                purchase_price=Money(idx, 'USD'),
+            )
+            StockItem.objects.create(part=variant, quantity=100, location=external)
+
+        def expected_entry(part):
+            """Calculate the expected stock history values for a single part."""
+            pricing = part.pricing
+
+            count = 0
+            quantity = 0
+            cost_min = Money(0, 'USD')
+            cost_max = Money(0, 'USD')
+
+            for item in part.stock_entries(
+                in_stock=True, include_external=False, include_variants=True
+            ):
+                item_min = pricing.overall_min or pricing.overall_max
+                item_max = pricing.overall_max or pricing.overall_min
+
+                if item.purchase_price is not None:
+                    item_min = item_max = item.purchase_price
+
+                try:
+                    item_min = convert_money(item_min, 'USD') * item.quantity
+                    item_max = convert_money(item_max, 'USD') * item.quantity
+                except Exception:
+                    item_min = item_max = Money(0, 'USD')
+
+                count += 1
+                quantity += item.quantity
+                cost_min += item_min
+                cost_max += item_max
+
+            return count, quantity, cost_min, cost_max
+
+        active = Part.objects.filter(active=True)
+        expected = {part.pk: expected_entry(part) for part in active}
+
+        calls = []
+
+        n = perform_stocktake(
+            chunk_size=3, progress=lambda done, total: calls.append((done, total))
+        )
+
+        self.assertEqual(n, active.count())
+        self.assertEqual(calls[-1], (active.count(), active.count()))
+        self.assertEqual(len(calls), (active.count() + 2) // 3)
+
+        for entry in PartStocktake.objects.all():
+            count, quantity, cost_min, cost_max = expected[entry.part.pk]
+
+            self.assertEqual(entry.item_count, count)
+            self.assertEqual(entry.quantity, quantity)
+            self.assertAlmostEqual(entry.cost_min.amount, cost_min.amount, places=4)
+            self.assertAlmostEqual(entry.cost_max.amount, cost_max.amount, places=4)
+
+        # The template part includes the stock for all variants
+        n_variants = template.get_descendants(include_self=True).count()
+        self.assertGreaterEqual(template.stocktakes.first().item_count, 3 * n_variants)
+
+        # Run again via the management command
+        PartStocktake.objects.all().delete()
+
+        output = io.StringIO()
+        call_command('stocktake', chunk_size=100, stdout=output)
+
+        self.assertIn(
+            f'Processed {active.count()} / {active.count()}', output.getvalue()
+        )
+        self.assertEqual(PartStocktake.objects.count(), active.count())
+
+
+def backdate_stock_history(days: int):
+    """Move all stock history (and the data it depends on) into the past."""
+    from part.models import PartPricing, PartStocktake
+    from stock.models import StockItem, StockItemTracking
+
+    date = timezone.now() - timedelta(days=days)
+
+    PartStocktake.objects.update(date=date.date())
+    StockItemTracking.objects.update(date=date - timedelta(days=1))
+    StockItem.objects.update(updated=date - timedelta(days=1))
+    PartPricing.objects.update(
+        updated=date - timedelta(days=1), scheduled_for_update=False
+    )
+
+
+class PartStockHistoryIncrementalTest(InvenTreeTestCase):
+    """Test incremental generation of stock history entries."""
+
+    fixtures = ['category', 'part', 'location', 'stock']
+
+    def test_incremental(self):
+        """Only parts with stock changes are recalculated."""
+        from part.models import Part, PartStocktake
+        from part.stocktake import calculate_entries, part_tree, perform_stocktake
+        from stock.models import StockItem
+
+        set_global_setting('STOCKTAKE_ENABLE', True)
+        set_global_setting('STOCKTAKE_INCREMENTAL', True)
+
+        PartStocktake.objects.all().delete()
+
+        # The first run has no previous data, so every part is calculated
+        N = perform_stocktake()
+        self.assertEqual(N, Part.objects.filter(active=True).count())
+
+        backdate_stock_history(3)
+
+        # Adjust the previous entries, to check that values are carried forward
+        PartStocktake.objects.update(quantity=12345)
+
+        # Remove stock for a variant part
+        item = StockItem.objects.filter(
+            part__variant_of__isnull=False, quantity__gt=1
+        ).first()
+        variant = item.part
+        template = variant.variant_of
+
+        self.assertTrue(item.take_stock(1, self.user))
+
+        self.assertEqual(perform_stocktake(), N)
+
+        today = PartStocktake.objects.filter(date=timezone.now().date())
+        self.assertEqual(today.count(), N)
+
+        expected = {
+            entry.part_id: entry
+            for entry in calculate_entries(
+                [template.pk, variant.pk], part_tree([template.pk, variant.pk]), 'USD'
+            )
+        }
+
+        for entry in today:
+            if entry.part_id in expected:
+                # Changed parts are recalculated
+                self.assertEqual(entry.quantity, expected[entry.part_id].quantity)
+                self.assertNotEqual(entry.quantity, 12345)
+            else:
+                # Unchanged parts are carried forward
+                self.assertEqual(entry.quantity, 12345)
+
+        # A full stocktake recalculates every part
+        PartStocktake.objects.filter(date=timezone.now().date()).delete()
+        perform_stocktake(incremental=False)
+
+        self.assertFalse(
+            PartStocktake.objects.filter(
+                date=timezone.now().date(), quantity=12345
+            ).exists()
+        )
+
+
+@tag('performance_test')
+class StockHistoryPerformanceTest(InvenTreeTestCase):
+    """Compare incremental stock history generation against a full rebuild."""
+
+    N_PARTS = 500
+    N_ITEMS = 5
+    N_CHANGED = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        """Generate a dataset of parts and stock items, with existing stock history."""
+        from part.models import Part
+        from part.stocktake import perform_stocktake
+        from stock.models import StockItem
+
+        super().setUpTestData()
+
+        set_global_setting('STOCKTAKE_ENABLE', True)
+
+        bulk_create_nodes(
+            Part,
+            [
+                Part(
+                    name=f'Benchmark part {idx}', description='A part for benchmarking'
+                )
+                for idx in range(cls.N_PARTS)
+            ],
+        )
+
+        bulk_create_nodes(
+            StockItem,
+            [
+                StockItem(part=part, quantity=10)
+                for part in Part.objects.all()
+                for _ in range(cls.N_ITEMS)
+            ],
+        )
+
+        perform_stocktake(incremental=False)
+        backdate_stock_history(7)
+
+        # Adjust stock for a small fraction of the parts
+        for item in StockItem.objects.filter(part__name__startswith='Benchmark')[
+            : cls.N_CHANGED
+        ]:
+            item.add_stock(5, None)
+
+    def run_stocktake(self, incremental: bool):
+        """Run the stocktake process, returning the created entries."""
+        from part.models import PartStocktake
+        from part.stocktake import perform_stocktake
+
+        with count_queries(f'Stocktake (incremental={incremental})', threshold=1):
+            perform_stocktake(incremental=incremental)
+
+        return {
+            entry.part_id: (entry.item_count, entry.quantity, entry.cost_min)
+            for entry in PartStocktake.objects.filter(date=timezone.now().date())
+        }
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_stocktake_full(self):
+        """Benchmark a full stocktake rebuild."""
+        entries = self.run_stocktake(incremental=False)
+        self.assertGreaterEqual(len(entries), self.N_PARTS)
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_stocktake_incremental(self):
+        """Benchmark an incremental stocktake, and check it matches a full rebuild."""
+        from part.models import PartStocktake
+
+        incremental = self.run_stocktake(incremental=True)
+
+        PartStocktake.objects.filter(date=timezone.now().date()).delete()
+
+        full = self.run_stocktake(incremental=False)
+
+        self.assertEqual(incremental, full)
+
+
+@tag('performance_test')
+class CanBuildPerformanceTest(InvenTreeTestCase):
+    """Compare the bulk 'can_build' annotation against the per-part property."""
+
+    N_ASSEMBLIES = 500
+    N_LINES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        """Generate a dataset of assemblies, each with a BOM and component stock."""
+        from part.models import BomItem, Part
+        from stock.models import StockItem
+
+        super().setUpTestData()
+
+        bulk_create_nodes(
+            Part,
+            [
+                Part(
+                    name=f'Benchmark {kind} {idx}',
+                    description='A part for benchmarking',
+                    assembly=kind == 'assembly',
+                    component=kind == 'component',
+                )
+                for idx in range(cls.N_ASSEMBLIES)
+                for kind in ['assembly', 'component']
+            ],
+        )
+
+        assemblies = list(Part.objects.filter(name__startswith='Benchmark assembly'))
+        components = list(Part.objects.filter(name__startswith='Benchmark component'))
+
+        BomItem.objects.bulk_create([
+            BomItem(
+                part=assembly,
+                sub_part=components[(idx + jj) % len(components)],
+                quantity=jj + 1,
+            )
+            for idx, assembly in enumerate(assemblies)
+            for jj in range(cls.N_LINES)
+        ])
+
+        bulk_create_nodes(
+            StockItem,
+            [
+                StockItem(part=component, quantity=100 + idx)
+                for idx, component in enumerate(components)
+            ],
+        )
+
+    def assemblies(self):
+        """Return a queryset of the benchmark assemblies."""
+        from part.models import Part
+
+        return Part.objects.filter(name__startswith='Benchmark assembly').order_by('pk')
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_can_build_property(self):
+        """Benchmark the per-part 'can_build' property."""
+        with count_queries('Part.can_build', threshold=1):
+            values = [prt.can_build for prt in self.assemblies()]
+
+        self.assertEqual(len(values), self.N_ASSEMBLIES)
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_can_build_annotation(self):
+        """Benchmark the bulk 'can_build' annotation, and check it matches the property."""
+        from part.filters import annotate_can_build
+
+        with count_queries('annotate_can_build', threshold=1) as result:
+            values = {
+                prt.pk: prt.can_build_quantity
+                for prt in annotate_can_build(self.assemblies())
+            }
+
+        self.assertEqual(result.count, 1)
+        self.assertEqual(values, {prt.pk: prt.can_build for prt in self.assemblies()})
@@ -0,0 +1,307 @@
+"""Unit tests for material requirements planning (MRP)."""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase
+
+import build.models
+import company.models
+import order.models
+import part.planning
+import stock.models
+from common.settings import set_global_setting
+from InvenTree.helpers import current_date
+
+from .models import (
+    BomItem,
+    BomItemSubstitute,
+    BomItemUsage,
+    MaterialRequirement,
+    MaterialRequirementChange,
+    Part,
+)
+
+
+class MaterialPlanningTest(TestCase):
+    """Tests for the MaterialPlanner class."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create an assembly with a single component, and some open orders."""
+        super().setUpTestData()
+
+        cls.today = current_date()
+
+        cls.assembly = Part.objects.create(
+            name='Assembly', description='An assembly', assembly=True, lead_time=5
+        )
+
+        cls.component = Part.objects.create(
+            name='Component',
+            description='A component',
+            component=True,
+            purchaseable=True,
+            lead_time=10,
+        )
+
+        BomItem.objects.create(part=cls.assembly, sub_part=cls.component, quantity=2)
+
+        stock.models.StockItem.objects.create(part=cls.assembly, quantity=3)
+        stock.models.StockItem.objects.create(part=cls.component, quantity=4)
+
+        customer = company.models.Company.objects.create(
+            name='Customer', is_customer=True
+        )
+
+        cls.sales_order = order.models.SalesOrder.objects.create(
+            customer=customer, reference='SO-9001', target_date=cls.day(20)
+        )
+
+        cls.sales_line = order.models.SalesOrderLineItem.objects.create(
+            order=cls.sales_order, part=cls.assembly, quantity=10
+        )
+
+        supplier = company.models.Company.objects.create(
+            name='Supplier', is_supplier=True
+        )
+
+        supplier_part = company.models.SupplierPart.objects.create(
+            part=cls.component, supplier=supplier, SKU='COMP-1'
+        )
+
+        purchase_order = order.models.PurchaseOrder.objects.create(
+            supplier=supplier, reference='PO-9001'
+        )
+
+        order.models.PurchaseOrderLineItem.objects.create(
+            order=purchase_order, part=supplier_part, quantity=5, target_date=cls.day(3)
+        )
+
+    @classmethod
+    def day(cls, n: int):
+        """Return the date 'n' days from today."""
+        return cls.today + timedelta(days=n)
+
+    def requirements(self, part: Part) -> list[tuple]:
+        """Return the calculated requirements for a part, in date order."""
+        return [
+            (
+                row.date,
+                row.level,
+                row.gross_requirement,
+                row.scheduled_receipts,
+                row.projected_stock,
+                row.net_requirement,
+                row.planned_date,
+            )
+            for row in MaterialRequirement.objects.filter(part=part).order_by('date')
+        ]
+
+    def test_full_run(self):
+        """Test gross-to-net calculation with BOM explosion and lead time offset."""
+        n = part.planning.MaterialPlanner().run()
+
+        self.assertEqual(n, 3)
+
+        # The assembly is short by 7 units, which must be built 5 days in advance
+        self.assertEqual(
+            self.requirements(self.assembly),
+            [(self.day(20), 0, 10, 0, 0, 7, self.day(15))],
+        )
+
+        # The planned build consumes 14 components, which must be ordered 10 days in advance
+        self.assertEqual(
+            self.requirements(self.component),
+            [
+                (self.day(3), 1, 0, 5, 9, 0, self.day(-7)),
+                (self.day(15), 1, 14, 0, 0, 5, self.day(5)),
+            ],
+        )
+
+        # A second run replaces the existing rows
+        part.planning.MaterialPlanner().run()
+        self.assertEqual(MaterialRequirement.objects.count(), 3)
+
+    def test_build_order(self):
+        """Test that build orders are planned as both supply and demand."""
+        build.models.Build.objects.create(
+            reference='BO-9001',
+            title='Build some assemblies',
+            part=self.assembly,
+            quantity=4,
+            target_date=self.day(10),
+        )
+
+        part.planning.MaterialPlanner().run()
+
+        self.assertEqual(
+            self.requirements(self.assembly),
+            [
+                (self.day(10), 0, 0, 4, 7, 0, self.day(5)),
+                (self.day(20), 0, 10, 0, 0, 3, self.day(15)),
+            ],
+        )
+
+        self.assertEqual(
+            self.requirements(self.component),
+            [
+                (self.day(3), 1, 0, 5, 9, 0, self.day(-7)),
+                (self.day(10), 1, 8, 0, 1, 0, self.day(0)),
+                (self.day(15), 1, 6, 0, 0, 5, self.day(5)),
+            ],
+        )
+
+    def test_minimum_stock(self):
+        """Test that the minimum stock level is treated as safety stock."""
+        self.component.minimum_stock = 2
+        self.component.save()
+
+        part.planning.MaterialPlanner().run()
+
+        self.assertEqual(
+            self.requirements(self.component)[-1],
+            (self.day(15), 1, 14, 0, 2, 7, self.day(5)),
+        )
+
+    def test_incremental_run(self):
+        """Test that an incremental run only recalculates the changed parts."""
+        set_global_setting('PART_PLANNING_ENABLE', True)
+
+        part.planning.update_material_requirements(incremental=False)
+        self.assertEqual(MaterialRequirement.objects.count(), 3)
+
+        # No changes have been recorded
+        self.assertEqual(part.planning.update_material_requirements(), 0)
+
+        # Adding component stock does not change the assembly requirements
+        with self.captureOnCommitCallbacks(execute=True):
+            stock.models.StockItem.objects.create(part=self.component, quantity=5)
+
+        self.assertEqual(
+            list(MaterialRequirementChange.objects.values_list('part', flat=True)),
+            [self.component.pk],
+        )
+
+        assembly_rows = list(
+            MaterialRequirement.objects.filter(part=self.assembly).values_list(
+                'pk', flat=True
+            )
+        )
+
+        # The dependent demand is read from the stored assembly requirements
+        self.assertEqual(part.planning.update_material_requirements(), 2)
+
+        self.assertEqual(
+            self.requirements(self.component)[-1],
+            (self.day(15), 1, 14, 0, 0, 0, self.day(5)),
+        )
+
+        self.assertEqual(
+            list(
+                MaterialRequirement.objects.filter(part=self.assembly).values_list(
+                    'pk', flat=True
+                )
+            ),
+            assembly_rows,
+        )
+
+        self.assertFalse(MaterialRequirementChange.objects.exists())
+
+        # Changing the sales order recalculates the assembly and its components
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sales_line.quantity = 12
+            self.sales_line.save()
+
+        part.planning.update_material_requirements()
+
+        self.assertEqual(
+            self.requirements(self.assembly),
+            [(self.day(20), 0, 12, 0, 0, 9, self.day(15))],
+        )
+
+        self.assertEqual(
+            self.requirements(self.component)[-1],
+            (self.day(15), 1, 18, 0, 0, 4, self.day(5)),
+        )
+
+    def test_rollback(self):
+        """Changes made within a transaction which is rolled back are not recorded."""
+        set_global_setting('PART_PLANNING_ENABLE', True)
+
+        try:
+            with transaction.atomic():
+                self.sales_line.quantity = 12
+                self.sales_line.save()
+                raise ValueError
+        except ValueError:
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stock.models.StockItem.objects.create(part=self.component, quantity=5)
+
+        self.assertEqual(
+            list(MaterialRequirementChange.objects.values_list('part', flat=True)),
+            [self.component.pk],
+        )
+
+    def test_substitute_allocation(self):
+        """Stock of a substitute part which is allocated to a build is netted in an incremental run."""
+        substitute = Part.objects.create(
+            name='Substitute', description='A substitute component', component=True
+        )
+
+        bom_item = BomItem.objects.get(part=self.assembly, sub_part=self.component)
+        BomItemSubstitute.objects.create(bom_item=bom_item, part=substitute)
+
+        build_order = build.models.Build.objects.create(
+            reference='BO-9002',
+            title='Build some assemblies',
+            part=self.assembly,
+            quantity=4,
+            target_date=self.day(10),
+        )
+
+        build.models.BuildItem.objects.create(
+            build_line=build_order.build_lines.get(bom_item=bom_item),
+            stock_item=stock.models.StockItem.objects.create(
+                part=substitute, quantity=10
+            ),
+            quantity=3,
+        )
+
+        part.planning.MaterialPlanner().run()
+        expected = self.requirements(self.component)
+
+        # The build requires 8 components, 3 of which are allocated (as substitutes)
+        self.assertIn((self.day(10), 1, 5, 0, 4, 0, self.day(0)), expected)
+
+        # Recalculate the component only
+        part.planning.MaterialPlanner([self.component.pk]).run()
+
+        self.assertEqual(self.requirements(self.component), expected)
+
+    def test_tracking_disabled(self):
+        """Changes are not recorded unless material planning is enabled."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sales_line.quantity = 12
+            self.sales_line.save()
+
+        self.assertFalse(MaterialRequirementChange.objects.exists())
+
+    def test_dependent_demand(self):
+        """Dependent demand is read from the BOM, even if the "used in" index is out of date."""
+        part.planning.MaterialPlanner().run()
+
+        BomItemUsage.objects.all().delete()
+
+        # Recalculate the component only
+        part.planning.MaterialPlanner([self.component.pk]).run()
+
+        self.assertEqual(
+            self.requirements(self.component),
+            [
+                (self.day(3), 1, 0, 5, 9, 0, self.day(-7)),
+                (self.day(15), 1, 14, 0, 0, 5, self.day(5)),
+            ],
+        )
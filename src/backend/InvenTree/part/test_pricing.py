@@ -1,8 +1,15 @@
 """Unit tests for Part pricing calculations."""
 
+import itertools
+from datetime import timedelta
+from unittest import mock
+
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.test.utils import override_settings
+from django.utils import timezone
 
+from django_q.models import OrmQ, Schedule
 from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 
@@ -10,6 +17,7 @@ import common.currency
 import company.models
 import order.models
 import part.models
+import part.pricing
 import stock.models
 from common.settings import set_global_setting
 from InvenTree.unit_test import InvenTreeTestCase
@@ -545,3 +553,409 @@ class PartPricingTests(InvenTreeTestCase):
 
         self.assertEqual(A1.pricing.overall_min, Money(a_min, 'USD'))
         self.assertEqual(A1.pricing.overall_max, Money(a_max, 'USD'))
+
+    def test_pricing_graph(self):
+        """Test that the pricing graph matches the per-part pricing calculations."""
+        from part.pricing import PricingGraph, update_pricing
+
+        set_global_setting('PART_INTERNAL_PRICE', True, None)
+
+        self.create_price_breaks()
+
+        # Template part with two variants
+        template = part.models.Part.objects.create(
+            name='Template', description='A template part', is_template=True
+        )
+
+        variants = []
+
+        for idx in range(2):
+            variant = part.models.Part.objects.create(
+                name=f'Variant {idx}',
+                description='A variant part',
+                variant_of=template,
+                component=True,
+            )
+
+            part.models.PartInternalPriceBreak.objects.create(
+                part=variant, quantity=1, price=5 + idx, price_currency='USD'
+            )
+
+            variants.append(variant)
+
+        substitute = part.models.Part.objects.create(
+            name='Substitute', description='A substitute part', component=True
+        )
+
+        part.models.PartInternalPriceBreak.objects.create(
+            part=substitute, quantity=1, price=3, price_currency='CAD'
+        )
+
+        # Template assembly, which uses the template part (allowing variants)
+        assembly = part.models.Part.objects.create(
+            name='Assembly',
+            description='An assembly',
+            assembly=True,
+            component=True,
+            is_template=True,
+        )
+
+        bom_item = part.models.BomItem.objects.create(
+            part=assembly,
+            sub_part=template,
+            quantity=2,
+            allow_variants=True,
+            inherited=True,
+        )
+
+        part.models.BomItemSubstitute.objects.create(bom_item=bom_item, part=substitute)
+
+        # Part tree IDs may have been shifted by the creation of new parts
+        self.part.refresh_from_db()
+
+        part.models.BomItem.objects.create(
+            part=assembly, sub_part=self.part, quantity=3
+        )
+
+        # Variant assembly, which inherits the BOM of the template assembly
+        assembly_variant = part.models.Part.objects.create(
+            name='Assembly Variant',
+            description='A variant assembly',
+            assembly=True,
+            component=True,
+            variant_of=assembly,
+        )
+
+        # Top-level assembly
+        top = part.models.Part.objects.create(
+            name='Top', description='Top level assembly', assembly=True
+        )
+
+        part.models.BomItem.objects.create(
+            part=top, sub_part=assembly_variant, quantity=4
+        )
+
+        # Starting from the leaf parts, the graph should include all dependent parts
+        graph = PricingGraph([variants[0].pk, substitute.pk])
+        graph.collect()
+
+        self.assertEqual(
+            graph.nodes,
+            {
+                variants[0].pk,
+                substitute.pk,
+                template.pk,
+                assembly.pk,
+                assembly_variant.pk,
+                top.pk,
+            },
+        )
+
+        # Sub-assemblies must be calculated before the assemblies which use them
+        graph.load()
+        ordered = graph.sort()
+
+        for lower, upper in [
+            (variants[0], template),
+            (template, assembly),
+            (substitute, assembly),
+            (assembly_variant, assembly),
+            (assembly_variant, top),
+        ]:
+            self.assertLess(ordered.index(lower.pk), ordered.index(upper.pk))
+
+        # Calculate pricing for every part in a single pass
+        all_parts = [
+            self.part,
+            *variants,
+            substitute,
+            template,
+            assembly_variant,
+            assembly,
+            top,
+        ]
+
+        part.models.PartPricing.objects.all().delete()
+
+        n = update_pricing([p.pk for p in all_parts], cascade=False)
+        self.assertEqual(n, len(all_parts))
+
+        graph_pricing = {
+            p.pk: part.models.PartPricing.objects.get(part=p) for p in all_parts
+        }
+
+        # Now calculate pricing for each part individually (in dependency order)
+        for p in all_parts:
+            p.pricing.update_pricing(cascade=False)
+
+        fields = ['bom_cost_min', 'bom_cost_max', 'overall_min', 'overall_max']
+
+        for p in all_parts:
+            expected = part.models.PartPricing.objects.get(part=p)
+            calculated = graph_pricing[p.pk]
+
+            self.assertIsNotNone(calculated.updated)
+            self.assertFalse(calculated.scheduled_for_update)
+
+            for field in [*fields, 'variant_cost_min', 'internal_cost_max']:
+                self.assertEqual(
+                    getattr(calculated, field), getattr(expected, field), field
+                )
+
+        self.assertIsNotNone(graph_pricing[top.pk].overall_min)
+        self.assertEqual(
+            graph_pricing[top.pk].overall_max,
+            graph_pricing[assembly_variant.pk].overall_max * 4,
+        )
+
+    def test_pricing_graph_index_not_built(self):
+        """Test that the pricing graph walks the BOM directly until the "used in" index is built."""
+        import part.bom
+        import part.tasks
+        from part.pricing import PricingGraph
+
+        component = part.models.Part.objects.create(
+            name='Component', description='A component', component=True
+        )
+
+        substitute = part.models.Part.objects.create(
+            name='Substitute', description='A substitute part', component=True
+        )
+
+        assembly = part.models.Part.objects.create(
+            name='Assembly',
+            description='A template assembly',
+            assembly=True,
+            component=True,
+            is_template=True,
+        )
+
+        bom_item = part.models.BomItem.objects.create(
+            part=assembly, sub_part=component, quantity=1, inherited=True
+        )
+
+        part.models.BomItemSubstitute.objects.create(bom_item=bom_item, part=substitute)
+
+        assembly_variant = part.models.Part.objects.create(
+            name='Assembly Variant',
+            description='A variant assembly',
+            assembly=True,
+            variant_of=assembly,
+        )
+
+        expected = {component.pk, substitute.pk, assembly.pk, assembly_variant.pk}
+
+        # The index has not been populated yet
+        part.models.BomItemUsage.objects.all().delete()
+        part.bom.set_index_built(part.models.BomItemUsage, False)
+        self.addCleanup(part.bom._built.clear)
+
+        self.assertFalse(part.bom.index_built(part.models.BomItemUsage))
+
+        graph = PricingGraph([component.pk, substitute.pk])
+        graph.collect()
+        self.assertEqual(graph.nodes, expected)
+
+        # Once the index has been built, the same parts are found
+        part.tasks.rebuild_all_bom_usage()
+        self.assertTrue(part.bom.index_built(part.models.BomItemUsage))
+
+        graph = PricingGraph([component.pk, substitute.pk])
+        graph.collect()
+        self.assertEqual(graph.nodes, expected)
+
+    def test_pricing_graph_depth(self):
+        """Test that pricing is cascaded through very deep BOM structures."""
+        from part.pricing import update_pricing
+
+        depth = part.models.PartPricing.MAX_PRICING_DEPTH + 5
+
+        parts = [
+            part.models.Part.objects.create(
+                name=f'Level {idx}',
+                description='A deep assembly',
+                assembly=True,
+                component=True,
+            )
+            for idx in range(depth)
+        ]
+
+        for upper, lower in itertools.pairwise(parts):
+            part.models.BomItem.objects.create(part=upper, sub_part=lower, quantity=1)
+
+        pricing = parts[-1].pricing
+        pricing.override_min = Money(1, 'USD')
+        pricing.override_max = Money(2, 'USD')
+        pricing.save()
+
+        # Update the lowest level part, which should cascade all the way to the top
+        n = update_pricing([parts[-1].pk])
+        self.assertEqual(n, depth)
+
+        top = part.models.PartPricing.objects.get(part=parts[0])
+        self.assertEqual(top.overall_min, Money(1, 'USD'))
+        self.assertEqual(top.overall_max, Money(2, 'USD'))
+
+    @override_settings(TESTING_PRICING=True)
+    def test_pricing_cascade(self):
+        """Test that updating pricing for a part cascades via the pricing graph."""
+        assembly = part.models.Part.objects.create(
+            name='Cascade Assembly', description='An assembly', assembly=True
+        )
+
+        self.part.refresh_from_db()
+
+        part.models.BomItem.objects.create(
+            part=assembly, sub_part=self.part, quantity=10
+        )
+
+        pricing = self.part.pricing
+        pricing.override_min = Money(1.5, 'USD')
+        pricing.override_max = Money(2.5, 'USD')
+        pricing.save()
+        pricing.update_pricing()
+
+        pricing = part.models.PartPricing.objects.get(part=assembly)
+        self.assertEqual(pricing.overall_min, Money(15, 'USD'))
+        self.assertEqual(pricing.overall_max, Money(25, 'USD'))
+
+    def test_pricing_queue(self):
+        """Test that pricing updates are coalesced via the pricing queue."""
+        p = part.models.Part.objects.create(
+            name='Queued part', description='A part for the pricing queue'
+        )
+
+        self.assertFalse(part.models.PartPricing.objects.filter(part=p).exists())
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            # Repeated scheduling does not hit the database
+            with self.assertNumQueries(0):
+                for _idx in range(10):
+                    part.pricing.schedule_pricing_update([p.pk, self.part.pk])
+
+                part.pricing.schedule_pricing_update([p.pk], create=True)
+
+        # A single flush is registered for the transaction
+        self.assertEqual(len(callbacks), 1)
+
+        # Only the part which requested creation has a PartPricing entry
+        pricing = part.models.PartPricing.objects.get(part=p)
+        self.assertTrue(pricing.scheduled_for_update)
+        self.assertFalse(
+            part.models.PartPricing.objects.filter(part=self.part).exists()
+        )
+
+        self.assertEqual(part.pricing.pricing_queue_depth(), 1)
+
+        # Process the queue
+        self.assertEqual(part.pricing.process_pricing_queue(), 1)
+        self.assertEqual(part.pricing.pricing_queue_depth(), 0)
+
+        pricing.refresh_from_db()
+        self.assertFalse(pricing.scheduled_for_update)
+        self.assertIsNotNone(pricing.updated)
+
+    def test_pricing_queue_rollback(self):
+        """Test that a rolled back transaction does not block later pricing updates."""
+        p = part.models.Part.objects.create(
+            name='Rollback part', description='A part for the pricing queue'
+        )
+
+        with self.assertRaises(ValueError), transaction.atomic():
+            part.pricing.schedule_pricing_update([p.pk], create=True)
+            raise ValueError('Rollback')
+
+        # Scheduling the same part again registers a new flush
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            part.pricing.schedule_pricing_update([p.pk], create=True)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(
+            part.models.PartPricing.objects.filter(
+                part=p, scheduled_for_update=True
+            ).exists()
+        )
+
+    def test_pricing_queue_task(self):
+        """Test that the periodic drain task is brought forward when parts are queued."""
+        OrmQ.objects.all().delete()
+        Schedule.objects.filter(func=part.pricing.PRICING_QUEUE_TASK).delete()
+
+        # Without the periodic task, a drain task is offloaded
+        part.pricing.schedule_pricing_queue()
+        self.assertEqual(OrmQ.objects.count(), 1)
+        OrmQ.objects.all().delete()
+
+        later = timezone.now() + timedelta(minutes=5)
+
+        schedule = Schedule.objects.create(
+            name=part.pricing.PRICING_QUEUE_TASK,
+            func=part.pricing.PRICING_QUEUE_TASK,
+            schedule_type=Schedule.MINUTES,
+            minutes=5,
+            next_run=later,
+        )
+
+        part.pricing.schedule_pricing_queue()
+
+        schedule.refresh_from_db()
+        next_run = schedule.next_run
+        self.assertLess(next_run, later)
+        self.assertLessEqual(
+            next_run,
+            timezone.now() + timedelta(seconds=part.pricing.PRICING_QUEUE_DELAY),
+        )
+
+        # Within the window, the next run is not delayed any further
+        part.pricing.schedule_pricing_queue()
+
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run, next_run)
+        self.assertEqual(OrmQ.objects.count(), 0)
+
+    def test_pricing_queue_failure(self):
+        """Test that parts are returned to the queue if the calculation fails."""
+        p = part.models.Part.objects.create(
+            name='Failing part', description='A part for the pricing queue'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            part.pricing.schedule_pricing_update([p.pk], create=True)
+
+        self.assertEqual(part.pricing.pricing_queue_depth(), 1)
+
+        with (
+            mock.patch('part.pricing.update_pricing', side_effect=ValueError('Failed')),
+            self.assertRaises(ValueError),
+        ):
+            part.pricing.process_pricing_queue()
+
+        # The part is still waiting in the queue
+        self.assertEqual(part.pricing.pricing_queue_depth(), 1)
+
+        self.assertEqual(part.pricing.process_pricing_queue(), 1)
+        self.assertEqual(part.pricing.pricing_queue_depth(), 0)
+
+        def drain_tasks():
+            """Return the queued drain tasks."""
+            return [
+                task
+                for task in OrmQ.objects.all()
+                if task.func() == part.pricing.PRICING_QUEUE_TASK
+            ]
+
+        part.pricing.schedule_pricing_queue()
+        part.pricing.schedule_pricing_queue()
+
+        tasks = drain_tasks()
+        self.assertEqual(len(tasks), 1)
+
+        # Once a worker has picked up the task, a new task can be scheduled
+        OrmQ.objects.filter(pk=tasks[0].pk).update(
+            lock=timezone.now() + timedelta(minutes=5)
+        )
+
+        part.pricing.schedule_pricing_queue()
+        self.assertEqual(len(drain_tasks()), 2)
+
+        OrmQ.objects.all().delete()
@@ -152,10 +152,18 @@ def allow_table_event(table_name):
     ignore_tables = [
         'common_notificationentry',
         'common_notificationmessage',
+        'common_referencesequence',
         'common_webhookendpoint',
         'common_webhookmessage',
+        'part_bomitemusage',
+        'part_explodedbomitem',
+        'part_materialrequirement',
+        'part_materialrequirementchange',
         'part_partpricing',
         'part_partstocktake',
+        'stock_serialnumberrange',
+        'stock_stockitemtrackingarchive',
+        'stock_stocklocationsummary',
     ]
 
     return table_name not in ignore_tables
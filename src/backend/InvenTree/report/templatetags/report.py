@@ -17,7 +17,6 @@ from django.utils.safestring import SafeString, mark_safe
 from django.utils.translation import gettext_lazy as _
 
 from djmoney.contrib.exchange.exceptions import MissingRate
-from djmoney.contrib.exchange.models import convert_money
 from djmoney.money import Money
 from PIL import Image
 
@@ -27,6 +26,7 @@ import common.models
 import InvenTree.helpers
 import InvenTree.helpers_model
 import report.helpers
+from common.currency import convert_money
 from common.settings import get_global_setting
 from company.models import Company
 from part.models import Part
@@ -0,0 +1,410 @@
+"""Bulk stock adjustment operations for the Stock app.
+
+The StockAdjustment class applies a stock adjustment (count, add, remove, transfer
+or status change) to a large number of StockItem objects at once:
+
+- The affected rows are locked with a single select_for_update() query
+- New quantities, locations and status values are calculated in memory
+- Changes are written with a single bulk_update() operation
+- Stock tracking entries are written with a single bulk_create() operation
+- Background tasks (low stock notification, pricing updates) are scheduled once per part
+
+All operations are performed within a single database transaction.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+import structlog
+
+import InvenTree.helpers
+import stock.summary
+from common.settings import get_global_setting
+from plugin import PluginMixinEnum, registry
+from plugin.events import trigger_event
+from stock.events import StockEvents
+from stock.status_codes import StockHistoryCode
+
+logger = structlog.get_logger('inventree')
+
+# Fields which may be modified by a bulk stock adjustment
+ADJUSTMENT_FIELDS = [
+    'quantity',
+    'location',
+    'status',
+    'status_custom_key',
+    'batch',
+    'packaging',
+    'stocktake_date',
+    'stocktake_user',
+    'updated',
+]
+
+
+class StockAdjustment:
+    """Apply a stock adjustment to multiple StockItem objects in bulk.
+
+    Each entry in the provided list of items is a dict (as returned by the
+    StockAdjustmentItemSerializer) containing:
+
+    - pk: The StockItem object (or primary key)
+    - quantity: The quantity for the adjustment
+    - status, batch, packaging: Optional values to update
+
+    Usage:
+        StockAdjustment(items, user, notes='Stocktake').run('count')
+    """
+
+    def __init__(self, items: list[dict], user: User | None = None, notes: str = ''):
+        """Initialize the stock adjustment.
+
+        Arguments:
+            items: A list of stock adjustment entries
+            user: The user performing the adjustment
+            notes: Optional notes for the generated tracking entries
+        """
+        self.entries = items
+        self.user = user
+        self.notes = notes
+
+        self.now = InvenTree.helpers.current_time()
+
+        # Locked StockItem objects, keyed by primary key
+        self.items: dict = {}
+
+        # Modified StockItem objects, keyed by primary key
+        self.modified: dict = {}
+
+        # Original location of each StockItem, keyed by primary key
+        self.locations: dict = {}
+
+        # StockItem objects which have been depleted, and are to be deleted
+        self.deleted: dict = {}
+
+        self.tracking: list = []
+        self.events: list[tuple[str, dict]] = []
+
+        self.custom_status_values = None
+
+        # Validation plugins are only queried once for the entire adjustment
+        self.validation_plugins = registry.with_mixin(PluginMixinEnum.VALIDATION)
+
+    @staticmethod
+    def item_pk(entry: dict) -> int:
+        """Return the StockItem primary key for a stock adjustment entry."""
+        item = entry['pk']
+        return getattr(item, 'pk', item)
+
+    def lock(self):
+        """Fetch (and lock) all StockItem objects referenced in this adjustment."""
+        from part.models import Part
+        from stock.models import StockItem
+
+        pks = {self.item_pk(entry) for entry in self.entries}
+
+        self.items = StockItem.objects.select_for_update().in_bulk(pks)
+
+        parts = Part.objects.in_bulk({item.part_id for item in self.items.values()})
+
+        for item in self.items.values():
+            item.part = parts[item.part_id]
+            self.locations[item.pk] = item.location_id
+
+    def get_item(self, entry: dict):
+        """Return the locked StockItem for a stock adjustment entry.
+
+        Returns None if the item has been deleted as part of this adjustment.
+        """
+        pk = self.item_pk(entry)
+
+        if pk in self.deleted:
+            return None
+
+        return self.items[pk]
+
+    def set_status(self, item, status, deltas: dict):
+        """Update the status of a StockItem (if required)."""
+        if status and not item.compare_status(status):
+            if self.custom_status_values is None:
+                self.custom_status_values = item.STATUS_CLASS.custom_values()
+
+            item.set_status(status, custom_values=self.custom_status_values)
+            deltas['status'] = status
+
+            self.modified[item.pk] = item
+
+    def set_fields(self, item, entry: dict, deltas: dict):
+        """Update the optional (non-status) transfer fields of a StockItem."""
+        for field in item.optional_transfer_fields():
+            if field == 'status':
+                continue
+
+            if value := entry.get(field):
+                setattr(item, field, value)
+                deltas[field] = value
+
+                if field == 'batch' and self.validation_plugins:
+                    item.validate_batch_code()
+
+        self.modified[item.pk] = item
+
+    def set_quantity(self, item, quantity: Decimal):
+        """Update the quantity of a StockItem.
+
+        Returns:
+            - True if the quantity was updated
+            - False if the StockItem is to be deleted
+            - None if the quantity cannot be adjusted
+        """
+        # Do not adjust quantity of a serialized part
+        if item.serialized:
+            return None
+
+        quantity = max(Decimal(quantity), 0)
+
+        if item.part.trackable and quantity != int(quantity):
+            raise ValidationError({
+                'quantity': _('Quantity must be integer value for trackable parts')
+            })
+
+        item.quantity = quantity
+
+        if quantity == 0 and item.delete_on_deplete and item.can_delete():
+            self.deleted[item.pk] = item
+            self.modified.pop(item.pk, None)
+            return False
+
+        self.modified[item.pk] = item
+
+        self.events.append((
+            StockEvents.ITEM_QUANTITY_UPDATED,
+            {'id': item.pk, 'quantity': float(item.quantity)},
+        ))
+
+        return True
+
+    def add_tracking_entry(self, item, code, deltas: dict):
+        """Add a (pending) stock tracking entry for a StockItem."""
+        if entry := item.add_tracking_entry(
+            code, self.user, notes=self.notes, deltas=deltas, commit=False
+        ):
+            entry.date = self.now
+            self.tracking.append(entry)
+
+    def count(self):
+        """Set the quantity of each StockItem (stocktake)."""
+        today = InvenTree.helpers.current_date()
+
+        for entry in self.entries:
+            if not (item := self.get_item(entry)):
+                continue
+
+            quantity = Decimal(entry['quantity'])
+
+            if quantity < 0:
+                continue
+
+            deltas = {}
+
+            self.set_status(item, entry.get('status'), deltas)
+
+            if self.set_quantity(item, quantity):
+                deltas['quantity'] = float(quantity)
+
+                item.stocktake_date = today
+                item.stocktake_user = self.user
+
+                self.set_fields(item, entry, deltas)
+                self.add_tracking_entry(item, StockHistoryCode.STOCK_COUNT, deltas)
+
+            self.events.append((
+                StockEvents.ITEM_COUNTED,
+                {'id': item.pk, 'quantity': float(item.quantity)},
+            ))
+
+    def add(self):
+        """Add the specified quantity to each StockItem."""
+        for entry in self.entries:
+            if not (item := self.get_item(entry)):
+                continue
+
+            quantity = Decimal(entry['quantity'] or 0)
+
+            # Cannot add items to a serialized part
+            if quantity <= 0 or item.serialized:
+                continue
+
+            deltas = {}
+
+            self.set_status(item, entry.get('status'), deltas)
+
+            if self.set_quantity(item, item.quantity + quantity):
+                deltas['added'] = float(quantity)
+                deltas['quantity'] = float(item.quantity)
+
+                self.set_fields(item, entry, deltas)
+                self.add_tracking_entry(item, StockHistoryCode.STOCK_ADD, deltas)
+
+    def remove(self):
+        """Remove the specified quantity from each StockItem."""
+        for entry in self.entries:
+            if not (item := self.get_item(entry)):
+                continue
+
+            quantity = Decimal(entry['quantity'] or 0)
+
+            # Cannot remove items from a serialized part
+            if quantity <= 0 or item.serialized:
+                continue
+
+            deltas = {}
+
+            self.set_status(item, entry.get('status'), deltas)
+
+            if self.set_quantity(item, item.quantity - quantity):
+                deltas['removed'] = float(quantity)
+                deltas['quantity'] = float(item.quantity)
+
+                self.set_fields(item, entry, deltas)
+                self.add_tracking_entry(item, StockHistoryCode.STOCK_REMOVE, deltas)
+
+    def transfer(self, location):
+        """Move each StockItem to the specified location.
+
+        If less than the available quantity is to be moved, the StockItem is split
+        (individually), and the new StockItem is moved to the specified location.
+        """
+        allow_out_of_stock_transfer = get_global_setting(
+            'STOCK_ALLOW_OUT_OF_STOCK_TRANSFER', backup_value=False, cache=False
+        )
+
+        for entry in self.entries:
+            if not (item := self.get_item(entry)):
+                continue
+
+            quantity = Decimal(entry.get('quantity', item.quantity))
+
+            if not allow_out_of_stock_transfer and not item.is_in_stock(
+                check_status=False, check_in_production=False
+            ):
+                raise ValidationError(
+                    _('StockItem cannot be moved as it is not in stock')
+                )
+
+            if quantity <= 0:
+                continue
+
+            if quantity < item.quantity:
+                # Partial movements require the stock item to be split
+                kwargs = {
+                    field: value
+                    for field in item.optional_transfer_fields()
+                    if (value := entry.get(field))
+                }
+
+                item.move(location, self.notes, self.user, quantity=quantity, **kwargs)
+                continue
+
+            old_location = item.location_id
+
+            deltas = {}
+
+            # Moving into the same location triggers a different history code
+            if old_location == location.pk:
+                code = StockHistoryCode.STOCK_UPDATE
+            else:
+                code = StockHistoryCode.STOCK_MOVE
+                deltas['location'] = location.pk
+
+            item.location = location
+
+            self.set_status(item, entry.get('status'), deltas)
+            self.set_fields(item, entry, deltas)
+            self.add_tracking_entry(item, code, deltas)
+
+            self.events.append((
+                StockEvents.ITEM_MOVED,
+                {
+                    'id': item.pk,
+                    'old_location': old_location,
+                    'new_location': location.pk,
+                    'quantity': quantity,
+                },
+            ))
+
+    def change_status(self, status):
+        """Set the status of each StockItem."""
+        for entry in self.entries:
+            if not (item := self.get_item(entry)):
+                continue
+
+            # Careful check for custom status codes also
+            if item.compare_status(status):
+                custom_status = item.get_custom_status()
+                if status == custom_status or custom_status is None:
+                    continue
+
+            if self.custom_status_values is None:
+                self.custom_status_values = item.STATUS_CLASS.custom_values()
+
+            item.set_status(status, custom_values=self.custom_status_values)
+            self.modified[item.pk] = item
+
+            self.add_tracking_entry(item, StockHistoryCode.EDITED, {'status': status})
+
+    def commit(self):
+        """Write all pending changes to the database."""
+        from stock.models import StockItem, StockItemTracking, stock_changed
+
+        items = list(self.modified.values())
+
+        if self.validation_plugins:
+            for item in items:
+                item.run_plugin_validation()
+
+        for item in items:
+            item.updated = self.now
+
+        StockItem.objects.bulk_update(items, ADJUSTMENT_FIELDS)
+
+        # bulk_update does not send post_save signals, so update the location summary here
+        stock.summary.update_location_summary(
+            stock.summary.location_changes(self.locations, items)
+        )
+
+        for item in self.deleted.values():
+            item.delete()
+
+        StockItemTracking.objects.bulk_create([
+            entry for entry in self.tracking if entry.item_id not in self.deleted
+        ])
+
+        if get_global_setting('ENABLE_PLUGINS_EVENTS', False):
+            for event, kwargs in self.events:
+                trigger_event(event, **kwargs)
+
+        stock_changed(
+            [item.part for item in [*items, *self.deleted.values()]], create=True
+        )
+
+        logger.info(
+            'Adjusted %s stock items (%s deleted)', len(items), len(self.deleted)
+        )
+
+    def run(self, action: str, *args):
+        """Perform the specified adjustment action, within a single transaction.
+
+        Arguments:
+            action: The name of the adjustment method (e.g. 'count', 'transfer')
+            *args: Additional arguments to pass to the adjustment method
+        """
+        with transaction.atomic():
+            self.lock()
+            getattr(self, action)(*args)
+            self.commit()
@@ -6,6 +6,7 @@ from datetime import timedelta
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import F, Q
+from django.http import Http404
 from django.urls import include, path
 from django.utils.translation import gettext_lazy as _
 
@@ -14,7 +15,7 @@ from django_filters.rest_framework.filterset import FilterSet
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_field
 from rest_framework import status
-from rest_framework.generics import GenericAPIView
+from rest_framework.generics import GenericAPIView, get_object_or_404
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 
@@ -22,6 +23,8 @@ import common.models
 import common.settings
 import InvenTree.helpers
 import InvenTree.permissions
+import stock.archive
+import stock.filters
 import stock.serializers as StockSerializers
 from build.models import Build
 from build.serializers import BuildSerializer
@@ -67,6 +70,7 @@ from stock.models import (
     StockItem,
     StockItemTestResult,
     StockItemTracking,
+    StockItemTrackingArchive,
     StockLocation,
     StockLocationType,
 )
@@ -856,6 +860,21 @@ class StockFilter(FilterSet):
             return queryset.exclude(purchase_price=None)
         return queryset.filter(purchase_price=None)
 
+    tests_passed = rest_filters.BooleanFilter(
+        label=_('Passed all required tests'), method='filter_tests_passed'
+    )
+
+    def filter_tests_passed(self, queryset, name, value):
+        """Filter by whether the stock item has passed all required tests."""
+        queryset = queryset.annotate(
+            required_tests=stock.filters.annotate_required_tests(),
+            passed_tests=stock.filters.annotate_passed_tests(),
+        )
+
+        if str2bool(value):
+            return queryset.filter(passed_tests__gte=F('required_tests'))
+        return queryset.filter(passed_tests__lt=F('required_tests'))
+
     ancestor = rest_filters.ModelChoiceFilter(
         label='Ancestor', queryset=StockItem.objects.all(), method='filter_ancestor'
     )
@@ -1469,11 +1488,23 @@ class StockItemTestResultList(
 
 
 class StockTrackingDetail(RetrieveAPI):
-    """Detail API endpoint for StockItemTracking model."""
+    """Detail API endpoint for StockItemTracking model.
+
+    Archived tracking entries are returned if the entry is not found in the main table.
+    """
 
     queryset = StockItemTracking.objects.all()
     serializer_class = StockSerializers.StockTrackingSerializer
 
+    def get_object(self):
+        """Return the tracking entry, falling back to the archive table."""
+        try:
+            return super().get_object()
+        except Http404:
+            return get_object_or_404(
+                StockItemTrackingArchive.objects.all(), pk=self.kwargs['pk']
+            )
+
 
 class StockTrackingOutputOptions(OutputConfiguration):
     """Output options for StockItemTracking endpoint."""
@@ -1517,9 +1548,29 @@ class StockTrackingList(
             'stockitem': (StockItem, StockSerializers.StockItemSerializer),
         }
 
+    def get_archive_queryset(self):
+        """Return the queryset of archived stock tracking entries."""
+        queryset = StockItemTrackingArchive.objects.all()
+
+        return self.get_serializer().prefetch_queryset(queryset)
+
     def list(self, request, *args, **kwargs):
-        """List all stock tracking entries."""
-        queryset = self.filter_queryset(self.get_queryset())
+        """List all stock tracking entries.
+
+        Entries are returned from the main tracking table first,
+        followed by any (older) entries from the archive table.
+        """
+        hot = self.filter_queryset(self.get_queryset())
+        archive = self.filter_queryset(self.get_archive_queryset())
+
+        # The combined history can only be ordered by date (see ordering_fields).
+        # Both tables are explicitly ordered, so that any other ordering falls back to '-date'
+        ascending = hot.query.order_by[:1] == ('date',)
+        ordering = 'date' if ascending else '-date'
+
+        queryset = stock.archive.TrackingHistory(
+            hot.order_by(ordering), archive.order_by(ordering), ascending=ascending
+        )
 
         page = self.paginate_queryset(queryset)
 
@@ -1596,6 +1647,8 @@ class StockTrackingList(
 
     ordering = '-date'
 
+    # Note: Ordering is restricted to the 'date' field,
+    # as entries are combined from the main and archive tables
     ordering_fields = ['date']
 
     search_fields = ['notes']
@@ -0,0 +1,205 @@
+"""Stock tracking history retention for the Stock app.
+
+The StockItemTracking table grows without bound, as every stock operation adds
+one (or more) tracking entries. To keep the "hot" table small, entries older than
+the STOCK_TRACKING_ARCHIVE_DAYS setting are moved into the StockItemTrackingArchive
+table by a scheduled task:
+
+- Entries are moved in bounded batches, each batch within its own transaction
+- Archived entries retain their original primary key
+- The number of batches processed in a single run is limited
+
+The stock tracking API queries the hot table first, and falls back to the archive
+table for any entries which are not found there (see TrackingHistory).
+"""
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+import structlog
+
+import InvenTree.helpers
+
+logger = structlog.get_logger('inventree')
+
+# Number of tracking entries to move in a single batch
+ARCHIVE_BATCH_SIZE = 5000
+
+# Maximum number of batches to process in a single archive run
+ARCHIVE_MAX_BATCHES = 100
+
+# Fields which are copied to the archive table
+ARCHIVE_FIELDS = [
+    'id',
+    'item_id',
+    'date',
+    'tracking_type',
+    'notes',
+    'user_id',
+    'deltas',
+]
+
+
+def archive_threshold(days: int) -> datetime:
+    """Return the date before which stock tracking entries are archived."""
+    return InvenTree.helpers.current_time() - timedelta(days=days)
+
+
+def archive_batch(before: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move a single batch of stock tracking entries into the archive table.
+
+    Arguments:
+        before: Entries dated before this time are archived
+        batch_size: The maximum number of entries to move
+
+    Returns:
+        The number of entries archived
+    """
+    from stock.models import StockItemTracking, StockItemTrackingArchive
+
+    with transaction.atomic():
+        rows = list(
+            StockItemTracking.objects
+            .select_for_update()
+            .filter(date__lt=before)
+            .order_by('pk')
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+
+        if not rows:
+            return 0
+
+        # Entries which were archived by an interrupted run are ignored
+        StockItemTrackingArchive.objects.bulk_create(
+            [StockItemTrackingArchive(**row) for row in rows], ignore_conflicts=True
+        )
+
+        StockItemTracking.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+
+    return len(rows)
+
+
+def archive_tracking(
+    before: datetime,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: int = ARCHIVE_MAX_BATCHES,
+) -> dict:
+    """Move stock tracking entries older than the provided date into the archive table.
+
+    Arguments:
+        before: Entries dated before this time are archived
+        batch_size: The number of entries to move in each batch
+        max_batches: The maximum number of batches to process
+
+    Returns:
+        A dict containing the number of entries archived, batches processed, and the throughput
+    """
+    archived = 0
+    batches = 0
+
+    t1 = time.time()
+
+    while batches < max_batches:
+        n = archive_batch(before, batch_size=batch_size)
+
+        if n == 0:
+            break
+
+        archived += n
+        batches += 1
+
+        if n < batch_size:
+            break
+
+    elapsed = time.time() - t1
+
+    result = {
+        'archived': archived,
+        'batches': batches,
+        'elapsed': elapsed,
+        'rate': archived / elapsed if elapsed > 0 else 0,
+    }
+
+    logger.info(
+        'Archived %s stock tracking entries in %s batches (%.1fs, %.0f entries/s)',
+        archived,
+        batches,
+        elapsed,
+        result['rate'],
+    )
+
+    return result
+
+
+class TrackingHistory:
+    """A read-only sequence of stock tracking entries from both the hot and archive tables.
+
+    Archived entries are always older than the entries in the hot table,
+    so the combined history (ordered by date) is the concatenation of the two tables.
+
+    Slicing queries the hot table first, and only falls back to the archive table
+    if the requested slice extends beyond the entries in the hot table.
+    This allows the combined history to be used with the standard API pagination.
+    """
+
+    def __init__(self, hot: QuerySet, archive: QuerySet, ascending: bool = False):
+        """Initialize the combined tracking history.
+
+        Arguments:
+            hot: Filtered queryset of StockItemTracking entries
+            archive: Filtered queryset of StockItemTrackingArchive entries
+            ascending: True if the entries are ordered by ascending date
+        """
+        # Ascending order returns the (older) archived entries first
+        self.first, self.second = (archive, hot) if ascending else (hot, archive)
+        self._first_count = None
+
+    def first_count(self) -> int:
+        """Return the number of entries in the first table (cached)."""
+        if self._first_count is None:
+            self._first_count = self.first.count()
+
+        return self._first_count
+
+    def count(self) -> int:
+        """Return the total number of entries."""
+        return self.first_count() + self.second.count()
+
+    def __len__(self) -> int:
+        """Return the total number of entries."""
+        return self.count()
+
+    def __iter__(self):
+        """Iterate through all entries.
+
+        Yields:
+            Each entry in the first table, followed by each entry in the second table
+        """
+        yield from self.first
+        yield from self.second
+
+    def __getitem__(self, key):
+        """Return a slice of entries, querying the second table only if required."""
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+
+        start = key.start or 0
+        stop = key.stop
+
+        entries = list(self.first[start:stop])
+
+        if stop is not None and len(entries) == stop - start:
+            return entries
+
+        # The slice extends beyond the first table
+        n = self.first_count()
+
+        offset = max(start - n, 0)
+        limit = None if stop is None else stop - n
+
+        return entries + list(self.second[offset:limit])
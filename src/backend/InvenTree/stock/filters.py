@@ -3,8 +3,9 @@
 from typing import Optional
 
 from django.db.models import F, Func, IntegerField, OuterRef, Q, Subquery
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Cast, Coalesce
 
+import part.models
 import stock.models
 
 
@@ -40,22 +41,80 @@ def annotate_location_items(filter: Optional[Q] = None):
     )
 
 
+def annotate_location_summary():
+    """Construct a queryset annotation which returns the number of stock items in a particular location.
+
+    - Includes items in sublocations also
+    - Reads the count from the (materialized) stock location summary
+    - Falls back to counting stock items if the location has no summary entry
+    """
+    return Coalesce(
+        F('summary__cascade_items'),
+        annotate_location_items(),
+        output_field=IntegerField(),
+    )
+
+
 def annotate_sub_locations():
-    """Construct a queryset annotation which returns the number of sub-locations below a certain StockLocation node in a StockLocation tree."""
-    subquery = stock.models.StockLocation.objects.filter(
-        tree_id=OuterRef('tree_id'),
-        lft__gt=OuterRef('lft'),
-        rght__lt=OuterRef('rght'),
-        level__gt=OuterRef('level'),
+    """Construct a queryset annotation which returns the number of sub-locations below a certain StockLocation node in a StockLocation tree.
+
+    The number of descendants of a node is calculated from its MPTT tree fields, without a subquery.
+    """
+    return Cast((F('rght') - F('lft') - 1) / 2, output_field=IntegerField())
+
+
+def required_tests_query():
+    """Construct a subquery which returns the required test templates for a StockItem.
+
+    - Includes tests defined for parent (template) parts
+    - Only enabled tests are included
+    """
+    return part.models.PartTestTemplate.objects.filter(
+        required=True,
+        enabled=True,
+        part__tree_id=OuterRef('part__tree_id'),
+        part__lft__lte=OuterRef('part__lft'),
+        part__rght__gte=OuterRef('part__rght'),
     )
 
+
+def annotate_required_tests():
+    """Construct a queryset annotation which returns the number of required tests for a StockItem."""
     return Coalesce(
         Subquery(
-            subquery
+            required_tests_query()
             .annotate(
-                count=Func(F('pk'), function='COUNT', output_field=IntegerField())
+                total=Func(F('pk'), function='COUNT', output_field=IntegerField())
             )
-            .values('count')
+            .values('total')
+            .order_by()
+        ),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def annotate_passed_tests():
+    """Construct a queryset annotation which returns the number of required tests which a StockItem has passed.
+
+    - Only the most recent result for each test is considered
+    """
+    latest = (
+        stock.models.StockItemTestResult.objects
+        .filter(stock_item=OuterRef(OuterRef('pk')), template__key=OuterRef('key'))
+        .order_by('-date', '-pk')
+        .values('result')[:1]
+    )
+
+    return Coalesce(
+        Subquery(
+            required_tests_query()
+            .annotate(latest_result=Subquery(latest))
+            .filter(latest_result=True)
+            .annotate(
+                total=Func(F('pk'), function='COUNT', output_field=IntegerField())
+            )
+            .values('total')
             .order_by()
         ),
         0,
@@ -0,0 +1,433 @@
+"""Bulk stock merge operations for the Stock app.
+
+The StockItemMerge class merges many groups of stock items in a single operation.
+Each group consists of a "base" item, which subsumes the other items in the group:
+
+- All affected rows are locked with a single select_for_update() query
+- Quantities and (weighted average) purchase prices are calculated in memory
+- Build order and sales order allocations are reassigned with batched updates
+- The merged items are deleted with a single delete operation
+- Each affected stock item tree is rebuilt (at most) once
+
+All operations are performed within a single database transaction.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.deletion import Collector
+from django.utils.translation import gettext_lazy as _
+
+import structlog
+
+import InvenTree.helpers
+import stock.summary
+from common.currency import convert_money
+from plugin import PluginMixinEnum, registry
+from stock.status_codes import StockHistoryCode
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of stock items to reference in a single batched update
+MERGE_CHUNK_SIZE = 500
+
+# Set while the merged stock items are being deleted by a StockItemMerge operation
+_deleting_merged: ContextVar[bool] = ContextVar('deleting_merged', default=False)
+
+# Fields which may be modified by a stock merge operation
+MERGE_FIELDS = [
+    'quantity',
+    'location',
+    'parent',
+    'purchase_price',
+    'purchase_price_currency',
+    'updated',
+]
+
+
+def deleting_merged_items() -> bool:
+    """Return True if stock items are currently being deleted by a StockItemMerge operation.
+
+    The merge operation updates the location summary and notifies stock changes in bulk,
+    so post_delete receivers for StockItem should skip this handling for merged items.
+    """
+    return _deleting_merged.get()
+
+
+def merged_purchase_price(pricing_data: list):
+    """Calculate the weighted average purchase price of merged stock items.
+
+    Arguments:
+        pricing_data: List of [unit_price, quantity] pairs
+
+    Returns:
+        The weighted average unit price (in the currency of the first entry), or None
+    """
+    if len(pricing_data) == 0:
+        return None
+
+    unit_price, quantity = pricing_data[0]
+
+    # Use the first currency as the base currency
+    base_currency = unit_price.currency
+
+    total_price = unit_price * quantity
+
+    for price, qty in pricing_data[1:]:
+        # Attempt to convert the price to the base currency
+        try:
+            price = convert_money(price, base_currency)
+            total_price += price * qty
+            quantity += qty
+        except Exception:
+            # Skip this entry, cannot convert to base currency
+            continue
+
+    if quantity > 0:
+        return total_price / quantity
+
+    return None
+
+
+class StockItemMerge:
+    """Merge multiple groups of StockItem objects in bulk.
+
+    Each group is a dict containing:
+
+    - base: The StockItem which subsumes the other items
+    - items: List of other StockItem objects to merge into the base item
+    - location: Optional destination location (default = location of the base item)
+
+    Usage:
+        StockItemMerge(groups, user, notes='Cleanup').run()
+    """
+
+    def __init__(
+        self,
+        groups: list[dict],
+        user: User | None = None,
+        notes: str | None = None,
+        **kwargs,
+    ):
+        """Initialize the stock merge operation.
+
+        Arguments:
+            groups: List of merge groups
+            user: The user performing the merge
+            notes: Optional notes for the generated tracking entries
+
+        Keyword Arguments:
+            allow_mismatched_suppliers: Allow items with different supplier parts to be merged
+            allow_mismatched_status: Allow items with different status codes to be merged
+        """
+        self.groups = groups
+        self.user = user
+        self.notes = notes
+        self.options = kwargs
+
+        self.now = InvenTree.helpers.current_time()
+
+        # Locked StockItem objects, keyed by primary key
+        self.items: dict = {}
+
+        # Map of merged StockItem ID -> base StockItem ID
+        self.targets: dict[int, int] = {}
+
+        # StockItem trees which must be rebuilt after the merge
+        self.trees: set[int] = set()
+
+        # Original location of each StockItem, keyed by primary key
+        self.locations: dict = {}
+
+    def lock(self):
+        """Fetch (and lock) all StockItem objects referenced in this merge."""
+        from company.models import SupplierPart
+        from part.models import Part
+        from stock.models import StockItem
+
+        pks = []
+
+        for group in self.groups:
+            pks.append(group['base'].pk)
+            pks.extend(item.pk for item in group['items'])
+
+        if len(pks) != len(set(pks)):
+            raise ValidationError(_('Duplicate stock items'))
+
+        self.items = (
+            StockItem.objects
+            .select_for_update()
+            .prefetch_related('installed_parts')
+            .in_bulk(pks)
+        )
+
+        parts = Part.objects.in_bulk({item.part_id for item in self.items.values()})
+
+        supplier_parts = SupplierPart.objects.in_bulk({
+            item.supplier_part_id for item in self.items.values()
+        })
+
+        for item in self.items.values():
+            item.part = parts[item.part_id]
+            item.supplier_part = supplier_parts.get(item.supplier_part_id)
+            self.locations[item.pk] = item.location_id
+
+    def validate(self):
+        """Check that each item can be merged into the base item of its group."""
+        for group in self.groups:
+            base = self.items[group['base'].pk]
+            base.can_merge(raise_error=True)
+
+            for other in group['items']:
+                other = self.items[other.pk]
+                other.can_merge(base, raise_error=True, **self.options)
+
+                self.targets[other.pk] = base.pk
+
+    def merge(self):
+        """Calculate the new quantity, location and price of each base item."""
+        tracking = []
+
+        for group in self.groups:
+            base = self.items[group['base'].pk]
+            others = [self.items[item.pk] for item in group['items']]
+
+            pricing_data = [
+                [item.purchase_price, item.quantity]
+                for item in [base, *others]
+                if item.purchase_price
+            ]
+
+            for other in others:
+                base.quantity += other.quantity
+
+            if price := merged_purchase_price(pricing_data):
+                base.purchase_price = price
+
+            if location := group.get('location'):
+                base.location = location
+
+            tracking.append(
+                base.add_tracking_entry(
+                    StockHistoryCode.MERGED_STOCK_ITEMS,
+                    self.user,
+                    quantity=base.quantity,
+                    notes=self.notes,
+                    deltas={'location': base.location_id},
+                    commit=False,
+                )
+            )
+
+        return tracking
+
+    def resolve_parent(self, parent_id: int | None) -> int | None:
+        """Return the closest ancestor which is not being deleted by this merge."""
+        while parent_id in self.targets:
+            parent_id = self.items[parent_id].parent_id
+
+        return parent_id
+
+    def reparent(self):
+        """Move any child items of the merged items up to the next surviving ancestor.
+
+        Children of a top-level item which is merged become top-level items,
+        and are moved into a new tree.
+        """
+        from stock.models import StockItem
+
+        merged = list(self.targets.keys())
+
+        for pk in merged:
+            item = self.items[pk]
+
+            # Removing a leaf node from the top of a tree does not require a rebuild
+            if item.parent_id or item.rght - item.lft > 1:
+                self.trees.add(item.tree_id)
+
+        # Direct children of the merged items (which are not themselves merged)
+        children = list(
+            StockItem.objects
+            .filter(parent__in=merged)
+            .exclude(pk__in=merged)
+            .values('pk', 'parent_id', 'tree_id', 'lft', 'rght')
+        )
+
+        parents = {}
+        next_tree_id = None
+
+        for child in children:
+            parent_id = self.resolve_parent(child['parent_id'])
+            tree_id = child['tree_id']
+
+            if parent_id is None:
+                # The child item becomes the root of a new tree
+                if next_tree_id is None:
+                    next_tree_id = StockItem.getNextTreeID()
+
+                tree_id = next_tree_id
+                next_tree_id += 1
+
+                StockItem.objects.filter(
+                    tree_id=child['tree_id'],
+                    lft__gte=child['lft'],
+                    rght__lte=child['rght'],
+                ).update(tree_id=tree_id)
+
+                self.trees.add(tree_id)
+
+            parents[child['pk']] = parent_id
+
+            if base := self.items.get(child['pk']):
+                # Base items are written back to the database later
+                base.parent_id = parent_id
+                base.tree_id = tree_id
+
+        for chunk in InvenTree.helpers.chunked(parents.items(), MERGE_CHUNK_SIZE):
+            StockItem.objects.filter(pk__in=[pk for pk, _parent in chunk]).update(
+                parent=Case(
+                    *[When(pk=pk, then=Value(parent)) for pk, parent in chunk],
+                    output_field=IntegerField(),
+                )
+            )
+
+    def reassign_allocations(self):
+        """Reassign build order and sales order allocations to the base items.
+
+        Build order allocations which would duplicate an existing allocation
+        (against the same build line and output) are combined.
+        """
+        from build.models import BuildItem
+        from order.models import SalesOrderAllocation
+
+        merged = list(self.targets.keys())
+
+        allocations = list(
+            BuildItem.objects.filter(stock_item__in=list(self.items.keys())).order_by(
+                'pk'
+            )
+        )
+
+        # Allocations against the base items take priority
+        allocations.sort(key=lambda a: a.stock_item_id in self.targets)
+
+        combined = {}
+        updated = {}
+        deleted = []
+
+        for allocation in allocations:
+            target = self.targets.get(
+                allocation.stock_item_id, allocation.stock_item_id
+            )
+            key = (allocation.build_line_id, allocation.install_into_id, target)
+
+            if existing := combined.get(key):
+                existing.quantity += allocation.quantity
+                updated[existing.pk] = existing
+                deleted.append(allocation.pk)
+            else:
+                combined[key] = allocation
+
+                if allocation.stock_item_id != target:
+                    allocation.stock_item_id = target
+                    updated[allocation.pk] = allocation
+
+        BuildItem.objects.filter(pk__in=deleted).delete()
+        BuildItem.objects.bulk_update(
+            updated.values(), ['stock_item', 'quantity'], batch_size=MERGE_CHUNK_SIZE
+        )
+
+        for chunk in InvenTree.helpers.chunked(merged, MERGE_CHUNK_SIZE):
+            SalesOrderAllocation.objects.filter(item__in=chunk).update(
+                item=Case(
+                    *[When(item=pk, then=Value(self.targets[pk])) for pk in chunk],
+                    output_field=IntegerField(),
+                )
+            )
+
+    def delete(self):
+        """Delete the merged items."""
+        deleted = [self.items[pk] for pk in self.targets]
+
+        collector = Collector(using=router.db_for_write(type(deleted[0])))
+        collector.collect(deleted)
+
+        # Post-delete handling (e.g. low stock notifications) is performed in bulk
+        token = _deleting_merged.set(True)
+
+        try:
+            collector.delete()
+        finally:
+            _deleting_merged.reset(token)
+
+    def rebuild_trees(self):
+        """Rebuild each affected stock item tree (once)."""
+        import InvenTree.tasks
+        import stock.tasks
+
+        result = True
+
+        for tree_id in sorted(self.trees):
+            if not stock.tasks.rebuild_stock_item_tree(tree_id, rebuild_on_fail=False):
+                result = False
+
+        if not result:
+            # If the rebuild failed, offload the task to a background worker
+            logger.warning(
+                'Failed to rebuild stock item tree during stock merge operation, offloading task.'
+            )
+            InvenTree.tasks.offload_task(stock.tasks.rebuild_stock_items, group='stock')
+
+    def commit(self, tracking: list):
+        """Write the updated base items and tracking entries to the database."""
+        from stock.models import StockItem, StockItemTracking, stock_changed
+
+        bases = [self.items[group['base'].pk] for group in self.groups]
+
+        if registry.with_mixin(PluginMixinEnum.VALIDATION):
+            for item in bases:
+                item.run_plugin_validation()
+
+        for item in bases:
+            item.updated = self.now
+
+        StockItem.objects.bulk_update(bases, MERGE_FIELDS, batch_size=MERGE_CHUNK_SIZE)
+        StockItemTracking.objects.bulk_create(tracking)
+
+        # Update the location summary for the moved (and deleted) items
+        deltas = stock.summary.location_changes(self.locations, bases)
+
+        for pk in self.targets:
+            deltas[self.locations[pk]] -= 1
+
+        stock.summary.update_location_summary(deltas)
+
+        stock_changed([item.part for item in self.items.values()], create=True)
+
+    def run(self):
+        """Perform the stock merge, within a single transaction."""
+        if not self.groups:
+            return
+
+        with transaction.atomic():
+            self.lock()
+            self.validate()
+
+            if not self.targets:
+                return
+
+            tracking = self.merge()
+
+            self.reparent()
+            self.reassign_allocations()
+            self.delete()
+            self.commit(tracking)
+            self.rebuild_trees()
+
+        logger.info(
+            'Merged %s stock items into %s items', len(self.targets), len(self.groups)
+        )
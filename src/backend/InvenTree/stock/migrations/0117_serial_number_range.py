@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-17 09:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('part', '0150_auto_20261017_0930'),
+        ('stock', '0116_alter_stockitem_link'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockitem',
+            name='serial_int',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='SerialNumberRange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.PositiveIntegerField(verbose_name='Start')),
+                ('end', models.PositiveIntegerField(verbose_name='End')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='serial_ranges', to='part.part', verbose_name='Part')),
+            ],
+            options={
+                'verbose_name': 'Serial Number Range',
+                'indexes': [models.Index(fields=['part', 'start'], name='stock_seria_part_id_668a97_idx'), models.Index(fields=['end'], name='stock_seria_end_67f711_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-17 09:20
+
+from django.db import migrations
+
+
+def rebuild_serial_index(apps, schema_editor):
+    """Populate the serial number range index for all existing serialized stock items.
+
+    The index is built synchronously, as serial number conflict checks rely on it.
+    """
+
+    from InvenTree.helpers import integer_serial
+    from stock.serials import compress
+
+    StockItem = apps.get_model('stock', 'StockItem')
+    SerialNumberRange = apps.get_model('stock', 'SerialNumberRange')
+
+    items = StockItem.objects.exclude(serial=None).exclude(serial='')
+
+    values = {}
+
+    for part_id, serial in items.values_list('part_id', 'serial').iterator():
+        if (value := integer_serial(serial)) is not None:
+            values.setdefault(part_id, set()).add(value)
+
+    if not values:
+        return
+
+    ranges = SerialNumberRange.objects.bulk_create(
+        [
+            SerialNumberRange(part_id=part_id, start=start, end=end)
+            for part_id, part_values in values.items()
+            for start, end in compress(part_values)
+        ],
+        batch_size=1000,
+    )
+
+    print(f"\nBuilt serial number index: {len(ranges)} ranges")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0117_serial_number_range"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_serial_index, migrations.RunPython.noop),
+    ]
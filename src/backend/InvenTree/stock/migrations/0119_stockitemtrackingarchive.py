@@ -0,0 +1,34 @@
+# Generated by Django 5.2.10 on 2026-10-17 10:10
+
+import InvenTree.models
+import django.db.models.deletion
+import stock.status_codes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0118_auto_20261017_0920'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockItemTrackingArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracking_type', models.IntegerField(default=stock.status_codes.StockHistoryCode['LEGACY'])),
+                ('notes', models.CharField(blank=True, help_text='Entry notes', max_length=512, null=True, verbose_name='Notes')),
+                ('deltas', models.JSONField(blank=True, null=True)),
+                ('date', models.DateTimeField(editable=False)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tracking_archive', to='stock.stockitem')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Stock Item Tracking',
+            },
+            bases=(InvenTree.models.ContentTypeMixin, InvenTree.models.PluginValidationMixin, models.Model),
+        ),
+    ]
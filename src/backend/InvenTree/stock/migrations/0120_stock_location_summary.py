@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0119_stockitemtrackingarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLocationSummary',
+            fields=[
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='stock.stocklocation', verbose_name='Location')),
+                ('items', models.IntegerField(default=0, verbose_name='Stock Items')),
+                ('cascade_items', models.IntegerField(default=0, verbose_name='Stock Items (including sublocations)')),
+            ],
+            options={
+                'verbose_name': 'Stock Location Summary',
+            },
+        ),
+    ]
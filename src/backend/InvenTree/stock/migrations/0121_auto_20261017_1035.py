@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-17 10:35
+
+from django.db import migrations
+
+
+def rebuild_location_summary(apps, schema_editor):
+    """Populate the stock location summary for all existing stock locations.
+
+    The background worker will process this task when the server restarts.
+    """
+
+    from InvenTree.tasks import offload_task
+    from stock.tasks import rebuild_location_summary
+
+    StockLocation = apps.get_model('stock', 'StockLocation')
+
+    if not StockLocation.objects.exists():
+        return
+
+    print("\nScheduling rebuild of stock location summary.")
+
+    offload_task(
+        rebuild_location_summary,
+        force_async=True,
+        group='stock'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0120_stock_location_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_location_summary, migrations.RunPython.noop),
+    ]
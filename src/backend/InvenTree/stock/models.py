@@ -11,7 +11,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
-from django.db.models import Q, QuerySet, Sum
+from django.db.models import F, Q, QuerySet, Sum
 from django.db.models.functions import Coalesce
 from django.db.models.signals import post_delete, post_save
 from django.db.utils import IntegrityError, OperationalError
@@ -20,7 +20,6 @@ from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 import structlog
-from djmoney.contrib.exchange.models import convert_money
 from mptt.managers import TreeManager
 from mptt.models import TreeForeignKey
 from taggit.managers import TaggableManager
@@ -31,9 +30,11 @@ import InvenTree.exceptions
 import InvenTree.helpers
 import InvenTree.models
 import InvenTree.ready
-import InvenTree.tasks
 import order.models
 import report.mixins
+import stock.merge
+import stock.serials
+import stock.summary
 import stock.tasks
 from common.icons import validate_icon
 from common.settings import get_global_setting
@@ -55,6 +56,9 @@ from users.models import Owner
 
 logger = structlog.get_logger('inventree')
 
+# Maximum number of rows to write in a single bulk_create operation when copying stock data
+COPY_BATCH_SIZE = 1000
+
 
 class StockLocationType(InvenTree.models.MetadataMixin, models.Model):
     """A type of stock location like Warehouse, room, shelf, drawer.
@@ -147,15 +151,30 @@ class StockLocation(
 
     tags = TaggableManager(blank=True)
 
+    def handle_tree_move(self, previous_parent):
+        """Update the stock location summary when this location is moved."""
+        stock.summary.move_location_summary(
+            self.pk, previous_parent.pk if previous_parent else None, self.parent_id
+        )
+
     def delete(self, *args, **kwargs):
         """Custom model deletion routine, which updates any child locations or items.
 
         This must be handled within a transaction.atomic(), otherwise the tree structure is damaged
         """
-        super().delete(
-            delete_children=kwargs.get('delete_sub_locations', False),
-            delete_items=kwargs.get('delete_stock_items', False),
-        )
+        delete_children = kwargs.get('delete_sub_locations', False)
+        delete_items = kwargs.get('delete_stock_items', False)
+
+        parent_id = self.parent_id
+        summary = StockLocationSummary.objects.filter(location=self.pk).first()
+
+        super().delete(delete_children=delete_children, delete_items=delete_items)
+
+        # Any stock items which are not deleted are moved to the parent location.
+        # Deleted stock items update the summary as they are deleted
+        if summary and not delete_items:
+            n = summary.cascade_items if delete_children else summary.items
+            stock.summary.update_location_summary({parent_id: n}, cascade=False)
 
     @staticmethod
     def get_api_url():
@@ -317,8 +336,21 @@ class StockLocation(
         return query
 
     def stock_item_count(self, cascade=True):
-        """Return the number of StockItem objects which live in or under this category."""
-        return self.get_stock_items(cascade).count()
+        """Return the number of StockItem objects which live in or under this category.
+
+        The count is read from the stock location summary (if available).
+        """
+        summary = (
+            StockLocationSummary.objects
+            .filter(location=self.pk)
+            .values_list('cascade_items' if cascade else 'items', flat=True)
+            .first()
+        )
+
+        if summary is None:
+            return self.get_stock_items(cascade).count()
+
+        return summary
 
     @property
     def item_count(self):
@@ -547,6 +579,8 @@ class StockItem(
 
         Note: This is an 'internal' function and should not be used by external code / plugins.
         """
+        from plugin import PluginMixinEnum, registry
+
         # Ensure the primary-key field is not provided
         kwargs.pop('id', None)
         kwargs.pop('pk', None)
@@ -604,40 +638,66 @@ class StockItem(
         # Pre-calculate MPTT fields
         data['parent'] = parent if parent else None
         data['level'] = parent.level + 1 if parent else 0
-        data['lft'] = 0 if parent else 1
-        data['rght'] = 0 if parent else 2
+        data['lft'] = 1
+        data['rght'] = 2
+
+        if parent:
+            # Make space for the new items (as the last children of the parent item),
+            # rather than rebuilding the entire StockItem tree after they are created
+            parent.refresh_from_db(fields=['lft', 'rght'])
+
+            gap = 2 * len(serials)
+
+            StockItem.objects.filter(tree_id=tree_id, rght__gte=parent.rght).update(
+                rght=F('rght') + gap
+            )
+            StockItem.objects.filter(tree_id=tree_id, lft__gt=parent.rght).update(
+                lft=F('lft') + gap
+            )
+
+            data['lft'] = parent.rght
+            data['rght'] = parent.rght + 1
+
+            parent.rght += gap
 
         # Force single quantity for each item
         data['quantity'] = 1
 
+        # Validation plugins are only queried once for all serial numbers
+        plugins = registry.with_mixin(PluginMixinEnum.VALIDATION)
+
         for serial in serials:
             data['serial'] = serial
 
             if serial is not None:
-                data['serial_int'] = StockItem.convert_serial_to_int(serial) or 0
+                data['serial_int'] = (
+                    StockItem.convert_serial_to_int(serial, plugins=plugins) or 0
+                )
             else:
                 data['serial_int'] = 0
 
             data['tree_id'] = tree_id
 
-            if not parent:
+            # Construct a new StockItem from the provided dict
+            items.append(StockItem(**data))
+
+            if parent:
+                # Each new item is a leaf node, placed after the previous item
+                data['lft'] += 2
+                data['rght'] += 2
+            else:
                 # No parent, this is a top-level item, so increment the tree_id
                 # This is because each new item is a "top-level" node in the StockItem tree
                 tree_id += 1
 
-            # Construct a new StockItem from the provided dict
-            items.append(StockItem(**data))
-
         # Create the StockItem objects in bulk
         StockItem.objects.bulk_create(items)
 
-        # We will need to rebuild the stock item tree manually, due to the bulk_create operation
-        if parent and parent.tree_id:
-            # Rebuild the tree structure for this StockItem tree
-            logger.info(
-                'Rebuilding StockItem tree structure for tree_id: %s', parent.tree_id
-            )
-            stock.tasks.rebuild_stock_item_tree(parent.tree_id)
+        # bulk_create does not send post_save signals, so update the serial number index here
+        stock.serials.add_serials(part.pk, serials)
+
+        # ... and the stock location summary
+        stock.summary.update_location_summary(stock.summary.count_locations(items))
 
         # Fetch the new StockItem objects from the database
         items = StockItem.objects.filter(part=part, serial__in=serials)
@@ -652,17 +712,24 @@ class StockItem(
         return items
 
     @staticmethod
-    def convert_serial_to_int(serial: str) -> int | None:
+    def convert_serial_to_int(serial: str, plugins: list | None = None) -> int | None:
         """Convert the provided serial number to an integer value.
 
         This function hooks into the plugin system to allow for custom serial number conversion.
+
+        Arguments:
+            serial: The serial number to convert
+            plugins: Optional list of validation plugins (if already known)
         """
         from plugin import PluginMixinEnum, registry
 
+        if plugins is None:
+            plugins = registry.with_mixin(PluginMixinEnum.VALIDATION)
+
         # First, let any plugins convert this serial number to an integer value
         # If a non-null value is returned (by any plugin) we will use that
 
-        for plugin in registry.with_mixin(PluginMixinEnum.VALIDATION):
+        for plugin in plugins:
             try:
                 serial_int = plugin.convert_serial_to_int(serial)
             except Exception:
@@ -796,6 +863,12 @@ class StockItem(
             try:
                 old = StockItem.objects.get(pk=self.pk)
 
+                # Record the previous serial number (for updating the serial number index)
+                self._serial_previous = (old.part_id, old.serial)
+
+                # Record the previous location (for updating the stock location summary)
+                self._location_previous = old.location_id
+
                 deltas = {}
 
                 # Status changed?
@@ -813,7 +886,8 @@ class StockItem(
         super().save(*args, **kwargs)
 
         # If user information is provided, and no existing note exists, create one!
-        if add_note and self.tracking_info.count() == 0:
+        # Archived entries are included (see stock.archive)
+        if add_note and not self.has_tracking_info:
             tracking_info = {'status': self.status}
 
             self.add_tracking_entry(
@@ -1073,7 +1147,7 @@ class StockItem(
         help_text=_('Serial number for this item'),
     )
 
-    serial_int = models.IntegerField(default=0)
+    serial_int = models.IntegerField(default=0, db_index=True)
 
     link = InvenTreeURLField(
         verbose_name=_('External Link'),
@@ -1756,8 +1830,8 @@ class StockItem(
 
     @property
     def tracking_info_count(self):
-        """How many tracking entries are available?"""
-        return self.tracking_info.count()
+        """How many tracking entries are available (including archived entries)?"""
+        return self.tracking_info.count() + self.tracking_archive.count()
 
     @property
     def has_tracking_info(self):
@@ -1830,6 +1904,7 @@ class StockItem(
         user: User | None = None,
         notes: str | None = '',
         location: StockLocation | None = None,
+        copy_history: bool = False,
     ):
         """Split this stock item into unique serial numbers.
 
@@ -1843,6 +1918,8 @@ class StockItem(
             user: User object associated with action
             notes: Optional notes for tracking
             location: If specified, serialized items will be placed in the given location
+            copy_history: If True, copy the stock history of this item to each new item.
+                Otherwise, the history is available via the parent item.
 
         Returns:
             List of newly created StockItem objects, each with a unique serial number.
@@ -1907,6 +1984,13 @@ class StockItem(
         # Generate a new serial number for each item
         items = StockItem._create_serial_numbers(serials, **data)
 
+        if copy_history:
+            # Copy the history of this item to each new item
+            self.copy_history_to(items)
+
+        # Copy any test results from this item to the new items
+        self.copy_test_results_to(items)
+
         # Create a new tracking entry for each item
         history_items = []
 
@@ -1932,9 +2016,6 @@ class StockItem(
             ):
                 history_items.append(entry)
 
-            # Copy any test results from this item to the new one
-            item.copyTestResultsFrom(self)
-
         StockItemTracking.objects.bulk_create(history_items)
 
         # Remove the equivalent number of items
@@ -1947,30 +2028,53 @@ class StockItem(
     @transaction.atomic
     def copyHistoryFrom(self, other):
         """Copy stock history from another StockItem."""
-        for item in other.tracking_info.all():
-            item.item = self
-            item.pk = None
-            item.save()
+        other.copy_history_to([self])
 
     @transaction.atomic
     def copyTestResultsFrom(self, other: StockItem, filters: dict | None = None):
         """Copy all test results from another StockItem."""
-        # Set default - see B006
+        other.copy_test_results_to([self], filters=filters)
 
-        results = other.test_results.all()
+    def copy_history_to(self, items: list[StockItem]) -> int:
+        """Copy the stock history of this StockItem to multiple other StockItems.
 
-        if filters:
-            results = results.filter(**filters)
+        Arguments:
+            items: List of StockItem objects to copy the history to
 
-        results_to_create = []
+        Returns:
+            The number of tracking entries created
+        """
+        # Archived entries are copied into the main table (and archived again later)
+        archived = [
+            StockItemTracking(
+                tracking_type=entry.tracking_type,
+                notes=entry.notes,
+                user_id=entry.user_id,
+                deltas=entry.deltas,
+            )
+            for entry in self.tracking_archive.all()
+        ]
+
+        return bulk_copy([*archived, *self.tracking_info.all()], items, 'item')
+
+    def copy_test_results_to(
+        self, items: list[StockItem], filters: dict | None = None
+    ) -> int:
+        """Copy the test results of this StockItem to multiple other StockItems.
+
+        Arguments:
+            items: List of StockItem objects to copy the test results to
+            filters: Optional filters to apply to the test results
 
-        for result in list(results):
-            # Create a copy of the test result by nulling-out the pk
-            result.pk = None
-            result.stock_item = self
-            results_to_create.append(result)
+        Returns:
+            The number of test results created
+        """
+        results = self.test_results.all()
 
-        StockItemTestResult.objects.bulk_create(results_to_create)
+        if filters:
+            results = results.filter(**filters)
+
+        return bulk_copy(list(results), items, 'stock_item')
 
     def add_test_result(self, create_template=True, **kwargs):
         """Helper function to add a new StockItemTestResult.
@@ -2089,28 +2193,17 @@ class StockItem(
         - The quantity of this StockItem is increased
         - Tracking history for the *other* item is deleted
         - Any allocations (build order, sales order) are moved to this StockItem
+
+        To merge multiple groups of stock items in a single operation, see stock.merge.StockItemMerge
         """
+        from stock.merge import StockItemMerge
+
         if isinstance(other_items, StockItem):
             other_items = [other_items]
 
         if len(other_items) == 0:
             return
 
-        # Keep track of the tree IDs that are being merged
-        tree_ids = {self.tree_id}
-
-        user = kwargs.get('user')
-        location = kwargs.get('location', self.location)
-        notes = kwargs.get('notes')
-
-        parent_id = self.parent.pk if self.parent else None
-
-        # Keep track of pricing data for the merged data
-        pricing_data = []
-
-        if self.purchase_price:
-            pricing_data.append([self.purchase_price, self.quantity])
-
         for other in other_items:
             # If the stock item cannot be merged, return
             if not self.can_merge(other, raise_error=raise_error, **kwargs):
@@ -2119,79 +2212,20 @@ class StockItem(
                 )
                 return
 
-        for other in other_items:
-            tree_ids.add(other.tree_id)
-
-            self.quantity += other.quantity
-
-            if other.purchase_price:
-                # Only add pricing data if it is available
-                pricing_data.append([other.purchase_price, other.quantity])
-
-            # Any "build order allocations" for the other item must be assigned to this one
-            for allocation in other.allocations.all():
-                allocation.stock_item = self
-                allocation.save()
-
-            # Any "sales order allocations" for the other item must be assigned to this one
-            for allocation in other.sales_order_allocations.all():
-                allocation.stock_item = self
-                allocation.save()
-
-            # Prevent atomicity issues when we are merging our own "parent" part in
-            if parent_id and parent_id == other.pk:
-                self.parent = None
-                self.save()
-
-            other.delete()
-
-        self.add_tracking_entry(
-            StockHistoryCode.MERGED_STOCK_ITEMS,
-            user,
-            quantity=self.quantity,
-            notes=notes,
-            deltas={'location': location.pk if location else None},
-        )
-
-        # Update the location of the item
-        self.location = location
-
-        # Update the unit price - calculate weighted average of available pricing data
-        if len(pricing_data) > 0:
-            unit_price, quantity = pricing_data[0]
-
-            # Use the first currency as the base currency
-            base_currency = unit_price.currency
-
-            total_price = unit_price * quantity
-
-            for price, qty in pricing_data[1:]:
-                # Attempt to convert the price to the base currency
-                try:
-                    price = convert_money(price, base_currency)
-                    total_price += price * qty
-                    quantity += qty
-                except Exception:
-                    # Skip this entry, cannot convert to base currency
-                    continue
-
-            if quantity > 0:
-                self.purchase_price = total_price / quantity
-
-        self.save()
+        StockItemMerge(
+            [
+                {
+                    'base': self,
+                    'items': other_items,
+                    'location': kwargs.pop('location', None),
+                }
+            ],
+            user=kwargs.pop('user', None),
+            notes=kwargs.pop('notes', None),
+            **kwargs,
+        ).run()
 
-        # Rebuild stock trees as required
-        rebuild_result = True
-        for tree_id in tree_ids:
-            if not stock.tasks.rebuild_stock_item_tree(tree_id, rebuild_on_fail=False):
-                rebuild_result = False
-
-        if not rebuild_result:
-            # If the rebuild failed, offload the task to a background worker
-            logger.warning(
-                'Failed to rebuild stock item tree during merge_stock_items operation, offloading task.'
-            )
-            InvenTree.tasks.offload_task(stock.tasks.rebuild_stock_items, group='stock')
+        self.refresh_from_db()
 
     @transaction.atomic
     def splitStock(self, quantity, location=None, user=None, **kwargs):
@@ -2753,62 +2787,223 @@ class StockItem(
         return status['passed'] >= status['total']
 
 
+def bulk_copy(objects: list, items: list[StockItem], field: str) -> int:
+    """Copy each of the provided objects to each of the provided StockItems.
+
+    The copies are written with batched bulk_create operations,
+    which is equivalent to an INSERT ... SELECT with the StockItem reference substituted.
+
+    Arguments:
+        objects: List of model instances (e.g. tracking entries or test results) to copy
+        items: List of StockItem objects to assign the copies to
+        field: The name of the StockItem foreign key field on the copied model
+
+    Returns:
+        The number of objects created
+    """
+    if not objects or not items:
+        return 0
+
+    model = type(objects[0])
+
+    fields = [
+        f.attname
+        for f in model._meta.concrete_fields
+        if not f.primary_key and f.name != field
+    ]
+
+    rows = [{name: getattr(obj, name) for name in fields} for obj in objects]
+
+    copies = (model(**row, **{field: item}) for item in items for row in rows)
+
+    n = 0
+
+    for batch in InvenTree.helpers.chunked(copies, COPY_BATCH_SIZE):
+        n += len(model.objects.bulk_create(batch))
+
+    return n
+
+
 @receiver(post_delete, sender=StockItem, dispatch_uid='stock_item_post_delete_log')
 def after_delete_stock_item(sender, instance: StockItem, **kwargs):
     """Function to be executed after a StockItem object is deleted."""
-    from part import tasks as part_tasks
-
     if InvenTree.ready.isImportingData():
         return
 
-    if InvenTree.ready.canAppAccessDatabase(allow_test=True):
-        # Run this check in the background
-        InvenTree.tasks.offload_task(
-            part_tasks.notify_low_stock_if_required,
-            instance.part.pk,
-            group='notification',
-            force_async=True,
-        )
+    # Stock items deleted by a bulk merge operation are handled by the merge itself
+    if stock.merge.deleting_merged_items():
+        return
 
-    if InvenTree.ready.canAppAccessDatabase(allow_test=settings.TESTING_PRICING):
-        # Schedule an update on parent part pricing
-        if instance.part:
-            instance.part.schedule_pricing_update(create=False)
+    if instance.part:
+        stock_changed([instance.part], create=False)
 
 
 @receiver(post_save, sender=StockItem, dispatch_uid='stock_item_post_save_log')
 def after_save_stock_item(sender, instance: StockItem, created, **kwargs):
     """Hook function to be executed after StockItem object is saved/updated."""
+    if not InvenTree.ready.isImportingData():
+        stock_changed([instance.part], create=True)
+
+
+def stock_changed(parts, create: bool = True):
+    """Schedule background tasks after the stock quantity of the provided parts has changed.
+
+    Each part is only processed once, so that bulk stock operations
+    can schedule the tasks for all affected parts in a single call.
+
+    Arguments:
+        parts: An iterable of Part objects
+        create: If True, create a pricing entry for any part which does not have one
+    """
+    from part import planning as part_planning
     from part import tasks as part_tasks
 
-    if not InvenTree.ready.isImportingData():
-        if InvenTree.ready.canAppAccessDatabase(allow_test=True):
-            InvenTree.tasks.offload_task(
-                part_tasks.notify_low_stock_if_required,
-                instance.part.pk,
-                group='notification',
-                force_async=True,
-            )
+    parts = list({part.pk: part for part in parts if part}.values())
 
-        if InvenTree.ready.canAppAccessDatabase(allow_test=settings.TESTING_PRICING):
-            if instance.part:
-                instance.part.schedule_pricing_update(create=True)
+    if InvenTree.ready.canAppAccessDatabase(allow_test=True):
+        # Low stock checks are coalesced, and run once the transaction is committed
+        part_tasks.schedule_low_stock_check([part.pk for part in parts])
 
+        # Record the changed parts for the next incremental planning run
+        part_planning.schedule_planning_update([part.pk for part in parts])
 
-class StockItemTracking(InvenTree.models.InvenTreeModel):
-    """Stock tracking entry - used for tracking history of a particular StockItem.
+    if InvenTree.ready.canAppAccessDatabase(allow_test=settings.TESTING_PRICING):
+        for part in parts:
+            # Schedule an update on parent part pricing
+            part.schedule_pricing_update(create=create)
 
-    Note: 2021-05-11
-    The legacy StockTrackingItem model contained very little information about the "history" of the item.
-    In fact, only the "quantity" of the item was recorded at each interaction.
-    Also, the "title" was translated at time of generation, and thus was not really translatable.
-    The "new" system tracks all 'delta' changes to the model,
-    and tracks change "type" which can then later be translated
 
+class StockLocationSummary(models.Model):
+    """The number of stock items in a StockLocation.
+
+    This table is maintained automatically (see stock.summary) and should not be edited directly.
+
+    Attributes:
+        location: The StockLocation which this summary refers to
+        items: The number of stock items directly in this location
+        cascade_items: The number of stock items in this location (or any sublocation)
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('Stock Location Summary')
+
+    location = models.OneToOneField(
+        StockLocation,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+        verbose_name=_('Location'),
+    )
+
+    items = models.IntegerField(default=0, verbose_name=_('Stock Items'))
+
+    cascade_items = models.IntegerField(
+        default=0, verbose_name=_('Stock Items (including sublocations)')
+    )
+
+    def __str__(self):
+        """Return a string representation of this stock location summary."""
+        return f'{self.location_id}: {self.items} ({self.cascade_items})'
+
+
+@receiver(
+    post_save, sender=StockLocation, dispatch_uid='stock_location_post_save_summary'
+)
+def create_stock_location_summary(sender, instance: StockLocation, created, **kwargs):
+    """Create an (empty) summary entry when a new StockLocation is created."""
+    if created:
+        StockLocationSummary.objects.get_or_create(location=instance)
+
+
+@receiver(post_save, sender=StockItem, dispatch_uid='stock_item_post_save_summary')
+def update_stock_location_summary(sender, instance: StockItem, created, **kwargs):
+    """Update the stock location summary when a StockItem is created or moved."""
+    previous = instance.__dict__.pop('_location_previous', instance.location_id)
+
+    if created:
+        previous = None
+
+    if previous != instance.location_id:
+        stock.summary.update_location_summary({previous: -1, instance.location_id: 1})
+
+
+@receiver(post_delete, sender=StockItem, dispatch_uid='stock_item_post_delete_summary')
+def remove_stock_location_summary(sender, instance: StockItem, **kwargs):
+    """Update the stock location summary when a StockItem is deleted."""
+    # Merged stock items are handled in bulk by the merge operation
+    if stock.merge.deleting_merged_items():
+        return
+
+    if instance.location_id:
+        stock.summary.update_location_summary({instance.location_id: -1})
+
+
+class SerialNumberRange(models.Model):
+    """A contiguous range of integer serial numbers which are allocated to a Part.
+
+    Together, the ranges form an interval index of the integer serial numbers in use,
+    which is used for efficient serial number conflict checks and "next" serial number lookups.
+    This table is maintained automatically (see stock.serials) and should not be edited directly.
+
+    Attributes:
+        part: The Part which the serial numbers are allocated to
+        start: The first serial number in the range (inclusive)
+        end: The last serial number in the range (inclusive)
+    """
+
+    class Meta:
+        """Metaclass providing extra model definition."""
+
+        verbose_name = _('Serial Number Range')
+        indexes = [models.Index(fields=['part', 'start']), models.Index(fields=['end'])]
+
+    part = models.ForeignKey(
+        'part.Part',
+        on_delete=models.CASCADE,
+        related_name='serial_ranges',
+        verbose_name=_('Part'),
+    )
+
+    start = models.PositiveIntegerField(verbose_name=_('Start'))
+
+    end = models.PositiveIntegerField(verbose_name=_('End'))
+
+    def __str__(self):
+        """Return a string representation of this serial number range."""
+        return f'{self.part_id}: {self.start} - {self.end}'
+
+
+@receiver(post_save, sender=StockItem, dispatch_uid='stock_item_post_save_serial_index')
+def update_serial_index(sender, instance: StockItem, **kwargs):
+    """Update the serial number index when the serial number of a StockItem is changed."""
+    previous = instance.__dict__.pop('_serial_previous', None)
+    current = (instance.part_id, instance.serial)
+
+    if previous == current:
+        return
+
+    if previous and previous[1]:
+        stock.serials.remove_serials(previous[0], [previous[1]])
+
+    if instance.serial:
+        stock.serials.add_serials(instance.part_id, [instance.serial])
+
+
+@receiver(
+    post_delete, sender=StockItem, dispatch_uid='stock_item_post_delete_serial_index'
+)
+def remove_serial_index(sender, instance: StockItem, **kwargs):
+    """Release the serial number of a StockItem from the serial number index when it is deleted."""
+    if instance.serial:
+        stock.serials.remove_serials(instance.part_id, [instance.serial])
+
+
+class AbstractStockItemTracking(InvenTree.models.InvenTreeModel):
+    """Abstract base class for stock tracking entries.
 
     Attributes:
-        item: ForeignKey reference to a particular StockItem
-        date: Date that this tracking info was created
         tracking_type: The type of tracking information
         notes: Associated notes (input by user)
         user: The user associated with this tracking info
@@ -2816,9 +3011,9 @@ class StockItemTracking(InvenTree.models.InvenTreeModel):
     """
 
     class Meta:
-        """Meta data for the StockItemTracking class."""
+        """Meta data for the AbstractStockItemTracking class."""
 
-        verbose_name = _('Stock Item Tracking')
+        abstract = True
 
     @staticmethod
     def get_api_url():
@@ -2827,7 +3022,7 @@ class StockItemTracking(InvenTree.models.InvenTreeModel):
 
     def get_absolute_url(self):
         """Return url for instance."""
-        return InvenTree.helpers.pui_url(f'/stock/item/{self.item.id}')
+        return InvenTree.helpers.pui_url(f'/stock/item/{self.item_id}')
 
     def label(self):
         """Return label."""
@@ -2838,12 +3033,6 @@ class StockItemTracking(InvenTree.models.InvenTreeModel):
 
     tracking_type = models.IntegerField(default=StockHistoryCode.LEGACY)
 
-    item = models.ForeignKey(
-        StockItem, on_delete=models.CASCADE, related_name='tracking_info'
-    )
-
-    date = models.DateTimeField(auto_now_add=True, editable=False)
-
     notes = models.CharField(
         blank=True,
         null=True,
@@ -2857,6 +3046,60 @@ class StockItemTracking(InvenTree.models.InvenTreeModel):
     deltas = models.JSONField(null=True, blank=True)
 
 
+class StockItemTracking(AbstractStockItemTracking):
+    """Stock tracking entry - used for tracking history of a particular StockItem.
+
+    Note: 2021-05-11
+    The legacy StockTrackingItem model contained very little information about the "history" of the item.
+    In fact, only the "quantity" of the item was recorded at each interaction.
+    Also, the "title" was translated at time of generation, and thus was not really translatable.
+    The "new" system tracks all 'delta' changes to the model,
+    and tracks change "type" which can then later be translated
+
+
+    Attributes:
+        item: ForeignKey reference to a particular StockItem
+        date: Date that this tracking info was created
+        tracking_type: The type of tracking information
+        notes: Associated notes (input by user)
+        user: The user associated with this tracking info
+        deltas: The changes associated with this history item
+    """
+
+    class Meta:
+        """Meta data for the StockItemTracking class."""
+
+        verbose_name = _('Stock Item Tracking')
+
+    item = models.ForeignKey(
+        StockItem, on_delete=models.CASCADE, related_name='tracking_info'
+    )
+
+    date = models.DateTimeField(auto_now_add=True, editable=False)
+
+
+class StockItemTrackingArchive(AbstractStockItemTracking):
+    """Archived stock tracking entry.
+
+    Stock tracking entries older than the STOCK_TRACKING_ARCHIVE_DAYS setting
+    are moved (with their original primary key) from the StockItemTracking table
+    into this table, to keep the "hot" tracking table small.
+
+    Refer to stock.archive for more information.
+    """
+
+    class Meta:
+        """Meta data for the StockItemTrackingArchive class."""
+
+        verbose_name = _('Archived Stock Item Tracking')
+
+    item = models.ForeignKey(
+        StockItem, on_delete=models.CASCADE, related_name='tracking_archive'
+    )
+
+    date = models.DateTimeField(editable=False)
+
+
 def rename_stock_item_test_result_attachment(instance, filename):
     """Rename test result."""
     return os.path.join(
@@ -0,0 +1,155 @@
+"""Bulk evaluation of required test status for the Stock app.
+
+The StockItem.requiredTestStatus() method evaluates a single stock item,
+fetching the required test templates (walking the part tree) and test results each time.
+
+The functions here evaluate the required test status for many stock items at once:
+
+- Required test templates are loaded once for each part tree
+- The test results for all stock items are loaded in a single (chunked) query
+- The latest result for each test is determined in memory
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.db.models import F, QuerySet
+
+from InvenTree.helpers import chunked
+
+# Maximum number of objects to reference in a single query
+TEST_STATUS_CHUNK_SIZE = 500
+
+
+def required_test_templates(parts: Iterable[int]) -> dict[int, list]:
+    """Return the required test templates for each of the provided parts.
+
+    Templates defined for parent (template) parts are included,
+    as per Part.getRequiredTests(). Only enabled templates are returned.
+
+    Arguments:
+        parts: Iterable of Part IDs
+
+    Returns:
+        A dict of {part_id: [PartTestTemplate]}
+    """
+    from part.models import Part, PartTestTemplate
+
+    nodes = []
+
+    for chunk in chunked(set(parts), TEST_STATUS_CHUNK_SIZE):
+        nodes.extend(
+            Part.objects.filter(pk__in=chunk).values('pk', 'tree_id', 'lft', 'rght')
+        )
+
+    trees = defaultdict(list)
+
+    for chunk in chunked({node['tree_id'] for node in nodes}, TEST_STATUS_CHUNK_SIZE):
+        templates = PartTestTemplate.objects.filter(
+            required=True, enabled=True, part__tree_id__in=chunk
+        ).annotate(
+            part_tree=F('part__tree_id'),
+            part_lft=F('part__lft'),
+            part_rght=F('part__rght'),
+        )
+
+        for template in templates:
+            trees[template.part_tree].append(template)
+
+    return {
+        node['pk']: [
+            template
+            for template in trees[node['tree_id']]
+            if template.part_lft <= node['lft'] and template.part_rght >= node['rght']
+        ]
+        for node in nodes
+    }
+
+
+def latest_test_results(items: Iterable[int], keys: Iterable[str]) -> dict:
+    """Return the latest result of each test for the provided stock items.
+
+    Arguments:
+        items: Iterable of StockItem IDs
+        keys: The test keys to return results for
+
+    Returns:
+        A dict of {(stock_item_id, test_key): result}
+    """
+    from stock.models import StockItemTestResult
+
+    keys = list(set(keys))
+    results = {}
+
+    if not keys:
+        return results
+
+    for chunk in chunked(items, TEST_STATUS_CHUNK_SIZE):
+        # Newer results override older ones
+        for item, key, result in (
+            StockItemTestResult.objects
+            .filter(stock_item__in=chunk, template__key__in=keys)
+            .order_by('date', 'pk')
+            .values_list('stock_item', 'template__key', 'result')
+        ):
+            results[item, key] = result
+
+    return results
+
+
+def required_test_status(items) -> dict[int, dict]:
+    """Evaluate the status of the required tests for many stock items.
+
+    Arguments:
+        items: A StockItem queryset (or list of StockItem objects)
+
+    Returns:
+        A dict of {stock_item_id: status}, where each status is a dict containing:
+        - total: Number of required tests
+        - passed: Number of required tests which have passed
+        - failed: Number of required tests which have failed
+        - missing: Number of required tests which have no result
+    """
+    if isinstance(items, QuerySet):
+        rows = list(items.values_list('pk', 'part').order_by())
+    else:
+        rows = [(item.pk, item.part_id) for item in items]
+
+    templates = required_test_templates(part for _pk, part in rows)
+
+    results = latest_test_results(
+        [pk for pk, part in rows if templates.get(part)],
+        [template.key for tests in templates.values() for template in tests],
+    )
+
+    status = {}
+
+    for pk, part in rows:
+        required = templates.get(part, [])
+
+        passed = 0
+        failed = 0
+
+        for template in required:
+            result = results.get((pk, template.key))
+
+            if result is True:
+                passed += 1
+            elif result is False:
+                failed += 1
+
+        status[pk] = {
+            'total': len(required),
+            'passed': passed,
+            'failed': failed,
+            'missing': len(required) - passed - failed,
+        }
+
+    return status
+
+
+def passed_required_tests(status: dict) -> bool:
+    """Return True if the provided test status indicates that all required tests have passed."""
+    return status['passed'] >= status['total']
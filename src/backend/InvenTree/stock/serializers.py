@@ -26,7 +26,9 @@ import order.models
 import part.filters as part_filters
 import part.models as part_models
 import part.serializers as part_serializers
+import stock.adjustment
 import stock.filters
+import stock.merge
 import stock.status_codes
 from common.settings import get_global_setting
 from generic.states.fields import InvenTreeCustomStatusSerializerMixin
@@ -505,8 +507,11 @@ class StockItemSerializer(
             + Coalesce(SubquerySum('allocations__quantity'), Decimal(0))
         )
 
-        # Annotate the queryset with the number of tracking items
-        queryset = queryset.annotate(tracking_items=SubqueryCount('tracking_info'))
+        # Annotate the queryset with the number of tracking items (including archived items)
+        queryset = queryset.annotate(
+            tracking_items=SubqueryCount('tracking_info')
+            + SubqueryCount('tracking_archive')
+        )
 
         # Add flag to indicate if the StockItem has expired
         queryset = queryset.annotate(
@@ -668,7 +673,7 @@ class SerializeStockItemSerializer(serializers.Serializer):
     class Meta:
         """Metaclass options."""
 
-        fields = ['quantity', 'serial_numbers', 'destination', 'notes']
+        fields = ['quantity', 'serial_numbers', 'destination', 'notes', 'copy_history']
 
     quantity = serializers.IntegerField(
         min_value=0,
@@ -718,6 +723,13 @@ class SerializeStockItemSerializer(serializers.Serializer):
         help_text=_('Optional note field'),
     )
 
+    copy_history = serializers.BooleanField(
+        default=False,
+        required=False,
+        label=_('Copy History'),
+        help_text=_('Copy the stock history of this item to each serialized item'),
+    )
+
     def validate(self, data):
         """Check that the supplied serial numbers are valid."""
         data = super().validate(data)
@@ -784,6 +796,7 @@ class SerializeStockItemSerializer(serializers.Serializer):
                 user=user,
                 notes=data.get('notes', ''),
                 location=data['destination'],
+                copy_history=data.get('copy_history', False),
             )
             or []
         )
@@ -1038,57 +1051,16 @@ class StockChangeStatusSerializer(serializers.Serializer):
         allow_blank=True,
     )
 
-    @transaction.atomic
     def save(self):
         """Save the serializer to change the status of the selected stock items."""
         data = self.validated_data
 
-        items = data['items']
-        status = data['status']
-
         request = self.context['request']
         user = getattr(request, 'user', None)
 
-        note = data.get('note', '')
-
-        transaction_notes = []
-
-        deltas = {'status': status}
-
-        now = InvenTree.helpers.current_time()
-
-        # Instead of performing database updates for each item,
-        # perform bulk database updates (much more efficient)
-
-        # Pre-cache the custom status values (to reduce DB hits)
-        custom_status_codes = StockItem.STATUS_CLASS.custom_values()
-
-        for item in items:
-            # Ignore items which are already in the desired status
-
-            # Careful check for custom status codes also
-            if item.compare_status(status):
-                custom_status = item.get_custom_status()
-                if status == custom_status or custom_status is None:
-                    continue
-
-            item.set_status(status, custom_values=custom_status_codes)
-            item.save(add_note=False)
-
-            # Create a new transaction note for each item
-            transaction_notes.append(
-                StockItemTracking(
-                    item=item,
-                    tracking_type=stock.status_codes.StockHistoryCode.EDITED.value,
-                    date=now,
-                    deltas=deltas,
-                    user=user,
-                    notes=note,
-                )
-            )
-
-        # Create tracking entries
-        StockItemTracking.objects.bulk_create(transaction_notes)
+        stock.adjustment.StockAdjustment(
+            [{'pk': item} for item in data['items']], user, notes=data.get('note', '')
+        ).run('change_status', data['status'])
 
 
 class StockLocationTypeSerializer(InvenTree.serializers.InvenTreeModelSerializer):
@@ -1173,7 +1145,7 @@ class LocationSerializer(
         queryset = queryset.prefetch_related('tags')
 
         queryset = queryset.annotate(
-            items=stock.filters.annotate_location_items(),
+            items=stock.filters.annotate_location_summary(),
             sublocations=stock.filters.annotate_sub_locations(),
         )
 
@@ -1400,21 +1372,56 @@ class StockMergeItemSerializer(serializers.Serializer):
         return item
 
 
+class StockMergeGroupSerializer(serializers.Serializer):
+    """Serializer for a single group of stock items within the StockMergeSerializer class.
+
+    The first item in the group is the "base" item, which subsumes the other items.
+    """
+
+    class Meta:
+        """Metaclass options."""
+
+        fields = ['items', 'location']
+
+    items = StockMergeItemSerializer(many=True, required=True)
+
+    location = serializers.PrimaryKeyRelatedField(
+        queryset=StockLocation.objects.all(),
+        many=False,
+        required=False,
+        allow_null=True,
+        label=_('Location'),
+        help_text=_('Destination stock location (overrides the default location)'),
+    )
+
+
 class StockMergeSerializer(serializers.Serializer):
-    """Serializer for merging two (or more) stock items together."""
+    """Serializer for merging two (or more) stock items together.
+
+    Multiple groups of stock items can be merged in a single request,
+    by providing a list of "groups" (in addition to, or instead of, the "items" list).
+    """
 
     class Meta:
         """Metaclass options."""
 
         fields = [
             'items',
+            'groups',
             'location',
             'notes',
             'allow_mismatched_suppliers',
             'allow_mismatched_status',
         ]
 
-    items = StockMergeItemSerializer(many=True, required=True)
+    items = StockMergeItemSerializer(many=True, required=False)
+
+    groups = StockMergeGroupSerializer(
+        many=True,
+        required=False,
+        label=_('Groups'),
+        help_text=_('Groups of stock items to merge'),
+    )
 
     location = serializers.PrimaryKeyRelatedField(
         queryset=StockLocation.objects.all(),
@@ -1444,73 +1451,94 @@ class StockMergeSerializer(serializers.Serializer):
         help_text=_('Allow stock items with different status codes to be merged'),
     )
 
+    def to_internal_value(self, data):
+        """Ensure that either a list of items or a list of groups is provided."""
+        errors = {}
+
+        if 'items' not in data and not data.get('groups'):
+            errors['items'] = [_('This field is required.')]
+
+        try:
+            value = super().to_internal_value(data)
+        except ValidationError as exc:
+            raise ValidationError({**errors, **exc.detail})
+
+        if errors:
+            raise ValidationError(errors)
+
+        return value
+
     def validate(self, data):
         """Make sure all needed values are provided and that the items can be merged."""
         data = super().validate(data)
 
-        items = data['items']
+        groups = list(data.get('groups', []))
 
-        if len(items) < 2:
-            raise ValidationError(_('At least two stock items must be provided'))
+        if 'items' in data:
+            groups.insert(0, {'items': data['items']})
+
+        options = {
+            'allow_mismatched_suppliers': data.get('allow_mismatched_suppliers', False),
+            'allow_mismatched_status': data.get('allow_mismatched_status', False),
+        }
 
         unique_items = set()
 
-        # The "base item" is the first item
-        base_item = items[0]['item']
+        data['merge_groups'] = []
 
-        data['base_item'] = base_item
+        for group in groups:
+            items = group['items']
 
-        # Ensure stock items are unique!
-        for element in items:
-            item = element['item']
+            if len(items) < 2:
+                raise ValidationError(_('At least two stock items must be provided'))
 
-            if item.pk in unique_items:
-                raise ValidationError(_('Duplicate stock items'))
+            # The "base item" is the first item in each group
+            base_item = items[0]['item']
 
-            unique_items.add(item.pk)
+            # Ensure stock items are unique (across all groups)!
+            for element in items:
+                item = element['item']
 
-            # Checks from here refer to the "base_item"
-            if item == base_item:
-                continue
+                if item.pk in unique_items:
+                    raise ValidationError(_('Duplicate stock items'))
 
-            # Check that this item can be merged with the base_item
-            item.can_merge(
-                raise_error=True,
-                other=base_item,
-                allow_mismatched_suppliers=data.get(
-                    'allow_mismatched_suppliers', False
-                ),
-                allow_mismatched_status=data.get('allow_mismatched_status', False),
-            )
+                unique_items.add(item.pk)
+
+                # Checks from here refer to the "base_item"
+                if item == base_item:
+                    continue
+
+                # Check that this item can be merged with the base_item
+                item.can_merge(raise_error=True, other=base_item, **options)
+
+            data['merge_groups'].append({
+                'base': base_item,
+                'items': [element['item'] for element in items[1:]],
+                'location': group.get('location') or data['location'],
+            })
+
+        data['base_item'] = data['merge_groups'][0]['base']
 
         return data
 
     def save(self):
         """Actually perform the stock merging action.
 
-        At this point we are confident that the merge can take place
+        At this point we are confident that the merge can take place.
+        All groups are merged within a single (bulk) operation.
         """
         data = self.validated_data
 
-        base_item = data['base_item']
-        items = data['items'][1:]
-
         request = self.context['request']
         user = getattr(request, 'user', None)
 
-        items = []
-
-        for item in data['items'][1:]:
-            items.append(item['item'])
-
-        base_item.merge_stock_items(
-            items,
-            allow_mismatched_suppliers=data.get('allow_mismatched_suppliers', False),
-            allow_mismatched_status=data.get('allow_mismatched_status', False),
+        stock.merge.StockItemMerge(
+            data['merge_groups'],
             user=user,
-            location=data['location'],
             notes=data.get('notes', None),
-        )
+            allow_mismatched_suppliers=data.get('allow_mismatched_suppliers', False),
+            allow_mismatched_status=data.get('allow_mismatched_status', False),
+        ).run()
 
 
 def stock_item_adjust_status_options():
@@ -1547,6 +1575,7 @@ class StockAdjustmentItemSerializer(serializers.Serializer):
         # Either True / False / None
         self.require_in_stock = kwargs.pop('require_in_stock', True)
         self.require_non_zero = kwargs.pop('require_non_zero', False)
+        self.allow_out_of_stock_transfer = None
 
         super().__init__(*args, **kwargs)
 
@@ -1562,11 +1591,13 @@ class StockAdjustmentItemSerializer(serializers.Serializer):
     def validate_pk(self, stock_item: StockItem) -> StockItem:
         """Ensure the stock item is valid."""
         if self.require_in_stock == True:
-            allow_out_of_stock_transfer = get_global_setting(
-                'STOCK_ALLOW_OUT_OF_STOCK_TRANSFER', backup_value=False, cache=False
-            )
+            # Read the setting once for all items in the request
+            if self.allow_out_of_stock_transfer is None:
+                self.allow_out_of_stock_transfer = get_global_setting(
+                    'STOCK_ALLOW_OUT_OF_STOCK_TRANSFER', backup_value=False, cache=False
+                )
 
-            if not allow_out_of_stock_transfer and not stock_item.is_in_stock(
+            if not self.allow_out_of_stock_transfer and not stock_item.is_in_stock(
                 check_status=False, check_quantity=False, check_in_production=False
             ):
                 raise ValidationError(_('Stock item is not in stock'))
@@ -1651,22 +1682,10 @@ class StockCountSerializer(StockAdjustmentSerializer):
         request = self.context['request']
 
         data = self.validated_data
-        items = data['items']
-        notes = data.get('notes', '')
-
-        with transaction.atomic():
-            for item in items:
-                stock_item = item['pk']
-                quantity = item['quantity']
-
-                # Optional fields
-                extra = {}
-
-                for field_name in StockItem.optional_transfer_fields():
-                    if field_value := item.get(field_name, None):
-                        extra[field_name] = field_value
 
-                stock_item.stocktake(quantity, request.user, notes=notes, **extra)
+        stock.adjustment.StockAdjustment(
+            data['items'], request.user, notes=data.get('notes', '')
+        ).run('count')
 
 
 class StockAddSerializer(StockAdjustmentSerializer):
@@ -1677,25 +1696,10 @@ class StockAddSerializer(StockAdjustmentSerializer):
         request = self.context['request']
 
         data = self.validated_data
-        notes = data.get('notes', '')
-
-        with transaction.atomic():
-            for item in data['items']:
-                stock_item = item['pk']
-                quantity = item['quantity']
-
-                if quantity is None or quantity <= 0:
-                    # Ignore in this case - no stock to add
-                    continue
-
-                # Optional fields
-                extra = {}
-
-                for field_name in StockItem.optional_transfer_fields():
-                    if field_value := item.get(field_name, None):
-                        extra[field_name] = field_value
 
-                stock_item.add_stock(quantity, request.user, notes=notes, **extra)
+        stock.adjustment.StockAdjustment(
+            data['items'], request.user, notes=data.get('notes', '')
+        ).run('add')
 
 
 class StockRemoveSerializer(StockAdjustmentSerializer):
@@ -1706,25 +1710,10 @@ class StockRemoveSerializer(StockAdjustmentSerializer):
         request = self.context['request']
 
         data = self.validated_data
-        notes = data.get('notes', '')
-
-        with transaction.atomic():
-            for item in data['items']:
-                stock_item = item['pk']
-                quantity = item['quantity']
-
-                # Ignore in this case - no stock to remove
-                if quantity is None or quantity <= 0:
-                    continue
-
-                # Optional fields
-                extra = {}
-
-                for field_name in StockItem.optional_transfer_fields():
-                    if field_value := item.get(field_name, None):
-                        extra[field_name] = field_value
 
-                stock_item.take_stock(quantity, request.user, notes=notes, **extra)
+        stock.adjustment.StockAdjustment(
+            data['items'], request.user, notes=data.get('notes', '')
+        ).run('remove')
 
 
 class StockTransferSerializer(StockAdjustmentSerializer):
@@ -1752,26 +1741,9 @@ class StockTransferSerializer(StockAdjustmentSerializer):
 
         data = self.validated_data
 
-        items = data['items']
-        notes = data.get('notes', '')
-        location = data['location']
-
-        with transaction.atomic():
-            for item in items:
-                # Required fields
-                stock_item = item['pk']
-                quantity = item['quantity']
-
-                # Optional fields
-                kwargs = {}
-
-                for field_name in StockItem.optional_transfer_fields():
-                    if field_value := item.get(field_name, None):
-                        kwargs[field_name] = field_value
-
-                stock_item.move(
-                    location, notes, request.user, quantity=quantity, **kwargs
-                )
+        stock.adjustment.StockAdjustment(
+            data['items'], request.user, notes=data.get('notes', '')
+        ).run('transfer', data['location'])
 
 
 class StockReturnSerializer(StockAdjustmentSerializer):
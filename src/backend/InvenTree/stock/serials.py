@@ -0,0 +1,372 @@
+"""Serial number range index for the Stock app.
+
+The SerialNumberRange table stores the integer serial numbers allocated to each
+part as a set of non-overlapping [start, end] intervals:
+
+- Only "plain" integer serial numbers (e.g. '123', but not '0123' or 'A123') are indexed
+- Adjacent and overlapping intervals are merged whenever serial numbers are added
+- Intervals are split whenever a serial number is released (e.g. a stock item is deleted)
+
+Serial numbers are unique across a part tree (or globally, if the
+SERIAL_NUMBER_GLOBALLY_UNIQUE setting is enabled), so checking a set of serial
+numbers for conflicts becomes an interval overlap query, and the highest allocated
+serial number (the "high water mark") is a single indexed lookup.
+
+The index is maintained automatically when StockItem objects are created, edited
+or deleted, and can be rebuilt with rebuild_serial_index(). Changes which bypass the
+ORM signals (e.g. queryset.update()) are corrected by check_serial_index(), which
+runs as a daily scheduled task.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+import structlog
+
+from common.settings import get_global_setting
+from InvenTree.helpers import chunked, integer_serial
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of intervals (or serial numbers) to pass to a single query
+SERIAL_CHUNK_SIZE = 500
+
+
+def compress(values: Iterable[int]) -> list[tuple[int, int]]:
+    """Compress a collection of integers into a sorted list of (start, end) intervals.
+
+    Example:
+        compress([1, 2, 3, 5, 7, 8]) -> [(1, 3), (5, 5), (7, 8)]
+    """
+    intervals = []
+
+    for value in sorted(set(values)):
+        if intervals and value == intervals[-1][1] + 1:
+            intervals[-1] = (intervals[-1][0], value)
+        else:
+            intervals.append((value, value))
+
+    return intervals
+
+
+def merge(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping (and adjacent) intervals into a sorted list of disjoint intervals."""
+    merged = []
+
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def overlap_filter(intervals: Iterable[tuple[int, int]], margin: int = 0) -> Q:
+    """Construct a query filter for index ranges which overlap any of the provided intervals.
+
+    Arguments:
+        intervals: List of (start, end) intervals
+        margin: Also match ranges within this distance of an interval (e.g. 1 for adjacent ranges)
+    """
+    return reduce(
+        or_,
+        (
+            Q(start__lte=end + margin, end__gte=start - margin)
+            for start, end in intervals
+        ),
+        Q(pk__in=[]),
+    )
+
+
+def part_filter(part) -> Q:
+    """Return a query filter for the index ranges which share a serial number "namespace" with the provided part."""
+    if get_global_setting('SERIAL_NUMBER_GLOBALLY_UNIQUE', False):
+        return Q()
+
+    return Q(part__tree_id=part.tree_id)
+
+
+def integer_serials(serials: Iterable) -> dict[int, str]:
+    """Return a map of {integer value: serial} for each "plain" integer serial number provided."""
+    values = {}
+
+    for serial in serials:
+        if (value := integer_serial(serial)) is not None:
+            values[value] = str(serial).strip()
+
+    return values
+
+
+def _subtract(interval: tuple[int, int], values: list[int]) -> list[tuple[int, int]]:
+    """Remove a sorted list of values from an interval, returning the remaining intervals."""
+    start, end = interval
+    result = []
+
+    for value in values:
+        if value > start:
+            result.append((start, value - 1))
+        start = value + 1
+
+    if start <= end:
+        result.append((start, end))
+
+    return result
+
+
+def _update_ranges(part_id: int, values: set[int], add: bool):
+    """Add (or remove) the provided integer values to (or from) the index ranges for a part.
+
+    The part (and its existing index ranges) are locked for the duration of the update,
+    so that concurrent updates for the same part cannot create overlapping ranges.
+    """
+    from part.models import Part
+    from stock.models import SerialNumberRange
+
+    intervals = compress(values)
+
+    if not intervals:
+        return
+
+    with transaction.atomic():
+        # Lock the part row, as there may not be any existing ranges to lock
+        list(Part.objects.select_for_update().filter(pk=part_id).values_list('pk'))
+
+        existing = []
+
+        for chunk in chunked(intervals, SERIAL_CHUNK_SIZE):
+            existing.extend(
+                SerialNumberRange.objects
+                .select_for_update()
+                .filter(part_id=part_id)
+                .filter(overlap_filter(chunk, margin=1 if add else 0))
+            )
+
+        current = [(r.start, r.end) for r in existing]
+
+        if add:
+            updated = merge([*current, *intervals])
+        else:
+            updated = []
+
+            # Split each existing range around the removed values
+            for start, end in sorted(current):
+                removed = sorted(v for v in values if start <= v <= end)
+                updated.extend(_subtract((start, end), removed))
+
+        if sorted(current) == updated:
+            return
+
+        SerialNumberRange.objects.filter(pk__in=[r.pk for r in existing]).delete()
+
+        SerialNumberRange.objects.bulk_create([
+            SerialNumberRange(part_id=part_id, start=start, end=end)
+            for start, end in updated
+        ])
+
+
+def add_serials(part_id: int, serials: Iterable):
+    """Add the provided serial numbers to the index for the specified part.
+
+    Arguments:
+        part_id: The ID of the Part which the serial numbers are allocated to
+        serials: List of serial numbers (non-integer values are ignored)
+    """
+    _update_ranges(part_id, set(integer_serials(serials)), add=True)
+
+
+def remove_serials(part_id: int, serials: Iterable):
+    """Remove the provided serial numbers from the index for the specified part.
+
+    Serial numbers which are still in use by another stock item for the part are retained.
+
+    Arguments:
+        part_id: The ID of the Part which the serial numbers were allocated to
+        serials: List of serial numbers (non-integer values are ignored)
+    """
+    from stock.models import StockItem
+
+    values = integer_serials(serials)
+
+    if not values:
+        return
+
+    for chunk in chunked(list(values.values()), SERIAL_CHUNK_SIZE):
+        for serial in StockItem.objects.filter(
+            part_id=part_id, serial__in=chunk
+        ).values_list('serial', flat=True):
+            values.pop(integer_serial(serial), None)
+
+    _update_ranges(part_id, set(values), add=False)
+
+
+def find_serial_conflicts(part, serials: Iterable) -> list[str]:
+    """Return the provided integer serial numbers which are already allocated.
+
+    Arguments:
+        part: The Part for which the serial numbers are to be allocated
+        serials: List of serial numbers (non-integer values are ignored)
+
+    Returns:
+        A sorted list of conflicting serial numbers
+    """
+    from stock.models import SerialNumberRange, StockItem
+
+    values = integer_serials(serials)
+
+    if not values:
+        return []
+
+    if not SerialNumberRange.objects.filter(part_filter(part)).exists():
+        # The index has not been built for these parts - query the serial numbers directly
+        items = StockItem.objects.filter(part_filter(part))
+        conflicts = set()
+
+        for chunk in chunked(sorted(values.values()), SERIAL_CHUNK_SIZE):
+            conflicts.update(
+                items.filter(serial__in=chunk).values_list('serial', flat=True)
+            )
+
+        return [values[value] for value in sorted(values) if values[value] in conflicts]
+
+    ranges = []
+
+    for chunk in chunked(compress(values), SERIAL_CHUNK_SIZE):
+        ranges.extend(
+            SerialNumberRange.objects
+            .filter(part_filter(part))
+            .filter(overlap_filter(chunk))
+            .values_list('start', 'end')
+        )
+
+    ranges = merge(ranges)
+    starts = [start for start, _end in ranges]
+
+    conflicts = []
+
+    for value in sorted(values):
+        idx = bisect_right(starts, value) - 1
+
+        if idx >= 0 and value <= ranges[idx][1]:
+            conflicts.append(values[value])
+
+    return conflicts
+
+
+def latest_serial(part) -> Optional[int]:
+    """Return the highest integer serial number allocated for the provided part (or None)."""
+    from stock.models import SerialNumberRange
+
+    return (
+        SerialNumberRange.objects
+        .filter(part_filter(part))
+        .order_by('-end')
+        .values_list('end', flat=True)
+        .first()
+    )
+
+
+def indexed_serials(part_ids: Optional[Iterable[int]] = None) -> dict[int, set[int]]:
+    """Return the integer serial numbers of the existing stock items, grouped by part.
+
+    Arguments:
+        part_ids: Optional list of Part IDs to include (default = all parts)
+    """
+    from stock.models import StockItem
+
+    items = StockItem.objects.exclude(serial=None).exclude(serial='')
+
+    if part_ids is not None:
+        items = items.filter(part_id__in=list(part_ids))
+
+    values: dict[int, set[int]] = {}
+
+    for part_id, serial in items.values_list('part_id', 'serial').iterator():
+        if (value := integer_serial(serial)) is not None:
+            values.setdefault(part_id, set()).add(value)
+
+    return values
+
+
+def check_serial_index() -> list[int]:
+    """Check the serial number index against the existing stock items.
+
+    Any part whose index ranges do not match the serial numbers of its stock items
+    (e.g. after serial numbers were changed with queryset.update()) is rebuilt.
+
+    Returns:
+        The IDs of the parts which were rebuilt
+    """
+    from stock.models import SerialNumberRange
+
+    expected = {
+        part_id: compress(values) for part_id, values in indexed_serials().items()
+    }
+
+    current: dict[int, list[tuple[int, int]]] = {}
+
+    for part_id, start, end in (
+        SerialNumberRange.objects
+        .order_by('part_id', 'start')
+        .values_list('part_id', 'start', 'end')
+        .iterator()
+    ):
+        current.setdefault(part_id, []).append((start, end))
+
+    stale = sorted(
+        part_id
+        for part_id in set(expected) | set(current)
+        if expected.get(part_id, []) != current.get(part_id, [])
+    )
+
+    for chunk in chunked(stale, SERIAL_CHUNK_SIZE):
+        rebuild_serial_index(chunk)
+
+    if stale:
+        logger.info('Corrected serial number index for %s parts', len(stale))
+
+    return stale
+
+
+def rebuild_serial_index(part_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild the serial number index from the existing StockItem serial numbers.
+
+    Arguments:
+        part_ids: Optional list of Part IDs to rebuild (default = all parts)
+
+    Returns:
+        The number of index ranges created
+    """
+    from stock.models import SerialNumberRange
+
+    ranges = SerialNumberRange.objects.all()
+
+    if part_ids is not None:
+        part_ids = list(part_ids)
+        ranges = ranges.filter(part_id__in=part_ids)
+
+    values = indexed_serials(part_ids)
+
+    with transaction.atomic():
+        ranges.delete()
+
+        created = SerialNumberRange.objects.bulk_create(
+            [
+                SerialNumberRange(part_id=part_id, start=start, end=end)
+                for part_id, part_values in values.items()
+                for start, end in compress(part_values)
+            ],
+            batch_size=1000,
+        )
+
+    logger.info('Rebuilt serial number index: %s ranges', len(created))
+
+    return len(created)
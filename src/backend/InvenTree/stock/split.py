@@ -0,0 +1,226 @@
+"""Bulk stock split operations for the Stock app.
+
+The StockItem.splitStock() method splits a single stock item, and writes the new item,
+tracking entries, test results and (rebuilt) stock item tree with separate queries.
+
+The StockItemSplit class splits many stock items in memory, for bulk operations
+which consume (or ship) part of many stock items at once:
+
+- New stock items are written with a single bulk_create operation
+- Children of top-level items (with no existing children) are positioned directly,
+  and any other affected stock item tree is rebuilt (at most) once
+- Test results are copied to the new items with a single bulk_create operation
+"""
+
+from __future__ import annotations
+
+import copy
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models.base import ModelState
+
+import structlog
+
+import InvenTree.helpers
+from common.settings import get_global_setting
+from plugin.events import trigger_event
+from stock.events import StockEvents
+from stock.status_codes import StockHistoryCode
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of objects to write in a single bulk operation
+SPLIT_CHUNK_SIZE = 500
+
+
+class StockItemSplit:
+    """Split multiple StockItem objects in bulk.
+
+    The parent items are modified in memory (and must be written by the caller),
+    while the new items are created by this class.
+
+    Usage:
+        splitter = StockItemSplit(user, notes='Shipped')
+        new_item = splitter.split(item, quantity)
+        ...
+        splitter.create()
+        StockItem.objects.bulk_update(parents, ['quantity', 'rght', ...])
+        splitter.complete()
+    """
+
+    def __init__(self, user=None, notes: str = ''):
+        """Initialize the stock split operation.
+
+        Arguments:
+            user: The user performing the split
+            notes: Optional notes for the generated tracking entries
+        """
+        self.user = user
+        self.notes = notes
+
+        # List of (parent, child, quantity, remaining) tuples for each split operation
+        self.splits: list = []
+
+        # Stock item trees which must be rebuilt once the new items are created
+        self.trees: set[int] = set()
+
+    @property
+    def created(self) -> list:
+        """Return the new StockItem objects."""
+        return [child for _parent, child, *_ in self.splits]
+
+    def split(self, item, quantity: Decimal):
+        """Split the specified quantity from a StockItem (in memory).
+
+        The new StockItem is created as a child of the original item,
+        and is written to the database later (see create).
+
+        Returns:
+            The new StockItem object
+        """
+        new_item = copy.copy(item)
+        new_item._state = ModelState()
+        new_item.pk = None
+        new_item.part = item.part
+        new_item.quantity = quantity
+
+        # The tree position is assigned after all items have been split
+        new_item.parent_id = item.pk
+        new_item.tree_id = item.tree_id
+        new_item.level = item.level + 1
+        new_item.lft = 0
+        new_item.rght = 0
+
+        item.quantity -= quantity
+
+        self.splits.append((item, new_item, quantity, item.quantity))
+
+        return new_item
+
+    def place_children(self):
+        """Assign the tree position of each new StockItem.
+
+        Items split from a top-level item with no existing children are
+        positioned directly (which avoids rebuilding the entire tree).
+        Note that this modifies the 'rght' field of the parent items.
+        """
+        children = defaultdict(list)
+        parents = {}
+
+        for parent, child, *_ in self.splits:
+            children[parent.pk].append(child)
+            parents[parent.pk] = parent
+
+        for pk, items in children.items():
+            parent = parents[pk]
+
+            if parent.parent_id or parent.rght - parent.lft > 1:
+                self.trees.add(parent.tree_id)
+                continue
+
+            for idx, child in enumerate(items):
+                child.lft = parent.lft + 1 + 2 * idx
+                child.rght = child.lft + 1
+
+            parent.rght = parent.lft + 1 + 2 * len(items)
+
+    def create(self, updated=None):
+        """Create the new StockItem objects in the database.
+
+        Arguments:
+            updated: Optional timestamp for the new items
+        """
+        from stock.models import StockItem
+
+        self.place_children()
+
+        if updated:
+            for item in self.created:
+                item.updated = updated
+
+        StockItem.objects.bulk_create(self.created, batch_size=SPLIT_CHUNK_SIZE)
+
+    def tracking_entries(self) -> list:
+        """Construct the stock tracking entries for each split operation.
+
+        Note that this must be called after the new StockItem objects have been created.
+        """
+        tracking = []
+
+        for parent, child, quantity, remaining in self.splits:
+            tracking.append(
+                child.add_tracking_entry(
+                    StockHistoryCode.SPLIT_FROM_PARENT,
+                    self.user,
+                    notes=self.notes,
+                    deltas={'stockitem': parent.pk, 'quantity': float(quantity)},
+                    commit=False,
+                )
+            )
+
+            tracking.append(
+                parent.add_tracking_entry(
+                    StockHistoryCode.SPLIT_CHILD_ITEM,
+                    self.user,
+                    notes=self.notes,
+                    deltas={
+                        'removed': float(quantity),
+                        'quantity': float(remaining),
+                        'stockitem': child.pk,
+                    },
+                    commit=False,
+                )
+            )
+
+        return tracking
+
+    def copy_test_results(self):
+        """Copy the test results of each split StockItem to the new items."""
+        from stock.models import StockItemTestResult, bulk_copy
+
+        children = defaultdict(list)
+
+        for parent, child, *_ in self.splits:
+            children[parent.pk].append(child)
+
+        results = defaultdict(list)
+
+        for chunk in InvenTree.helpers.chunked(children.keys(), SPLIT_CHUNK_SIZE):
+            for result in StockItemTestResult.objects.filter(stock_item__in=chunk):
+                results[result.stock_item_id].append(result)
+
+        for pk, items in results.items():
+            bulk_copy(items, children[pk], 'stock_item')
+
+    def rebuild_trees(self):
+        """Rebuild each affected stock item tree (once)."""
+        import InvenTree.tasks
+        import stock.tasks
+
+        result = True
+
+        for tree_id in sorted(self.trees):
+            if not stock.tasks.rebuild_stock_item_tree(tree_id, rebuild_on_fail=False):
+                result = False
+
+        if not result:
+            # If the rebuild failed, offload the task to a background worker
+            logger.warning(
+                'Failed to rebuild stock item tree during stock split operation, offloading task.'
+            )
+            InvenTree.tasks.offload_task(stock.tasks.rebuild_stock_items, group='stock')
+
+    def complete(self):
+        """Complete the split operation, once the parent items have been written.
+
+        - Copy test results to the new items
+        - Rebuild the affected stock item trees
+        - Trigger plugin events for the new items
+        """
+        self.copy_test_results()
+        self.rebuild_trees()
+
+        if get_global_setting('ENABLE_PLUGINS_EVENTS', False):
+            for parent, child, *_ in self.splits:
+                trigger_event(StockEvents.ITEM_SPLIT, id=child.pk, parent=parent.pk)
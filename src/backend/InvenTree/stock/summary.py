@@ -0,0 +1,231 @@
+"""Materialized stock location summary for the Stock app.
+
+The StockLocationSummary table stores the number of stock items in each location:
+
+- items: The number of stock items directly in the location
+- cascade_items: The number of stock items in the location (or any sublocation)
+
+The summary is maintained incrementally as stock items are created, moved and deleted,
+so the stock location API endpoints can read item counts without counting stock items
+under each location (which is expensive for large location trees).
+
+Changes to the structure of a location tree are also applied incrementally:
+
+- When a location is moved, the items under it are moved between the old and new parent locations
+- When a location is deleted, any items which are not deleted are moved to its parent location
+
+The summary for all locations is also recalculated periodically by a scheduled task,
+to correct any drift caused by stock items which are modified without going through the ORM.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+import structlog
+
+from InvenTree.helpers import chunked
+
+logger = structlog.get_logger('inventree')
+
+# Maximum number of locations to reference in a single query
+SUMMARY_CHUNK_SIZE = 500
+
+
+def count_locations(items: Iterable) -> Counter:
+    """Return a map of {location_id: count} for the provided StockItem objects."""
+    return Counter(item.location_id for item in items if item.location_id)
+
+
+def location_changes(previous: dict[int, Optional[int]], items: Iterable) -> Counter:
+    """Return a map of {location_id: delta} for StockItem objects which have been moved.
+
+    Arguments:
+        previous: Map of {stock_item_id: location_id} before the items were modified
+        items: The (modified) StockItem objects
+    """
+    deltas = Counter()
+
+    for item in items:
+        old = previous.get(item.pk)
+
+        if old != item.location_id:
+            deltas[old] -= 1
+            deltas[item.location_id] += 1
+
+    return deltas
+
+
+def update_location_summary(deltas: dict, items: bool = True, cascade: bool = True):
+    """Apply changes in the number of stock items to the location summary.
+
+    The direct item count of each location is adjusted by the provided delta,
+    and the cascaded item count of each location (and all of its parent locations).
+
+    Arguments:
+        deltas: Map of {location_id: delta} (e.g. {1: 5, 2: -5} for 5 items moved from location 1 to 2)
+        items: If False, the direct item counts are not adjusted
+        cascade: If False, the cascaded item counts are not adjusted
+    """
+    from stock.models import StockLocation, StockLocationSummary
+
+    deltas = {pk: delta for pk, delta in deltas.items() if pk and delta}
+
+    if not deltas:
+        return
+
+    cascade_deltas = defaultdict(int)
+
+    if cascade:
+        locations = list(
+            StockLocation.objects.filter(pk__in=deltas.keys()).values(
+                'pk', 'tree_id', 'lft', 'rght'
+            )
+        )
+    else:
+        locations = []
+
+    for chunk in chunked(locations, SUMMARY_CHUNK_SIZE):
+        # Find each location, and all parent locations
+        ancestors = StockLocation.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(
+                        tree_id=loc['tree_id'],
+                        lft__lte=loc['lft'],
+                        rght__gte=loc['rght'],
+                    )
+                    for loc in chunk
+                ),
+            )
+        ).values('pk', 'tree_id', 'lft', 'rght')
+
+        for ancestor in ancestors:
+            for loc in chunk:
+                if (
+                    ancestor['tree_id'] == loc['tree_id']
+                    and ancestor['lft'] <= loc['lft']
+                    and ancestor['rght'] >= loc['rght']
+                ):
+                    cascade_deltas[ancestor['pk']] += deltas[loc['pk']]
+
+    item_deltas = deltas if items else {}
+
+    for chunk in chunked(
+        list(set(item_deltas.keys()) | set(cascade_deltas.keys())), SUMMARY_CHUNK_SIZE
+    ):
+        StockLocationSummary.objects.filter(location__in=chunk).update(
+            items=F('items')
+            + Case(
+                *[
+                    When(location=pk, then=Value(item_deltas[pk]))
+                    for pk in chunk
+                    if pk in item_deltas
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            cascade_items=F('cascade_items')
+            + Case(
+                *[
+                    When(location=pk, then=Value(cascade_deltas[pk]))
+                    for pk in chunk
+                    if pk in cascade_deltas
+                ],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+
+
+def move_location_summary(
+    location_id: int, old_parent_id: Optional[int], new_parent_id: Optional[int]
+):
+    """Update the location summary when a location is moved to a new parent location.
+
+    The stock items under the moved location are removed from the cascaded item count
+    of the old parent locations, and added to the cascaded item count of the new parent locations.
+    The summary of locations within the moved location is not affected.
+    """
+    from stock.models import StockLocationSummary
+
+    n = (
+        StockLocationSummary.objects
+        .filter(location=location_id)
+        .values_list('cascade_items', flat=True)
+        .first()
+    )
+
+    if n:
+        update_location_summary({old_parent_id: -n, new_parent_id: n}, items=False)
+
+
+def rebuild_location_summary(tree_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalculate the location summary from the existing stock items.
+
+    Arguments:
+        tree_ids: Optional list of location tree IDs to rebuild (default = all locations)
+
+    Returns:
+        The number of locations which were updated
+    """
+    from stock.models import StockItem, StockLocation, StockLocationSummary
+
+    locations = StockLocation.objects.all()
+
+    if tree_ids is not None:
+        locations = locations.filter(tree_id__in=list(tree_ids))
+
+    parents = dict(locations.values_list('pk', 'parent_id'))
+
+    if not parents:
+        return 0
+
+    direct = Counter()
+
+    for chunk in chunked(list(parents.keys()), SUMMARY_CHUNK_SIZE):
+        direct.update(
+            dict(
+                StockItem.objects
+                .filter(location__in=chunk)
+                .values('location')
+                .annotate(n=Count('pk'))
+                .values_list('location', 'n')
+                .order_by()
+            )
+        )
+
+    cascade = Counter()
+
+    # Add the direct count of each location to all of its parent locations
+    for pk, n in direct.items():
+        location = pk
+
+        while location is not None:
+            cascade[location] += n
+            location = parents.get(location)
+
+    summaries = [
+        StockLocationSummary(
+            location_id=pk, items=direct[pk], cascade_items=cascade[pk]
+        )
+        for pk in parents
+    ]
+
+    with transaction.atomic():
+        StockLocationSummary.objects.filter(location__in=locations).delete()
+        StockLocationSummary.objects.bulk_create(
+            summaries, batch_size=SUMMARY_CHUNK_SIZE
+        )
+
+    logger.info('Rebuilt stock location summary for %s locations', len(summaries))
+
+    return len(summaries)
@@ -3,6 +3,9 @@
 import structlog
 from opentelemetry import trace
 
+from common.settings import get_global_setting
+from InvenTree.tasks import ScheduledTask, scheduled_task
+
 tracer = trace.get_tracer(__name__)
 logger = structlog.get_logger('inventree')
 
@@ -65,3 +68,55 @@ def rebuild_stock_item_tree(tree_id: int, rebuild_on_fail: bool = True) -> bool:
         # No tree_id provided, so rebuild the entire tree
         StockItem.objects.rebuild()
         return True
+
+
+@tracer.start_as_current_span('rebuild_serial_index')
+def rebuild_serial_index():
+    """Rebuild the serial number range index for all parts."""
+    import stock.serials
+
+    stock.serials.rebuild_serial_index()
+
+
+@tracer.start_as_current_span('check_serial_index')
+@scheduled_task(ScheduledTask.DAILY)
+def check_serial_index():
+    """Check the serial number range index, and rebuild any parts which are out of date.
+
+    The index is maintained incrementally, this task corrects any drift
+    (e.g. from serial numbers which are modified outside of the ORM).
+    """
+    import stock.serials
+
+    stock.serials.check_serial_index()
+
+
+@tracer.start_as_current_span('archive_stock_tracking')
+@scheduled_task(ScheduledTask.DAILY)
+def archive_stock_tracking():
+    """Move old stock tracking entries into the archive table.
+
+    Entries older than the STOCK_TRACKING_ARCHIVE_DAYS setting are archived,
+    in bounded batches (a single run processes at most ARCHIVE_MAX_BATCHES batches).
+    """
+    import stock.archive
+
+    days = int(get_global_setting('STOCK_TRACKING_ARCHIVE_DAYS', 0, cache=False))
+
+    if days <= 0:
+        return
+
+    stock.archive.archive_tracking(stock.archive.archive_threshold(days))
+
+
+@tracer.start_as_current_span('rebuild_location_summary')
+@scheduled_task(ScheduledTask.DAILY)
+def rebuild_location_summary():
+    """Recalculate the stock location summary for all stock locations.
+
+    The summary is maintained incrementally, this task corrects any drift
+    (e.g. from stock items which are modified outside of the ORM).
+    """
+    import stock.summary
+
+    stock.summary.rebuild_location_summary()
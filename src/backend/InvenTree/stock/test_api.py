@@ -15,6 +15,7 @@ from rest_framework import status
 
 import build.models
 import company.models
+import InvenTree.helpers
 import part.models
 from common.models import InvenTreeCustomUserStateModel, InvenTreeSetting
 from common.settings import set_global_setting
@@ -821,6 +822,17 @@ class StockItemListTest(StockAPITestCase):
         response = self.get_stock(has_purchase_price=False)
         self.assertEqual(len(response), 28)
 
+    def test_filter_tests_passed(self):
+        """Filter StockItem by tests_passed."""
+        passed = {item['pk'] for item in self.get_stock(tests_passed=True)}
+        failed = {item['pk'] for item in self.get_stock(tests_passed=False)}
+
+        self.assertEqual(len(passed) + len(failed), 29)
+        self.assertIn(522, failed)
+
+        for item in StockItem.objects.all():
+            self.assertEqual(item.pk in passed, item.passedAllRequiredTests())
+
     def test_filter_stale(self):
         """Filter StockItem by stale."""
         response = self.get_stock(stale=True)
@@ -2411,6 +2423,82 @@ class StockTrackingTest(StockAPITestCase):
             assert_fnc=lambda x: x.data['results'][0],
         )
 
+    def test_archive(self):
+        """Test that archived tracking entries are returned by the API."""
+        from stock.archive import archive_tracking
+        from stock.models import StockItemTrackingArchive
+
+        url = self.get_url()
+        item = StockItem.objects.get(pk=1)
+
+        entries = list(item.tracking_info.order_by('pk').values_list('pk', flat=True))
+        N = len(entries)
+
+        # Mark the first 20 entries as "old"
+        threshold = InvenTree.helpers.current_time() - timedelta(days=100)
+
+        StockItemTracking.objects.filter(pk__in=entries[:20]).update(
+            date=threshold - timedelta(days=1)
+        )
+
+        result = archive_tracking(threshold, batch_size=7)
+
+        self.assertEqual(result['archived'], 20)
+        self.assertEqual(result['batches'], 3)
+
+        self.assertEqual(item.tracking_info.count(), N - 20)
+        self.assertEqual(item.tracking_archive.count(), 20)
+        self.assertEqual(item.tracking_info_count, N)
+
+        archived = set(entries[:20])
+
+        self.assertEqual(
+            set(StockItemTrackingArchive.objects.values_list('pk', flat=True)), archived
+        )
+
+        # Newest entries (from the main table) are returned first
+        response = self.get(url, {'item': item.pk, 'limit': 10, 'offset': N - 25})
+
+        self.assertEqual(response.data['count'], N)
+
+        pks = [entry['pk'] for entry in response.data['results']]
+        self.assertEqual(len(pks), 10)
+        self.assertFalse(archived.intersection(pks[:5]))
+        self.assertTrue(archived.issuperset(pks[5:]))
+
+        # Oldest entries (from the archive table) are returned first
+        response = self.get(url, {'item': item.pk, 'limit': 5, 'ordering': 'date'})
+
+        self.assertTrue(
+            archived.issuperset(entry['pk'] for entry in response.data['results'])
+        )
+
+        # Any other ordering falls back to the default (newest first)
+        for ordering in ['pk', '-notes', 'date,pk']:
+            response = self.get(
+                url, {'item': item.pk, 'limit': N, 'ordering': ordering}
+            )
+
+            dates = [entry['date'] for entry in response.data['results']]
+
+            self.assertEqual(len(dates), N)
+            self.assertEqual(dates, sorted(dates, reverse=ordering != 'date,pk'))
+
+        # Without pagination, all entries are returned
+        response = self.get(url, {'item': item.pk})
+        self.assertEqual(len(response.data), N)
+        self.assertEqual({entry['pk'] for entry in response.data}, set(entries))
+
+        # Archived entries can be retrieved individually
+        response = self.get(
+            reverse('api-stock-tracking-detail', kwargs={'pk': entries[0]})
+        )
+        self.assertEqual(response.data['pk'], entries[0])
+        self.assertEqual(response.data['item'], item.pk)
+
+        # Nothing else to archive
+        self.assertEqual(archive_tracking(threshold)['archived'], 0)
+
 
 class StockAssignTest(StockAPITestCase):
     """Unit tests for the stock assignment API endpoint, where stock items are manually assigned to a customer."""
@@ -2588,6 +2676,52 @@ class StockMergeTest(StockAPITestCase):
         # Total number of stock items has been reduced!
         self.assertEqual(StockItem.objects.filter(part=self.part).count(), n - 2)
 
+    def test_merge_groups(self):
+        """Test merging of multiple groups of stock items in a single request."""
+        item_4 = StockItem.objects.create(
+            part=self.part, supplier_part=self.sp_1, quantity=25
+        )
+
+        # Stock items cannot appear in multiple groups
+        payload = {
+            'groups': [
+                {'items': [{'item': self.item_1.pk}, {'item': item_4.pk}]},
+                {'items': [{'item': self.item_2.pk}, {'item': item_4.pk}]},
+            ],
+            'location': 1,
+        }
+
+        data = self.post(self.URL, payload, expected_code=400).data
+        self.assertIn('Duplicate stock items', str(data))
+
+        # Each group must contain at least two items
+        payload['groups'] = [{'items': [{'item': self.item_1.pk}]}]
+
+        data = self.post(self.URL, payload, expected_code=400).data
+        self.assertIn('At least two stock items', str(data))
+
+        payload['groups'] = [
+            {'items': [{'item': self.item_1.pk}, {'item': item_4.pk}]},
+            {
+                'items': [{'item': self.item_2.pk}, {'item': self.item_3.pk}],
+                'location': 5,
+            },
+        ]
+
+        self.post(self.URL, payload, expected_code=201)
+
+        self.item_1.refresh_from_db()
+        self.item_2.refresh_from_db()
+
+        self.assertEqual(self.item_1.quantity, 125)
+        self.assertEqual(self.item_1.location.pk, 1)
+        self.assertEqual(self.item_2.quantity, 150)
+        self.assertEqual(self.item_2.location.pk, 5)
+
+        self.assertFalse(
+            StockItem.objects.filter(pk__in=[item_4.pk, self.item_3.pk]).exists()
+        )
+
 
 class StockMetadataAPITest(InvenTreeAPITestCase):
     """Unit tests for the various metadata endpoints of API."""
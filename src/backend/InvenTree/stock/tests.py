@@ -1,26 +1,43 @@
 """Tests for stock app."""
 
 import datetime
+from unittest import mock
 
 from django.core.exceptions import ValidationError
+from django.db import connection, transaction
 from django.db.models import Sum
-from django.test import override_settings
+from django.db.models.signals import post_delete
+from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 
+import pytest
 from djmoney.money import Money
 
-from build.models import Build
+import stock.summary
+from build.models import Build, BuildItem, BuildLine
+from build.validators import generate_next_build_reference
 from common.models import InvenTreeSetting
 from company.models import Company
-from InvenTree.unit_test import AdminTestCase, InvenTreeTestCase
-from order.models import SalesOrder
-from part.models import Part, PartTestTemplate
+from InvenTree.unit_test import (
+    AdminTestCase,
+    InvenTreeTestCase,
+    bulk_create_nodes,
+    count_queries,
+)
+from order.models import SalesOrder, SalesOrderAllocation, SalesOrderLineItem
+from part import tasks as part_tasks
+from part.models import BomItem, Part, PartTestTemplate
+from stock.merge import StockItemMerge, deleting_merged_items
 from stock.status_codes import StockHistoryCode, StockStatus
 
 from .models import (
+    SerialNumberRange,
     StockItem,
     StockItemTestResult,
     StockItemTracking,
+    StockItemTrackingArchive,
     StockLocation,
+    StockLocationSummary,
     StockLocationType,
 )
 
@@ -693,6 +710,84 @@ class StockTest(StockTestBase):
         # Serialize the remainder of the stock
         item.serializeStock(2, [99, 100], self.user)
 
+    def test_serialize_stock_copy(self):
+        """Test that history and test results are copied to serialized items."""
+        part = Part.objects.create(
+            name='Serialized part',
+            description='A trackable part',
+            trackable=True,
+            testable=True,
+        )
+
+        item = StockItem.objects.create(part=part, quantity=10)
+        item.add_tracking_entry(StockHistoryCode.EDITED, self.user, notes='Edited')
+
+        for idx in range(3):
+            item.add_test_result(test_name=f'Test {idx}', result=True)
+
+        self.assertEqual(item.tracking_info.count(), 2)
+
+        # By default, the history is not copied
+        items = item.serializeStock(2, ['1', '2'], self.user)
+
+        for child in items:
+            self.assertEqual(child.test_results.count(), 3)
+            self.assertEqual(child.tracking_info.count(), 2)
+
+        n_history = item.tracking_info.count()
+
+        items = item.serializeStock(3, ['3', '4', '5'], self.user, copy_history=True)
+
+        for child in items:
+            self.assertEqual(child.test_results.count(), 3)
+            self.assertEqual(child.tracking_info.count(), n_history + 2)
+            self.assertTrue(child.tracking_info.filter(notes='Edited').exists())
+
+        # Test results are not shared between items
+        self.assertEqual(
+            StockItemTestResult.objects.filter(stock_item__parent=item).count(), 15
+        )
+
+    def test_archive_tracking(self):
+        """Test that old tracking entries are archived by the scheduled task."""
+        import stock.tasks
+
+        item = StockItem.objects.create(part=Part.objects.first(), quantity=10)
+
+        for idx in range(5):
+            item.add_tracking_entry(StockHistoryCode.EDITED, self.user, notes=f'{idx}')
+
+        N = item.tracking_info.count()
+
+        item.tracking_info.update(date=datetime.datetime(2020, 1, 1))
+
+        # Archiving is disabled by default
+        stock.tasks.archive_stock_tracking()
+        self.assertEqual(item.tracking_info.count(), N)
+
+        InvenTreeSetting.set_setting('STOCK_TRACKING_ARCHIVE_DAYS', 30, self.user)
+        stock.tasks.archive_stock_tracking()
+
+        self.assertEqual(item.tracking_info.count(), 0)
+        self.assertEqual(item.tracking_archive.count(), N)
+        self.assertEqual(item.tracking_info_count, N)
+
+        # Saving the item does not add a new "created" entry
+        item.save(user=self.user)
+        self.assertEqual(item.tracking_info.count(), 0)
+
+        # Archived history is copied into the main table
+        other = StockItem.objects.create(part=item.part, quantity=1)
+        n = other.tracking_info.count()
+
+        self.assertEqual(item.copy_history_to([other]), N)
+        self.assertEqual(other.tracking_info.count(), n + N)
+        self.assertTrue(other.tracking_info.filter(notes='4').exists())
+
+        # Archived entries are deleted with the stock item
+        item.delete()
+        self.assertFalse(StockItemTrackingArchive.objects.filter(item=item.pk).exists())
+
     def test_metadata(self):
         """Unit tests for the metadata field."""
         for model in [StockItem, StockLocation]:
@@ -767,43 +862,123 @@ class StockTest(StockTestBase):
         self.assertAlmostEqual(s1.purchase_price.amount, 16.875, places=3)
 
     def test_notify_low_stock(self):
-        """Test that the 'notify_low_stock' task is triggered correctly."""
-        FUNC_NAME = 'part.tasks.notify_low_stock_if_required'
+        """Test that the 'check_low_stock' task is triggered correctly."""
+        FUNC_NAME = 'part.tasks.check_low_stock'
 
         from django_q.models import OrmQ
 
         # Start from a blank slate
         OrmQ.objects.all().delete()
 
-        def check_func() -> bool:
-            """Check that the 'notify_low_stock_if_required' task has been triggered."""
-            found = False
-            for task in OrmQ.objects.all():
-                if task.func() == FUNC_NAME:
-                    found = True
-                    break
+        def check_func() -> int:
+            """Return the number of 'check_low_stock' tasks which have been triggered."""
+            n = len([task for task in OrmQ.objects.all() if task.func() == FUNC_NAME])
 
             # Clear the task queue (for the next test)
             OrmQ.objects.all().delete()
 
-            return found
+            return n
 
-        self.assertFalse(check_func())
+        self.assertEqual(check_func(), 0)
 
         part = Part.objects.first()
 
         # Create a new stock item for this part
-        item = StockItem.objects.create(
-            part=part, quantity=100, location=StockLocation.objects.first()
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            item = StockItem.objects.create(
+                part=part, quantity=100, location=StockLocation.objects.first()
+            )
 
-        self.assertTrue(check_func())
-        self.assertFalse(check_func())
+        self.assertEqual(check_func(), 1)
+        self.assertEqual(check_func(), 0)
 
         # Re-count the stock item
-        item.stocktake(99, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.stocktake(99, None)
+
+        self.assertEqual(check_func(), 1)
+
+        # Multiple changes within a single transaction are coalesced
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for idx in range(10):
+                item.stocktake(90 - idx, None)
+                StockItem.objects.create(part=Part.objects.last(), quantity=1)
+
+        self.assertEqual(check_func(), 1)
+
+        # Only a single callback is registered for the transaction
+        self.assertEqual(
+            len([
+                cb
+                for cb in callbacks
+                if getattr(cb, 'queue', None) is part_tasks._low_stock_queue
+            ]),
+            1,
+        )
+
+        # Parts scheduled in a transaction which is rolled back are discarded
+        try:
+            with transaction.atomic():
+                part_tasks.schedule_low_stock_check([part.pk])
+                raise ValueError
+        except ValueError:
+            pass
+
+        with (
+            mock.patch('part.tasks.offload_task') as offload,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            part_tasks.schedule_low_stock_check([Part.objects.last().pk])
+
+        offload.assert_called_once_with(
+            part_tasks.check_low_stock,
+            [Part.objects.last().pk],
+            group='notification',
+            force_async=True,
+        )
+
+    def test_low_stock_parts(self):
+        """Test the batch evaluation of parts which are low on stock."""
+        from part.tasks import low_stock_parts
+
+        template = Part.objects.create(
+            name='Template', description='A template part', is_template=True
+        )
+
+        variants = [
+            Part.objects.create(
+                name=f'Variant {idx}', description='A variant part', variant_of=template
+            )
+            for idx in range(3)
+        ]
+
+        for variant in variants:
+            StockItem.objects.create(part=variant, quantity=10)
+
+        self.assertEqual(low_stock_parts([v.pk for v in variants]), [])
+
+        # The template part is low on stock (including variant stock)
+        template.minimum_stock = 50
+        template.save()
+
+        variants[0].minimum_stock = 20
+        variants[0].save()
+
+        with self.assertNumQueries(2):
+            parts = low_stock_parts([v.pk for v in variants])
+
+        self.assertEqual({p.pk for p in parts}, {template.pk, variants[0].pk})
+
+        for p in parts:
+            self.assertTrue(p.is_part_low_on_stock())
+            self.assertEqual(p.stock_count, p.get_stock_count())
+
+        # Inactive parts are not checked
+        variants[0].active = False
+        variants[0].save()
 
-        self.assertTrue(check_func())
+        parts = low_stock_parts([variants[0].pk])
+        self.assertEqual(parts, [])
 
     def test_purchase_price(self):
         """Test purchase price field."""
@@ -1400,6 +1575,60 @@ class TestResultTest(StockTestBase):
 
         self.assertTrue(item.passedAllRequiredTests())
 
+    def test_bulk_test_status(self):
+        """Test bulk evaluation of required test status."""
+        from stock.filters import annotate_passed_tests, annotate_required_tests
+        from stock.required_tests import passed_required_tests, required_test_status
+
+        item = StockItem.objects.get(pk=522)
+
+        # The most recent result for each test takes precedence
+        StockItemTestResult.objects.filter(stock_item=item).update(
+            date=datetime.datetime(2024, 1, 1)
+        )
+        StockItemTestResult.objects.filter(pk=8).update(
+            date=datetime.datetime(2024, 6, 1), result=False
+        )
+
+        items = StockItem.objects.all()
+
+        with CaptureQueriesContext(connection) as ctx:
+            status = required_test_status(items)
+
+        # Query count does not depend on the number of items
+        self.assertLessEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(len(status), items.count())
+
+        annotated = {
+            row['pk']: row
+            for row in items.annotate(
+                required_tests=annotate_required_tests(),
+                passed_tests=annotate_passed_tests(),
+            ).values('pk', 'required_tests', 'passed_tests')
+        }
+
+        for item in items:
+            expected = item.requiredTestStatus()
+
+            for key in ['total', 'passed', 'failed']:
+                self.assertEqual(status[item.pk][key], expected[key])
+
+            self.assertEqual(
+                status[item.pk]['missing'],
+                expected['total'] - expected['passed'] - expected['failed'],
+            )
+
+            self.assertEqual(
+                passed_required_tests(status[item.pk]), item.passedAllRequiredTests()
+            )
+
+            self.assertEqual(annotated[item.pk]['required_tests'], expected['total'])
+            self.assertEqual(annotated[item.pk]['passed_tests'], expected['passed'])
+
+        self.assertEqual(status[522]['total'], 5)
+        self.assertEqual(status[522]['passed'], 1)
+        self.assertEqual(status[522]['failed'], 2)
+
     def test_duplicate_item_tests(self):
         """Test duplicate item behaviour."""
         # Create an example stock item by copying one from the database (because we are lazy)
@@ -1539,6 +1768,656 @@ class TestResultTest(StockTestBase):
         self.assertNotIn('somenewtest', tests)
 
 
+class StockAdjustmentTest(StockTestBase):
+    """Tests for bulk stock adjustment operations."""
+
+    def create_items(self, n: int, quantity: int = 10) -> list[StockItem]:
+        """Create a number of (untracked) stock items for testing."""
+        part = Part.objects.create(
+            name='Adjustment part', description='A part for stock adjustment'
+        )
+
+        return [
+            StockItem.objects.create(part=part, quantity=quantity, location=self.home)
+            for _ in range(n)
+        ]
+
+    def adjust(self, action: str, items, *args) -> int:
+        """Perform a bulk stock adjustment, and return the number of queries."""
+        from stock.adjustment import StockAdjustment
+
+        with CaptureQueriesContext(connection) as ctx:
+            StockAdjustment(items, self.user, notes='Bulk adjustment').run(
+                action, *args
+            )
+
+        return len(ctx.captured_queries)
+
+    def test_transfer(self):
+        """Test bulk transfer of stock items."""
+        items = self.create_items(20)
+
+        N = StockItemTracking.objects.count()
+
+        q1 = self.adjust(
+            'transfer',
+            [{'pk': item, 'quantity': item.quantity} for item in items[:5]],
+            self.drawer1,
+        )
+
+        q2 = self.adjust(
+            'transfer',
+            [
+                {'pk': item, 'quantity': item.quantity, 'batch': 'B-123'}
+                for item in items[5:]
+            ],
+            self.drawer2,
+        )
+
+        # Query count does not depend on the number of items
+        self.assertEqual(q1, q2)
+
+        for idx, item in enumerate(items):
+            item.refresh_from_db()
+            self.assertEqual(item.location, self.drawer1 if idx < 5 else self.drawer2)
+            self.assertEqual(item.quantity, 10)
+
+            entry = item.tracking_info.order_by('-pk').first()
+            self.assertEqual(entry.tracking_type, StockHistoryCode.STOCK_MOVE.value)
+            self.assertEqual(entry.notes, 'Bulk adjustment')
+            self.assertEqual(entry.user, self.user)
+
+            if idx >= 5:
+                self.assertEqual(item.batch, 'B-123')
+                self.assertEqual(entry.deltas['batch'], 'B-123')
+
+        self.assertEqual(StockItemTracking.objects.count(), N + 20)
+
+        # Partial transfer splits the stock item
+        self.adjust('transfer', [{'pk': items[0], 'quantity': 4}], self.drawer3)
+
+        items[0].refresh_from_db()
+        self.assertEqual(items[0].quantity, 6)
+        self.assertEqual(items[0].location, self.drawer1)
+        self.assertEqual(items[0].children.first().location, self.drawer3)
+        self.assertEqual(items[0].children.first().quantity, 4)
+
+    def test_quantity(self):
+        """Test bulk count, add and remove operations."""
+        items = self.create_items(5)
+
+        self.adjust('add', [{'pk': item, 'quantity': 5} for item in items])
+
+        # The same stock item may be adjusted multiple times
+        self.adjust(
+            'remove', [{'pk': items[0], 'quantity': 3}, {'pk': items[0], 'quantity': 4}]
+        )
+
+        self.adjust(
+            'count',
+            [{'pk': items[1], 'quantity': 99, 'status': StockStatus.DAMAGED.value}],
+        )
+
+        quantities = [StockItem.objects.get(pk=item.pk).quantity for item in items]
+        self.assertEqual(quantities, [8, 99, 15, 15, 15])
+
+        items[1].refresh_from_db()
+        self.assertEqual(items[1].status, StockStatus.DAMAGED.value)
+        self.assertIsNotNone(items[1].stocktake_date)
+        self.assertEqual(items[1].stocktake_user, self.user)
+
+        entries = items[0].tracking_info.order_by('-pk')
+        self.assertEqual(entries[0].deltas, {'removed': 4.0, 'quantity': 8.0})
+        self.assertEqual(entries[1].deltas, {'removed': 3.0, 'quantity': 12.0})
+        self.assertEqual(entries[2].deltas, {'added': 5.0, 'quantity': 15.0})
+
+        # Depleted stock items are deleted
+        items[2].delete_on_deplete = True
+        items[2].save()
+
+        items[3].delete_on_deplete = False
+        items[3].save()
+
+        self.adjust('remove', [{'pk': item, 'quantity': 15} for item in items[2:4]])
+
+        self.assertFalse(StockItem.objects.filter(pk=items[2].pk).exists())
+        self.assertEqual(StockItem.objects.get(pk=items[3].pk).quantity, 0)
+
+    def test_invalid(self):
+        """Invalid adjustments are rolled back."""
+        part = Part.objects.create(
+            name='Trackable part', description='A trackable part', trackable=True
+        )
+
+        item = StockItem.objects.create(part=part, quantity=10)
+        other = self.create_items(1)[0]
+
+        with self.assertRaises(ValidationError):
+            self.adjust(
+                'add', [{'pk': other, 'quantity': 5}, {'pk': item, 'quantity': 1.5}]
+            )
+
+        self.assertEqual(StockItem.objects.get(pk=other.pk).quantity, 10)
+        self.assertEqual(StockItem.objects.get(pk=item.pk).quantity, 10)
+
+
+class SerialNumberIndexTest(StockTestBase):
+    """Tests for the serial number range index."""
+
+    def ranges(self, part) -> list[tuple[int, int]]:
+        """Return the indexed serial number ranges for a part."""
+        return list(
+            SerialNumberRange.objects
+            .filter(part=part)
+            .order_by('start')
+            .values_list('start', 'end')
+        )
+
+    def test_index(self):
+        """Test that the index is maintained as stock items are created, edited and deleted."""
+        part = Part.objects.create(
+            name='Serialized part', description='A trackable part', trackable=True
+        )
+
+        items = StockItem._create_serial_numbers(
+            [str(x) for x in [*range(1, 11), 15]] + ['A20', '030'], part=part
+        )
+
+        self.assertEqual(items.count(), 13)
+
+        # Non-integer serial numbers are not indexed
+        self.assertEqual(self.ranges(part), [(1, 10), (15, 15)])
+
+        # Delete an item from the middle of a range
+        items.get(serial='5').delete()
+        self.assertEqual(self.ranges(part), [(1, 4), (6, 10), (15, 15)])
+
+        # Edit a serial number
+        item = items.get(serial='15')
+        item.serial = '11'
+        item.save()
+        self.assertEqual(self.ranges(part), [(1, 4), (6, 11)])
+
+        item = StockItem.objects.create(part=part, quantity=1, serial='5')
+        self.assertEqual(self.ranges(part), [(1, 11)])
+
+        # Rebuilding the index produces the same result
+        from stock.serials import rebuild_serial_index
+
+        rebuild_serial_index([part.pk])
+        self.assertEqual(self.ranges(part), [(1, 11)])
+
+    def test_conflicts(self):
+        """Test serial number conflict detection and the latest serial number."""
+        InvenTreeSetting.set_setting('SERIAL_NUMBER_GLOBALLY_UNIQUE', False, self.user)
+
+        chair = Part.objects.get(pk=10000)
+        variant = Part.objects.get(pk=10004)
+
+        serials = [str(x) for x in range(1000, 1100)]
+        StockItem._create_serial_numbers(serials[::2], part=variant)
+
+        self.assertEqual(chair.get_latest_serial_number(), '1098')
+
+        with CaptureQueriesContext(connection) as ctx:
+            conflicts = chair.find_conflicting_serial_numbers(serials)
+
+        self.assertEqual(conflicts, serials[::2])
+        self.assertLess(len(ctx.captured_queries), 10)
+
+        # Serial numbers are not shared with a different part tree
+        part = Part.objects.create(
+            name='Other part', description='A trackable part', trackable=True
+        )
+        self.assertEqual(part.find_conflicting_serial_numbers(serials), [])
+        self.assertIsNone(part.get_latest_serial_number())
+
+        # Unless serial numbers are globally unique
+        InvenTreeSetting.set_setting('SERIAL_NUMBER_GLOBALLY_UNIQUE', True, self.user)
+        self.assertEqual(
+            part.find_conflicting_serial_numbers(['1000', '1001', 'ABC']), ['1000']
+        )
+        self.assertEqual(part.get_latest_serial_number(), '1098')
+
+    def test_missing_index(self):
+        """Test that existing serial numbers conflict before the index has been built."""
+        from stock.serials import check_serial_index
+
+        part = Part.objects.create(
+            name='Serialized part', description='A trackable part', trackable=True
+        )
+
+        StockItem._create_serial_numbers(['5', '7'], part=part)
+
+        # Serial numbers modified outside of the ORM are not indexed
+        StockItem.objects.filter(part=part, serial='7').update(serial='8', serial_int=8)
+        SerialNumberRange.objects.filter(part=part).delete()
+
+        self.assertEqual(
+            part.find_conflicting_serial_numbers(['5', '6', '8']), ['5', '8']
+        )
+
+        # The scheduled check rebuilds the index for the affected part
+        self.assertIn(part.pk, check_serial_index())
+        self.assertEqual(self.ranges(part), [(5, 5), (8, 8)])
+        self.assertEqual(
+            part.find_conflicting_serial_numbers(['5', '6', '8']), ['5', '8']
+        )
+
+        # Nothing to correct on the second pass
+        self.assertEqual(check_serial_index(), [])
+
+
+class StockMergeTest(StockTestBase):
+    """Tests for the bulk stock merge operation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create parts, a build order and a sales order to allocate against."""
+        super().setUpTestData()
+
+        cls.assembly = Part.objects.create(
+            name='Merge assembly', description='An assembly', assembly=True
+        )
+
+        cls.component = Part.objects.create(
+            name='Merge component', description='A component', component=True
+        )
+
+        cls.salable = Part.objects.create(
+            name='Merge salable', description='A salable part', salable=True
+        )
+
+        BomItem.objects.create(part=cls.assembly, sub_part=cls.component, quantity=1)
+
+        cls.build = Build.objects.create(
+            reference=generate_next_build_reference(),
+            title='Merge build',
+            part=cls.assembly,
+            quantity=100,
+        )
+
+        cls.build_line = BuildLine.objects.get(build=cls.build)
+
+        customer = Company.objects.create(name='Merge customer', is_customer=True)
+
+        cls.order = SalesOrder.objects.create(customer=customer, reference='SO-9876')
+
+        cls.order_line = SalesOrderLineItem.objects.create(
+            order=cls.order, part=cls.salable, quantity=100
+        )
+
+    def test_merge_groups(self):
+        """Merge multiple groups of stock items in a single operation."""
+        a1 = StockItem.objects.create(part=self.component, quantity=10)
+        a2 = StockItem.objects.create(part=self.component, quantity=20, parent=a1)
+        a3 = StockItem.objects.create(part=self.component, quantity=30)
+
+        # Child items of the merged items
+        c1 = StockItem.objects.create(part=self.component, quantity=1, parent=a2)
+        c2 = StockItem.objects.create(part=self.component, quantity=2, parent=a3)
+
+        b1 = StockItem.objects.create(part=self.salable, quantity=5)
+        b2 = StockItem.objects.create(part=self.salable, quantity=15)
+
+        for item, quantity in [(a1, 5), (a2, 10), (a3, 3)]:
+            BuildItem.objects.create(
+                build_line=self.build_line, stock_item=item, quantity=quantity
+            )
+
+        allocation = SalesOrderAllocation.objects.create(
+            line=self.order_line, item=b2, quantity=10
+        )
+
+        StockItemMerge(
+            [
+                {'base': a1, 'items': [a2, a3], 'location': self.office},
+                {'base': b1, 'items': [b2]},
+            ],
+            user=self.user,
+            notes='Bulk merge',
+        ).run()
+
+        for item in [a1, b1, c1, c2]:
+            item.refresh_from_db()
+
+        self.assertEqual(a1.quantity, 60)
+        self.assertEqual(a1.location, self.office)
+        self.assertEqual(b1.quantity, 20)
+
+        self.assertFalse(
+            StockItem.objects.filter(pk__in=[a2.pk, a3.pk, b2.pk]).exists()
+        )
+
+        for item in [a1, b1]:
+            self.assertEqual(
+                item.tracking_info.filter(
+                    tracking_type=StockHistoryCode.MERGED_STOCK_ITEMS.value
+                ).count(),
+                1,
+            )
+
+        # Build order allocations are combined against the base item
+        build_item = BuildItem.objects.get(build_line=self.build_line)
+        self.assertEqual(build_item.stock_item, a1)
+        self.assertEqual(build_item.quantity, 18)
+
+        # Sales order allocations are reassigned to the base item
+        allocation.refresh_from_db()
+        self.assertEqual(allocation.item, b1)
+
+        # Child items are moved to the nearest surviving ancestor
+        self.assertEqual(c1.parent, a1)
+        self.assertIsNone(c2.parent)
+        self.assertNotEqual(c2.tree_id, a1.tree_id)
+
+        self.assertEqual(list(a1.get_descendants()), [c1])
+        self.assertTrue(c2.is_root_node())
+        self.assertEqual(c2.get_descendant_count(), 0)
+
+    def test_post_delete(self):
+        """Post-delete receivers can identify the stock items deleted by a merge."""
+        a1 = StockItem.objects.create(part=self.component, quantity=10)
+        a2 = StockItem.objects.create(part=self.component, quantity=20)
+
+        merged = []
+
+        def receiver(sender, instance, **kwargs):
+            merged.append((instance.pk, deleting_merged_items()))
+
+        post_delete.connect(receiver, sender=StockItem)
+
+        try:
+            a2_pk = a2.pk
+            StockItemMerge([{'base': a1, 'items': [a2]}]).run()
+            self.assertEqual(merged, [(a2_pk, True)])
+            self.assertFalse(deleting_merged_items())
+
+            # Other deletions are not affected
+            a1_pk = a1.pk
+            a1.delete()
+            self.assertEqual(merged[-1], (a1_pk, False))
+        finally:
+            post_delete.disconnect(receiver, sender=StockItem)
+
+    def test_invalid_groups(self):
+        """No changes are made if any group cannot be merged."""
+        a1 = StockItem.objects.create(part=self.component, quantity=10)
+        a2 = StockItem.objects.create(part=self.component, quantity=20)
+        b1 = StockItem.objects.create(part=self.salable, quantity=5)
+
+        with self.assertRaises(ValidationError):
+            StockItemMerge([
+                {'base': a1, 'items': [a2]},
+                {'base': b1, 'items': [a1]},
+            ]).run()
+
+        with self.assertRaises(ValidationError):
+            StockItemMerge([{'base': a1, 'items': [a2, b1]}]).run()
+
+        a1.refresh_from_db()
+        self.assertEqual(a1.quantity, 10)
+        self.assertEqual(StockItem.objects.filter(pk__in=[a2.pk, b1.pk]).count(), 2)
+
+
+class StockLocationSummaryTest(StockTestBase):
+    """Tests for the materialized stock location summary."""
+
+    def check_summary(self):
+        """Check that the location summary matches the actual stock item counts."""
+        for location in StockLocation.objects.all():
+            summary = StockLocationSummary.objects.get(location=location)
+
+            self.assertEqual(
+                summary.items, StockItem.objects.filter(location=location).count()
+            )
+            self.assertEqual(
+                summary.cascade_items, location.get_stock_items(True).count()
+            )
+            self.assertEqual(location.stock_item_count(), summary.cascade_items)
+
+    def test_stock_items(self):
+        """Test that the summary is updated as stock items are created, moved and deleted."""
+        from stock.adjustment import StockAdjustment
+
+        self.check_summary()
+
+        part = Part.objects.get(pk=25)
+
+        items = [
+            StockItem.objects.create(part=part, quantity=10, location=self.drawer1)
+            for _ in range(5)
+        ]
+
+        self.check_summary()
+
+        # Move a single item
+        items[0].move(self.bathroom, 'Moved', self.user)
+        self.check_summary()
+
+        # Move a partial quantity (creates a new item)
+        items[1].move(self.drawer2, 'Split', self.user, quantity=4)
+        self.check_summary()
+
+        # Bulk transfer
+        StockAdjustment(
+            [{'pk': item, 'quantity': item.quantity} for item in items[2:4]], self.user
+        ).run('transfer', self.diningroom)
+        self.check_summary()
+
+        # Bulk merge
+        StockItemMerge([
+            {'base': items[2], 'items': [items[3], items[4]], 'location': self.drawer3}
+        ]).run()
+        self.check_summary()
+
+        # Serialize stock
+        trackable = Part.objects.filter(trackable=True).first()
+        item = StockItem.objects.create(
+            part=trackable, quantity=5, location=self.office
+        )
+        item.serializeStock(3, ['9001', '9002', '9003'], self.user)
+        self.check_summary()
+
+        items[0].delete()
+        self.check_summary()
+
+    def test_locations(self):
+        """Test that the summary is updated when the location tree changes."""
+        location = StockLocation.objects.create(name='Shelf', parent=self.drawer1)
+        self.assertEqual(location.summary.items, 0)
+
+        part = Part.objects.get(pk=25)
+
+        for _ in range(3):
+            StockItem.objects.create(part=part, quantity=1, location=location)
+
+        self.check_summary()
+
+        # Move the location into a different tree
+        location.parent = self.bathroom
+        location.save()
+        self.check_summary()
+
+        # Delete the parent location (moving the location up a level)
+        self.bathroom.delete(delete_stock_items=False, delete_sub_locations=False)
+        self.check_summary()
+
+        # Renaming a location does not affect the summary
+        location.name = 'Renamed shelf'
+        location.save()
+        self.check_summary()
+
+        location.parent = self.diningroom
+        location.save()
+        self.check_summary()
+
+        # Delete a location and its sublocations (moving the items up a level)
+        bin_location = StockLocation.objects.create(name='Bin', parent=location)
+        StockItem.objects.create(part=part, quantity=1, location=bin_location)
+        self.check_summary()
+
+        n = self.diningroom.summary.items
+
+        location.delete(delete_stock_items=False, delete_sub_locations=True)
+        self.check_summary()
+
+        self.diningroom.summary.refresh_from_db()
+        self.assertEqual(self.diningroom.summary.items, n + 4)
+
+        # Delete a location and its stock items
+        crate = StockLocation.objects.create(name='Crate', parent=self.diningroom)
+
+        for _ in range(2):
+            StockItem.objects.create(part=part, quantity=1, location=crate)
+
+        self.check_summary()
+
+        crate.delete(delete_stock_items=True, delete_sub_locations=False)
+        self.check_summary()
+
+        # Any drift is corrected by a rebuild
+        StockLocationSummary.objects.update(items=0, cascade_items=0)
+        stock.summary.rebuild_location_summary()
+        self.check_summary()
+
+
+@tag('performance_test')
+class SerializeStockPerformanceTest(StockTestBase):
+    """Benchmark bulk stock serialization against per-item history and test result copies."""
+
+    N_ITEMS = 1000
+    N_HISTORY = 10
+    N_RESULTS = 10
+
+    def create_item(self) -> StockItem:
+        """Create a stock item with a history and test results."""
+        part = Part.objects.create(
+            name='Benchmark part',
+            description='A trackable part',
+            trackable=True,
+            testable=True,
+        )
+
+        item = StockItem.objects.create(part=part, quantity=self.N_ITEMS + 1)
+
+        for idx in range(self.N_HISTORY - 1):
+            item.add_tracking_entry(StockHistoryCode.EDITED, None, notes=f'{idx}')
+
+        for idx in range(self.N_RESULTS):
+            item.add_test_result(test_name=f'Test {idx}', result=True)
+
+        return item
+
+    def copy_per_item(self, item: StockItem, items):
+        """Copy history and test results with separate queries for each new item."""
+        for child in items:
+            for entry in item.tracking_info.all():
+                entry.item = child
+                entry.pk = None
+                entry.save()
+
+            results = []
+
+            for result in item.test_results.all():
+                result.pk = None
+                result.stock_item = child
+                results.append(result)
+
+            StockItemTestResult.objects.bulk_create(results)
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_serialize(self):
+        """Benchmark serialization of a large stock item, with a copy of its history."""
+        serials = [str(sn) for sn in range(1, self.N_ITEMS + 1)]
+
+        item = self.create_item()
+        items = StockItem._create_serial_numbers(serials, part=item.part)
+
+        with count_queries('per-item copy', threshold=1) as per_item:
+            self.copy_per_item(item, items)
+
+        item = self.create_item()
+
+        with count_queries('serializeStock', threshold=1) as result:
+            items = item.serializeStock(
+                self.N_ITEMS, [f'B{sn}' for sn in serials], self.user, copy_history=True
+            )
+
+        self.assertEqual(len(items), self.N_ITEMS)
+
+        self.assertEqual(
+            StockItemTestResult.objects.filter(stock_item__in=items).count(),
+            self.N_ITEMS * self.N_RESULTS,
+        )
+
+        # Each item has the copied history, plus two new tracking entries
+        self.assertEqual(
+            StockItemTracking.objects.filter(item__in=items).count(),
+            self.N_ITEMS * (self.N_HISTORY + 2),
+        )
+
+        # The stock item tree is still valid
+        item.refresh_from_db()
+        self.assertEqual(item.get_descendant_count(), self.N_ITEMS)
+        self.assertEqual(
+            set(item.get_children().values_list('pk', flat=True)),
+            {child.pk for child in items},
+        )
+
+        # Only the bulk_create operations may be split into multiple queries
+        self.assertLess(result.count, self.N_ITEMS / 2)
+        self.assertGreater(per_item.count, self.N_ITEMS * self.N_HISTORY)
+
+
+@tag('performance_test')
+class MergeStockPerformanceTest(StockTestBase):
+    """Benchmark bulk stock merging against merging each group individually."""
+
+    N_GROUPS = 200
+    N_ITEMS = 5
+
+    def create_groups(self) -> list[dict]:
+        """Create groups of stock items to merge."""
+        part = Part.objects.create(name='Merge part', description='A part to merge')
+
+        items = bulk_create_nodes(
+            StockItem,
+            [
+                StockItem(part=part, quantity=1)
+                for _idx in range(self.N_GROUPS * self.N_ITEMS)
+            ],
+        )
+
+        return [
+            {'base': items[idx], 'items': items[idx + 1 : idx + self.N_ITEMS]}
+            for idx in range(0, len(items), self.N_ITEMS)
+        ]
+
+    @pytest.mark.django_db
+    @pytest.mark.benchmark
+    def test_merge(self):
+        """Benchmark merging many groups of stock items."""
+        groups = self.create_groups()
+
+        with count_queries('merge_stock_items', threshold=1) as individual:
+            for group in groups:
+                group['base'].merge_stock_items(group['items'])
+
+        groups = self.create_groups()
+
+        with count_queries('StockItemMerge', threshold=1) as result:
+            StockItemMerge(groups).run()
+
+        for group in groups:
+            group['base'].refresh_from_db()
+            self.assertEqual(group['base'].quantity, self.N_ITEMS)
+
+        self.assertLess(result.count, self.N_GROUPS)
+        self.assertGreater(individual.count, self.N_GROUPS * 5)
+
+
 class StockLocationTest(InvenTreeTestCase):
     """Tests for the StockLocation model."""
 
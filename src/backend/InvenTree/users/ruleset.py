@@ -103,6 +103,10 @@ def get_ruleset_models() -> dict:
             'part_partpricing',
             'part_bomitem',
             'part_bomitemsubstitute',
+            'part_bomitemusage',
+            'part_explodedbomitem',
+            'part_materialrequirement',
+            'part_materialrequirementchange',
             'part_partsellpricebreak',
             'part_partinternalpricebreak',
             'part_parttesttemplate',
@@ -117,13 +121,20 @@ def get_ruleset_models() -> dict:
         RuleSetEnum.STOCK: [
             'stock_stockitem',
             'stock_stockitemtracking',
+            'stock_stockitemtrackingarchive',
+            'stock_stocklocationsummary',
             'stock_stockitemtestresult',
+            'stock_serialnumberrange',
         ],
         RuleSetEnum.BUILD: [
             'part_part',
             'part_partcategory',
             'part_bomitem',
             'part_bomitemsubstitute',
+            'part_bomitemusage',
+            'part_explodedbomitem',
+            'part_materialrequirement',
+            'part_materialrequirementchange',
             'build_build',
             'build_builditem',
             'build_buildline',
@@ -185,6 +196,7 @@ def get_ruleset_ignore() -> list[str]:
         'common_notificationmessage',
         'common_notesimage',
         'common_projectcode',
+        'common_referencesequence',
         'common_webhookendpoint',
         'common_webhookmessage',
         'common_inventreecustomuserstatemodel',
@@ -65,6 +65,7 @@ export function usePartFields({
       },
       default_expiry: {},
       minimum_stock: {},
+      lead_time: {},
       responsible: {
         filters: {
           is_active: true
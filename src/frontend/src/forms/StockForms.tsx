@@ -420,7 +420,8 @@ export function useStockItemSerializeFields({
         placeholder: serialGenerator.result && `${serialGenerator.result}+`,
         placeholderAutofill: true
       },
-      destination: {}
+      destination: {},
+      copy_history: {}
     };
   }, [serialGenerator.result]);
 }
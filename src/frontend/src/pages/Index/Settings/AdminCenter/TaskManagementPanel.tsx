@@ -37,7 +37,8 @@ export default function TaskManagementPanel() {
           items={[
             { title: t`Pending Tasks`, value: taskInfo?.pending_tasks },
             { title: t`Scheduled Tasks`, value: taskInfo?.scheduled_tasks },
-            { title: t`Failed Tasks`, value: taskInfo?.failed_tasks }
+            { title: t`Failed Tasks`, value: taskInfo?.failed_tasks },
+            { title: t`Pricing Queue`, value: taskInfo?.pricing_queue }
           ]}
         />
         <Divider />
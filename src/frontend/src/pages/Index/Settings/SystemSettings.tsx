@@ -220,7 +220,8 @@ export default function SystemSettings() {
               'PART_COPY_PARAMETERS',
               'PART_COPY_TESTS',
               'PART_CATEGORY_PARAMETERS',
-              'PART_CATEGORY_DEFAULT_ICON'
+              'PART_CATEGORY_DEFAULT_ICON',
+              'PART_PLANNING_ENABLE'
             ]}
           />
         )
@@ -258,9 +259,11 @@ export default function SystemSettings() {
             keys={[
               'STOCKTAKE_ENABLE',
               'STOCKTAKE_EXCLUDE_EXTERNAL',
+              'STOCKTAKE_INCREMENTAL',
               'STOCKTAKE_AUTO_DAYS',
               'STOCKTAKE_DELETE_OLD_ENTRIES',
-              'STOCKTAKE_DELETE_DAYS'
+              'STOCKTAKE_DELETE_DAYS',
+              'STOCK_TRACKING_ARCHIVE_DAYS'
             ]}
           />
         )
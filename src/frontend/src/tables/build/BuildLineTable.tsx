@@ -583,13 +583,15 @@ export default function BuildLineTable({
       exclude_location: {},
       interchangeable: {},
       substitutes: {},
-      optional_items: {}
+      optional_items: {},
+      strategy: {}
     },
     initialData: {
       location: build.take_from,
       interchangeable: true,
       substitutes: true,
-      optional_items: false
+      optional_items: false,
+      strategy: 'fifo'
     },
     successMessage: t`Auto allocation in progress`,
     table: table,
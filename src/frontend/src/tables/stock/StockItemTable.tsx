@@ -393,6 +393,11 @@ function stockItemTableFilters({
       label: t`Has Purchase Price`,
       description: t`Show items which have a purchase price`
     },
+    {
+      name: 'tests_passed',
+      label: t`Passed Tests`,
+      description: t`Show items which have passed all required tests`
+    },
     {
       name: 'expired',
       label: t`Expired`,